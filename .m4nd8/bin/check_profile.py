@@ -0,0 +1,239 @@
+# check_profile.py — per-check timings, resource usage and traces for sentinel runs
+"""
+Wraps sentinel's run_one so every check of a gate leaves a record:
+
+  start, end        epoch seconds; wall_s is measured on the monotonic clock
+  cpu_s             CPU the check spent in this process (its worker thread)
+  child_cpu_s       user + system CPU of the shell children it ran
+  peak_rss_kb       largest child high-water RSS (None for in-process checks;
+                    process_rss_kb is the gate's own high-water mark). A
+                    forked child starts from the gate's RSS, so small shell
+                    checks read about the same as process_rss_kb
+  read_bytes,       block I/O of the worker thread and the children, from
+  write_bytes       ru_inblock / ru_oublock (reads served by the page cache
+                    are not counted)
+  returncode, status, origin    origin is run | cache | skip, or scheduler
+                    for checks blocked or cancelled before they started
+
+Children are reaped with wait4() (detectors.collect_child_usage), so their
+usage is exact per check even under -j N; thread figures come from
+RUSAGE_THREAD where the platform has it.
+
+Each gate appends its records as JSON lines to _logs/sentinel_checks.jsonl
+and rewrites _logs/sentinel_trace.json in the Chrome trace event format
+(chrome://tracing, ui.perfetto.dev): one track per worker thread. Like the
+rest of sentinel's state they live under _logs/, which the FileIndex never
+indexes, so no check reads them as project files (C170 would otherwise want a
+logits trace for sentinel_trace.json on the next gate).
+
+With profile=True (sentinel --profile), checks evaluated in-process (no shell
+script) also run under cProfile: one _logs/profile/<check>.prof each plus
+the merged profile/sentinel.prof, readable with pstats or snakeviz. Profiled
+sections hold a lock, since one profiler per process is all Python 3.12+ allows.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import detectors
+
+try:
+    import resource
+except ImportError:  # not POSIX
+    resource = None
+
+LOG_DIR = "_logs"
+RECORDS_NAME = "sentinel_checks.jsonl"
+TRACE_NAME = "sentinel_trace.json"
+PROFILE_DIR = "profile"
+BLOCK_BYTES = 512  # ru_inblock / ru_oublock unit on Linux
+
+_PROFILE_LOCK = threading.Lock()
+
+
+def check_name(chk: Dict[str, Any]) -> str:
+    return chk.get("id") or chk.get("name") or "<unnamed>"
+
+
+def in_process(chk: Dict[str, Any]) -> bool:
+    """True when no shell is involved: every detect primitive is evaluated natively."""
+    if chk.get("type") == "runtime_verification" or "script" in chk:
+        return False
+    return "script" not in (chk.get("detect") or {})
+
+
+def _thread_usage():
+    if resource is not None and hasattr(resource, "RUSAGE_THREAD"):
+        return resource.getrusage(resource.RUSAGE_THREAD)
+    return None
+
+
+def _self_rss_kb() -> Optional[int]:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+
+
+def _cpu(usage) -> float:
+    return usage.ru_utime + usage.ru_stime
+
+
+class Recorder:
+    """Collects one record per check of a gate run; thread-safe."""
+
+    def __init__(self, log_dir: str = LOG_DIR, profile: bool = False):
+        self.log_dir = log_dir
+        self.profile = profile
+        self.run = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + f"-{os.getpid()}"
+        self.records: List[Dict[str, Any]] = []
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._epoch0 = time.time()
+
+    def _clock(self) -> float:
+        """Seconds since the run started, on the monotonic clock."""
+        return time.perf_counter() - self._t0
+
+    def wrap(self, run_one: Callable[[Dict[str, Any], Any], Dict[str, Any]]):
+        """run_one, recording each call."""
+        def measured(chk, token):
+            children: list = []
+            profiler = cProfile.Profile() if self.profile and in_process(chk) else None
+            thread = threading.current_thread().name
+            detectors.collect_child_usage(children)
+            if profiler is not None:
+                _PROFILE_LOCK.acquire()
+            before, cpu_before = _thread_usage(), time.thread_time()
+            start = self._clock()
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    result = run_one(chk, token)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+            finally:
+                end = self._clock()
+                after, cpu_after = _thread_usage(), time.thread_time()
+                if profiler is not None:
+                    _PROFILE_LOCK.release()
+                detectors.collect_child_usage(None)
+            reads = sum(u.ru_inblock for u in children)
+            writes = sum(u.ru_oublock for u in children)
+            if before is not None:
+                reads += after.ru_inblock - before.ru_inblock
+                writes += after.ru_oublock - before.ru_oublock
+            record = self._record(chk, result, start, end, thread,
+                                  cpu_s=round(cpu_after - cpu_before, 6),
+                                  children=len(children),
+                                  child_cpu_s=round(sum(_cpu(u) for u in children), 6),
+                                  peak_rss_kb=max((u.ru_maxrss for u in children), default=None),
+                                  read_bytes=reads * BLOCK_BYTES, write_bytes=writes * BLOCK_BYTES)
+            with self._lock:
+                self.records.append(record)
+                if profiler is not None and record["origin"] == "run":
+                    self._profiles[record["check"]] = profiler
+            return result
+        return measured
+
+    def wrap_emit(self, emit: Callable[[int, Dict[str, Any], Dict[str, Any]], None]):
+        """emit, recording the checks the scheduler settled without running them."""
+        def noted(i, chk, result):
+            if result["status"] in ("blocked", "cancelled"):
+                now = self._clock()
+                with self._lock:
+                    if not any(r["check"] == check_name(chk) for r in self.records):
+                        self.records.append(self._record(chk, result, now, now, None))
+            emit(i, chk, result)
+        return noted
+
+    def _record(self, chk, result, start, end, thread, cpu_s=0.0, children=0, child_cpu_s=0.0,
+                peak_rss_kb=None, read_bytes=0, write_bytes=0) -> Dict[str, Any]:
+        if thread is None:
+            origin = "scheduler"
+        elif result["status"] == "skip":
+            origin = "skip"
+        elif result.get("cached"):
+            origin = "cache"
+        else:
+            origin = "run"
+        return {
+            "run": self.run,
+            "check": check_name(chk),
+            "status": result["status"],
+            "origin": origin,
+            "returncode": result.get("returncode"),
+            "start": round(self._epoch0 + start, 6),
+            "end": round(self._epoch0 + end, 6),
+            "wall_s": round(end - start, 6),
+            "thread": thread,
+            "cpu_s": cpu_s,
+            "children": children,
+            "child_cpu_s": child_cpu_s,
+            "peak_rss_kb": peak_rss_kb,
+            "process_rss_kb": _self_rss_kb(),
+            "read_bytes": read_bytes,
+            "write_bytes": write_bytes,
+        }
+
+    # --- Output ---------------------------------------------------------------------------
+
+    def trace(self) -> Dict[str, Any]:
+        """The run as Chrome trace events: complete ("X") events per worker thread."""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "sentinel"}},
+                  {"name": "thread_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "scheduler"}}]
+        threads: Dict[str, int] = {}
+        for rec in sorted(self.records, key=lambda r: r["start"]):
+            args = {k: v for k, v in rec.items() if k not in ("run", "check", "start", "end", "thread")}
+            ts = (rec["start"] - self._epoch0) * 1e6
+            if rec["thread"] is None:
+                events.append({"name": rec["check"], "cat": rec["origin"], "ph": "i", "s": "t",
+                               "ts": ts, "pid": pid, "tid": 0, "args": args})
+                continue
+            if rec["thread"] not in threads:
+                threads[rec["thread"]] = len(threads) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": threads[rec["thread"]],
+                               "args": {"name": rec["thread"]}})
+            events.append({"name": rec["check"], "cat": rec["origin"], "ph": "X", "ts": ts,
+                           "dur": rec["wall_s"] * 1e6, "pid": pid, "tid": threads[rec["thread"]], "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run": self.run}}
+
+    def write(self) -> Dict[str, str]:
+        """Append the records, rewrite the trace, dump profiles; the paths written."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        records = sorted(self.records, key=lambda r: r["start"])
+        paths = {"records": os.path.join(self.log_dir, RECORDS_NAME),
+                 "trace": os.path.join(self.log_dir, TRACE_NAME)}
+        with open(paths["records"], "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, sort_keys=True) + "\n" for r in records))
+        tmp = paths["trace"] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+        os.replace(tmp, paths["trace"])
+        if self._profiles:
+            out = os.path.join(self.log_dir, PROFILE_DIR)
+            os.makedirs(out, exist_ok=True)
+            for name, prof in sorted(self._profiles.items()):
+                prof.dump_stats(os.path.join(out, re.sub(r"[^\w.-]", "_", name) + ".prof"))
+            paths["profile"] = os.path.join(out, "sentinel.prof")
+            self.stats().dump_stats(paths["profile"])
+        return paths
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """All in-process profiles merged, or None when nothing was profiled."""
+        profs = [p for _, p in sorted(self._profiles.items())]
+        if not profs:
+            return None
+        stats = pstats.Stats(profs[0])
+        for prof in profs[1:]:
+            stats.add(prof)
+        return stats
+
+    def slowest(self, count: int = 5) -> List[Dict[str, Any]]:
+        return sorted((r for r in self.records if r["origin"] == "run"), key=lambda r: -r["wall_s"])[:count]
@@ -0,0 +1,378 @@
+# contrast.py — exhaustive WCAG contrast matrix for theme tokens behind C161.theme_contrast_pbt
+"""
+Checks every foreground/background pairing of the theme's color tokens, in
+every mode, against the role's minimum from ui_gate.yaml
+(accessibility.min_contrast: text 4.5, large_text / ui_components /
+graphical_objects 3.0).
+
+  * Each token's relative luminance is computed once per mode. The whole
+    fg×bg ratio matrix is then one broadcast, (max(Li, Lj) + 0.05) /
+    (min(Li, Lj) + 0.05), over the luminance vector (nested loops without
+    NumPy). The judged pairings are gathered from it by index and compared
+    with their minimums at once, so every mode is checked completely rather
+    than sampled.
+  * A token's role and partner backgrounds come from its name:
+      bg/*, surface/*, *background*         backgrounds
+      brand/on-primary  (on-X)              text on X only
+      text/inverse      (*inverse*)         text on bg/inverse, else on text/default
+      *large*text*                          large_text on every background
+      text/*, *fg*, *foreground*            text on every background
+      focus/*, *outline*, icon/*            ui_components on every background
+    Other tokens (brand fills, status colors, borders) are not judged unless
+    tokens.json pins them with "contrast_pairs", e.g. for an input whose
+    border is its only boundary:
+      [{"fg": "border/strong", "bg": ["bg/*"], "role": "ui_components"}]
+  * Token files are either ui_gate-style semantic tokens
+    ({name: {light, dark, hc}}, under design_tokens.color.semantic,
+    color.semantic or semantic) or the older per-mode layout
+    ({"colors": {"light_mode": {name: hex, "contrast_ratio_min": 4.5}}},
+    where contrast_ratio_min raises the text minimum for that mode).
+    Without src/theme/tokens.json the ui_gate.yaml tokens themselves are
+    checked.
+  * The report (matrix, failures) is cached in _logs/contrast_report.json,
+    keyed on the token file, ui_gate.yaml and this engine.
+
+    python .m4nd8/bin/contrast.py check [--tokens FILE] [--json]
+    python .m4nd8/bin/contrast.py show MODE [--tokens FILE]
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python matrix
+    np = None
+
+try:
+    import yaml
+except ImportError:  # ui_gate.yaml unreadable: built-in minimums
+    yaml = None
+
+TOKENS_PATH = "src/theme/tokens.json"
+UI_GATE_PATHS = (".m4nd8/policy/ui_gate.yaml",
+                 os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "policy", "ui_gate.yaml"))
+REPORT_PATH = "_logs/contrast_report.json"
+REPORT_VERSION = 1
+
+# WCAG 2.2 AA, overridden by ui_gate.yaml accessibility.min_contrast
+MIN_CONTRAST = {"text": 4.5, "large_text": 3.0, "ui_components": 3.0, "graphical_objects": 3.0}
+
+_HEX = re.compile(r"^#([0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+_SEP = r"(?:^|[/_.\-])"
+_END = r"(?:$|[/_.\-])"
+_BACKGROUND = re.compile(rf"{_SEP}(?:bg|background|surface)s?{_END}")
+_ON = re.compile(rf"{_SEP}on[-_]")
+_INVERSE = re.compile(rf"{_SEP}inverse{_END}")
+# First match wins; the role's minimum comes from MIN_CONTRAST.
+ROLE_RULES: Tuple[Tuple["re.Pattern[str]", str], ...] = (
+    (re.compile(rf"large{_END}.*text|text{_SEP}.*large"), "large_text"),
+    (re.compile(rf"{_SEP}(?:text|fg|foreground){_END}|^text"), "text"),
+    (re.compile(rf"{_SEP}(?:focus|outline|icon){_END}"), "ui_components"),
+)
+
+
+class ContrastError(Exception):
+    """The token file is missing, unreadable, or holds a color that cannot be judged."""
+
+
+# --- Color -------------------------------------------------------------------------------
+
+def parse_hex(value: str) -> Tuple[int, int, int]:
+    m = _HEX.match(value.strip())
+    if not m:
+        raise ContrastError(f"not a hex color: {value!r}")
+    h = m.group(1)
+    if len(h) == 3:
+        h = "".join(c * 2 for c in h)
+    if len(h) == 8 and h[6:].lower() != "ff":
+        raise ContrastError(f"{value} is translucent; its contrast depends on what it is drawn over")
+    return int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+
+
+def _linear(c: float) -> float:
+    c /= 255.0
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def luminance(rgb: Sequence[int]) -> float:
+    r, g, b = rgb
+    return 0.2126 * _linear(r) + 0.7152 * _linear(g) + 0.0722 * _linear(b)
+
+
+def ratio(l1: float, l2: float) -> float:
+    hi, lo = (l1, l2) if l1 >= l2 else (l2, l1)
+    return (hi + 0.05) / (lo + 0.05)
+
+
+def ratio_matrix(lum: Sequence[float]):
+    """All pairwise ratios: an (n, n) array (a list of lists without NumPy)."""
+    if np is None:
+        return [[ratio(a, b) for b in lum] for a in lum]
+    v = np.asarray(lum, dtype=np.float64)
+    return (np.maximum.outer(v, v) + 0.05) / (np.minimum.outer(v, v) + 0.05)
+
+
+# --- Tokens ------------------------------------------------------------------------------
+
+def _semantic_block(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for path in (("design_tokens", "color", "semantic"), ("color", "semantic"), ("semantic",)):
+        node: Any = data
+        for key in path:
+            node = node.get(key) if isinstance(node, dict) else None
+        if isinstance(node, dict):
+            return node
+    return None
+
+
+def load_modes(data: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, str]], Dict[str, float]]:
+    """({mode: {token: hex}}, {mode: text minimum from the file})."""
+    modes: Dict[str, Dict[str, str]] = {}
+    floors: Dict[str, float] = {}
+    semantic = _semantic_block(data)
+    if semantic is not None:
+        for name, values in semantic.items():
+            if isinstance(values, dict):
+                for mode, value in values.items():
+                    if isinstance(value, str) and value.startswith("#"):
+                        modes.setdefault(str(mode), {})[str(name)] = value
+        return modes, floors
+    colors = data.get("colors")
+    if not isinstance(colors, dict):
+        raise ContrastError("no color tokens (expected design_tokens.color.semantic or colors.<mode>)")
+    for key, block in colors.items():
+        if not isinstance(block, dict):
+            continue
+        mode = key[:-5] if key.endswith("_mode") else key
+        for name, value in block.items():
+            if name == "contrast_ratio_min":
+                floors[mode] = float(value)
+            elif isinstance(value, str) and value.startswith("#"):
+                modes.setdefault(mode, {})[str(name)] = value
+    return modes, floors
+
+
+def role_of(name: str) -> Optional[str]:
+    for pattern, role in ROLE_RULES:
+        if pattern.search(name):
+            return role
+    return None
+
+
+def pairings(names: Sequence[str], pins: Sequence[Dict[str, Any]] = ()) -> List[Tuple[int, int, str]]:
+    """(fg index, bg index, role) for every pairing judged in one mode."""
+    index = {n: i for i, n in enumerate(names)}
+    backgrounds = [i for i, n in enumerate(names) if _BACKGROUND.search(n)]
+    is_bg = set(backgrounds)
+    out: Dict[Tuple[int, int], str] = {}
+    for i, name in enumerate(names):
+        if i in is_bg:
+            continue
+        if _ON.search(name):
+            base = _ON.sub(lambda m: m.group(0)[:-3], name, count=1)
+            partners = [index[base]] if base in index else backgrounds
+            role = "text"
+        elif _INVERSE.search(name):
+            partners = [j for j in backgrounds if _INVERSE.search(names[j])]
+            if not partners:
+                default = _INVERSE.sub(lambda m: m.group(0).replace("inverse", "default"), name, count=1)
+                partners = [index[default]] if default in index else []
+            role = role_of(name) or "text"
+        else:
+            role = role_of(name)
+            partners = backgrounds if role else []
+        for j in partners:
+            out[(i, j)] = role
+    for pin in pins:  # explicit pairs from tokens.json override the naming rules
+        fgs = [i for i, n in enumerate(names) if fnmatch.fnmatchcase(n, pin["fg"])]
+        bg_patterns = pin.get("bg") or ["*"]
+        bgs = [j for j, n in enumerate(names) if any(fnmatch.fnmatchcase(n, p) for p in bg_patterns)]
+        for i in fgs:
+            for j in bgs:
+                if i != j:
+                    out[(i, j)] = pin.get("role", "text")
+    return sorted((i, j, role) for (i, j), role in out.items())
+
+
+# --- Report ------------------------------------------------------------------------------
+
+def find_ui_gate() -> Optional[str]:
+    return next((p for p in UI_GATE_PATHS if os.path.isfile(p)), None)
+
+
+def load_minimums(ui_gate: Optional[str]) -> Dict[str, float]:
+    minimums = dict(MIN_CONTRAST)
+    if ui_gate and yaml is not None:
+        with open(ui_gate, "r", encoding="utf-8") as f:
+            gate = yaml.safe_load(f) or {}
+        declared = (gate.get("accessibility") or {}).get("min_contrast") or {}
+        minimums.update({str(k): float(v) for k, v in declared.items()})
+    return minimums
+
+
+def _read(path: str) -> Tuple[bytes, Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        raise ContrastError(f"cannot read {path}: {e}")
+    try:
+        data = yaml.safe_load(raw) if path.endswith((".yaml", ".yml")) and yaml else json.loads(raw)
+    except ValueError as e:
+        raise ContrastError(f"{path}: {e}")
+    return raw, data if isinstance(data, dict) else {}
+
+
+def _mode_report(tokens: Dict[str, str], minimums: Dict[str, float], floor: Optional[float],
+                 pins: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    names = sorted(tokens)
+    lum = []
+    for n in names:
+        try:
+            lum.append(luminance(parse_hex(tokens[n])))
+        except ContrastError as e:
+            raise ContrastError(f"{n}: {e}")
+    matrix = ratio_matrix(lum)
+    pairs = pairings(names, pins)
+
+    def minimum(role: str) -> float:
+        m = minimums.get(role, minimums["text"])
+        return max(m, floor) if floor is not None and role == "text" else m
+
+    failures = []
+    if pairs and np is not None:
+        fg = np.fromiter((p[0] for p in pairs), dtype=np.intp, count=len(pairs))
+        bg = np.fromiter((p[1] for p in pairs), dtype=np.intp, count=len(pairs))
+        need = np.fromiter((minimum(p[2]) for p in pairs), dtype=np.float64, count=len(pairs))
+        got = matrix[fg, bg]
+        for k in np.flatnonzero(got < need).tolist():
+            failures.append((pairs[k], float(got[k]), float(need[k])))
+        rows = np.round(matrix, 3).tolist()
+    else:
+        for p in pairs:
+            got, need = matrix[p[0]][p[1]], minimum(p[2])
+            if got < need:
+                failures.append((p, got, need))
+        rows = [[round(x, 3) for x in row] for row in matrix]
+    return {
+        "tokens": names,
+        "matrix": rows,
+        "checked": len(pairs),
+        "failures": [{"fg": names[i], "bg": names[j], "role": role, "ratio": round(got, 3), "min": need}
+                     for (i, j, role), got, need in failures],
+    }
+
+
+def build_report(tokens_path: Optional[str] = None, ui_gate: Optional[str] = None,
+                 cache_path: Optional[str] = REPORT_PATH) -> Dict[str, Any]:
+    """
+    The contrast report for `tokens_path` (default: src/theme/tokens.json,
+    else the ui_gate.yaml tokens). Served from `cache_path` when nothing it
+    depends on changed; pass cache_path=None to always recompute.
+    """
+    ui_gate = ui_gate or find_ui_gate()
+    if tokens_path is None:
+        tokens_path = TOKENS_PATH if os.path.isfile(TOKENS_PATH) else ui_gate
+    if tokens_path is None:
+        raise ContrastError(f"no tokens: neither {TOKENS_PATH} nor ui_gate.yaml found")
+    raw, data = _read(tokens_path)
+    gate_raw = b""
+    if ui_gate and os.path.abspath(ui_gate) != os.path.abspath(tokens_path):
+        gate_raw = _read(ui_gate)[0]
+    with open(os.path.abspath(__file__), "rb") as f:
+        engine = f.read()
+    key = hashlib.sha256(b"\0".join([raw, gate_raw, engine, b"numpy" if np is not None else b""])).hexdigest()
+
+    if cache_path:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("version") == REPORT_VERSION and cached.get("key") == key:
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    modes, floors = load_modes(data)
+    if not modes:
+        raise ContrastError(f"{tokens_path}: no color tokens")
+    minimums = load_minimums(ui_gate)
+    pins = data.get("contrast_pairs") or []
+    report = {
+        "version": REPORT_VERSION,
+        "key": key,
+        "tokens_path": tokens_path,
+        "ui_gate": ui_gate,
+        "minimums": minimums,
+        "modes": {mode: _mode_report(tokens, minimums, floors.get(mode), pins)
+                  for mode, tokens in sorted(modes.items())},
+    }
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        os.replace(tmp, cache_path)
+    return report
+
+
+def failures(report: Dict[str, Any]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    for mode, r in report["modes"].items():
+        for fail in r["failures"]:
+            yield mode, fail
+
+
+def describe(mode: str, fail: Dict[str, Any]) -> str:
+    return (f"[{mode}] {fail['fg']} on {fail['bg']}: {fail['ratio']:.2f}:1 "
+            f"< {fail['min']:g}:1 ({fail['role']})")
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check theme token contrast for every mode.")
+    parser.add_argument("--tokens", help=f"token file (default: {TOKENS_PATH}, else ui_gate.yaml)")
+    parser.add_argument("--ui-gate", help="ui_gate.yaml with accessibility.min_contrast")
+    parser.add_argument("--no-cache", action="store_true", help=f"do not read or write {REPORT_PATH}")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    chk = sub.add_parser("check", help="judge every fg/bg pairing; exit 1 on any failure")
+    chk.add_argument("--json", action="store_true")
+    show = sub.add_parser("show", help="print one mode's ratio matrix")
+    show.add_argument("mode")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    try:
+        report = build_report(args.tokens, args.ui_gate, None if args.no_cache else REPORT_PATH)
+    except (ContrastError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.cmd == "show":
+        r = report["modes"].get(args.mode)
+        if r is None:
+            print(f"❌ No mode {args.mode!r} (have: {', '.join(report['modes'])})", file=sys.stderr)
+            return 1
+        width = max(len(n) for n in r["tokens"])
+        print(" " * width + " " + " ".join(f"{i:>6}" for i in range(len(r["tokens"]))))
+        for i, (name, row) in enumerate(zip(r["tokens"], r["matrix"])):
+            print(f"{name:>{width}} " + " ".join(f"{x:6.2f}" for x in row) + f"  [{i}]")
+        return 0
+
+    bad = list(failures(report))
+    if args.json:
+        print(json.dumps([{"mode": m, **f} for m, f in bad], indent=2))
+    else:
+        for mode, fail in bad:
+            print(describe(mode, fail))
+        checked = sum(r["checked"] for r in report["modes"].values())
+        print(f"{len(bad)}/{checked} pairings below minimum across {len(report['modes'])} modes "
+              f"({', '.join(report['modes'])}) in {report['tokens_path']}")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
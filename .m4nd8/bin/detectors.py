@@ -0,0 +1,440 @@
+# detectors.py — in-process evaluators for compliance.yaml `detect:` primitives
+"""
+Native evaluation of the declarative `detect:` blocks in compliance.yaml so a
+gate run costs file reads instead of one shell + interpreter spawn per check.
+
+Supported primitives:
+  files_exist, any_files_exist, file_nonempty, file_contains,
+  file_regex_absent, grep_absent, grep_present, multi_grep_sequence,
+  log_event_present, log_event_sequence (worker-log event store),
+  condition, manual, script (shell fallback)
+Legacy entries:
+  type: file_verification, type: runtime_verification
+
+Every evaluator takes (spec, ctx) where ctx carries the run's manifest and
+FileIndex snapshot, and returns a result dict:
+  {"status": "pass" | "fail" | "manual", "output": str, "returncode": int}
+"""
+import functools
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from fs_index import FileIndex
+from log_store import LOG_DB_ENV, open_from_env
+from scheduler import kill_process
+
+
+@functools.lru_cache(maxsize=None)
+def compile_pattern(pattern: str, flags: int = re.M) -> "re.Pattern[str]":
+    """Compile a check regex once per process."""
+    return re.compile(pattern, flags)
+
+
+def _result(ok: bool, output: str = "", returncode: int = None) -> Dict[str, Any]:
+    if returncode is None:
+        returncode = 0 if ok else 1
+    return {"status": "pass" if ok else "fail", "output": output, "returncode": returncode}
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _index(ctx: Dict[str, Any]) -> FileIndex:
+    if ctx.get("index") is None:
+        ctx["index"] = FileIndex.build(".")
+    return ctx["index"]
+
+
+def expand_paths(patterns: Iterable[str], ctx: Dict[str, Any]) -> List[str]:
+    """Resolve glob patterns and bare directories ("src/") against the run's FileIndex."""
+    index = _index(ctx)
+    found = set()
+    for pat in patterns:
+        found.update(index.glob(pat))
+    return sorted(found)
+
+
+# --- Primitives ----------------------------------------------------------------------
+
+def files_exist(paths: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        return _result(False, "Missing required files: " + ", ".join(missing))
+    return _result(True, "OK")
+
+
+def any_files_exist(paths: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    if any(os.path.exists(p) for p in paths):
+        return _result(True, "OK")
+    return _result(False, "None of the expected files exist: " + ", ".join(paths))
+
+
+def file_nonempty(path: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        return _result(False, f"{path} missing or empty")
+    return _result(True, "OK")
+
+
+def file_contains(spec: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    path = spec["file"]
+    if not os.path.isfile(path):
+        return _result(False, f"{path} not found")
+    text = _read_text(path)
+    missing = [s for s in spec.get("substrings") or [] if s not in text]
+    if missing:
+        return _result(False, f"{path} is missing: " + ", ".join(missing))
+    return _result(True, "OK")
+
+
+def file_regex_absent(spec: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    path = spec["file"]
+    if not os.path.isfile(path):
+        # Absence holds trivially; presence is enforced by C00.
+        return _result(True, f"{path} not found; nothing to scan")
+    text = _read_text(path)
+    hits = []
+    for pat in spec.get("patterns") or []:
+        m = compile_pattern(pat).search(text)
+        if m:
+            line = text.count("\n", 0, m.start()) + 1
+            hits.append(f"{path}:{line}: {m.group(0).strip()}")
+    if hits:
+        return _result(False, "Forbidden patterns present:\n" + "\n".join(hits))
+    return _result(True, "OK")
+
+
+def grep_absent(spec: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    rx = compile_pattern(spec["pattern"])
+    hits = []
+    for path in expand_paths(spec.get("paths") or [], ctx):
+        try:
+            text = _read_text(path)
+        except OSError:
+            continue
+        m = rx.search(text)
+        if m:
+            line = text.count("\n", 0, m.start()) + 1
+            hits.append(f"{path}:{line}: {m.group(0)}")
+    if hits:
+        return _result(False, "Pattern found:\n" + "\n".join(hits))
+    return _result(True, "OK")
+
+
+def grep_present(spec: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    rx = compile_pattern(spec["pattern"])
+    paths = expand_paths(spec.get("paths") or [], ctx)
+    for path in paths:
+        try:
+            if rx.search(_read_text(path)):
+                return _result(True, f"OK ({path})")
+        except OSError:
+            continue
+    return _result(False, f"Pattern not found in {len(paths)} file(s): {spec['pattern']}")
+
+
+def _sequence(hits: Iterable, names: List[str]) -> Dict[str, Any]:
+    """
+    Check ordered stages over (path, lineno, stage) hits sorted by path then line:
+    each file must hit the stages in order; at least one file must complete them.
+    """
+    errors, completed = [], False
+    cur, stage = None, 0
+    for path, lineno, k in hits:
+        if path != cur:
+            cur, stage = path, 0
+        if stage == len(names):
+            continue
+        if k > stage:
+            errors.append(f"{path}:{lineno}: {names[k]} before {names[stage]}")
+        elif k == stage:
+            stage += 1
+            completed |= stage == len(names)
+    if errors:
+        return _result(False, "Out-of-order log lines:\n" + "\n".join(errors))
+    if not completed:
+        return _result(False, "Sequence never completed: " + " → ".join(names))
+    return _result(True, "OK")
+
+
+def multi_grep_sequence(spec: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Each file must hit the patterns in order; at least one file must complete the sequence."""
+    rxs = [compile_pattern(p) for p in spec.get("ordered_patterns") or []]
+    paths = expand_paths([spec["file_glob"]], ctx)
+    if not paths:
+        return _result(False, f"No files match {spec['file_glob']}")
+
+    def hits():
+        for path in paths:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                for lineno, line in enumerate(f, 1):
+                    line = line.rstrip("\n")
+                    for k, rx in enumerate(rxs):
+                        if rx.search(line):
+                            yield path, lineno, k
+                            break
+
+    return _sequence(hits(), [r.pattern for r in rxs])
+
+
+# --- Worker-log events (log_store.py) -------------------------------------------------
+
+def _events():
+    if not os.environ.get(LOG_DB_ENV):
+        raise LookupError(f"worker-log event store not built (${LOG_DB_ENV} unset; run via sentinel)")
+    return open_from_env()
+
+
+def log_event_present(spec: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """At least one `kind` event (optionally with `value`) was logged."""
+    try:
+        store = _events()
+    except LookupError as e:
+        return _result(False, str(e))
+    try:
+        ok = store.has(spec["kind"], spec.get("value"))
+    finally:
+        store.close()
+    return _result(ok, "OK" if ok else f"No {spec['kind']} line in worker logs")
+
+
+def log_event_sequence(kinds: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Same contract as multi_grep_sequence, answered from the event store."""
+    try:
+        store = _events()
+    except LookupError as e:
+        return _result(False, str(e))
+    try:
+        rows = store.events(kinds)
+    finally:
+        store.close()
+    stage = {k: i for i, k in enumerate(kinds)}
+    return _sequence(((f, line, stage[kind]) for f, line, kind, _ in rows), kinds)
+
+
+# --- Declarative conditions (C190–C192) --------------------------------------------
+
+_COND_MANIFEST = re.compile(r"^manifest\.([\w.]+)\s*==\s*(\S+)$")
+_COND_CALL = re.compile(r"^(exists|contains)\((.*)\)$")
+_COND_ARG = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+def _lookup(manifest: Dict[str, Any], dotted: str) -> Any:
+    cur: Any = manifest
+    for key in dotted.split("."):
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(key)
+    return cur
+
+
+def _wrapped(term: str) -> bool:
+    """True when the whole term is enclosed by one matching pair of parentheses."""
+    if not (term.startswith("(") and term.endswith(")")):
+        return False
+    depth = 0
+    for i, ch in enumerate(term):
+        depth += {"(": 1, ")": -1}.get(ch, 0)
+        if depth == 0 and i < len(term) - 1:
+            return False
+    return True
+
+
+def _eval_term(term: str, manifest: Dict[str, Any]) -> bool:
+    term = term.strip()
+    while _wrapped(term):
+        term = term[1:-1].strip()
+    if " or " in term:
+        return any(_eval_term(t, manifest) for t in term.split(" or "))
+    if " and " in term:
+        return all(_eval_term(t, manifest) for t in term.split(" and "))
+    m = _COND_MANIFEST.match(term)
+    if m:
+        want = m.group(2).strip("\"'")
+        have = _lookup(manifest, m.group(1))
+        if want in ("true", "false"):
+            return bool(have) == (want == "true")
+        return str(have) == want
+    m = _COND_CALL.match(term)
+    if m:
+        args = _COND_ARG.findall(m.group(2))
+        if m.group(1) == "exists":
+            return os.path.exists(args[0])
+        return os.path.isfile(args[0]) and args[1] in _read_text(args[0])
+    raise ValueError(f"Unsupported condition term: {term}")
+
+
+def condition(expr: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Evaluate `antecedent → consequent` (or a bare term) against manifest + filesystem."""
+    manifest = ctx.get("manifest") or {}
+    try:
+        if "→" in expr:
+            lhs, rhs = expr.split("→", 1)
+            ok = (not _eval_term(lhs, manifest)) or _eval_term(rhs, manifest)
+        else:
+            ok = _eval_term(expr, manifest)
+    except (ValueError, IndexError) as e:
+        return _result(False, f"Condition error: {e}")
+    return _result(ok, "OK" if ok else f"Condition not satisfied: {expr.strip()}")
+
+
+# --- Shell fallbacks & legacy entries --------------------------------------------------
+
+# Where _shell reports each reaped child's resource usage, per thread (see check_profile.py)
+_child_usage = threading.local()
+
+
+def collect_child_usage(sink: list = None) -> None:
+    """Append the rusage of every shell child this thread reaps to `sink`; None stops."""
+    _child_usage.sink = sink
+
+
+def _drain(stream, into: list) -> None:
+    into.append(stream.read())
+    stream.close()
+
+
+def _wait4(proc: subprocess.Popen, deadline: float = None):
+    """Reap proc with wait4() and set its returncode; its rusage, or None if the
+    (monotonic) deadline passes first. Blocks when there is no deadline."""
+    delay = 0.0005
+    while True:
+        pid, status, usage = os.wait4(proc.pid, 0 if deadline is None else os.WNOHANG)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return usage
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        delay = min(delay * 2, remaining, 0.05)
+        time.sleep(delay)
+
+
+def _communicate(proc: subprocess.Popen, timeout: float):
+    """proc.communicate(), but reaping with wait4() to keep the child's own rusage
+    (RUSAGE_CHILDREN deltas would mix in every other check running concurrently).
+    Returns (stdout, stderr, rusage or None, timed_out); a check still running at
+    the timeout is killed along with its session."""
+    if not hasattr(os, "wait4"):
+        try:
+            return (*proc.communicate(timeout=timeout), None, False)
+        except subprocess.TimeoutExpired:
+            kill_process(proc)
+            return (*proc.communicate(), None, True)
+    deadline = time.monotonic() + timeout
+    out: list = []
+    err: list = []
+    readers = [threading.Thread(target=_drain, args=(proc.stdout, out), daemon=True),
+               threading.Thread(target=_drain, args=(proc.stderr, err), daemon=True)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join(max(0.0, deadline - time.monotonic()))
+    usage = None if any(r.is_alive() for r in readers) else _wait4(proc, deadline)
+    timed_out = usage is None
+    if timed_out:
+        kill_process(proc)
+        for reader in readers:
+            reader.join()
+        usage = _wait4(proc)
+    return out[0], err[0], usage, timed_out
+
+
+def _shell(command: str, ctx: Dict[str, Any]) -> subprocess.CompletedProcess:
+    """Run a shell check in its own session so a timeout or cancel kills the whole tree."""
+    timeout, token = ctx.get("timeout", 10), ctx.get("cancel")
+    env = {**os.environ, **ctx["env"]} if ctx.get("env") else None
+    proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, start_new_session=True, env=env)
+    if token is not None:
+        token.register(proc)
+    try:
+        out, err, usage, timed_out = _communicate(proc, timeout)
+    finally:
+        if token is not None:
+            token.unregister(proc)
+    sink = getattr(_child_usage, "sink", None)
+    if sink is not None and usage is not None:
+        sink.append(usage)
+    if timed_out:
+        return subprocess.CompletedProcess(command, 124, out, f"{err}\nTimed out after {timeout}s")
+    return subprocess.CompletedProcess(command, proc.returncode, out, err)
+
+
+def run_script(script: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    proc = _shell(script, ctx)
+    return _result(proc.returncode == 0, f"{proc.stdout}\n{proc.stderr}".strip(), proc.returncode)
+
+
+def file_verification(chk: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    target = chk["target"]
+    if not os.path.exists(target):
+        if chk.get("required", True):
+            return _result(False, f"{target} missing")
+        return _result(True, f"{target} absent (optional)")
+    perms = chk.get("permissions")
+    if perms:
+        want = int(str(perms), 8)
+        have = os.stat(target).st_mode & 0o777
+        if have & want != want:
+            return _result(False, f"{target} has mode {have:o}, needs {want:o}")
+    return _result(True, "OK")
+
+
+def runtime_verification(chk: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    proc = _shell(chk["command"], ctx)
+    ok = proc.returncode == int(chk.get("expected_exit_code", 0))
+    return _result(ok, f"{proc.stdout}\n{proc.stderr}".strip(), 0 if ok else proc.returncode or 1)
+
+
+# --- Dispatch ---------------------------------------------------------------------
+
+PRIMITIVES = {
+    "files_exist": files_exist,
+    "any_files_exist": any_files_exist,
+    "file_nonempty": file_nonempty,
+    "file_contains": file_contains,
+    "file_regex_absent": file_regex_absent,
+    "grep_absent": grep_absent,
+    "grep_present": grep_present,
+    "multi_grep_sequence": multi_grep_sequence,
+    "log_event_present": log_event_present,
+    "log_event_sequence": log_event_sequence,
+    "condition": condition,
+    "script": run_script,
+}
+
+
+def run_check(chk: Dict[str, Any], manifest: Dict[str, Any], index: FileIndex = None,
+              cancel=None, env: Dict[str, str] = None) -> Dict[str, Any]:
+    """Evaluate one compliance.yaml entry; every primitive in its detect block must pass."""
+    ctx = {"manifest": manifest, "index": index, "timeout": chk.get("timeout_sec", 10),
+           "cancel": cancel, "env": env}
+    kind = chk.get("type")
+    if kind == "file_verification":
+        return file_verification(chk, ctx)
+    if kind == "runtime_verification":
+        return runtime_verification(chk, ctx)
+    detect = chk.get("detect")
+    if detect is None and "script" in chk:
+        detect = {"script": chk["script"]}
+    if not detect:
+        return _result(False, "Unsupported check: no detect block")
+    if detect.get("manual"):
+        return {"status": "manual", "output": "Manual review required", "returncode": 0}
+
+    outputs = []
+    for key, spec in detect.items():
+        if key in PRIMITIVES:
+            res = PRIMITIVES[key](spec, ctx)
+        else:
+            res = _result(False, f"Unsupported detect primitive: {key}")
+        if res["status"] == "fail":
+            return res
+        outputs.append(res["output"])
+    return _result(True, "\n".join(o for o in outputs if o))
@@ -0,0 +1,276 @@
+# fs_index.py — single-pass filesystem snapshot shared by every check in a sentinel run
+"""
+One walk of the project tree per gate. Checks query the snapshot instead of
+re-globbing `**`; inline scripts load the serialized copy sentinel names in
+M4ND8_FS_INDEX (M4ND8_BIN points at this directory):
+
+    import os, sys
+    sys.path.insert(0, os.environ["M4ND8_BIN"]); from fs_index import load_from_env
+    for path in load_from_env().glob("**/*.py"): ...
+
+Glob queries follow glob.glob semantics: wildcards never match dot-entries.
+A long-lived caller (sentinel --watch) polls with refresh(), which re-stats
+the known files and lists only the directories whose mtime moved.
+"""
+import fnmatch
+import functools
+import json
+import os
+import re
+import stat
+import time
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Applied once at walk time; a pattern that names one of these explicitly
+# (e.g. "_logs/worker/*.log") is resolved against the live filesystem instead.
+EXCLUDED_DIRS = frozenset({".git", "node_modules", "_logs"})
+INDEX_ENV = "M4ND8_FS_INDEX"
+BIN_ENV = "M4ND8_BIN"
+# A directory whose mtime is this close to a snapshot may change again within
+# the same timestamp tick on coarse filesystems; refresh() lists it again.
+RACY_NS = 2_000_000_000
+
+
+@functools.lru_cache(maxsize=None)
+def _glob_regex(pattern: str) -> "re.Pattern[str]":
+    """Translate a recursive glob ("**/*.md", "src/**/*.{js,ts}") into a regex."""
+    pattern = pattern.replace("\\", "/")
+    if pattern.startswith("./"):
+        pattern = pattern[2:]
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        seg_start = i == 0 or pattern[i - 1] == "/"
+        if pattern.startswith("**/", i) and seg_start:
+            out.append(r"(?:(?!\.)[^/]*/)*")
+            i += 3
+            continue
+        if pattern.startswith("**", i) and seg_start:
+            out.append(r"(?:(?!\.)[^/]*(?:/|\Z))*")
+            i += 2
+            continue
+        if c == "*":
+            out.append(r"(?!\.)[^/]*" if seg_start else "[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "{" and "}" in pattern[i:]:
+            j = pattern.index("}", i)
+            out.append("(?:" + "|".join(re.escape(a) for a in pattern[i + 1:j].split(",")) + ")")
+            i = j
+        elif c == "[":
+            j = pattern.find("]", i)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                out.append(fnmatch.translate(pattern[i:j + 1])[4:-3])
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+def _walk(root: str, stack: List[str], files: Dict[str, Tuple[int, float]], empty: List[str],
+          dirs: Dict[str, int], known: Iterable[str] = ()) -> None:
+    """List the directories in `stack` and everything below them, except `known` subdirectories."""
+    while stack:
+        rel = stack.pop()
+        try:
+            entries = list(os.scandir(os.path.join(root, rel) if rel else root))
+        except OSError:
+            continue
+        if rel and not entries:
+            empty.append(rel)
+        for e in entries:
+            p = f"{rel}/{e.name}" if rel else e.name
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if e.name not in EXCLUDED_DIRS and p not in known:
+                        dirs[p] = e.stat(follow_symlinks=False).st_mtime_ns
+                        stack.append(p)
+                elif e.is_file():
+                    st = e.stat()
+                    files[p] = (st.st_size, st.st_mtime)
+            except OSError:
+                continue
+
+
+class FileIndex:
+    """Immutable snapshot: path → (size, mtime), extension buckets and empty dirs."""
+
+    __slots__ = ("root", "_files", "_by_ext", "_empty_dirs", "_paths", "_dirs", "_taken")
+
+    def __init__(self, root: str, files: Dict[str, Tuple[int, float]], empty_dirs: Iterable[str],
+                 dirs: Optional[Dict[str, int]] = None, taken: int = 0):
+        self.root = root
+        self._files = MappingProxyType(dict(sorted(files.items())))
+        self._paths = tuple(self._files)
+        by_ext: Dict[str, List[str]] = {}
+        for p in self._paths:
+            by_ext.setdefault(os.path.splitext(p)[1].lower(), []).append(p)
+        self._by_ext = MappingProxyType({k: tuple(v) for k, v in by_ext.items()})
+        self._empty_dirs = tuple(sorted(empty_dirs))
+        # Directory → st_mtime_ns when it was listed, and when the walk began (for refresh)
+        self._dirs = MappingProxyType(dict(dirs or {}))
+        self._taken = taken
+
+    @classmethod
+    def build(cls, root: str = ".") -> "FileIndex":
+        taken = time.time_ns()
+        files: Dict[str, Tuple[int, float]] = {}
+        empty: List[str] = []
+        dirs: Dict[str, int] = {}
+        try:
+            dirs[""] = os.stat(root).st_mtime_ns
+        except OSError:
+            pass
+        _walk(root, [""], files, empty, dirs)
+        return cls(root, files, empty, dirs, taken)
+
+    def refresh(self) -> "FileIndex":
+        """
+        The tree as it is now, for callers that poll: known files are re-stat'ed
+        and a directory is listed again only when its mtime moved (an entry was
+        added, removed or renamed). A snapshot without directory mtimes (loaded
+        or subset) is rebuilt.
+        """
+        if not self._dirs:
+            return FileIndex.build(self.root)
+        taken = time.time_ns()
+        by_dir: Dict[str, List[str]] = {}
+        for p in self._paths:
+            by_dir.setdefault(p.rpartition("/")[0], []).append(p)
+        was_empty = set(self._empty_dirs)
+        files: Dict[str, Tuple[int, float]] = {}
+        empty: List[str] = []
+        dirs: Dict[str, int] = {}
+        relist = []
+        for rel, mtime in self._dirs.items():
+            try:
+                st = os.stat(os.path.join(self.root, rel) if rel else self.root)
+            except OSError:
+                continue  # removed, files and all
+            if not stat.S_ISDIR(st.st_mode):
+                continue
+            dirs[rel] = st.st_mtime_ns
+            if st.st_mtime_ns != mtime or mtime >= self._taken - RACY_NS:
+                relist.append(rel)
+                continue
+            if rel in was_empty:
+                empty.append(rel)
+            for p in by_dir.get(rel, ()):
+                try:
+                    st = os.stat(os.path.join(self.root, p))
+                except OSError:
+                    continue
+                files[p] = (st.st_size, st.st_mtime)
+        _walk(self.root, relist, files, empty, dirs, known=self._dirs)
+        return FileIndex(self.root, files, empty, dirs, taken)
+
+    # --- Queries -------------------------------------------------------------------
+
+    def __contains__(self, path: str) -> bool:
+        return _norm(path) in self._files
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        return self._paths
+
+    @property
+    def empty_dirs(self) -> Tuple[str, ...]:
+        return self._empty_dirs
+
+    def stat(self, path: str) -> Optional[Tuple[int, float]]:
+        return self._files.get(_norm(path))
+
+    def with_ext(self, *exts: str) -> List[str]:
+        out: List[str] = []
+        for ext in exts:
+            ext = ext.lower() if ext.startswith(".") else "." + ext.lower()
+            out.extend(self._by_ext.get(ext, ()))
+        return sorted(out)
+
+    def subset(self, paths: Iterable[str]) -> "FileIndex":
+        """A snapshot restricted to `paths` (e.g. the files changed since a ref)."""
+        keep = {_norm(p) for p in paths}
+        return FileIndex(self.root, {p: st for p, st in self._files.items() if p in keep}, ())
+
+    def changed_since(self, older: "FileIndex") -> List[str]:
+        """Paths added, removed or modified (size or mtime) relative to `older`."""
+        old = older._files
+        changed = {p for p, st in self._files.items() if old.get(p) != st}
+        changed.update(p for p in old if p not in self._files)
+        return sorted(changed)
+
+    def under(self, directory: str) -> List[str]:
+        prefix = _norm(directory).rstrip("/") + "/"
+        if prefix == "/":
+            return list(self._paths)
+        return [p for p in self._paths if p.startswith(prefix)]
+
+    def glob(self, pattern: str) -> List[str]:
+        """Match a glob (or a bare directory like "src/") against the snapshot."""
+        norm = _norm(pattern)
+        if pattern.endswith("/"):
+            return self.under(norm)
+        if _names_excluded(norm):
+            import glob as _glob
+            return sorted(_norm(p) for p in _glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        rx = _glob_regex(norm)
+        # Cheap pre-filter on a literal extension suffix ("**/*.md").
+        m = re.search(r"\*(\.[\w]+)$", norm)
+        candidates = self._by_ext.get(m.group(1).lower(), ()) if m else self._paths
+        return [p for p in candidates if rx.match(p)]
+
+    # --- Serialization -------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        return {
+            "root": os.path.abspath(self.root),
+            "files": [[p, s, t] for p, (s, t) in self._files.items()],
+            "empty_dirs": list(self._empty_dirs),
+        }
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "FileIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("root", "."), {p: (s, t) for p, s, t in data["files"]}, data.get("empty_dirs", []))
+
+
+def matches(pattern: str, path: str) -> bool:
+    """Whether `path` is selected by `pattern` (glob, literal path or "dir/"), as FileIndex.glob would."""
+    path = _norm(path)
+    if _names_excluded(path) and not _names_excluded(_norm(pattern)):
+        return False
+    if pattern.endswith("/"):
+        return path.startswith(_norm(pattern))
+    return _glob_regex(_norm(pattern)).match(path) is not None
+
+
+def load_from_env() -> FileIndex:
+    """Load the snapshot sentinel serialized for this run (used by inline scripts)."""
+    return FileIndex.load(os.environ[INDEX_ENV])
+
+
+def _norm(path: str) -> str:
+    path = path.replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path
+
+
+def _names_excluded(pattern: str) -> bool:
+    return any(part in EXCLUDED_DIRS for part in pattern.split("/"))
@@ -0,0 +1,354 @@
+# hub_graph.py — repository-wide wiring graph behind C54.hub_wiring_valid
+"""
+Merges the `hub_wiring` block of every hub.md into one graph whose nodes are
+project-relative paths, so edges that leave a hub's directory join up with
+the rest of the tree.
+
+  * Per-hub work (YAML parse, edge shape, "every file in the folder is a node
+    or local_only") is cached in _logs/hub_graph.json, keyed on the hub's
+    content hash and a signature of its directory listing; only hubs whose
+    text or folder changed are re-validated.
+  * Graph-wide checks run on every build and are set lookups against the
+    FileIndex snapshot: referenced paths exist, and `imports` edges have no
+    cycles (ACYCLIC_RELATIONS). Nodes no edge touches are reported as
+    warnings (orphans).
+
+The template box between the TEMPLATE-ONLY markers is not part of a hub.
+
+Agents planning an edit can ask who depends on a path:
+    python .m4nd8/bin/hub_graph.py --dependents src/core/config.py [--transitive]
+With no query it validates every hub (what C54 runs) and exits 1 on errors.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fs_index import FileIndex, INDEX_ENV, load_from_env
+
+CACHE_PATH = os.path.join("_logs", "hub_graph.json")
+CACHE_VERSION = 1
+HUB_GLOB = "**/hub.md"
+# Files a hub's folder listing never has to account for.
+LISTING_IGNORE = frozenset({"hub.md", "cofo.md", "README.md"})
+# Relations whose edges must not form a cycle.
+ACYCLIC_RELATIONS = frozenset({"imports"})
+
+_TEMPLATE_BOX = re.compile(
+    r"<!--\s*TEMPLATE-ONLY:\s*hub-template-start\s*-->.*?<!--\s*TEMPLATE-ONLY:\s*hub-template-end\s*-->", re.S)
+_YAML_BLOCK = re.compile(r"```ya?ml[^\n]*\n(.*?)```", re.S)
+_WIRING_KEY = re.compile(r"^\s*hub_wiring\s*:", re.M)
+_EXTERNAL = re.compile(r"^[a-z][a-z0-9+.-]*://")
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_external(ref: Any) -> bool:
+    return bool(_EXTERNAL.match(str(ref)))
+
+
+@functools.lru_cache(maxsize=None)
+def resolve(hub_dir: str, ref: str) -> str:
+    """A node as written in a hub (`./a.py`, `../assets/x`) → project-relative path."""
+    return os.path.normpath(os.path.join(hub_dir or ".", str(ref).strip())).replace(os.sep, "/")
+
+
+# --- One hub -----------------------------------------------------------------------------
+
+def extract_wiring(text: str) -> Optional[str]:
+    """The first fenced YAML block declaring `hub_wiring:`, ignoring the template box."""
+    text = _TEMPLATE_BOX.sub("", text)
+    for block in _YAML_BLOCK.findall(text):
+        if _WIRING_KEY.search(block):
+            return block
+    return None
+
+
+def parse_hub(hub: str, text: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """(wiring, errors) from hub.md text alone: the block, its YAML and the edge shape."""
+    block = extract_wiring(text)
+    if block is None:
+        return None, [f"{hub}: missing hub_wiring block"]
+    import yaml
+    try:
+        data = yaml.safe_load(block) or {}
+    except yaml.YAMLError as e:
+        return None, [f"{hub}: YAML parse error in hub_wiring: {e}"]
+    hw = data.get("hub_wiring") if isinstance(data, dict) else None
+    if not isinstance(hw, dict):
+        return None, [f"{hub}: hub_wiring must be a mapping"]
+
+    errors = []
+    nodes = [str(n) for n in hw.get("nodes") or [] if n is not None]
+    local_only = [str(n) for n in hw.get("local_only") or [] if n is not None]
+    edges = []
+    for i, e in enumerate(hw.get("edges") or []):
+        if not isinstance(e, dict):
+            errors.append(f"{hub}: edge #{i} must be a mapping")
+            continue
+        f, t = e.get("from"), e.get("to")
+        if not f or not t:
+            errors.append(f"{hub}: edge #{i} missing from/to")
+            continue
+        if "relation" not in e:
+            errors.append(f"{hub}: edge #{i} missing relation")
+        edges.append({"from": str(f), "to": str(t), "relation": str(e.get("relation") or ""),
+                      "why": str(e.get("why") or "")})
+    base = os.path.dirname(hub)
+    declared = {resolve(base, n) for n in nodes if not is_external(n)}
+    for i, e in enumerate(edges):
+        for end in ("from", "to"):
+            if not is_external(e[end]) and resolve(base, e[end]) not in declared:
+                errors.append(f"{hub}: edge #{i} {end} not in nodes: {e[end]}")
+    return {"nodes": nodes, "edges": edges, "local_only": local_only}, errors
+
+
+def listing_errors(hub: str, wiring: Dict[str, Any], listing: Iterable[str]) -> List[str]:
+    """Every entry of the hub's own folder must be a node or local_only."""
+    base = os.path.dirname(hub)
+    covered = {resolve(base, n) for n in wiring["nodes"] + wiring["local_only"] if not is_external(n)}
+    return [f"{hub}: ./{entry} not represented in nodes or local_only"
+            for entry in sorted(listing)
+            if entry not in LISTING_IGNORE and resolve(base, entry) not in covered]
+
+
+def folder_listings(index: FileIndex, dirs: Iterable[str]) -> Dict[str, Set[str]]:
+    """Direct children (files and subfolders) of each of `dirs`, in one pass over the index."""
+    out: Dict[str, Set[str]] = {d: set() for d in dirs}
+    for p in list(index.paths) + list(index.empty_dirs):
+        parts = p.split("/")
+        for depth in range(len(parts)):
+            parent = "/".join(parts[:depth])
+            if parent in out:
+                out[parent].add(parts[depth])
+    return out
+
+
+# --- The graph ---------------------------------------------------------------------------
+
+class HubGraph:
+    """Every hub's wiring, merged; nodes are project-relative paths or external URLs."""
+
+    def __init__(self, hubs: Dict[str, Dict[str, Any]]):
+        self.hubs = hubs
+        self.edges: List[Tuple[str, str, str, str]] = []   # (from, relation, to, hub)
+        self.nodes: Dict[str, str] = {}                    # node → first hub declaring it
+        self.out: Dict[str, List[Tuple[str, str, str]]] = {}
+        self.into: Dict[str, List[Tuple[str, str, str]]] = {}
+        for hub, wiring in sorted(hubs.items()):
+            base = os.path.dirname(hub)
+            key = lambda ref: ref if is_external(ref) else resolve(base, ref)  # noqa: E731
+            for n in wiring["nodes"]:
+                self.nodes.setdefault(key(n), hub)
+            for e in wiring["edges"]:
+                src, dst = key(e["from"]), key(e["to"])
+                self.edges.append((src, e["relation"], dst, hub))
+                self.out.setdefault(src, []).append((e["relation"], dst, hub))
+                self.into.setdefault(dst, []).append((e["relation"], src, hub))
+
+    def _walk(self, path: str, adjacency, transitive: bool) -> List[Dict[str, str]]:
+        start = resolve("", path) if not is_external(path) else path
+        seen, out, frontier = {start}, [], [start]
+        while frontier:
+            node = frontier.pop()
+            for relation, other, hub in adjacency.get(node, ()):
+                out.append({"path": other, "relation": relation, "via": node, "hub": hub})
+                if transitive and other not in seen:
+                    seen.add(other)
+                    frontier.append(other)
+            if not transitive:
+                break
+        return out
+
+    def dependents(self, path: str, transitive: bool = False) -> List[Dict[str, str]]:
+        """Nodes with an edge into `path` (everything that imports/reads/invokes it)."""
+        return self._walk(path, self.into, transitive)
+
+    def dependencies(self, path: str, transitive: bool = False) -> List[Dict[str, str]]:
+        """Nodes `path` has an edge to."""
+        return self._walk(path, self.out, transitive)
+
+    def missing(self, index: FileIndex) -> List[str]:
+        """Declared nodes that are not in the tree (outside-index paths hit the filesystem)."""
+        dirs = {p.rsplit("/", i)[0] for p in index.paths for i in range(1, p.count("/") + 1)}
+        dirs.update(index.empty_dirs)
+        errors = []
+        for node, hub in sorted(self.nodes.items()):
+            if is_external(node) or node in index or node in dirs or node == ".":
+                continue
+            if node.startswith("..") or node.split("/", 1)[0] in ("_logs", "node_modules", ".git"):
+                if os.path.exists(node):
+                    continue
+            errors.append(f"{hub}: node does not exist: {node}")
+        return errors
+
+    def cycles(self, relations: Iterable[str] = ACYCLIC_RELATIONS) -> List[List[str]]:
+        """
+        Cycles over edges of `relations`, as closed paths: one per back edge of
+        a depth-first walk, so every cyclic component is reported at least once
+        (not every simple cycle through it).
+        """
+        relations = set(relations)
+        adj: Dict[str, List[str]] = {}
+        for src, rel, dst, _ in self.edges:
+            if rel in relations:
+                adj.setdefault(src, []).append(dst)
+        state: Dict[str, int] = {}          # 1 = on the DFS stack, 2 = done
+        found, seen = [], set()
+        for root in sorted(adj):
+            if state.get(root):
+                continue
+            stack, path = [(root, iter(adj.get(root, ())))], [root]
+            state[root] = 1
+            while stack:
+                node, it = stack[-1]
+                nxt = next(it, None)
+                if nxt is None:
+                    state[node] = 2
+                    stack.pop()
+                    path.pop()
+                elif state.get(nxt) == 1:
+                    cycle = path[path.index(nxt):]
+                    pivot = cycle.index(min(cycle))
+                    canon = tuple(cycle[pivot:] + cycle[:pivot])
+                    if canon not in seen:
+                        seen.add(canon)
+                        found.append(list(canon) + [canon[0]])
+                elif not state.get(nxt):
+                    state[nxt] = 1
+                    stack.append((nxt, iter(adj.get(nxt, ()))))
+                    path.append(nxt)
+        return found
+
+    def orphans(self) -> List[str]:
+        """Local nodes no edge in any hub touches."""
+        touched = {n for src, _, dst, _ in self.edges for n in (src, dst)}
+        return sorted(n for n in self.nodes
+                      if n not in touched and not is_external(n)
+                      and os.path.basename(n) not in LISTING_IGNORE)
+
+
+# --- Build with cache --------------------------------------------------------------------
+
+class HubCache:
+    """hub path → {sha, listing, wiring, errors}; dropped when the cache format changes."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.hubs: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.hubs = data.get("hubs", {})
+            except (OSError, ValueError):
+                pass
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CACHE_VERSION, "hubs": self.hubs}, separators=(",", ":")))
+        os.replace(tmp, self.path)
+
+
+def build(index: FileIndex, cache: HubCache) -> Dict[str, Any]:
+    """Validate every hub (re-parsing only changed ones) and return the graph plus findings."""
+    hubs = index.glob(HUB_GLOB)
+    listings = folder_listings(index, {os.path.dirname(h) for h in hubs})
+    stats = {"hubs": len(hubs), "parsed": 0, "relisted": 0, "cached": 0}
+    errors: List[str] = []
+    wirings: Dict[str, Dict[str, Any]] = {}
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for hub in hubs:
+        try:
+            with open(hub, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            errors.append(f"{hub}: unreadable: {e}")
+            continue
+        sha = _sha(raw)
+        listing = sorted(listings.get(os.path.dirname(hub), ()))
+        sig = _sha("\n".join(listing).encode())
+        memo = cache.hubs.get(hub)
+        if memo and memo["sha"] == sha and memo["listing"] == sig:
+            stats["cached"] += 1
+        elif memo and memo["sha"] == sha:
+            # Same text, folder changed: only the listing rule needs re-running
+            memo = dict(memo, listing=sig)
+            memo["errors"] = memo["text_errors"] + (
+                listing_errors(hub, memo["wiring"], listing) if memo["wiring"] else [])
+            stats["relisted"] += 1
+        else:
+            wiring, text_errors = parse_hub(hub, raw.decode("utf-8", "ignore"))
+            memo = {"sha": sha, "listing": sig, "wiring": wiring, "text_errors": text_errors,
+                    "errors": text_errors + (listing_errors(hub, wiring, listing) if wiring else [])}
+            stats["parsed"] += 1
+        fresh[hub] = memo
+        errors += memo["errors"]
+        if memo["wiring"]:
+            wirings[hub] = memo["wiring"]
+    cache.dirty = cache.dirty or stats["cached"] != len(cache.hubs) or len(fresh) != len(cache.hubs)
+    cache.hubs = fresh
+
+    graph = HubGraph(wirings)
+    errors += graph.missing(index)
+    errors += [f"{graph.nodes.get(c[0], '?')}: import cycle: {' -> '.join(c)}" for c in graph.cycles()]
+    return {"graph": graph, "errors": errors, "warnings": [f"orphan node: {n}" for n in graph.orphans()],
+            **stats}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Validate and query the hub.md wiring graph.")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--dependents", metavar="PATH", help="list what has an edge into PATH")
+    query.add_argument("--dependencies", metavar="PATH", help="list what PATH has an edge to")
+    parser.add_argument("--transitive", action="store_true", help="follow edges all the way")
+    parser.add_argument("--json", action="store_true", help="print one JSON report instead of text")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    index = load_from_env() if os.environ.get(INDEX_ENV) else FileIndex.build(".")
+    cache = HubCache(None if args.no_cache else CACHE_PATH)
+    report = build(index, cache)
+    cache.save()
+    graph = report.pop("graph")
+
+    target = args.dependents or args.dependencies
+    if target:
+        walk = graph.dependents if args.dependents else graph.dependencies
+        hits = walk(target, transitive=args.transitive)
+        if args.json:
+            print(json.dumps(hits, indent=2))
+        else:
+            for h in hits:
+                arrow = f"{h['path']} --{h['relation']}--> {h['via']}" if args.dependents \
+                    else f"{h['via']} --{h['relation']}--> {h['path']}"
+                print(f"{arrow}  ({h['hub']})")
+        return 0
+
+    if args.json:
+        print(json.dumps({**report, "nodes": len(graph.nodes), "edges": len(graph.edges)}, indent=2))
+    else:
+        for w in report["warnings"]:
+            print(f"warning: {w}", file=sys.stderr)
+        if report["errors"]:
+            print("\n".join(report["errors"]))
+        else:
+            print(f"OK ({report['hubs']} hubs, {len(graph.nodes)} nodes, {len(graph.edges)} edges, "
+                  f"{report['cached']} cached)")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# logits_trace.py — columnar logits traces behind C170.minp_confidence_check
+"""
+A structured output `out.json` carries its per-token trace in a sibling
+`out.json.logits.bin`:
+
+    magic    b"M4LOGIT1"
+    u32      header length, then a JSON header (count, column table)
+    columns  each 8-byte aligned, little-endian:
+               prob           float16[count]
+               syntax         uint8[count]     1 = JSON punctuation, not a value
+               token_id       int32[count]     -1 when the model gave none
+               token_offsets  uint32[count+1]  into token_bytes
+               token_bytes    utf-8
+
+The file is memory-mapped and the columns are viewed in place, so checking a
+trace costs one vectorized comparison rather than a JSON parse and a Python
+loop. Probabilities are stored as float16 and compared against the threshold
+rounded to float16, so a token written at exactly the threshold still passes.
+
+The older `out.json.logits.json` (a list of {"token", "prob"[, "token_id"]})
+is still read, and converts with:
+    python .m4nd8/bin/logits_trace.py convert out.json.logits.json [--remove]
+Per-trace statistics:
+    python .m4nd8/bin/logits_trace.py stats out.json.logits.bin [--threshold 0.4]
+
+NumPy is used when installed; without it the same checks run through struct.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # columns decoded with struct instead
+    np = None
+
+MAGIC = b"M4LOGIT1"
+FORMAT_VERSION = 1
+TRACE_SUFFIX = ".logits.bin"
+LEGACY_SUFFIX = ".logits.json"
+MIN_P = 0.4
+# Tokens that are JSON structure rather than generated values.
+SYNTAX_TOKENS = frozenset({"{", "}", "[", "]", ":", ",", '"', ""})
+QUANTILES = (0.05, 0.5)
+# Low-confidence tokens listed per artifact (the count is always complete).
+REPORT_LIMIT = 5
+
+# Column name → dtype, in file order.
+_COLUMNS = (
+    ("prob", "<f2"),
+    ("syntax", "|u1"),
+    ("token_id", "<i4"),
+    ("token_offsets", "<u4"),
+    ("token_bytes", "|u1"),
+)
+_STRUCT = {"<f2": "e", "|u1": "B", "<i4": "i", "<u4": "I"}
+
+
+def is_syntax(token: str) -> bool:
+    return token.strip() in SYNTAX_TOKENS
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def round_f16(value: float) -> float:
+    """`value` as stored in a float16 column."""
+    return struct.unpack("<e", struct.pack("<e", value))[0]
+
+
+# --- Writing -----------------------------------------------------------------------------
+
+def write_trace(path: str, tokens: Sequence[str], probs: Sequence[float],
+                token_ids: Optional[Sequence[Optional[int]]] = None) -> None:
+    """Write one trace; replaces `path` atomically."""
+    count = len(tokens)
+    if len(probs) != count or (token_ids is not None and len(token_ids) != count):
+        raise ValueError("tokens, probs and token_ids must have the same length")
+    encoded = [t.encode("utf-8") for t in tokens]
+    offsets = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+    columns = {
+        "prob": struct.pack(f"<{count}e", *probs),
+        "syntax": bytes(1 if is_syntax(t) else 0 for t in tokens),
+        "token_id": struct.pack(f"<{count}i", *(-1 if i is None else i for i in (token_ids or [None] * count))),
+        "token_offsets": struct.pack(f"<{count + 1}I", *offsets),
+        "token_bytes": b"".join(encoded),
+    }
+    # The header's own length moves the column offsets: repeat until it settles.
+    table: Dict[str, Dict[str, Any]] = {}
+    header, previous = b"", None
+    while len(header) != previous:
+        previous = len(header)
+        pos = _align(len(MAGIC) + 4 + len(header))
+        for name, dtype in _COLUMNS:
+            table[name] = {"dtype": dtype, "offset": pos, "nbytes": len(columns[name])}
+            pos = _align(pos + len(columns[name]))
+        header = json.dumps({"version": FORMAT_VERSION, "count": count, "columns": table},
+                            separators=(",", ":")).encode("utf-8")
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name in table:
+            f.write(b"\0" * (table[name]["offset"] - f.tell()))
+            f.write(columns[name])
+    os.replace(tmp, path)
+
+
+def read_legacy(path: str) -> Dict[str, List[Any]]:
+    """The JSON trace format: a list of {"token", "prob"[, "token_id" | "id"]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    tokens: List[str] = []
+    probs: List[float] = []
+    ids: List[Optional[int]] = []
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and "prob" in entry:
+            tokens.append(str(entry.get("token", "")))
+            probs.append(float(entry["prob"]))
+            token_id = entry.get("token_id", entry.get("id"))
+            ids.append(token_id if isinstance(token_id, int) else None)
+    return {"tokens": tokens, "probs": probs, "token_ids": ids}
+
+
+def convert(json_path: str, out_path: Optional[str] = None) -> str:
+    if out_path is None:
+        base = json_path[:-len(LEGACY_SUFFIX)] if json_path.endswith(LEGACY_SUFFIX) else json_path
+        out_path = base + TRACE_SUFFIX
+    legacy = read_legacy(json_path)
+    write_trace(out_path, legacy["tokens"], legacy["probs"], legacy["token_ids"])
+    return out_path
+
+
+# --- Reading -----------------------------------------------------------------------------
+
+class Trace:
+    """
+    A memory-mapped trace. `prob` and `syntax` are NumPy views over the file
+    (plain lists without NumPy); tokens are decoded only when asked for.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a logits trace")
+        (hlen,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(self._map[start:start + hlen]))
+        if header.get("version") != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported trace version {header.get('version')}")
+        self.count: int = header["count"]
+        self._columns: Dict[str, Dict[str, Any]] = header["columns"]
+        self.prob = self._column("prob")
+        self.syntax = self._column("syntax")
+
+    @classmethod
+    def from_legacy(cls, path: str) -> "Trace":
+        """An in-memory Trace over a .logits.json (not converted on disk)."""
+        legacy = read_legacy(path)
+        self = cls.__new__(cls)
+        self.path, self._map, self.count = path, None, len(legacy["tokens"])
+        self._tokens = legacy["tokens"]
+        self._ids = [-1 if i is None else i for i in legacy["token_ids"]]
+        mask = [1 if is_syntax(t) else 0 for t in legacy["tokens"]]
+        if np is not None:
+            self.prob = np.asarray(legacy["probs"], dtype="<f2")
+            self.syntax = np.asarray(mask, dtype="|u1")
+        else:
+            self.prob = [round_f16(p) for p in legacy["probs"]]
+            self.syntax = mask
+        return self
+
+    def _column(self, name: str):
+        col = self._columns[name]
+        dtype = col["dtype"]
+        n = col["nbytes"] // struct.calcsize(_STRUCT[dtype])
+        if np is not None:
+            return np.frombuffer(self._map, dtype=dtype, count=n, offset=col["offset"])
+        return [v for (v,) in struct.iter_unpack("<" + _STRUCT[dtype],
+                                                  self._map[col["offset"]:col["offset"] + col["nbytes"]])]
+
+    def token(self, i: int) -> str:
+        if self._map is None:
+            return self._tokens[i]
+        start, end = struct.unpack_from("<II", self._map, self._columns["token_offsets"]["offset"] + 4 * i)
+        base = self._columns["token_bytes"]["offset"]
+        return bytes(self._map[base + start:base + end]).decode("utf-8")
+
+    def token_id(self, i: int) -> int:
+        if self._map is None:
+            return self._ids[i]
+        return struct.unpack_from("<i", self._map, self._columns["token_id"]["offset"] + 4 * i)[0]
+
+    def close(self) -> None:
+        # Drop the column views first: an mmap with exported buffers cannot close
+        self.prob = self.syntax = None
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = None
+
+    def __enter__(self) -> "Trace":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_trace(path: str) -> Trace:
+    return Trace.from_legacy(path) if path.endswith(LEGACY_SUFFIX) else Trace(path)
+
+
+def trace_for(output_path: str, exists=os.path.exists) -> Optional[str]:
+    """The trace belonging to a structured output, binary preferred."""
+    for suffix in (TRACE_SUFFIX, LEGACY_SUFFIX):
+        if exists(output_path + suffix):
+            return output_path + suffix
+    return None
+
+
+# --- Min-P -------------------------------------------------------------------------------
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """Linear interpolation, as numpy.quantile's default."""
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def minp_report(trace: Trace, threshold: float = MIN_P) -> Dict[str, Any]:
+    """
+    Confidence statistics over the value (non-syntax) tokens of one trace and
+    every token below `threshold`: {"tokens", "critical", "min", "mean",
+    "p05", "p50", "low", "examples": [(index, token, prob), ...]}.
+    """
+    cut = round_f16(threshold)
+    if np is not None:
+        critical = trace.prob[trace.syntax == 0].astype(np.float32)
+        low = np.flatnonzero((trace.syntax == 0) & (trace.prob < np.float16(cut)))
+        n, n_low = int(critical.size), int(low.size)
+        stats = {}
+        if n:
+            qs = np.quantile(critical, QUANTILES)
+            stats = {"min": float(critical.min()), "mean": float(critical.mean()),
+                     "p05": float(qs[0]), "p50": float(qs[1])}
+        first_low = [int(i) for i in low[:REPORT_LIMIT]]
+    else:
+        critical = [p for p, s in zip(trace.prob, trace.syntax) if not s]
+        low_idx = [i for i, (p, s) in enumerate(zip(trace.prob, trace.syntax)) if not s and p < cut]
+        n, n_low = len(critical), len(low_idx)
+        stats = {}
+        if n:
+            ordered = sorted(critical)
+            stats = {"min": ordered[0], "mean": sum(critical) / n,
+                     "p05": _quantile(ordered, QUANTILES[0]), "p50": _quantile(ordered, QUANTILES[1])}
+        first_low = low_idx[:REPORT_LIMIT]
+    return {
+        "tokens": trace.count, "critical": n, **stats, "low": n_low,
+        "examples": [(i, trace.token(i), float(trace.prob[i])) for i in first_low],
+    }
+
+
+def describe(path: str, report: Dict[str, Any]) -> str:
+    if not report["critical"]:
+        return f"{path}: {report['tokens']} tokens, no value tokens"
+    return (f"{path}: {report['critical']}/{report['tokens']} value tokens, "
+            f"min={report['min']:.3f} mean={report['mean']:.3f} "
+            f"p05={report['p05']:.3f} p50={report['p50']:.3f}, {report['low']} below threshold")
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Columnar logits traces (C170).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    conv = sub.add_parser("convert", help=f"write {TRACE_SUFFIX} next to each {LEGACY_SUFFIX}")
+    conv.add_argument("paths", nargs="+")
+    conv.add_argument("--remove", action="store_true", help="delete the JSON trace once converted")
+    stats = sub.add_parser("stats", help="Min-P statistics for traces")
+    stats.add_argument("paths", nargs="+")
+    stats.add_argument("--threshold", type=float, default=MIN_P)
+    stats.add_argument("--json", action="store_true")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    if args.cmd == "convert":
+        for path in args.paths:
+            try:
+                out = convert(path)
+            except (OSError, ValueError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                return 1
+            if args.remove:
+                os.remove(path)
+            print(f"{path} -> {out}")
+        return 0
+
+    reports = {}
+    for path in args.paths:
+        try:
+            with open_trace(path) as trace:
+                reports[path] = minp_report(trace, args.threshold)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            return 1
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for path, report in reports.items():
+            print(describe(path, report))
+    return 1 if any(r["low"] for r in reports.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# policy_compiler.py — one validated, cached model of the policy pack per run
+"""
+Resolves the three policy sources into a single normalized model:
+
+  compliance.yaml  the capsule's check pack (defaults, optional_dir_flags, checks)
+  director.yaml    the project's m4nd8_pro/director.yaml (boundaries, allowlists);
+                   the worker-log line_contract comes from the capsule's director
+  manifest.yaml    first of m4nd8_pro/manifest.yaml, manifest.yaml
+
+The model is written to _logs/policy.compiled.json, keyed on the content hash
+of every candidate source (and of this compiler), so an unchanged pack costs
+one json.load instead of three YAML parses. Sentinel exports the path in
+M4ND8_POLICY; inline scripts read it instead of re-locating the manifest:
+
+    import os, sys
+    sys.path.insert(0, os.environ["M4ND8_BIN"]); from policy_compiler import load_from_env
+    if not load_from_env()["features"].get("ui"): sys.exit(0)
+"""
+import hashlib
+import json
+import os
+import shlex
+from typing import Any, Dict, List, Optional
+
+POLICY_ENV = "M4ND8_POLICY"
+COMPILED_PATH = os.path.join("_logs", "policy.compiled.json")
+MODEL_VERSION = 3
+MANIFEST_PATHS = ("m4nd8_pro/manifest.yaml", "manifest.yaml")
+PROJECT_DIRECTOR_PATH = "m4nd8_pro/director.yaml"
+SEVERITIES = frozenset({"critical", "high", "medium", "low"})
+LEGACY_TYPES = {"file_verification": "target", "runtime_verification": "command"}
+
+
+class PolicyError(Exception):
+    """The policy pack does not compile; every problem found is listed."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+def _sha_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _load_yaml(path: Optional[str]) -> Any:
+    if path is None:
+        return None
+    import yaml
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def source_key(compliance_path: str, contract_director_path: str) -> Dict[str, Any]:
+    """Hash of every file the model could be built from, present or not."""
+    candidates = [compliance_path, contract_director_path, PROJECT_DIRECTOR_PATH, *MANIFEST_PATHS,
+                  os.path.abspath(__file__)]
+    hashes = {p: _sha_file(p) for p in candidates}
+    key = hashlib.sha256(json.dumps([MODEL_VERSION, hashes], sort_keys=True).encode()).hexdigest()
+    return {"key": key, "hashes": hashes}
+
+
+# --- Normalization & validation ----------------------------------------------------------
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def normalize_check(chk: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(chk)
+    out["id"] = str(chk.get("id") or chk.get("name") or "")
+    for key in ("after", "inputs", "tools", "manifest_keys"):
+        if key in out:
+            out[key] = [str(v) for v in _as_list(out[key])]
+    if out.get("blocking") and not out.get("severity"):
+        out["severity"] = "critical"
+    if "timeout_sec" in out:
+        out["timeout_sec"] = int(out["timeout_sec"])
+    return out
+
+
+def validate_checks(checks: List[Dict[str, Any]]) -> List[str]:
+    from detectors import PRIMITIVES
+    import scheduler
+
+    problems, seen = [], set()
+    keys = {c["id"] for c in checks} | {scheduler.check_key(c) for c in checks}
+    for n, chk in enumerate(checks):
+        where = chk["id"] or f"checks[{n}]"
+        if not chk["id"]:
+            problems.append(f"{where}: missing id")
+        elif chk["id"] in seen:
+            problems.append(f"{where}: duplicate id")
+        seen.add(chk["id"])
+        if chk.get("severity") is not None and chk["severity"] not in SEVERITIES:
+            problems.append(f"{where}: unknown severity {chk['severity']!r}")
+        if "applies_if" in chk and not (chk["applies_if"] or {}).get("feature"):
+            problems.append(f"{where}: applies_if needs a feature")
+        for ref in chk.get("after", []):
+            if ref not in keys:
+                problems.append(f"{where}: after references unknown check {ref}")
+        kind = chk.get("type")
+        if kind is not None:
+            if kind not in LEGACY_TYPES:
+                problems.append(f"{where}: unknown type {kind!r}")
+            elif LEGACY_TYPES[kind] not in chk:
+                problems.append(f"{where}: type {kind} needs {LEGACY_TYPES[kind]!r}")
+            continue
+        detect = chk.get("detect")
+        if detect is None and "script" not in chk:
+            problems.append(f"{where}: no detect block")
+        elif detect is not None and not isinstance(detect, dict):
+            problems.append(f"{where}: detect must be a mapping")
+        elif detect:
+            for key in detect:
+                if key not in PRIMITIVES and key != "manual":
+                    problems.append(f"{where}: unknown detect primitive {key!r}")
+    if not problems:
+        try:
+            scheduler.resolve_dependencies(checks)
+        except ValueError as e:
+            problems.append(str(e))
+    return problems
+
+
+def _verification_target(manifest: Dict[str, Any]) -> Optional[str]:
+    vt = manifest.get("verification_target")
+    if isinstance(vt, (list, tuple)):
+        return " ".join(shlex.quote(str(x)) for x in vt)
+    return vt if isinstance(vt, str) and vt.strip() else None
+
+
+def compile_policy(compliance_path: str, contract_director_path: str) -> Dict[str, Any]:
+    """Parse, normalize and validate the pack; raises PolicyError listing every problem."""
+    problems = []
+    pack = _load_yaml(compliance_path) or {}
+    contract_director = _load_yaml(contract_director_path) or {}
+    director_path = PROJECT_DIRECTOR_PATH if os.path.isfile(PROJECT_DIRECTOR_PATH) else None
+    director = _load_yaml(director_path) or {}
+    manifest_path = next((p for p in MANIFEST_PATHS if os.path.isfile(p)), None)
+    manifest = _load_yaml(manifest_path) or {}
+
+    if not isinstance(manifest, dict):
+        problems.append(f"{manifest_path}: manifest must be a mapping")
+        manifest = {}
+    features = manifest.get("features") or {}
+    if not isinstance(features, dict):
+        problems.append(f"{manifest_path}: features must be a mapping")
+        features = {}
+    checks = [normalize_check(c) for c in pack.get("checks") or []]
+    problems += validate_checks(checks)
+    if problems:
+        raise PolicyError(problems)
+
+    environment = director.get("environment") or {}
+    logs = (contract_director.get("environment") or {}).get("logs") or {}
+    return {
+        "version": MODEL_VERSION,
+        "paths": {
+            "compliance": compliance_path,
+            "contract_director": contract_director_path,
+            "director": director_path,
+            "manifest": manifest_path,
+        },
+        "manifest": manifest,
+        "features": {k: bool(v) for k, v in features.items()},
+        "verification_target": _verification_target(manifest),
+        "director": director,
+        "filesystem_boundary": list((director.get("budgets") or {}).get("io", {}).get("filesystem_boundary") or []),
+        "network_allowlist": list((environment.get("io_policies") or {}).get("network_allowlist") or []),
+        "line_contract": logs.get("line_contract") or {},
+        "defaults": pack.get("defaults") or {},
+        "optional_dir_flags": pack.get("optional_dir_flags") or {},
+        "checks": checks,
+    }
+
+
+# --- Cached artifact ---------------------------------------------------------------------
+
+def load_or_compile(compliance_path: str, contract_director_path: str,
+                    path: str = COMPILED_PATH) -> Dict[str, Any]:
+    """The compiled model, rebuilt only when a source (or the compiler) changed."""
+    src = source_key(compliance_path, contract_director_path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == src["key"]:
+            return cached["model"]
+    except (OSError, ValueError):
+        pass
+    model = compile_policy(compliance_path, contract_director_path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"key": src["key"], "sources": src["hashes"], "model": model}, f, default=str)
+    os.replace(tmp, path)
+    return model
+
+
+def load_from_env() -> Dict[str, Any]:
+    """The model sentinel compiled for this run (used by inline scripts)."""
+    with open(os.environ[POLICY_ENV], "r", encoding="utf-8") as f:
+        return json.load(f)["model"]
@@ -0,0 +1,226 @@
+# result_cache.py — content-addressed cache of passing check results
+"""
+A passing check is replayed from cache when its key is unchanged. The key
+hashes four things:
+
+  1. the check definition itself (the compliance.yaml entry),
+  2. the manifest features it reads (applies_if, manifest.* in conditions),
+  3. the content of its input files,
+  4. tool versions (Python, the detector engine and the capsule policy data
+     it reads, anything in `tools:`).
+
+Input files come from the detect primitives themselves (files_exist paths,
+file_contains file, grep paths, ...) plus an explicit `inputs:` glob list.
+Shell scripts are opaque, so a script check is only cacheable when it
+declares `inputs:`. `cache: false` opts a check out entirely.
+
+File hashes are memoized on (size, mtime) so an unchanged tree costs no
+reads. The store lives in .m4nd8/data/sentinel_cache.json.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+from fs_index import FileIndex
+from log_store import LOG_GLOB
+
+CACHE_VERSION = 1
+_MANIFEST_REF = re.compile(r"manifest\.([\w.]+)")
+_ENGINE_MODULES = ("cofo_journal.py", "contrast.py", "detectors.py", "fs_index.py", "hub_graph.py", "log_store.py",
+                   "logits_trace.py", "policy_compiler.py", "provenance.py", "result_cache.py",
+                   "secret_scan.py", "semantic_entropy.py", "watermark.py")
+# Capsule policy data the engine modules read beside compliance.yaml (contrast.py: ui_gate.yaml)
+_ENGINE_DATA = (os.path.join(os.pardir, "policy", "ui_gate.yaml"),)
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _canonical(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def declared_inputs(chk: Dict[str, Any]) -> Optional[List[str]]:
+    """Input globs for a check, or None when its inputs cannot be known."""
+    if chk.get("cache") is False or chk.get("type") == "runtime_verification":
+        return None
+    inputs = list(chk.get("inputs") or [])
+    if chk.get("type") == "file_verification":
+        return inputs + [chk["target"]]
+    detect = chk.get("detect") or {}
+    if not detect or detect.get("manual"):
+        return None
+    for key, spec in detect.items():
+        if key in ("files_exist", "any_files_exist"):
+            inputs.extend(spec)
+        elif key == "file_nonempty":
+            inputs.append(spec)
+        elif key in ("file_contains", "file_regex_absent"):
+            inputs.append(spec["file"])
+        elif key in ("grep_absent", "grep_present"):
+            inputs.extend(spec.get("paths") or [])
+        elif key == "multi_grep_sequence":
+            inputs.append(spec["file_glob"])
+        elif key in ("log_event_present", "log_event_sequence"):
+            inputs.append(LOG_GLOB)
+        elif key == "condition":
+            inputs.extend(re.findall(r'(?:exists|contains)\("([^"]+)"', spec))
+        elif key == "script" and "inputs" not in chk:
+            return None
+    return inputs
+
+
+def manifest_features(chk: Dict[str, Any], manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """The slice of manifest.yaml this check depends on."""
+    refs = set()
+    if "applies_if" in chk:
+        refs.add("features." + chk["applies_if"]["feature"])
+    cond = (chk.get("detect") or {}).get("condition")
+    if cond:
+        refs.update(_MANIFEST_REF.findall(cond))
+    refs.update(chk.get("manifest_keys") or [])
+    out = {}
+    for ref in sorted(refs):
+        cur: Any = manifest
+        for part in ref.split("."):
+            cur = cur.get(part) if isinstance(cur, dict) else None
+        out[ref] = cur
+    return out
+
+
+class ResultCache:
+    """Thread-safe persistent cache shared by all workers in one sentinel run."""
+
+    def __init__(self, path: str, index: FileIndex):
+        self.path = path
+        self.index = index
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._tool_versions: Dict[str, str] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                raise ValueError("stale cache format")
+        except (OSError, ValueError):
+            data = {}
+        self._results: Dict[str, Dict[str, Any]] = data.get("results", {})
+        self._files: Dict[str, List[Any]] = data.get("files", {})
+        self._engine = self._engine_hash()
+
+    # --- Key derivation ------------------------------------------------------------
+
+    def _engine_hash(self) -> str:
+        here = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha256(sys.version.encode())
+        for name in _ENGINE_MODULES + _ENGINE_DATA:
+            try:
+                with open(os.path.join(here, name), "rb") as f:
+                    h.update(f.read())
+            except OSError:
+                pass
+        return h.hexdigest()
+
+    def _file_hash(self, path: str) -> str:
+        st = self.index.stat(path)
+        if st is None:
+            try:
+                s = os.stat(path)
+            except OSError:
+                return "missing"
+            if os.path.isdir(path):
+                return "dir"
+            st = (s.st_size, s.st_mtime)
+        with self._lock:
+            memo = self._files.get(path)
+        if memo and memo[0] == st[0] and memo[1] == st[1]:
+            return memo[2]
+        h = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        except OSError:
+            return "unreadable"
+        digest = h.hexdigest()
+        with self._lock:
+            self._files[path] = [st[0], st[1], digest]
+            self._dirty = True
+        return digest
+
+    def _tool_version(self, tool: str) -> str:
+        if tool not in self._tool_versions:
+            exe = shutil.which(tool)
+            if exe is None:
+                version = "absent"
+            else:
+                try:
+                    proc = subprocess.run([exe, "--version"], capture_output=True, text=True, timeout=10)
+                    version = (proc.stdout or proc.stderr).strip()
+                except (OSError, subprocess.TimeoutExpired):
+                    version = "unknown"
+            self._tool_versions[tool] = version
+        return self._tool_versions[tool]
+
+    def key_for(self, chk: Dict[str, Any], manifest: Dict[str, Any],
+                index: Optional[FileIndex] = None) -> Optional[str]:
+        """Cache key for a check, or None when it is not cacheable.
+
+        `index` is the snapshot the check will actually see (a diff-scoped subset
+        under --since), so scoped and full runs never share an entry.
+        """
+        inputs = declared_inputs(chk)
+        if inputs is None:
+            return None
+        index = index or self.index
+        files = {}
+        for pattern in inputs:
+            matches = index.glob(pattern) if any(c in pattern for c in "*?[{") or pattern.endswith("/") else [pattern]
+            if not matches:
+                files[pattern] = "missing"
+            for p in matches:
+                files[p] = self._file_hash(p)
+        parts = {
+            "definition": _sha(_canonical(chk)),
+            "features": _sha(_canonical(manifest_features(chk, manifest))),
+            "files": _sha(_canonical(files)),
+            "tools": _sha(_canonical([self._engine] + [self._tool_version(t) for t in chk.get("tools") or []])),
+        }
+        return _sha(_canonical(parts))
+
+    # --- Lookup / store --------------------------------------------------------------
+
+    def lookup(self, check_id: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._results.get(check_id)
+        if entry and entry.get("key") == key:
+            return {"status": "pass", "output": entry.get("output", ""), "returncode": 0, "cached": True}
+        return None
+
+    def store(self, check_id: str, key: str, result: Dict[str, Any]) -> None:
+        if result["status"] != "pass":
+            with self._lock:
+                self._dirty |= self._results.pop(check_id, None) is not None
+            return
+        with self._lock:
+            self._results[check_id] = {"key": key, "output": result.get("output", "")}
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": CACHE_VERSION, "results": self._results, "files": self._files}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp, self.path)
@@ -0,0 +1,265 @@
+# secret_scan.py — parallel secret scanner behind C100.no_secrets_in_code
+"""
+Scans project files for credentials and reports every finding as
+file:line:col with the rule that matched.
+
+  * All rules are compiled into one alternation per file kind, so each file
+    is searched in a single pass.
+  * Small files are read whole; files over MMAP_THRESHOLD are mmapped.
+    Files with a NUL byte in their first block are treated as binary and skipped.
+  * Files are scanned on a process pool (regex matching holds the GIL).
+  * Results are cached per file, keyed by content hash and rule fingerprint, in
+    _logs/secret_scan_cache.json; (size, mtime) short-circuits the re-hash.
+
+Prose (.md) is only checked against the token-format rules; the generic
+`password = "..."` assignment rule applies to code and config, where it means
+something. Config (.env, YAML) values need no quotes, so there the rule also
+takes a bare value up to the end of the line: `DB_PASSWORD=...`, `password: ...`.
+A line containing `m4nd8: allow-secret` is never reported.
+
+Usage (sentinel exports M4ND8_FS_INDEX, so --since scoping applies):
+    python .m4nd8/bin/secret_scan.py [--json] [-j N] [--no-cache] [GLOB ...]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from fs_index import FileIndex, INDEX_ENV, load_from_env
+
+DEFAULT_GLOBS = ["**/*.{py,js,ts,md,env,yaml,yml}", "**/.env", "**/.env.*"]
+CACHE_PATH = os.path.join("_logs", "secret_scan_cache.json")
+MMAP_THRESHOLD = 4 << 20
+SNIFF_BYTES = 8192
+# Below this many uncached files the pool costs more than it saves.
+PARALLEL_MIN_FILES = 64
+ALLOW_MARKER = b"m4nd8: allow-secret"
+PROSE_EXTS = frozenset({".md"})
+CONFIG_EXTS = frozenset({".env", ".yaml", ".yml"})
+ALL_KINDS = frozenset({"prose", "code", "config"})
+
+_SECRET_KEY = rb"(?i:api[_-]?key|passw(?:or)?d|secret|token|private[_-]?key|access[_-]?key)[\w-]*"
+# (name, leading bytes, pattern, file kinds). Patterns are bytes regexes with no
+# named groups; every match must start with one of the leading bytes. The
+# assignment rules capture the value as group 1.
+RULES: List[Tuple[str, bytes, bytes, FrozenSet[str]]] = [
+    ("private_key", b"-", rb"-----BEGIN (?:[A-Z0-9]+ )*PRIVATE KEY-----", ALL_KINDS),
+    ("aws_access_key_id", b"A", rb"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", ALL_KINDS),
+    ("aws_secret_access_key", b"Aa",
+     rb"(?i:aws_?secret_?access_?key)[\"']?\s*[:=]\s*[\"']?[A-Za-z0-9/+=]{40}\b", ALL_KINDS),
+    ("github_token", b"g", rb"\bgh[pousr]_[A-Za-z0-9]{36,}\b", ALL_KINDS),
+    ("slack_token", b"x", rb"\bxox[abprs]-[A-Za-z0-9-]{10,}", ALL_KINDS),
+    ("google_api_key", b"A", rb"\bAIza[0-9A-Za-z_\-]{35}", ALL_KINDS),
+    ("stripe_live_key", b"rs", rb"\b[rs]k_live_[0-9A-Za-z]{24,}", ALL_KINDS),
+    ("openai_api_key", b"s", rb"\bsk-(?:proj-)?[A-Za-z0-9_\-]{32,}", ALL_KINDS),
+    ("jwt", b"e", rb"\beyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}", ALL_KINDS),
+    ("generic_secret_assignment", b"AaPpSsTt",
+     _SECRET_KEY + rb"[\"']?\s*[:=]\s*[\"']([^\"'\s]{8,})[\"']", frozenset({"code", "config"})),
+    # Bare value to the end of the line (or a comment); env/YAML references,
+    # anchors, tags and paths are not values.
+    ("unquoted_secret_assignment", b"AaPpSsTt",
+     _SECRET_KEY + rb"[ \t]*[:=][ \t]*([^\s\"'#/.~$!&*|>{\[][^\s\"'#]{7,})(?![^\s])", frozenset({"config"})),
+]
+_ASSIGNMENT_RULES = frozenset({"generic_secret_assignment", "unquoted_secret_assignment"})
+# A captured value that looks like a template or example is not a secret, nor
+# is a short word-only value such as a design-token reference ("focus/outline").
+_PLACEHOLDER = re.compile(
+    rb"(?i)^(?:.*(?:\$\{|\{\{|<[^>]*>|example|changeme|placeholder|dummy|your[_-]|redacted|xxxx).*|(.)\1+)$")
+_WORDY = re.compile(rb"^[A-Za-z/._-]{1,19}$")
+
+_SINGLE = {name: re.compile(pat) for name, _, pat, _ in RULES}
+_COMBINED: Dict[str, "re.Pattern[bytes]"] = {}
+
+
+def rules_fingerprint() -> str:
+    h = hashlib.sha256()
+    for name, lead, pat, kinds in RULES:
+        h.update(name.encode() + b"\0" + lead + b"\0" + pat + b"\0" + ",".join(sorted(kinds)).encode())
+    h.update(_PLACEHOLDER.pattern + _WORDY.pattern + ALLOW_MARKER)
+    return h.hexdigest()
+
+
+def file_kind(path: str) -> str:
+    """prose, config or code: which rules apply to the file."""
+    name = os.path.basename(path).lower()
+    ext = os.path.splitext(name)[1]
+    if ext in PROSE_EXTS:
+        return "prose"
+    if ext in CONFIG_EXTS or name == ".env" or name.startswith(".env."):
+        return "config"
+    return "code"
+
+
+def combined_pattern(kind: str) -> "re.Pattern[bytes]":
+    """
+    One alternation of every rule for this file kind, each wrapped in a group
+    named after it. A lookahead on the union of leading bytes lets the engine
+    reject most positions before trying any branch.
+    """
+    if kind not in _COMBINED:
+        rules = [r for r in RULES if kind in r[3]]
+        lead = b"".join(sorted({bytes([c]) for _, ld, _, _ in rules for c in ld}))
+        parts = [b"(?P<%s>%s)" % (name.encode(), pat) for name, _, pat, _ in rules]
+        _COMBINED[kind] = re.compile(b"(?=[" + re.escape(lead) + b"])(?:" + b"|".join(parts) + b")")
+    return _COMBINED[kind]
+
+
+def _redact(value: bytes) -> str:
+    text = value.decode("utf-8", "replace")
+    return text[:4] + "…" if len(text) > 4 else "…"
+
+
+def scan_buffer(path: str, data, kind: str) -> List[Dict[str, Any]]:
+    """All findings in `data` (bytes or mmap), with 1-based line and column."""
+    findings = []
+    line, last = 1, 0
+    for m in combined_pattern(kind).finditer(data):
+        rule = m.lastgroup
+        if rule in _ASSIGNMENT_RULES:
+            value = _SINGLE[rule].match(m.group()).group(1)
+            if _PLACEHOLDER.match(value) or _WORDY.match(value):
+                continue
+        start = m.start()
+        line += data[last:start].count(b"\n")  # slices work for bytes and mmap alike
+        last = start
+        bol = data.rfind(b"\n", 0, start) + 1
+        eol = data.find(b"\n", start)
+        if ALLOW_MARKER in data[bol:eol if eol != -1 else len(data)]:
+            continue
+        findings.append({"file": path, "line": line, "col": start - bol + 1,
+                         "rule": rule, "match": _redact(m.group())})
+    return findings
+
+
+def scan_file(path: str, known_sha: Optional[str] = None) -> Dict[str, Any]:
+    """Scan one file. Returns {"sha", "findings"} or {"sha", "reuse": True} when the hash is known."""
+    kind = file_kind(path)
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            if b"\0" in head:
+                return {"sha": None, "binary": True, "findings": []}
+            size = os.fstat(f.fileno()).st_size
+            if size > MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    sha = hashlib.sha256(mm).hexdigest()
+                    if sha == known_sha:
+                        return {"sha": sha, "reuse": True}
+                    return {"sha": sha, "findings": scan_buffer(path, mm, kind)}
+            data = head + f.read()
+    except (OSError, ValueError) as e:
+        return {"sha": None, "error": str(e), "findings": []}
+    sha = hashlib.sha256(data).hexdigest()
+    if sha == known_sha:
+        return {"sha": sha, "reuse": True}
+    return {"sha": sha, "findings": scan_buffer(path, data, kind)}
+
+
+def _scan_batch(batch: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, Dict[str, Any]]]:
+    return [(p, scan_file(p, sha)) for p, sha in batch]
+
+
+class ScanCache:
+    """path → [size, mtime, sha, findings]; dropped wholesale when the rules change."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.fingerprint = rules_fingerprint()
+        self.files: Dict[str, List[Any]] = {}
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("rules") == self.fingerprint:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError):
+                pass
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"rules": self.fingerprint, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+def scan(paths: List[str], index: FileIndex, cache: ScanCache, jobs: int = 1) -> Dict[str, Any]:
+    """Scan `paths`, reusing cached results; returns findings plus run statistics."""
+    stats = {"scanned": 0, "cached": 0, "binary": 0, "errors": []}
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    todo: List[Tuple[str, Optional[str]]] = []
+    for p in paths:
+        st = index.stat(p)
+        memo = cache.files.get(p)
+        if memo and st and memo[0] == st[0] and memo[1] == st[1]:
+            results[p] = memo[3]
+            stats["cached"] += 1
+        else:
+            todo.append((p, memo[2] if memo else None))
+
+    if jobs > 1 and len(todo) >= PARALLEL_MIN_FILES:
+        size = max(1, len(todo) // (jobs * 4))
+        batches = [todo[i:i + size] for i in range(0, len(todo), size)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            done = [item for chunk in pool.map(_scan_batch, batches) for item in chunk]
+    else:
+        done = _scan_batch(todo)
+
+    for p, res in done:
+        if res.get("error"):
+            stats["errors"].append(f"{p}: {res['error']}")
+            continue
+        st = index.stat(p) or (0, 0)
+        if res.get("binary"):
+            stats["binary"] += 1
+            cache.files[p] = [st[0], st[1], None, []]
+            results[p] = []
+            continue
+        if res.get("reuse"):
+            findings = cache.files[p][3]
+            stats["cached"] += 1
+        else:
+            findings = res["findings"]
+            stats["scanned"] += 1
+        cache.files[p] = [st[0], st[1], res["sha"], findings]
+        results[p] = findings
+
+    findings = [f for p in sorted(results) for f in results[p]]
+    return {"findings": findings, **stats}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scan project files for committed secrets.")
+    parser.add_argument("globs", nargs="*", default=DEFAULT_GLOBS)
+    parser.add_argument("--json", action="store_true", help="print one JSON report instead of text")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    index = load_from_env() if os.environ.get(INDEX_ENV) else FileIndex.build(".")
+    paths = sorted({p for g in args.globs for p in index.glob(g)})
+    cache = ScanCache(None if args.no_cache else CACHE_PATH)
+    report = scan(paths, index, cache, jobs=args.jobs)
+    cache.save()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for f in report["findings"]:
+            print(f"{f['file']}:{f['line']}:{f['col']}: {f['rule']} ({f['match']})")
+        for err in report["errors"]:
+            print(f"unreadable: {err}", file=sys.stderr)
+        if not report["findings"]:
+            print(f"OK ({len(paths)} files, {report['cached']} cached)")
+    return 1 if report["findings"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
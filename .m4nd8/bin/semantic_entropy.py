@@ -0,0 +1,303 @@
+# semantic_entropy.py — batched semantic-entropy scoring behind C171.semantic_entropy_monitor
+"""
+Semantic entropy (Pillar M): sample N generations per prompt, cluster them
+by meaning, and take the entropy of the cluster distribution. Rephrasings
+of one answer land in one cluster (low entropy); answers that disagree on
+the facts spread over many (high entropy, hallucination risk).
+
+Eval batches are JSON lines, one prompt per line:
+
+    {"prompt_id": "q17", "samples": ["Paris", "paris.", "Lyon"], "logprobs": [-0.2, -0.4, -2.1]}
+
+`logprobs` (sequence log-likelihoods) is optional, per prompt. Without it
+(or with one per sample missing) that prompt's samples weigh the same; with
+it a cluster's mass is the sum of its samples' probabilities, normalized per
+prompt. A prompt scores the same whatever else is in its batch.
+
+Equivalence is pluggable:
+  * a key function (text → hashable): samples with equal keys are one
+    cluster, found with one dict lookup per sample. `normalized` (the
+    default: NFKC, casefold, punctuation/articles/number formatting
+    dropped) and `bag` (order-insensitive word set) are built in;
+  * a pairwise predicate (a, b → bool) marked with @pairwise, e.g. an NLI
+    model: each sample is compared with one representative per cluster.
+A dotted `module:function` names either kind from the CLI or the manifest.
+
+Clustering is per sample; the entropy itself is computed for a whole chunk
+of prompts at once with NumPy bincounts (pure Python without NumPy).
+
+    python .m4nd8/bin/semantic_entropy.py score eval.samples.jsonl [--threshold 1.0] [--json]
+"""
+import argparse
+import functools
+import importlib
+import json
+import math
+import re
+import sys
+import unicodedata
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # per-prompt loops instead of bincounts
+    np = None
+
+SAMPLES_GLOB = "**/*.samples.jsonl"
+# Nats. ln 2 ≈ 0.69 is an even two-way split; with 10 samples, 2.30 means no two agree.
+SE_THRESHOLD = 1.0
+CHUNK_PROMPTS = 4096
+# Highest-entropy prompts listed per batch (the count is always complete).
+REPORT_LIMIT = 5
+
+_PUNCT = re.compile(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_TRAILING_ZEROS = re.compile(r"\b(\d+)\.0+\b")
+_ARTICLES = re.compile(r"\b(?:a|an|the)\b")
+_WS = re.compile(r"\s+")
+
+
+# --- Equivalence -------------------------------------------------------------------------
+
+def pairwise(fn: Callable[[str, str], bool]) -> Callable[[str, str], bool]:
+    """Mark `fn(a, b) -> bool` as a pairwise equivalence rather than a key function."""
+    fn.pairwise = True
+    return fn
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def normalized_key(text: str) -> str:
+    """Surface form only: `The answer is 1,000.` and `the answer is 1000` are equivalent."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _TRAILING_ZEROS.sub(r"\1", _THOUSANDS.sub("", text))
+    text = _ARTICLES.sub(" ", _PUNCT.sub(" ", text))
+    return _WS.sub(" ", text).strip()
+
+
+def bag_key(text: str) -> frozenset:
+    """Word set of the normalized text: word order and repetition do not matter."""
+    return frozenset(normalized_key(text).split())
+
+
+EQUIVALENCES: Dict[str, Callable] = {"normalized": normalized_key, "bag": bag_key}
+
+
+def resolve_equivalence(spec: Any) -> Callable:
+    """A built-in name, a `module:function` path, or a callable."""
+    if callable(spec):
+        return spec
+    if spec in EQUIVALENCES:
+        return EQUIVALENCES[spec]
+    module, sep, attr = str(spec).partition(":")
+    if not sep:
+        raise ValueError(f"unknown equivalence {spec!r} (built in: {', '.join(EQUIVALENCES)}; "
+                         f"or module:function)")
+    fn = getattr(importlib.import_module(module), attr)
+    if not callable(fn):
+        raise ValueError(f"{spec} is not callable")
+    return fn
+
+
+def cluster(samples: Sequence[str], equivalence: Callable = normalized_key) -> List[int]:
+    """Cluster index (0, 1, ... in order of first appearance) for every sample."""
+    if getattr(equivalence, "pairwise", False):
+        reps: List[str] = []
+        ids = []
+        for text in samples:
+            for cid, rep in enumerate(reps):
+                if text == rep or equivalence(rep, text):
+                    break
+            else:
+                cid = len(reps)
+                reps.append(text)
+            ids.append(cid)
+        return ids
+    seen: Dict[Hashable, int] = {}
+    return [seen.setdefault(equivalence(text), len(seen)) for text in samples]
+
+
+# --- Entropy -----------------------------------------------------------------------------
+
+def _entropies_numpy(sizes: List[int], cluster_ids: List[int], logprobs: Optional[List[float]]) -> List[float]:
+    """
+    `cluster_ids` are per-prompt cluster indexes of all samples, prompt after
+    prompt (`sizes` samples each). One bincount gives every cluster's mass,
+    a second the per-prompt entropy sums.
+    """
+    n_prompts = len(sizes)
+    sizes_a = np.asarray(sizes, dtype=np.int64)
+    prompt = np.repeat(np.arange(n_prompts), sizes_a)
+    local = np.asarray(cluster_ids, dtype=np.int64)
+    # Global cluster ids: offset each prompt's local ids by the clusters before it
+    n_clusters = np.zeros(n_prompts, dtype=np.int64)
+    np.maximum.at(n_clusters, prompt, local + 1)
+    first = np.concatenate(([0], np.cumsum(n_clusters)[:-1]))
+    gid = first[prompt] + local
+    if logprobs is None:
+        weight = np.ones(len(local))
+    else:
+        lp = np.asarray(logprobs, dtype=np.float64)
+        peak = np.full(n_prompts, -np.inf)
+        np.maximum.at(peak, prompt, lp)
+        weight = np.exp(lp - peak[prompt])  # stable: each prompt's best sample weighs 1
+    mass = np.bincount(gid, weights=weight, minlength=int(n_clusters.sum()))
+    cluster_prompt = np.repeat(np.arange(n_prompts), n_clusters)
+    total = np.bincount(prompt, weights=weight, minlength=n_prompts)
+    p = mass / total[cluster_prompt]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, -p * np.log(p), 0.0)
+    return np.bincount(cluster_prompt, weights=terms, minlength=n_prompts).tolist()
+
+
+def _entropies_python(sizes: List[int], cluster_ids: List[int], logprobs: Optional[List[float]]) -> List[float]:
+    out, pos = [], 0
+    for size in sizes:
+        ids = cluster_ids[pos:pos + size]
+        if logprobs is None or not size:
+            weights = [1.0] * size
+        else:
+            lp = logprobs[pos:pos + size]
+            peak = max(lp)
+            weights = [math.exp(v - peak) for v in lp]
+        pos += size
+        mass: Dict[int, float] = {}
+        for cid, w in zip(ids, weights):
+            mass[cid] = mass.get(cid, 0.0) + w
+        total = sum(weights) or 1.0
+        out.append(-sum(m / total * math.log(m / total) for m in mass.values() if m > 0))
+    return out
+
+
+def semantic_entropy(samples: Sequence[str], logprobs: Optional[Sequence[float]] = None,
+                     equivalence: Callable = normalized_key) -> float:
+    """Semantic entropy (nats) of one prompt's samples."""
+    if not samples:
+        return 0.0
+    return score_batch([{"samples": list(samples), "logprobs": logprobs}], equivalence)[0]["entropy"]
+
+
+def score_batch(records: Sequence[Dict[str, Any]], equivalence: Callable = normalized_key) -> List[Dict[str, Any]]:
+    """
+    Score a list of {"prompt_id", "samples"[, "logprobs"]}: prompt_id,
+    sample and cluster counts, entropy, and entropy / ln(samples).
+    """
+    sizes, ids = [], []
+    logprobs: Optional[List[float]] = []
+    weighted = False
+    for rec in records:
+        samples = rec.get("samples") or []
+        sizes.append(len(samples))
+        ids.extend(cluster(samples, equivalence))
+        lp = rec.get("logprobs")
+        if lp is not None and len(lp) == len(samples):
+            logprobs.extend(float(v) for v in lp)
+            weighted = True
+        else:
+            logprobs.extend([0.0] * len(samples))  # this prompt's samples weigh the same
+    if not weighted:
+        logprobs = None
+    entropies = (_entropies_numpy if np is not None else _entropies_python)(sizes, ids, logprobs) \
+        if ids else [0.0] * len(sizes)
+    out, pos = [], 0
+    for rec, size, h in zip(records, sizes, entropies):
+        n_clusters = max(ids[pos:pos + size], default=-1) + 1
+        pos += size
+        h = max(float(h), 0.0)
+        out.append({"prompt_id": rec.get("prompt_id"), "samples": size, "clusters": n_clusters,
+                    "entropy": h, "normalized": h / math.log(size) if size > 1 else 0.0})
+    return out
+
+
+def read_samples(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a .samples.jsonl; `generations` is accepted for `samples`."""
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{n}: {e}")
+            samples = rec.get("samples", rec.get("generations"))
+            if not isinstance(samples, list):
+                raise ValueError(f"{path}:{n}: no samples list")
+            rec["samples"] = [str(s) for s in samples]
+            rec.setdefault("prompt_id", n)
+            yield rec
+
+
+def score(records: Iterable[Dict[str, Any]], equivalence: Any = "normalized",
+          chunk: int = CHUNK_PROMPTS) -> Iterator[Dict[str, Any]]:
+    """Stream scores for any number of records, `chunk` prompts per vectorized pass."""
+    fn = resolve_equivalence(equivalence)
+    batch: List[Dict[str, Any]] = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= chunk:
+            yield from score_batch(batch, fn)
+            batch = []
+    if batch:
+        yield from score_batch(batch, fn)
+
+
+def summarize(path: str, scores: Iterable[Dict[str, Any]], threshold: float = SE_THRESHOLD) -> Dict[str, Any]:
+    """Batch report: prompt count, mean/max entropy, and every prompt above `threshold`."""
+    n, total, peak, above = 0, 0.0, 0.0, []
+    for s in scores:
+        n += 1
+        total += s["entropy"]
+        peak = max(peak, s["entropy"])
+        if s["entropy"] > threshold:
+            above.append(s)
+    above.sort(key=lambda s: -s["entropy"])
+    return {"path": path, "prompts": n, "mean": total / n if n else 0.0, "max": peak,
+            "threshold": threshold, "above": len(above), "worst": above[:REPORT_LIMIT]}
+
+
+def describe(report: Dict[str, Any]) -> str:
+    return (f"{report['path']}: {report['prompts']} prompts, mean SE={report['mean']:.3f} "
+            f"max={report['max']:.3f}, {report['above']} above {report['threshold']:g}")
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Semantic entropy of sampled generations.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sc = sub.add_parser("score", help="score .samples.jsonl batches")
+    sc.add_argument("paths", nargs="+")
+    sc.add_argument("--threshold", type=float, default=SE_THRESHOLD, help="nats (default: %(default)s)")
+    sc.add_argument("--equivalence", default="normalized",
+                    help=f"{' | '.join(EQUIVALENCES)} | module:function (default: %(default)s)")
+    sc.add_argument("--per-prompt", action="store_true", help="print every prompt's score as JSON lines")
+    sc.add_argument("--json", action="store_true")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    reports = []
+    try:
+        for path in args.paths:
+            scores = score(read_samples(path), args.equivalence)
+            if args.per_prompt:
+                scores = _echo(scores)
+            reports.append(summarize(path, scores, args.threshold))
+    except (OSError, ValueError, ImportError, AttributeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    elif not args.per_prompt:
+        for report in reports:
+            print(describe(report))
+            for s in report["worst"]:
+                print(f"  {s['prompt_id']}: SE={s['entropy']:.3f} ({s['clusters']} meanings in {s['samples']} samples)")
+    return 1 if any(r["above"] for r in reports) else 0
+
+
+def _echo(scores: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for s in scores:
+        print(json.dumps(s))
+        yield s
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,15 @@
 # sentinel_executor.py (run by CI or human before merge)
-import yaml
-import os, subprocess, sys
+import argparse
+import glob, os, subprocess, sys, time
+
+import detectors
+import scheduler
+from check_profile import Recorder
+from fs_index import FileIndex, INDEX_ENV, BIN_ENV, matches
+from log_store import LogStore, LOG_DB_ENV, LOG_GLOB
+from policy_compiler import (COMPILED_PATH, MANIFEST_PATHS, POLICY_ENV, PROJECT_DIRECTOR_PATH,
+                             PolicyError, load_or_compile)
+from result_cache import ResultCache, declared_inputs
 
 # Royal Path Resolver: locate director.yaml in Factory or Capsule
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,32 +24,296 @@ if config_path is None:
 # Derive policy root from director.yaml location
 policy_root = os.path.dirname(config_path)
 compliance_path = os.path.join(policy_root, "policy", "compliance.yaml")
+# Serialized FileIndex handed to inline scripts via $M4ND8_FS_INDEX
+index_path = os.path.join("_logs", "fs_index.json")
+# --since: diff-scoped snapshot for `scope: content` checks, plus the raw list
+scoped_index_path = os.path.join("_logs", "fs_index.changed.json")
+changed_list_path = os.path.join("_logs", "changed_files.txt")
+CHANGED_ENV = "M4ND8_CHANGED_FILES"
+# Worker-log events parsed against director.yaml's line_contract (see log_store.py)
+log_db_path = os.path.join("_logs", "events.db")
+# Content-hash cache of passing results (see result_cache.py)
+cache_path = os.path.join(policy_root, "data", "sentinel_cache.json")
+
+def check_name(chk):
+    """compliance.yaml keys checks by `id`; older packs used `name`."""
+    return chk.get("id") or chk.get("name") or "<unnamed>"
+
+def applies(chk, manifest):
+    if "applies_if" in chk:
+        cond = chk["applies_if"]
+        feature = cond["feature"]
+        return manifest.get("features", {}).get(feature, False)
+    return True
+
+def changed_files(ref):
+    """Files changed since `ref`: committed, staged, unstaged, untracked and deleted;
+    relative to the cwd (the project root), like the FileIndex."""
+    try:
+        diff = subprocess.run(["git", "diff", "--name-only", "--relative", ref],
+                              capture_output=True, text=True, check=True).stdout
+        untracked = subprocess.run(["git", "ls-files", "--others", "--exclude-standard"],
+                                   capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        sys.exit(f"HALT: cannot compute changes since {ref}: {getattr(e, 'stderr', '') or e}")
+    # sentinel's own artifacts are never part of the change under review
+    own = {os.path.relpath(os.path.normpath(cache_path)).replace(os.sep, "/")}
+    return sorted({p for p in (diff + untracked).splitlines()
+                   if p and p not in own and not p.startswith("_logs/")})
+
+def report(i, chk, result):
+    """Print one result; called by the scheduler in declaration order."""
+    name = check_name(chk)
+    status = result["status"]
+    if status == "skip":
+        print(f"Skipped: {name} (not applicable)")
+    elif status == "blocked":
+        print(f"Blocked: {name} ({result['output']})")
+    elif status == "cancelled":
+        print(f"Cancelled: {name}")
+    else:
+        print(f"Running check: {name}" + (" (cached)" if result.get("cached") else ""))
+        if status == "fail":
+            print(f"HALT: {name} failed\n{result['output']}")
+        elif status == "manual":
+            print(f"Manual: {name} ({result['output']})")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the compliance.yaml gate against this project.")
+    parser.add_argument("-j", "--jobs", type=int, default=min(8, os.cpu_count() or 1),
+                        help="checks to run concurrently (default: min(8, CPUs))")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore and do not update the result cache")
+    parser.add_argument("--since", metavar="REF",
+                        help="limit `scope: content` checks to files changed since REF")
+    parser.add_argument("--watch", action="store_true",
+                        help="stay running and re-check whatever a file change affects")
+    parser.add_argument("--interval", type=float, default=0.2, metavar="SEC",
+                        help="--watch polling interval (default: 0.2)")
+    parser.add_argument("--profile", action="store_true",
+                        help="also run in-process checks under cProfile (see check_profile.py)")
+    args = parser.parse_args(argv)
+    if args.watch and args.since:
+        parser.error("--watch and --since cannot be combined")
+    return args
+
+def load_policy():
+    """The compiled policy model (see policy_compiler.py); recompiled only when a source changed."""
+    try:
+        model = load_or_compile(compliance_path, config_path)
+    except PolicyError as e:
+        sys.exit(f"HALT: policy pack does not compile:\n{e}")
+    # Handed to inline scripts via $M4ND8_POLICY
+    os.environ[POLICY_ENV] = os.path.abspath(COMPILED_PATH)
+    return model
+
+def log_glob(model):
+    return model["defaults"].get("worker_log_glob", LOG_GLOB)
+
+def snapshot(index=None):
+    """One tree walk per gate; every check queries this snapshot."""
+    index = index or FileIndex.build(".")
+    os.environ[INDEX_ENV] = os.path.abspath(index.save(index_path))
+    return index
+
+def sync_logs(model, index):
+    """Append-only log ingest: only bytes written since the last run are parsed."""
+    store = LogStore(log_db_path, model["line_contract"])
+    try:
+        store.sync(index.glob(log_glob(model)))
+    finally:
+        store.close()
+    os.environ[LOG_DB_ENV] = os.path.abspath(log_db_path)
+
+def write_profile(recorder, verbose):
+    paths = recorder.write()
+    if not verbose:
+        return
+    print(f"Profile: {len(recorder.records)} checks -> {paths['records']}, trace {paths['trace']}")
+    for rec in recorder.slowest():
+        print(f"  {rec['wall_s']:8.3f}s wall {rec['cpu_s'] + rec['child_cpu_s']:8.3f}s cpu  {rec['check']}")
+    stats = recorder.stats()
+    if stats is not None:
+        print(f"In-process checks profiled -> {paths['profile']}")
+        stats.sort_stats("cumulative").print_stats(15)
+
+def make_runner(manifest, index, cache, scoped=None, scoped_env=None):
+    def run_one(chk, token):
+        if not applies(chk, manifest):
+            return {"status": "skip", "output": "", "returncode": 0}
+        view, env = index, None
+        if scoped is not None and chk.get("scope") == "content":
+            view, env = scoped, scoped_env
+        key = cache.key_for(chk, manifest, view) if cache else None
+        if key:
+            hit = cache.lookup(check_name(chk), key)
+            if hit:
+                return hit
+        result = detectors.run_check(chk, manifest, view, cancel=token, env=env)
+        if key:
+            cache.store(check_name(chk), key, result)
+        return result
+    return run_one
+
+def failing(checks, results):
+    return [scheduler.check_key(c) for c, r in zip(checks, results)
+            if r and r["status"] in ("fail", "blocked", "cancelled")]
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ[BIN_ENV] = base_dir
+    if args.watch:
+        sys.exit(watch(args))
+    model = load_policy()
+    manifest, checks = model["manifest"], model["checks"]
+    index = snapshot()
+    sync_logs(model, index)
+    cache = None if args.no_cache else ResultCache(cache_path, index)
+
+    # Diff-scoped mode: content checks see only the changed files; structural
+    # checks keep the full snapshot.
+    scoped, scoped_env = None, None
+    if args.since:
+        changed = changed_files(args.since)
+        with open(changed_list_path, "w", encoding="utf-8") as f:
+            f.write("".join(p + "\n" for p in changed))
+        os.environ[CHANGED_ENV] = os.path.abspath(changed_list_path)
+        scoped = index.subset(changed)
+        scoped_env = {INDEX_ENV: os.path.abspath(scoped.save(scoped_index_path))}
+        print(f"Diff scope: {len(changed)} file(s) changed since {args.since}")
+
+    recorder = Recorder(profile=args.profile)
+    run_one = recorder.wrap(make_runner(manifest, index, cache, scoped, scoped_env))
+    try:
+        results = scheduler.run_checks(checks, run_one, jobs=args.jobs, emit=recorder.wrap_emit(report))
+    finally:
+        if cache:
+            cache.save()
+        write_profile(recorder, args.profile)
+    if failing(checks, results):
+        sys.exit(1)
+
+# --- Watch mode -----------------------------------------------------------------------
+
+# Polls a burst of changes may keep a re-run waiting (see watch)
+SETTLE_POLLS = 5
+
+def _rel(path):
+    return os.path.relpath(os.path.normpath(path)).replace(os.sep, "/")
+
+def _noise(path):
+    """Tool droppings (.pytest_cache, __pycache__, editor swap files) never trigger a re-run."""
+    return any(part.startswith(".") or part == "__pycache__" for part in path.split("/"))
+
+def _log_stats(model):
+    out = {}
+    for p in glob.glob(log_glob(model)):
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        out[p.replace(os.sep, "/")] = (st.st_size, st.st_mtime)
+    return out
+
+def affected_checks(checks, changed):
+    """
+    Indices of checks whose declared inputs (result_cache.declared_inputs) match
+    a changed path, plus everything ordered `after:` them. Checks with unknown
+    inputs (scripts without `inputs:`, runtime verification) re-run on any
+    change; manual checks never do.
+    """
+    hit = set()
+    for i, chk in enumerate(checks):
+        if (chk.get("detect") or {}).get("manual"):
+            continue
+        inputs = declared_inputs(chk)
+        if inputs is None or any(matches(g, p) for g in inputs for p in changed):
+            hit.add(i)
+    deps = scheduler.resolve_dependencies(checks)
+    grew = True
+    while grew:
+        grew = False
+        for i, ds in enumerate(deps):
+            if i not in hit and any(d in hit for d in ds):
+                hit.add(i)
+                grew = True
+    return sorted(hit)
+
+def watch(args):
+    """Keep policy, index and cache warm; re-run only the checks a change affects."""
+    policy_files = {_rel(compliance_path), _rel(config_path), PROJECT_DIRECTOR_PATH, *MANIFEST_PATHS}
+    own = {_rel(cache_path), _rel(cache_path) + ".tmp"}
+    model = load_policy()
+    manifest, checks = model["manifest"], model["checks"]
+    index = snapshot()
+    sync_logs(model, index)
+    logs = _log_stats(model)
+    cache = None if args.no_cache else ResultCache(cache_path, index)
+    results = [None] * len(checks)
+    todo = list(range(len(checks)))
+    pending, pending_logs, busy = set(), set(), 0
+    print(f"Watching {len(index)} files ({len(checks)} checks); Ctrl-C to stop")
+    try:
+        while True:
+            if todo:
+                started = time.monotonic()
+                subset = [checks[i] for i in todo]
+                recorder = Recorder(profile=args.profile)
+                run_one = recorder.wrap(make_runner(manifest, index, cache))
+                emit = recorder.wrap_emit(report)
+                for i, res in zip(todo, scheduler.run_checks(subset, run_one, jobs=args.jobs, emit=emit)):
+                    results[i] = res
+                if cache:
+                    cache.save()
+                write_profile(recorder, args.profile)
+                bad = failing(checks, results)
+                verdict = f"FAIL ({', '.join(bad)})" if bad else "PASS"
+                print(f"Verdict: {verdict} [{len(todo)} re-checked in {time.monotonic() - started:.2f}s]")
+                todo = []
+            time.sleep(args.interval)
 
-def main():
-    with open("manifest.yaml") as f:
-        manifest = yaml.safe_load(f)
-    with open(compliance_path) as f:
-        checks = yaml.safe_load(f)["checks"]
-    for chk in checks:
-        applies = True
-        if "applies_if" in chk:
-            cond = chk["applies_if"]
-            feature = cond["feature"]
-            applies = manifest.get("features", {}).get(feature, False)
-        if applies:
-            print(f"Running check: {chk['name']}")
-            result = subprocess.run(
-                chk["script"],
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=chk.get("timeout_sec", 10)
-            )
-            if result.returncode != 0:
-                print(f"HALT: {chk['name']} failed\n{result.stdout}\n{result.stderr}")
-                sys.exit(1)
-        else:
-            print(f"Skipped: {chk['name']} (not applicable)")
+            # Re-stat the snapshot's files; only directories whose mtime moved are listed again
+            new = index.refresh()
+            changed = [p for p in new.changed_since(index) if p not in own]
+            new_logs = _log_stats(model)
+            changed_logs = [p for p in set(logs) | set(new_logs) if logs.get(p) != new_logs.get(p)]
+            if changed or changed_logs:
+                index, logs = new, new_logs
+                pending.update(changed)
+                pending_logs.update(changed_logs)
+                # Debounce: wait for a quiet poll (editor saves, scaffold runs), but not
+                # past SETTLE_POLLS while something keeps writing (a worker's log)
+                busy += 1
+                if busy < SETTLE_POLLS:
+                    continue
+            if not pending and not pending_logs:
+                continue
+            changed, changed_logs = sorted(pending), sorted(pending_logs)
+            pending, pending_logs, busy = set(), set(), 0
+            index = snapshot(index)
+            if cache:
+                cache.index = index
+            if changed_logs:
+                sync_logs(model, index)
+            if policy_files.intersection(changed):
+                print("--- policy changed; re-running all checks")
+                model = load_policy()
+                manifest, checks = model["manifest"], model["checks"]
+                sync_logs(model, index)
+                results = [None] * len(checks)
+                todo = list(range(len(checks)))
+                continue
+            changed = [p for p in changed if not _noise(p)] + changed_logs
+            if not changed:
+                continue
+            print(f"--- changed: {', '.join(changed[:5])}" + (f" (+{len(changed) - 5} more)" if len(changed) > 5 else ""))
+            # A verdict cut short by fail-fast is never final: retry those too.
+            retry = {i for i, r in enumerate(results) if r and r["status"] in ("blocked", "cancelled")}
+            todo = sorted(retry.union(affected_checks(checks, changed)))
+    except KeyboardInterrupt:
+        if cache:
+            cache.save()
+        return 1 if failing(checks, results) else 0
 
 if __name__ == "__main__":
     main()
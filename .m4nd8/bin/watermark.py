@@ -0,0 +1,292 @@
+# watermark.py — offline green-list watermark detector behind C181.watermark_detectable
+"""
+Green-list watermarking (Kirchenbauer et al.): while generating, the model
+favours a pseudo-random "green" fraction `gamma` of the vocabulary, reseeded
+from the previous token and a secret key. Detection needs only the text and
+the key: recompute each token's green-list membership and test the green
+count against the gamma * T expected of unwatermarked text:
+
+    z = (green - gamma * T) / sqrt(T * gamma * (1 - gamma))
+
+Membership is one 64-bit mix per (previous, current) token pair,
+
+    green(prev, cur) = splitmix64(key ^ prev * 0x9E3779B97F4A7C15 ^ cur) < gamma * 2**64
+
+evaluated for a whole chunk at once as NumPy uint64 arithmetic (the same
+integers in pure Python without NumPy). Generators must use `green_mask` /
+`is_green` so both sides agree.
+
+Besides the document z-score, the detector slides a `window`-token window
+over the text (cumulative sums over the green flags) and reports the best
+window, which finds watermarked passages pasted into human text. The best
+of many windows is a multiple comparison, so it is judged against a stricter
+threshold: the document threshold's one-sided p-value divided by the number
+of windows (Bonferroni). Otherwise long unwatermarked texts would be called
+watermarked by chance.
+
+Files are read in fixed-size chunks; the previous token and the last
+`window` flags carry over between chunks, so memory does not grow with the
+file or the corpus.
+
+Tokens come from a word/punctuation regex and map to ids through BLAKE2b;
+a model tokenizer (text → str or int tokens) plugs in as `module:function`.
+
+    M4ND8_WATERMARK_KEY=... python .m4nd8/bin/watermark.py scan 'output/**/*.txt' [--json]
+"""
+import argparse
+import functools
+import glob
+import hashlib
+import importlib
+import json
+import math
+import os
+import re
+import sys
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # same arithmetic on Python ints
+    np = None
+
+KEY_ENV = "M4ND8_WATERMARK_KEY"
+GAMMA = 0.25
+Z_THRESHOLD = 4.0
+WINDOW = 200
+# Documents with fewer scored tokens are reported but not judged.
+MIN_TOKENS = 50
+READ_CHUNK = 1 << 20
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+# --- Tokens ------------------------------------------------------------------------------
+
+def regex_tokens(text: str) -> List[str]:
+    """Default offline tokenizer: words and single punctuation marks."""
+    return _TOKEN.findall(text)
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def token_id(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def key_id(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8, person=b"m4nd8-wm").digest(),
+                          "little")
+
+
+def resolve_tokenizer(spec: Any) -> Callable[[str], Sequence[Any]]:
+    """None / "regex", a `module:function` path, or a callable."""
+    if callable(spec):
+        return spec
+    if spec in (None, "", "regex"):
+        return regex_tokens
+    module, sep, attr = str(spec).partition(":")
+    if not sep:
+        raise ValueError(f"unknown tokenizer {spec!r} (regex, or module:function)")
+    return getattr(importlib.import_module(module), attr)
+
+
+def ids_of(tokens: Sequence[Any]) -> List[int]:
+    return [t & _MASK if isinstance(t, int) else token_id(t) for t in tokens]
+
+
+# --- Green list --------------------------------------------------------------------------
+
+def is_green(key: int, prev: int, cur: int, gamma: float = GAMMA) -> bool:
+    z = (key ^ ((prev * _GOLDEN) & _MASK) ^ cur) & _MASK
+    z = ((z ^ (z >> 30)) * _MIX1) & _MASK
+    z = ((z ^ (z >> 27)) * _MIX2) & _MASK
+    return (z ^ (z >> 31)) < int(gamma * (1 << 64))
+
+
+def green_mask(key: int, prev: Sequence[int], cur: Sequence[int], gamma: float = GAMMA):
+    """Membership of each (prev[i], cur[i]) pair: a bool array (a list without NumPy)."""
+    if np is None:
+        return [is_green(key, p, c, gamma) for p, c in zip(prev, cur)]
+    p = np.asarray(prev, dtype=np.uint64)
+    z = np.uint64(key) ^ (p * np.uint64(_GOLDEN)) ^ np.asarray(cur, dtype=np.uint64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MIX2)
+    z ^= z >> np.uint64(31)
+    return z < np.uint64(int(gamma * (1 << 64)))
+
+
+def z_score(green: int, total: int, gamma: float = GAMMA) -> float:
+    if total <= 0:
+        return 0.0
+    return (green - gamma * total) / math.sqrt(total * gamma * (1 - gamma))
+
+
+def corrected_threshold(z_threshold: float, tests: int) -> float:
+    """The z the best of `tests` scores must reach for the false-positive rate of one score at z_threshold."""
+    p = NormalDist().cdf(-z_threshold) / max(1, tests)
+    if tests <= 1 or p <= 0.0:
+        return z_threshold
+    return -NormalDist().inv_cdf(p)
+
+
+# --- Detector ----------------------------------------------------------------------------
+
+class _Scan:
+    """Running state for one document: counts, carried token, window tail."""
+
+    def __init__(self, window: int):
+        self.prev: Optional[int] = None
+        self.total = self.green = 0
+        self.window = window
+        self.tail: List[bool] = []   # last window-1 flags
+        self.best_window = -1        # most green tokens in any full window
+
+    def feed(self, detector: "Detector", ids: List[int]) -> None:
+        if self.prev is None:
+            if not ids:
+                return
+            self.prev, ids = ids[0], ids[1:]  # the first token has no context to score
+        if not ids:
+            return
+        prev = [self.prev] + ids[:-1]
+        flags = green_mask(detector.key, prev, ids, detector.gamma)
+        self.prev = ids[-1]
+        w = self.window
+        if np is not None:
+            count = int(np.count_nonzero(flags))
+            run = np.concatenate((np.asarray(self.tail, dtype=bool), flags))
+            if len(run) >= w:
+                csum = np.concatenate(([0], np.cumsum(run, dtype=np.int64)))
+                self.best_window = max(self.best_window, int((csum[w:] - csum[:-w]).max()))
+            self.tail = run[-(w - 1):].tolist() if w > 1 else []
+        else:
+            count = sum(flags)
+            run = self.tail + list(flags)
+            if len(run) >= w:
+                cur = sum(run[:w])
+                best = cur
+                for i in range(w, len(run)):
+                    cur += run[i] - run[i - w]
+                    best = max(best, cur)
+                self.best_window = max(self.best_window, best)
+            self.tail = run[-(w - 1):] if w > 1 else []
+        self.total += len(ids)
+        self.green += count
+
+
+class Detector:
+    """
+    Scores documents for one key. `key` is the secret string (or its 64-bit
+    id); `tokenizer` maps text to str or int tokens.
+    """
+
+    def __init__(self, key: Any, gamma: float = GAMMA, window: int = WINDOW,
+                 z_threshold: float = Z_THRESHOLD, min_tokens: int = MIN_TOKENS, tokenizer: Any = None):
+        if not 0 < gamma < 1:
+            raise ValueError("gamma must be between 0 and 1")
+        self.key = key if isinstance(key, int) else key_id(str(key))
+        self.gamma, self.window = gamma, max(1, int(window))
+        self.z_threshold, self.min_tokens = z_threshold, min_tokens
+        self.tokenize = resolve_tokenizer(tokenizer)
+
+    def _result(self, name: str, scan: _Scan) -> Dict[str, Any]:
+        z = z_score(scan.green, scan.total, self.gamma)
+        if scan.best_window >= 0:
+            window_z = z_score(scan.best_window, self.window, self.gamma)
+            window_threshold = corrected_threshold(self.z_threshold, scan.total - self.window + 1)
+        else:
+            window_z, window_threshold = z, self.z_threshold  # shorter than one window
+        judged = scan.total >= self.min_tokens
+        marked = z >= self.z_threshold or window_z >= window_threshold
+        return {"path": name, "tokens": scan.total, "green": scan.green, "z": z, "window_z": window_z,
+                "window_threshold": window_threshold, "watermarked": marked if judged else None}
+
+    def score_text(self, text: str, name: str = "<text>") -> Dict[str, Any]:
+        scan = _Scan(self.window)
+        scan.feed(self, ids_of(self.tokenize(text)))
+        return self._result(name, scan)
+
+    def score_file(self, path: str, chunk: int = READ_CHUNK) -> Dict[str, Any]:
+        """Streamed: chunks are cut at whitespace so no token straddles two of them."""
+        scan = _Scan(self.window)
+        carry = ""
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                data = f.read(chunk)
+                text = carry + data
+                if not data:
+                    scan.feed(self, ids_of(self.tokenize(text)))
+                    break
+                cut = max(text.rfind(" "), text.rfind("\n"))
+                if cut <= 0:
+                    carry = text
+                    continue
+                carry = text[cut:]
+                scan.feed(self, ids_of(self.tokenize(text[:cut])))
+        return self._result(path, scan)
+
+    def scan(self, paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for path in paths:
+            try:
+                yield self.score_file(path)
+            except OSError as e:
+                yield {"path": path, "error": str(e)}
+
+
+def expand(patterns: Iterable[str], index=None) -> List[str]:
+    """Files matched by the output globs, from the FileIndex snapshot when given."""
+    out: List[str] = []
+    for pattern in patterns:
+        out.extend(index.glob(pattern) if index is not None
+                   else (p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)))
+    return sorted(set(out))
+
+
+def describe(r: Dict[str, Any], threshold: float = Z_THRESHOLD) -> str:
+    if "error" in r:
+        return f"{r['path']}: unreadable ({r['error']})"
+    verdict = {True: "watermarked", False: "NO WATERMARK", None: "too short to judge"}[r["watermarked"]]
+    return (f"{r['path']}: {verdict} (z={r['z']:.2f}, best window z={r['window_z']:.2f}, "
+            f"{r['green']}/{r['tokens']} green, threshold {threshold:g}, "
+            f"window threshold {r['window_threshold']:.2f})")
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Detect green-list watermarks in text artifacts.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sc = sub.add_parser("scan", help="score files matched by globs")
+    sc.add_argument("patterns", nargs="+")
+    sc.add_argument("--gamma", type=float, default=GAMMA)
+    sc.add_argument("--window", type=int, default=WINDOW)
+    sc.add_argument("--threshold", type=float, default=Z_THRESHOLD)
+    sc.add_argument("--min-tokens", type=int, default=MIN_TOKENS)
+    sc.add_argument("--tokenizer", default="regex", help="regex | module:function")
+    sc.add_argument("--key-env", default=KEY_ENV, help="environment variable holding the key (default: %(default)s)")
+    sc.add_argument("--json", action="store_true", help="one JSON line per document")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    key = os.environ.get(args.key_env)
+    if not key:
+        print(f"❌ No watermark key: set {args.key_env}", file=sys.stderr)
+        return 1
+    try:
+        detector = Detector(key, args.gamma, args.window, args.threshold, args.min_tokens, args.tokenizer)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    failed = False
+    for r in detector.scan(expand(args.patterns)):
+        failed = failed or "error" in r or r["watermarked"] is False
+        print(json.dumps(r) if args.json else describe(r, args.threshold))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,79 +1,178 @@
 #!/usr/bin/env python3
 """
 update_adb.py — Approved Dependency Base Updater
-Purpose: Pull a public table of approved dependencies and generate .m4nd8/data/approved_dependencies.db
-Usage: python update_adb.py
+Purpose: Pull a table of approved dependencies and generate .m4nd8/data/approved_dependencies.db
+Usage: python update_adb.py [--source URL_OR_PATH] [--force]
 Output: .m4nd8/data/approved_dependencies.db (SQLite)
 Note: This script is for protocol maintainers only. It is NOT part of the .m4nd8 capsule.
+
+Updates are keyed on the source's SHA-256: an unchanged source is a no-op,
+a changed one applies only the added/removed rows in a single transaction.
+A first build (or --force) bulk-loads a staging DB next to the live one and
+swaps it in with os.replace, so readers never see a half-written table.
 """
 
+import argparse
+import hashlib
+import json
 import os
-import sys
 import sqlite3
+import sys
 import urllib.request
-import json
+from datetime import datetime, timezone
 from pathlib import Path
 
 # CONFIGURATION — Replace with your own source
 # Option A: Public JSON endpoint (e.g., GitHub Gist, Google Apps Script)
 ADB_SOURCE_URL = "https://gist.githubusercontent.com/ToxicFartCloud/9e94ec37a63a933cd714a92e6cce13c5/raw/863876140699dbc204f1c24c3235ac16bf736ad9/gistfile1.txt"
 
-# Option B: Local CSV/JSON path (for air-gapped or private use)
-# ADB_SOURCE_PATH = "./approved_deps.json"
+# Option B: Local JSON path (for air-gapped or private use): pass --source PATH
+# or set M4ND8_ADB_SOURCE, e.g. M4ND8_ADB_SOURCE=./approved_deps.json
+ADB_SOURCE_ENV = "M4ND8_ADB_SOURCE"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS approved_versions (
+        ecosystem TEXT NOT NULL,
+        package TEXT NOT NULL,
+        version TEXT NOT NULL,
+        PRIMARY KEY (ecosystem, package, version)
+    );
+    CREATE TABLE IF NOT EXISTS adb_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+"""
 
-def fetch_approved_deps():
-    """Fetch from remote JSON source."""
-    print("📡 Fetching Approved Dependency Base from remote source...")
+def read_source(source):
+    """Raw bytes of the approval table, from a URL or a local file."""
+    if source.startswith(("http://", "https://")):
+        print("📡 Fetching Approved Dependency Base from remote source...")
+        try:
+            with urllib.request.urlopen(source) as resp:
+                return resp.read()
+        except Exception as e:
+            print(f"❌ Failed to fetch ADB: {e}", file=sys.stderr)
+            sys.exit(1)
+    print(f"📂 Reading Approved Dependency Base from {source}...")
     try:
-        with urllib.request.urlopen(ADB_SOURCE_URL) as resp:
-            data = json.load(resp)
-        return data
-    except Exception as e:
-        print(f"❌ Failed to fetch ADB: {e}", file=sys.stderr)
+        return Path(source).read_bytes()
+    except OSError as e:
+        print(f"❌ Failed to read ADB: {e}", file=sys.stderr)
         sys.exit(1)
 
+def parse_rows(raw):
+    """
+    Flatten the table into (ecosystem, package, version) rows. Accepts the
+    published {"approved": {eco: {pkg: [versions]}}} shape and the capsule's
+    own approved_dependencies.json ({eco: {pkg: version}}).
+    """
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        print(f"❌ ADB source is not valid JSON: {e}", file=sys.stderr)
+        sys.exit(1)
+    table = data.get("approved", data) if isinstance(data, dict) else {}
+    rows = set()
+    for eco, pkgs in table.items():
+        if not isinstance(pkgs, dict):
+            continue
+        for pkg, versions in pkgs.items():
+            if isinstance(versions, str):
+                versions = [versions]
+            for ver in versions:
+                rows.add((eco, pkg, str(ver)))
+    return rows
+
 def ensure_data_dir():
     data_dir = Path(".m4nd8/data")
     data_dir.mkdir(parents=True, exist_ok=True)
     return data_dir / "approved_dependencies.db"
 
-def init_db(db_path):
-    """Initialize SQLite schema."""
+def read_meta(db_path):
+    """adb_meta of the live DB, or None when there is no usable DB yet."""
+    if not db_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return dict(conn.execute("SELECT key, value FROM adb_meta"))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+def write_meta(conn, source, sha, count):
+    conn.executemany("INSERT OR REPLACE INTO adb_meta (key, value) VALUES (?, ?)", [
+        ("source", source),
+        ("sha256", sha),
+        ("rows", str(count)),
+        ("updated_at", datetime.now(timezone.utc).isoformat()),
+    ])
+
+def full_build(db_path, rows, source, sha):
+    """Bulk-load a staging DB, then atomically swap it over the live one."""
+    staging = db_path.with_name(db_path.name + ".staging")
+    staging.unlink(missing_ok=True)
+    conn = sqlite3.connect(staging)
+    try:
+        # Staging is disposable until the swap: skip journaling and fsyncs.
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT INTO approved_versions (ecosystem, package, version) VALUES (?, ?, ?)",
+                sorted(rows))
+            write_meta(conn, source, sha, len(rows))
+    finally:
+        conn.close()
+    os.replace(staging, db_path)
+    return len(rows), 0
+
+def apply_delta(db_path, rows, source, sha):
+    """Apply only the rows added to / removed from the source, in one transaction."""
     conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS approved_versions (
-            ecosystem TEXT NOT NULL,
-            package TEXT NOT NULL,
-            version TEXT NOT NULL,
-            PRIMARY KEY (ecosystem, package, version)
-        )
-    """)
-    cur.execute("DELETE FROM approved_versions")  # Fresh update
-    conn.commit()
-    return conn
-
-def main():
-    deps = fetch_approved_deps()
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = set(conn.execute("SELECT ecosystem, package, version FROM approved_versions"))
+            added, removed = sorted(rows - current), sorted(current - rows)
+            conn.executemany(
+                "DELETE FROM approved_versions WHERE ecosystem = ? AND package = ? AND version = ?",
+                removed)
+            conn.executemany(
+                "INSERT INTO approved_versions (ecosystem, package, version) VALUES (?, ?, ?)",
+                added)
+            write_meta(conn, source, sha, len(rows))
+    finally:
+        conn.close()
+    return len(added), len(removed)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Update the Approved Dependency Base.")
+    parser.add_argument("--source", default=os.environ.get(ADB_SOURCE_ENV, ADB_SOURCE_URL),
+                        help=f"URL or local JSON file (default: ${ADB_SOURCE_ENV} or the published Gist)")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild from scratch even if the source is unchanged")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    raw = read_source(args.source)
+    sha = hashlib.sha256(raw).hexdigest()
     db_path = ensure_data_dir()
-    conn = init_db(db_path)
-    cur = conn.cursor()
+    meta = read_meta(db_path)
 
-    inserted = 0
-    for eco, pkgs in deps.get("approved", {}).items():
-        for pkg, versions in pkgs.items():
-            if isinstance(versions, str):
-                versions = [versions]
-            for ver in versions:
-                cur.execute(
-                    "INSERT INTO approved_versions (ecosystem, package, version) VALUES (?, ?, ?)",
-                    (eco, pkg, ver)
-                )
-                inserted += 1
-
-    conn.commit()
-    conn.close()
-    print(f"✅ Wrote {inserted} approved package versions to {db_path}")
+    if meta and meta.get("sha256") == sha and not args.force:
+        print(f"✅ {db_path} already matches source ({meta.get('rows', '?')} approved versions)")
+        return
+    rows = parse_rows(raw)
+    if meta is None or args.force:
+        added, removed = full_build(db_path, rows, args.source, sha)
+    else:
+        added, removed = apply_delta(db_path, rows, args.source, sha)
+    print(f"✅ Wrote {len(rows)} approved package versions to {db_path} (+{added} / -{removed})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+lockfiles.py — Streaming readers for dependency lockfiles
+Purpose: Yield every resolved (ecosystem, package, version), transitive ones
+         included, without holding the lockfile in memory.
+Usage: from lockfiles import read_lockfile
+       for ecosystem, package, version in read_lockfile("package-lock.json"): ...
+Formats: package-lock.json / npm-shrinkwrap.json (v1-v3), pnpm-lock.yaml (v5-v9),
+         poetry.lock, uv.lock, requirements*.txt (`==` pins only)
+Note: Readers work on fixed-size chunks or single lines, so peak memory does
+      not grow with the lockfile. package.json is not a lockfile and is not
+      read here (its entries are ranges, not resolved versions).
+"""
+
+import json
+import os
+import re
+from json.decoder import JSONDecodeError, scanstring
+
+CHUNK_CHARS = 1 << 16
+NPM_LOCKFILES = ("package-lock.json", "npm-shrinkwrap.json")
+LOCKFILES = NPM_LOCKFILES + ("pnpm-lock.yaml", "poetry.lock", "uv.lock")
+
+_REQ_NAME = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(.*)$")
+
+
+# --- npm: incremental JSON ---------------------------------------------------------------
+
+class JsonStream:
+    """
+    Pull parser over a JSON text file: walks objects key by key and decodes
+    only the values asked for, refilling a bounded buffer as it goes.
+    """
+
+    _WS = re.compile(r"[ \t\r\n]*")
+    _STRUCT = re.compile(r'["{}\[\]]')
+
+    def __init__(self, f, chunk=CHUNK_CHARS):
+        self.f, self.chunk = f, chunk
+        self.buf, self.pos, self.eof = "", 0, False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = self._WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON stream, got {self.peek()!r}")
+        self.pos += 1
+
+    def string(self):
+        self.expect('"')
+        while True:
+            try:
+                value, end = scanstring(self.buf, self.pos)
+            except JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def value(self):
+        """Decode one (small) value whole."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut at the buffer edge may continue in the next chunk
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        """Consume one value of any size without building it."""
+        if self.peek() not in "{[":
+            self.value()
+            return
+        depth = 0
+        while True:
+            m = self._STRUCT.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("unterminated JSON value")
+                continue
+            self.pos = m.start()
+            char = m.group()
+            if char == '"':
+                self.string()
+                continue
+            self.pos += 1
+            depth += 1 if char in "{[" else -1
+            if depth == 0:
+                return
+
+    def items(self):
+        """Yield each key of the object at the cursor; the caller must consume its value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.string()
+            self.expect(":")
+            yield key
+            sep = self.peek()
+            self.pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"expected ',' or '}}' in JSON stream, got {sep!r}")
+
+
+def _npm_v1(stream):
+    """lockfileVersion 1: nested {name: {version, dependencies: {...}}}."""
+    for name in stream.items():
+        if stream.peek() != "{":
+            stream.skip()
+            continue
+        for field in stream.items():
+            if field == "version":
+                version = stream.value()
+                if isinstance(version, str):
+                    yield "npm", name, version
+            elif field == "dependencies":
+                yield from _npm_v1(stream)
+            else:
+                stream.skip()
+
+
+def package_lock(path):
+    """package-lock.json / npm-shrinkwrap.json, any lockfileVersion."""
+    with open(path, "r", encoding="utf-8") as f:
+        stream = JsonStream(f)
+        for key in stream.items():
+            if key == "packages":
+                # v2/v3: flat {"node_modules/a/node_modules/b": {version, ...}}
+                for location in stream.items():
+                    meta = stream.value()
+                    if not location or not isinstance(meta, dict) or meta.get("link"):
+                        continue
+                    if "version" in meta:
+                        yield "npm", meta.get("name") or location.rsplit("node_modules/", 1)[-1], meta["version"]
+                # v2 also carries the v1 tree for old npm: don't read it twice
+                return
+            if key == "dependencies":
+                yield from _npm_v1(stream)
+            else:
+                stream.skip()
+
+
+# --- pnpm --------------------------------------------------------------------------------
+
+def _pnpm_key(key, major):
+    """Package key → (name, version): v5 `/@s/n/1.0.0_peer@2`, v6 `/n@1.0.0(peer@2)`, v9 `n@1.0.0`."""
+    key = key.strip("'\"").lstrip("/")
+    if major < 6:
+        name, _, version = key.rpartition("/")
+        version = version.split("_", 1)[0]
+    else:
+        key = key.split("(", 1)[0]
+        at = key.rfind("@")
+        if at <= 0:
+            return None
+        name, version = key[:at], key[at + 1:]
+    if not name or not version[:1].isdigit():
+        return None  # tarball, git and link: entries carry no registry version
+    return name, version
+
+
+def pnpm_lock(path):
+    major, section = 9, None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if not line[0].isspace():
+                section, _, rest = line.partition(":")
+                section = section.strip()
+                if section == "lockfileVersion":
+                    m = re.search(r"\d+", rest)
+                    major = int(m.group()) if m else major
+                continue
+            # Package keys sit at exactly two spaces of indent under `packages:`
+            if section != "packages" or line[2:3].isspace() or not line.rstrip().endswith(":"):
+                continue
+            parsed = _pnpm_key(line.strip()[:-1], major)
+            if parsed:
+                yield ("npm",) + parsed
+
+
+# --- Python: poetry.lock / uv.lock -------------------------------------------------------
+
+_TOML_FIELD = re.compile(r'^(name|version|source)\s*=\s*(.*)$')
+_TOML_STR = re.compile(r'^"((?:[^"\\]|\\.)*)"|^\'([^\']*)\'')
+
+
+def _toml_packages(path):
+    """[[package]] tables of a TOML lockfile, one line at a time (name, version, source)."""
+    pkg = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            s = line.strip()
+            if s.startswith("["):
+                if pkg:
+                    yield pkg
+                pkg = {} if s == "[[package]]" else None
+                continue
+            if pkg is None:
+                continue
+            m = _TOML_FIELD.match(s)
+            if m and m.group(1) not in pkg:
+                value = m.group(2)
+                sm = _TOML_STR.match(value)
+                pkg[m.group(1)] = (sm.group(1) if sm.group(1) is not None else sm.group(2)) if sm else value
+    if pkg:
+        yield pkg
+
+
+def poetry_lock(path):
+    for pkg in _toml_packages(path):
+        if pkg.get("name") and pkg.get("version"):
+            yield "pypi", pkg["name"], pkg["version"]
+
+
+def uv_lock(path):
+    for pkg in _toml_packages(path):
+        source = pkg.get("source", "")
+        # The project itself and path dependencies are not third-party packages
+        if any(kind in source for kind in ("editable", "virtual", "directory")):
+            continue
+        if pkg.get("name") and pkg.get("version"):
+            yield "pypi", pkg["name"], pkg["version"]
+
+
+# --- requirements.txt --------------------------------------------------------------------
+
+def requirement_specs(path, seen=None):
+    """(name, specifier) per requirement line, following `-r` includes."""
+    seen = seen if seen is not None else set()
+    if os.path.abspath(path) in seen:
+        return
+    seen.add(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        for raw in f:
+            line = raw.split(" #")[0].split(";")[0].strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("-r ", "--requirement ")):
+                included = os.path.join(os.path.dirname(path), line.split(None, 1)[1])
+                yield from requirement_specs(included, seen)
+                continue
+            if line.startswith("-") or "://" in line:
+                continue  # options, editables and URL requirements name no version
+            m = _REQ_NAME.match(line)
+            if m:
+                yield m.group(1), m.group(2).replace(" ", "")
+
+
+def pinned(spec):
+    """The version of an exact `==` pin, else None."""
+    if spec.startswith("==") and not spec.startswith("===") and "," not in spec and "*" not in spec:
+        return spec[2:]
+    return None
+
+
+def requirements(path):
+    for name, spec in requirement_specs(path):
+        version = pinned(spec)
+        if version:
+            yield "pypi", name, version
+
+
+# --- Dispatch ----------------------------------------------------------------------------
+
+READERS = {
+    "package-lock.json": package_lock,
+    "npm-shrinkwrap.json": package_lock,
+    "pnpm-lock.yaml": pnpm_lock,
+    "poetry.lock": poetry_lock,
+    "uv.lock": uv_lock,
+}
+
+
+def reader_for(path):
+    base = os.path.basename(path)
+    if base in READERS:
+        return READERS[base]
+    if base.endswith(".txt"):
+        return requirements
+    return None
+
+
+def read_lockfile(path):
+    reader = reader_for(path)
+    if reader is None:
+        raise ValueError(f"unsupported lockfile: {path}")
+    return reader(path)
+
+
+def discover(root="."):
+    """Lockfiles and requirements.txt present in `root`."""
+    names = ("requirements.txt",) + LOCKFILES
+    return [os.path.join(root, n) if root != "." else n
+            for n in names if os.path.isfile(os.path.join(root, n))]
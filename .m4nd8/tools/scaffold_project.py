@@ -9,20 +9,39 @@ Operational Context:
 - It must be idempotent and handle both autonomous and director_supervised modes
 - It enforces the absolute census mandate by updating hub.md before creating files
 - It maintains cryptographic provenance through cofo.md Change Notes
+- Director-supervised runs take a scaffold.json (--plan) and apply it as one
+  transaction: every target is validated up front, content is staged, then
+  files, hub/cofo census rows and Change Notes land together or not at all
+
+Usage: python3 scaffold_project.py [--plan scaffold.json [--dry-run]]
+scaffold.json: {"evidence": "...", "overwrite": false, "directories": ["docs"],
+                "artifacts": [{"path": "src/app.py", "template": "..." | "content": "...",
+                               "role": "Entry", "description": "..."}]}
 
 Safety Constraints:
 - Must operate within filesystem_boundary defined in director.yaml
 - Must respect feature flags for optional scaffolds
 - Must halt on ambiguity rather than invent structure
 """
+import argparse
 import os
+import re
 import sys
 import json
+import shutil
+import tempfile
 import yaml
 import logging
-from datetime import datetime, timezone
 from pathlib import Path
 
+# Change Notes go to the append-only journal in the capsule's bin/ (see cofo_journal.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'bin'))
+import cofo_journal  # noqa: E402
+
+JOURNAL = cofo_journal.Journal()
+# Trace Ref recorded on every scaffolder Change Note (C56); main() logs here too
+TRACE_REF = '_logs/trace/scaffold_project.log'
+
 class ScaffoldingError(Exception):
     """Strategic failure requiring escalation"""
     pass
@@ -79,74 +98,295 @@ def scaffold_core_artifacts(bootstrap_mode, boundaries):
                 # Director-supervised mode: require explicit command
                 logging.info(f"Skipping {artifact} creation - awaiting Director command in supervised mode")
     
+    render_cofo_notes()
     return core_artifacts
 
-def update_hub_wiring(artifact_path, role, description):
-    """Enforce absolute census mandate before file creation"""
-    hub_path = Path('hub.md')
-    if hub_path.exists():
-        content = hub_path.read_text()
-        if f"| {artifact_path}" not in content:
-            # Add to items table
-            items_marker = "| Path|Role|Description|"
-            if items_marker in content:
-                new_entry = f"| {artifact_path}|{role}|{description}|"
-                content = content.replace(items_marker, f"{items_marker}\n{new_entry}")
-                hub_path.write_text(content)
-                logging.info(f"Updated hub.md wiring for {artifact_path}")
-    else:
-        # Create minimal hub.md if missing
-        hub_template = """# hub — Wiring Diagram (Control Plane)
+HUB_ITEMS_MARKER = "| Path|Role|Description|"
+HUB_TEMPLATE = """# hub — Wiring Diagram (Control Plane)
 M4ND8 Protocol v5.1
 
 hub — Wiring Diagram (Template)
-Directory: `./`
+Directory: `{directory}`
 
 ## Items (Role & Description)
 | Path|Role|Description|
 |---|---|---|
+
+## Machine-Readable Wiring (for checks)
+
+```yaml
+hub_wiring:
+  nodes:
+  edges: []
+  local_only:
+    - ./cofo.md
+    - ./hub.md
+```
 """
-        hub_path.write_text(hub_template)
-        logging.info("Created minimal hub.md")
 
-def record_cofo_change(path, change, evidence):
-    """Maintain cryptographic provenance through Change Notes"""
-    cofo_path = Path('cofo.md')
-    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
-    
-    if cofo_path.exists():
-        content = cofo_path.read_text()
-        if "| Timestamp (UTC)|Actor|Path|Change|Why / Evidence|" in content:
-            change_entry = f"| {timestamp}|scaffolder|{path}|{change}|{evidence}|"
-            content = content.replace("| Timestamp (UTC)|Actor|Path|Change|Why / Evidence|", 
-                                     f"| Timestamp (UTC)|Actor|Path|Change|Why / Evidence|\n{change_entry}")
-            cofo_path.write_text(content)
+def add_items_rows(content, rows):
+    """Census rows (path, role, description) added to hub/cofo text: Items table and any hub_wiring nodes"""
+    new = [r for r in rows if f"| {r[0]}|" not in content]
+    if not new:
+        return content
+    if HUB_ITEMS_MARKER in content:
+        entries = "".join(f"\n| {path}|{role}|{description}|" for path, role, description in new)
+        # Rows go below the header separator, so the table still renders
+        header = re.search(re.escape(HUB_ITEMS_MARKER) + r"(\n\|[-| :]+\|)?", content)
+        content = content[:header.end()] + entries + content[header.end():]
+    nodes = [path for path, _, _ in new if not re.search(rf"^\s*-\s*{re.escape(path)}\s*$", content, re.M)]
+    block = re.search(r"^(\s*)nodes:[ \t]*(\[.*\])?[ \t]*$", content, re.M)
+    if nodes and block:
+        indent, flow = block.group(1), block.group(2)
+        if flow is not None:
+            items = [i.strip() for i in flow[1:-1].split(",") if i.strip()] + nodes
+            replacement = f"{indent}nodes: [{', '.join(items)}]"
+        else:
+            replacement = block.group(0) + "".join(f"\n{indent}  - {n}" for n in nodes)
+        content = content[:block.start()] + replacement + content[block.end():]
+    return content
+
+def update_hub_wiring(artifact_path, role, description):
+    """Enforce absolute census mandate before file creation"""
+    hub_path = Path('hub.md')
+    if hub_path.exists():
+        content = hub_path.read_text()
+        updated = add_items_rows(content, [(artifact_path, role, description)])
+        if updated != content:
+            hub_path.write_text(updated)
+            logging.info(f"Updated hub.md wiring for {artifact_path}")
     else:
-        # Create minimal cofo.md if missing
-        cofo_template = f"""# cofo — Context Form (Control Plane)
+        # Create minimal hub.md if missing
+        hub_path.write_text(add_items_rows(HUB_TEMPLATE.format(directory='./'), [(artifact_path, role, description)]))
+        logging.info("Created minimal hub.md")
+
+COFO_TEMPLATE = """# cofo — Context Form (Control Plane)
 M4ND8 Protocol v5.1
 
 cofo — Context Form (Template)
-Directory: `./`
+Directory: `{directory}`
 
 ## Items (Role & Description)
 | Path|Role|Description|
 |---|---|---|
 
 ## Change Notes
-| Timestamp (UTC)|Actor|Path|Change|Why / Evidence|
-|---|---|---|---|---|
-| {timestamp}|scaffolder|{path}|{change}|{evidence}|
-
+""" + cofo_journal.TABLE_HEADER + """
 ## Rules (Local)
 `cofo` must list all items in this folder.
 Every edit to an item must add a Change Note row.
 """
-        cofo_path.write_text(cofo_template)
 
-def main():
+def record_cofo_change(path, change, evidence):
+    """Maintain cryptographic provenance through Change Notes (one O(1) journal append)"""
+    JOURNAL.append(cofo_journal.note(path, change, evidence, actor="scaffolder", trace=TRACE_REF))
+
+    cofo_path = Path('cofo.md')
+    if not cofo_path.exists():
+        # Create minimal cofo.md if missing; its Change Notes table is rendered from the journal
+        cofo_path.write_text(COFO_TEMPLATE.format(directory='./'))
+
+def render_cofo_notes():
+    """Render the journal into cofo.md's Change Notes table once per run, not per change"""
+    if Path('cofo.md').exists():
+        cofo_journal.write_table(JOURNAL, 'cofo.md')
+
+# --- Director-supervised batch mode (scaffold.json) -----------------------------------
+
+MANIFEST_PATHS = ('m4nd8_pro/manifest.yaml', 'manifest.yaml')
+
+def load_scaffold_plan(plan_path):
+    """Load a Director-issued scaffold.json; shape problems are reported all at once"""
+    try:
+        with open(plan_path, 'r') as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ScaffoldingError(f"Unreadable scaffold plan {plan_path}: {e}")
+    problems = []
+    if not isinstance(plan, dict):
+        raise ScaffoldingError(f"{plan_path}: plan must be a JSON object")
+    artifacts = plan.get('artifacts') or []
+    directories = plan.get('directories') or []
+    if not isinstance(artifacts, list) or not isinstance(directories, list):
+        raise ScaffoldingError(f"{plan_path}: 'artifacts' and 'directories' must be lists")
+    if not artifacts and not directories:
+        problems.append("plan declares no artifacts or directories")
+    seen = set()
+    for n, art in enumerate(artifacts):
+        if not isinstance(art, dict) or not art.get('path'):
+            problems.append(f"artifacts[{n}]: needs a path")
+            continue
+        path = os.path.normpath(art['path'])
+        if path in seen:
+            problems.append(f"artifacts[{n}]: duplicate path {art['path']}")
+        seen.add(path)
+        if 'template' in art and 'content' in art:
+            problems.append(f"artifacts[{n}]: give either template or content, not both")
+        if 'template' in art and not Path(art['template']).is_file():
+            problems.append(f"artifacts[{n}]: missing template {art['template']}")
+        if os.path.basename(path) in ('hub.md', 'cofo.md'):
+            problems.append(f"artifacts[{n}]: {path} is maintained by the scaffolder, not the plan")
+    for n, d in enumerate(directories):
+        if not isinstance(d, str) or not d.strip():
+            problems.append(f"directories[{n}]: must be a path")
+    if problems:
+        raise ScaffoldingError(f"Invalid scaffold plan {plan_path}: " + "; ".join(problems))
+    return plan
+
+def within_boundary(target, boundaries):
+    """Whether target (after resolving symlinks and ..) lies inside a filesystem_boundary entry"""
+    real = os.path.realpath(target)
+    for boundary in boundaries:
+        root = os.path.realpath(boundary)
+        if real == root or real.startswith(root.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+def enabled_features():
+    for candidate in MANIFEST_PATHS:
+        if Path(candidate).exists():
+            with open(candidate, 'r') as f:
+                return (yaml.safe_load(f) or {}).get('features') or {}
+    return {}
+
+def plan_targets(plan):
+    """Every file and directory the plan creates: (files, directories), project-relative"""
+    files = [os.path.normpath(a['path']) for a in plan.get('artifacts') or []]
+    dirs = {os.path.normpath(d) for d in plan.get('directories') or []}
+    for path in files + sorted(dirs):
+        parent = os.path.dirname(path)
+        while parent and not parent.startswith(('..', os.sep)):
+            dirs.add(parent)
+            parent = os.path.dirname(parent)
+    return files, sorted(dirs, key=lambda d: (d.count(os.sep), d))
+
+def validate_scaffold_plan(plan, director_config, boundaries):
+    """Check every target up front: boundary, optional-scaffold flags, no silent overwrite"""
+    files, dirs = plan_targets(plan)
+    problems = []
+    for target in files + dirs:
+        if os.path.isabs(target) or target.split(os.sep)[0] == '..':
+            problems.append(f"{target}: must be a relative path inside the project")
+        elif not within_boundary(target, boundaries):
+            problems.append(f"{target}: outside filesystem_boundary {boundaries}")
+    mapping = (director_config.get('optional_scaffolds') or {}).get('mapping') or {}
+    features = enabled_features()
+    for top in sorted({t.split(os.sep)[0] for t in files + dirs} & set(mapping)):
+        flag = mapping[top].split('.', 1)[-1]
+        if not features.get(flag):
+            problems.append(f"{top}/: optional scaffold needs {mapping[top]} enabled in manifest.yaml")
+    if not plan.get('overwrite'):
+        problems += [f"{f}: already exists (set \"overwrite\": true to replace)" for f in files if Path(f).exists()]
+    problems += [f"{d}: exists and is not a directory" for d in dirs if Path(d).exists() and not Path(d).is_dir()]
+    if problems:
+        raise ScaffoldingError("Scaffold plan rejected: " + "; ".join(problems))
+    return files, dirs
+
+def stage_scaffold_plan(plan, files, dirs):
+    """Final content of every file the plan touches: artifacts plus each folder's hub.md/cofo.md"""
+    staged = {}
+    hub_rows, cofo_rows = {}, {}
+    new_dirs = [d for d in dirs if not Path(d).exists()]
+    for art in plan.get('artifacts') or []:
+        path = os.path.normpath(art['path'])
+        if 'template' in art:
+            staged[path] = Path(art['template']).read_text()
+        else:
+            staged[path] = art.get('content', '')
+        row = ('./' + os.path.basename(path), art.get('role', 'File'), art.get('description', ''))
+        hub_rows.setdefault(os.path.dirname(path), []).append(row)
+        cofo_rows.setdefault(os.path.dirname(path), []).append(row)
+    for d in new_dirs:
+        row = ('./' + os.path.basename(d), 'Subdir', '')
+        hub_rows.setdefault(os.path.dirname(d), []).append(row)
+        cofo_rows.setdefault(os.path.dirname(d), []).append(row)
+    # Census first (hub.md), then ledger items (cofo.md), one write per folder
+    for directory in sorted(set(hub_rows) | set(new_dirs)):
+        label = './' + directory if directory else './'
+        for name, template, rows in (('hub.md', HUB_TEMPLATE, hub_rows), ('cofo.md', COFO_TEMPLATE, cofo_rows)):
+            target = os.path.join(directory, name)
+            current = Path(target).read_text() if Path(target).exists() else template.format(directory=label)
+            staged[target] = add_items_rows(current, rows.get(directory, []))
+    notes = [cofo_journal.note(path, 'Created' if not Path(path).exists() else 'Replaced',
+                               plan.get('evidence', 'director_supervised scaffold.json'),
+                               actor='scaffolder', trace=plan.get('trace', TRACE_REF))
+             for path in files]
+    return staged, new_dirs, notes
+
+def commit_scaffold(staged, new_dirs, notes):
+    """
+    All-or-nothing: content is written to a staging folder next to the targets
+    first, then every file is moved into place with os.replace and the Change
+    Notes are appended in one journal write. Any failure restores the files
+    that were replaced and removes everything created.
+    """
+    staging = tempfile.mkdtemp(prefix='.scaffold-staging-', dir='.')
+    created_dirs, applied = [], []   # applied: (target, backup or None)
+    try:
+        for n, (target, content) in enumerate(staged.items()):
+            with open(os.path.join(staging, str(n)), 'w') as f:
+                f.write(content)
+        for d in new_dirs:
+            os.mkdir(d)
+            created_dirs.append(d)
+        for n, target in enumerate(staged):
+            backup = None
+            if os.path.exists(target):
+                backup = os.path.join(staging, f'{n}.orig')
+                os.replace(target, backup)
+            applied.append((target, backup))
+            os.replace(os.path.join(staging, str(n)), target)
+        JOURNAL.append(*notes)
+    except BaseException as e:
+        for target, backup in reversed(applied):
+            try:
+                if backup:
+                    os.replace(backup, target)
+                elif os.path.exists(target):
+                    os.remove(target)
+            except OSError as undo:
+                logging.error(f"Rollback could not restore {target}: {undo}")
+        for d in reversed(created_dirs):
+            try:
+                os.rmdir(d)
+            except OSError as undo:
+                logging.error(f"Rollback could not remove {d}: {undo}")
+        if isinstance(e, Exception):
+            raise ScaffoldingError(f"Scaffold commit failed and was rolled back: {e}")
+        raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def execute_scaffold_plan(plan_path, director_config, boundaries, dry_run=False):
+    """Director-supervised scaffolding: validate, stage and commit a scaffold.json in one pass"""
+    plan = load_scaffold_plan(plan_path)
+    files, dirs = validate_scaffold_plan(plan, director_config, boundaries)
+    staged, new_dirs, notes = stage_scaffold_plan(plan, files, dirs)
+    if dry_run:
+        logging.info(f"Plan valid: {len(files)} files, {len(new_dirs)} new directories, "
+                     f"{len(staged) - len(files)} hub/cofo updates")
+        return staged
+    commit_scaffold(staged, new_dirs, notes)
+    logging.info(f"Scaffolded {len(files)} files and {len(new_dirs)} directories from {plan_path}")
+    # cofo Change Notes tables are renderings of the journal; refresh the touched ones
+    for target in staged:
+        if os.path.basename(target) == 'cofo.md':
+            cofo_journal.write_table(JOURNAL, target)
+    return staged
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="M4ND8 scaffolding (canonical execution path).")
+    parser.add_argument('--plan', metavar='SCAFFOLD_JSON',
+                        help="execute a Director-issued scaffold.json as one atomic batch")
+    parser.add_argument('--dry-run', action='store_true', help="validate and stage the plan without writing")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Strategic scaffolding execution entry point"""
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    os.makedirs(os.path.dirname(TRACE_REF), exist_ok=True)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler(), logging.FileHandler(TRACE_REF)])
     
     try:
         director_config = load_director_config()
@@ -154,13 +394,15 @@ def main():
         boundaries = validate_filesystem_boundary(director_config)
         
         # Strategic scaffolding decision point
-        if bootstrap_mode == 'autonomous':
+        if args.plan:
+            logging.info(f"Executing scaffold plan {args.plan}")
+            execute_scaffold_plan(args.plan, director_config, boundaries, dry_run=args.dry_run)
+        elif bootstrap_mode == 'autonomous':
             logging.info("Executing autonomous bootstrap sequence")
             scaffold_core_artifacts(bootstrap_mode, boundaries)
         else:
-            logging.info("Director-supervised mode - awaiting explicit command")
-            # In supervised mode, this script would typically be called with specific parameters
-            # from the Director agent with a scaffold.json specification
+            # Director-supervised mode executes only an explicit scaffold.json (--plan)
+            logging.info("Director-supervised mode - awaiting explicit command (--plan scaffold.json)")
         
         logging.info("Scaffolding sequence completed successfully")
         return 0
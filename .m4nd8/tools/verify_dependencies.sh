@@ -3,17 +3,9 @@ set -euo pipefail
 
 echo "🔍 M4ND8: Verifying dependencies against approved list..."
 
-# Check uv is installed
-if ! command -v uv &> /dev/null; then
-    echo "❌ ERROR: uv not found. Install with: curl -LsSf https://astral.sh/uv/install.sh | sh"
-    exit 1
-fi
-
-# Check Python dependencies
-if [[ -f "requirements.txt" ]]; then
-    echo "🐍 Verifying Python dependencies..."
-    uv pip compile --check requirements.txt -o /dev/null
-fi
+# Check Python and Node dependencies against the Approved Dependency Base (offline)
+echo "📦 Verifying locked dependencies..."
+python3 "$(dirname "$0")/verify_dependencies.py" "$@"
 
 # Check system dependencies
 echo "⚙️ Verifying system dependencies..."
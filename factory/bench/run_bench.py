@@ -0,0 +1,306 @@
+# run_bench.py — times the sentinel gate and every compliance check on a synthetic project
+"""
+Generates a project with synth_repo.py (or uses --repo), checks that the
+gate passes on it (an untimed run; a failing gate halts early and would
+time the wrong thing), then measures
+
+  * sentinel end to end: `sentinel.py --no-cache` as one child process,
+    wall time, CPU time (user + sys, its own children included) and peak
+    RSS from os.wait4;
+  * each check in isolation: a fresh process per check loads the policy,
+    snapshots the tree and syncs the logs, then times only the check
+    (wall, CPU of the process and the check's scripts, peak RSS).
+
+With --repeat N the fastest wall/CPU and the highest RSS of N runs are kept.
+
+Results are written with --save and compared with --baseline: any entry
+whose wall or CPU time grows by more than --tolerance (and by at least
+MIN_DELTA_SEC), or whose RSS grows by more than --tolerance (and at least
+MIN_DELTA_MB), is a regression and the run exits 1. Baselines are only
+comparable on the same machine and scale; a scale mismatch is refused.
+
+The synthetic project carries a copy of .m4nd8/; run pack_protocol.sh first.
+
+    python factory/bench/run_bench.py --scale small --save bench/baseline.json
+    python factory/bench/run_bench.py --scale small --baseline bench/baseline.json
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # not POSIX: wall time only
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synth_repo  # noqa: E402
+
+RESULTS_VERSION = 1
+TOLERANCE = 0.25
+MIN_DELTA_SEC = 0.05
+MIN_DELTA_MB = 5.0
+TIMEOUT = 900
+# ru_maxrss is KiB on Linux, bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _mb(maxrss: float) -> float:
+    return maxrss * _RSS_UNIT / (1 << 20)
+
+
+def measure(cmd: List[str], cwd: str, timeout: float = TIMEOUT,
+            env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Run `cmd`; its wall time, CPU time and peak RSS (descendants it waited for included)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, env=env)
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    try:
+        out = proc.stdout.read()
+        if hasattr(os, "wait4"):
+            _, status, ru = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            cpu, rss = ru.ru_utime + ru.ru_stime, _mb(ru.ru_maxrss)
+        else:
+            proc.wait()
+            cpu, rss = None, None
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+    return {"wall": time.perf_counter() - start, "cpu": cpu, "rss_mb": rss,
+            "returncode": proc.returncode, "output": out.decode("utf-8", "replace")}
+
+
+# --- One check, in its own process -------------------------------------------------------
+
+def run_one(check_id: str) -> int:
+    """Internal (--one): set up like sentinel, then time a single check; prints one JSON line."""
+    bin_dir = os.path.abspath(os.path.join(".m4nd8", "bin"))
+    sys.path.insert(0, bin_dir)
+    import sentinel
+    from fs_index import BIN_ENV
+    os.environ[BIN_ENV] = bin_dir
+    model = sentinel.load_policy()
+    index = sentinel.snapshot()
+    sentinel.sync_logs(model, index)
+    chk = next((c for c in model["checks"] if sentinel.check_name(c) == check_id), None)
+    if chk is None:
+        print(json.dumps({"error": f"no check {check_id}"}))
+        return 1
+    runner = sentinel.make_runner(model["manifest"], index, None)
+    self0 = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    kids0 = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    start = time.perf_counter()
+    result = runner(chk, None)
+    wall = time.perf_counter() - start
+    out = {"status": result["status"], "wall": wall, "cpu": None, "rss_mb": None}
+    if resource:
+        self1 = resource.getrusage(resource.RUSAGE_SELF)
+        kids1 = resource.getrusage(resource.RUSAGE_CHILDREN)
+        out["cpu"] = sum(getattr(b, f) - getattr(a, f) for a, b in ((self0, self1), (kids0, kids1))
+                         for f in ("ru_utime", "ru_stime"))
+        out["rss_mb"] = _mb(max(self1.ru_maxrss, kids1.ru_maxrss))
+    print(json.dumps(out))
+    return 0
+
+
+def check_ids(repo: str) -> List[str]:
+    code = ("import os, sys, json; sys.path.insert(0, os.path.join('.m4nd8', 'bin')); import sentinel; "
+            "print(json.dumps([sentinel.check_name(c) for c in sentinel.load_policy()['checks']]))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=repo, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# --- Suite -------------------------------------------------------------------------------
+
+def _best(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def low(key):
+        values = [r[key] for r in runs if r.get(key) is not None]
+        return min(values) if values else None
+
+    rss = [r["rss_mb"] for r in runs if r.get("rss_mb") is not None]
+    return {"wall": low("wall"), "cpu": low("cpu"), "rss_mb": max(rss) if rss else None,
+            "status": runs[-1].get("status"), "runs": len(runs)}
+
+
+def bench(repo: str, repeat: int = 1, jobs: Optional[int] = None, only: Optional[str] = None,
+          checks: bool = True, progress=None, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"sentinel": None, "checks": {}}
+    cmd = [sys.executable, os.path.join(".m4nd8", "bin", "sentinel.py"), "--no-cache"]
+    if jobs:
+        cmd += ["-j", str(jobs)]
+    baseline = measure(cmd, repo, env=env)
+    if baseline["returncode"] != 0:
+        tail = "\n".join(baseline["output"].splitlines()[-20:])
+        raise RuntimeError(f"sentinel fails on {repo} (exit {baseline['returncode']}); "
+                           f"not timing a gate that halts early:\n{tail}")
+    runs = []
+    for _ in range(repeat):
+        r = measure(cmd, repo, env=env)
+        r["status"] = "pass" if r["returncode"] == 0 else f"exit {r['returncode']}"
+        runs.append(r)
+    results["sentinel"] = _best(runs)
+    if progress:
+        progress("sentinel", results["sentinel"])
+    if not checks:
+        return results
+    me = os.path.abspath(__file__)
+    for cid in check_ids(repo):
+        if only and not fnmatch.fnmatchcase(cid, only):
+            continue
+        runs = []
+        for _ in range(repeat):
+            r = measure([sys.executable, me, "--one", cid], repo, env=env)
+            try:
+                inner = json.loads(r["output"].strip().splitlines()[-1])
+            except (ValueError, IndexError):
+                inner = {"status": f"harness error (exit {r['returncode']})", "wall": None, "cpu": None,
+                         "rss_mb": r["rss_mb"]}
+            if "error" in inner:
+                inner = {"status": inner["error"], "wall": None, "cpu": None, "rss_mb": None}
+            runs.append(inner)
+        results["checks"][cid] = _best(runs)
+        if progress:
+            progress(cid, results["checks"][cid])
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = TOLERANCE) -> List[str]:
+    """Human-readable regressions of `current` against `baseline` (empty when none)."""
+    regressions = []
+    pairs = [("sentinel", current.get("sentinel"), baseline.get("sentinel"))]
+    pairs += [(cid, r, baseline.get("checks", {}).get(cid)) for cid, r in current.get("checks", {}).items()]
+    for name, cur, base in pairs:
+        if not cur or not base:
+            continue
+        for key, floor, unit in (("wall", MIN_DELTA_SEC, "s"), ("cpu", MIN_DELTA_SEC, "s"),
+                                 ("rss_mb", MIN_DELTA_MB, " MB")):
+            c, b = cur.get(key), base.get(key)
+            if c is None or b is None:
+                continue
+            if c > b * (1 + tolerance) and c - b >= floor:
+                pct = f"+{(c / b - 1) * 100:.0f}%" if b else "new"
+                regressions.append(f"{name}: {key} {c:.2f}{unit} vs {b:.2f}{unit} baseline ({pct})")
+    return regressions
+
+
+def _fmt(v: Optional[float], spec: str = ".2f") -> str:
+    return "-" if v is None else format(v, spec)
+
+
+def table(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    rows = [("sentinel (end to end)", results["sentinel"], (baseline or {}).get("sentinel"))]
+    ordered = sorted(results["checks"].items(), key=lambda kv: -(kv[1]["wall"] or 0))
+    rows += [(cid, r, (baseline or {}).get("checks", {}).get(cid)) for cid, r in ordered]
+    width = max(len(r[0]) for r in rows)
+    head = f"{'':<{width}}  {'wall s':>8}  {'cpu s':>8}  {'rss MB':>8}  {'vs base':>8}  status"
+    lines = [head, "-" * len(head)]
+    for name, r, base in rows:
+        delta = ""
+        if base and base.get("wall") and r.get("wall") is not None:
+            delta = f"{(r['wall'] / base['wall'] - 1) * 100:+.0f}%"
+        lines.append(f"{name:<{width}}  {_fmt(r['wall']):>8}  {_fmt(r['cpu']):>8}  {_fmt(r['rss_mb'], '.1f'):>8}  "
+                     f"{delta:>8}  {r['status']}")
+    return "\n".join(lines)
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sentinel and each compliance check.")
+    parser.add_argument("--one", help=argparse.SUPPRESS)  # internal: time one check in this process
+    synth_repo.add_scale_args(parser)
+    parser.add_argument("--repo", help="benchmark this existing project instead of generating one")
+    parser.add_argument("--keep", action="store_true", help="keep the generated project")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("-j", "--jobs", type=int, help="sentinel --jobs")
+    parser.add_argument("--only", metavar="GLOB", help="only checks whose id matches (e.g. 'C5*')")
+    parser.add_argument("--no-checks", action="store_true", help="end-to-end timing only")
+    parser.add_argument("--save", metavar="PATH", help="write the results (JSON) here")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with saved results; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.one:
+        return run_one(args.one)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read baseline: {e}", file=sys.stderr)
+            return 1
+
+    workdir = None
+    try:
+        if args.repo:
+            repo, scale, params = os.path.abspath(args.repo), {"repo": os.path.abspath(args.repo)}, None
+        else:
+            params = synth_repo.scale_from_args(args)
+            capsule = params.pop("capsule")
+            scale = dict(params, features=sorted(params["features"]))
+        if baseline and baseline.get("scale") != scale:
+            print(f"❌ Baseline scale {json.dumps(baseline.get('scale'))} differs from this run's "
+                  f"{json.dumps(scale)}; results are not comparable", file=sys.stderr)
+            return 1
+        if params is not None:
+            workdir = tempfile.mkdtemp(prefix="m4nd8-bench-")
+            repo = os.path.join(workdir, "repo")
+            started = time.perf_counter()
+            synth_repo.generate(repo, capsule=capsule, **params)
+            print(f"Generated {repo} in {time.perf_counter() - started:.1f}s: {json.dumps(scale)}", file=sys.stderr)
+
+        def progress(name, r):
+            print(f"  {name}: {_fmt(r['wall'])}s wall, {_fmt(r['cpu'])}s cpu ({r['status']})", file=sys.stderr)
+
+        # A generated tree gets an empty HOME, so `bash -l` in check scripts reads no user profile
+        env = dict(os.environ, HOME=workdir) if workdir else None
+        results = bench(repo, args.repeat, args.jobs, args.only, not args.no_checks, progress, env)
+    except (ValueError, OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        if workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        elif workdir:
+            print(f"Kept {repo}", file=sys.stderr)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "meta": {"time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "repeat": args.repeat},
+        "scale": scale,
+        **results,
+    }
+    print(table(results, baseline))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+# synth_repo.py — synthetic project trees for benchmarking the sentinel gate
+"""
+Lays out a project the compliance pack can run against, at a chosen scale:
+
+    files          source files, spread over the hub directories
+    hubs           directories with a hub.md (wiring: every file a node,
+                   one acyclic imports chain) and a cofo.md (Items table)
+    log_lines      worker-log lines in _logs/worker/*.log, following
+                   director.yaml's line_contract
+    lock_packages  entries in package-lock.json (lockfile v3)
+    logits_tokens  tokens in output/result.json.logits.bin (C170)
+
+plus the control plane (manifest.yaml, m4nd8_pro/) and a copy of the capsule.
+The tree passes the gate as generated, so every check runs to the end:
+run_bench.py refuses to time one that does not, and
+tests/unit/test_synth_repo.py holds the generator to it with no, the
+default and all features enabled. Content is drawn from a seeded RNG, so
+the same scale and seed give the same tree byte for byte.
+
+The capsule is copied from the repository's .m4nd8/; run pack_protocol.sh
+first to benchmark factory/ as it is now.
+
+    python factory/bench/synth_repo.py /tmp/synth --scale medium [--files 20000 ...]
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+from typing import Any, Dict, Iterable, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CAPSULE = os.path.join(REPO_ROOT, ".m4nd8")
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"files": 500, "hubs": 10, "log_lines": 2_000, "lock_packages": 500, "logits_tokens": 20_000},
+    "medium": {"files": 5_000, "hubs": 50, "log_lines": 20_000, "lock_packages": 5_000, "logits_tokens": 200_000},
+    "large": {"files": 50_000, "hubs": 200, "log_lines": 200_000, "lock_packages": 50_000,
+              "logits_tokens": 2_000_000},
+}
+FEATURES = ("ui", "structured_output_monitoring", "cryptographic_provenance", "text_watermarking",
+            "intent_based_gating", "chain_of_verification", "dependency_governance")
+DEFAULT_FEATURES = ("structured_output_monitoring",)
+LOG_LINES_PER_FILE = 5_000
+
+LICENSE_HEADER = "# Copyright (c) synth. License: Proprietary, see LICENSE.\n"
+
+_WORDS = ("cache index graph token ledger policy worker stream batch shard queue route schema "
+          "config adapter handler client parser render").split()
+
+HUB = """# hub — Wiring Diagram (Control Plane)
+M4ND8 Protocol v5.1
+
+Directory: `./{directory}`
+
+## Items (Role & Description)
+| Path|Role|Description|
+|---|---|---|
+{items}
+
+## Machine-Readable Wiring (for checks)
+
+```yaml
+hub_wiring:
+  nodes:
+{nodes}
+  edges:
+{edges}
+  local_only:
+    - ./cofo.md
+    - ./hub.md
+```
+"""
+
+COFO = """# cofo — Context Form (Control Plane)
+M4ND8 Protocol v5.1
+
+Directory: `./{directory}`
+
+## Items (Role & Description)
+| Path|Role|Description|
+|---|---|---|
+{items}
+
+## Change Notes
+| Timestamp (UTC) | Actor | Path | Change | Why / Evidence | Trace Ref |
+|---|---|---|---|---|---|
+
+## Rules (Local)
+- None.
+"""
+
+
+def _write(root: str, rel: str, text: str) -> None:
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _module(rng: random.Random, name: str, imports: Optional[str]) -> str:
+    a, b = rng.sample(_WORDS, 2)
+    head = f"from .{imports} import run as _next\n\n\n" if imports else "\n"
+    body = f"    return _next(value) + {rng.randint(1, 99)}\n" if imports else f"    return value * {rng.randint(2, 9)}\n"
+    return f'{LICENSE_HEADER}"""{name}: {a} {b}."""\n{head}def run(value):\n{body}'
+
+
+def control_plane(root: str, features: Iterable[str], capsule: str) -> None:
+    enabled = set(features)
+    manifest = "features:\n" + "".join(f"  {f}: {'true' if f in enabled else 'false'}\n" for f in FEATURES)
+    _write(root, "manifest.yaml", manifest + 'verification_target: "true"\n')
+    _write(root, "m4nd8_pro/spec.md",
+           "Agentic TDD Mandate RED GREEN REFACTOR\nReflexion Protocol Anti-Looping reflection.md\n"
+           "Worker Constraints Filesystem boundary Network egress\n")
+    _write(root, "m4nd8_pro/fnl_chk.yaml", "checks: []\n")
+    _write(root, "m4nd8_pro/blueprint.md", "Blueprint.\n")
+    _write(root, "spec(template).md", "# Spec\n\n✦ **Structured Data Integrity Rule (CoVe):** outputs are "
+                                      "verified claim by claim before release.\n")
+    _write(root, "README.md", "# synth\n\nSynthetic benchmark project.\n\n## Installation\n\nNone.\n\n"
+                              "## Usage\n\n`python -m src`\n\n## Configuration\n\nmanifest.yaml\n")
+    _write(root, "LICENSE", "Proprietary. Copyright (c) synth.\n")
+    _write(root, "_logs/action_plan.md", "Plan.\n")
+    _write(root, "tests/test_app.py",
+           "import pytest\n\n\ndef test_app():\n    with pytest.raises(ZeroDivisionError):\n        1 / 0\n")
+    shutil.copytree(capsule, os.path.join(root, ".m4nd8"),
+                    ignore=shutil.ignore_patterns("__pycache__", "sentinel_cache.json"))
+    # Executable as pack_protocol.sh leaves them, whatever modes the checkout has (C58)
+    for path in glob.glob(os.path.join(root, ".m4nd8", "bin", "*")) + \
+            glob.glob(os.path.join(root, ".m4nd8", "tools", "*.sh")):
+        os.chmod(path, os.stat(path).st_mode | 0o111)
+    shutil.copy(os.path.join(capsule, "director.yaml"), os.path.join(root, "m4nd8_pro", "director.yaml"))
+
+
+def sources(root: str, rng: random.Random, files: int, hubs: int) -> list:
+    """Source files spread over `hubs` directories, each wired by its hub.md; the written paths."""
+    hubs = max(1, hubs)
+    written = []
+    for h in range(hubs):
+        directory = f"src/pkg{h:03d}"
+        names = [f"mod{i:05d}.py" for i in range(h, files, hubs)]
+        for k, name in enumerate(names):
+            nxt = names[k + 1][:-3] if k + 1 < len(names) else None
+            _write(root, f"{directory}/{name}", _module(rng, name, nxt))
+            written.append(f"{directory}/{name}")
+        items = "\n".join(f"| ./{n}|module|{' '.join(rng.sample(_WORDS, 3))}|" for n in names)
+        nodes = "\n".join(f"    - ./{n}" for n in names) or "    []"
+        edges = "\n".join(f"    - {{ from: ./{a}, relation: imports, to: ./{b}, why: \"chain\" }}"
+                          for a, b in zip(names, names[1:])) or "    []"
+        _write(root, f"{directory}/hub.md", HUB.format(directory=directory, items=items, nodes=nodes, edges=edges))
+        _write(root, f"{directory}/cofo.md", COFO.format(directory=directory, items=items))
+    _write(root, "src/__init__.py", LICENSE_HEADER)
+    return written
+
+
+def worker_logs(root: str, rng: random.Random, lines: int, paths: list) -> None:
+    """Complete READ/PLAN/WRITE/COFO_NOTE/VERIFY cycles until `lines` lines are written."""
+    read_ok = ("READ_OK: director.yaml → manifest.yaml → hub.md → cofo.md → spec.md → doctrine.md → "
+               "fnl_chk.yaml")
+    written, part = 0, 0
+    while written < lines or part == 0:
+        out = []
+        while len(out) < LOG_LINES_PER_FILE and written + len(out) < max(lines, 5):
+            path = "./" + rng.choice(paths) if paths else "./src/__init__.py"
+            out += [read_ok, "PLAN_OK", f"WRITE_OK: {path}", f"COFO_NOTE_OK: {path}", "VERIFY_OK"]
+        _write(root, f"_logs/worker/worker{part:03d}.log", "\n".join(out) + "\n")
+        written += len(out)
+        part += 1
+
+
+def lockfile(root: str, rng: random.Random, packages: int) -> None:
+    entries: Dict[str, Any] = {"": {"name": "synth", "version": "1.0.0", "dependencies": {}}}
+    for i in range(packages):
+        name = f"{rng.choice(_WORDS)}-{rng.choice(_WORDS)}-{i}"
+        version = f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 99)}"
+        entries[f"node_modules/{name}"] = {
+            "version": version,
+            "resolved": f"https://registry.npmjs.org/{name}/-/{name}-{version}.tgz",
+            "integrity": "sha512-" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")
+                                             for _ in range(86)) + "==",
+        }
+        if i < 50:
+            entries[""]["dependencies"][name] = version
+    _write(root, "package-lock.json", json.dumps({"name": "synth", "version": "1.0.0", "lockfileVersion": 3,
+                                                  "requires": True, "packages": entries}, indent=2))
+    _write(root, "package.json", json.dumps({"name": "synth", "version": "1.0.0",
+                                             "dependencies": entries[""]["dependencies"]}, indent=2))
+    # Approve exactly what the lockfile resolves, so C60 passes and the gate runs to the end
+    subprocess.run([sys.executable, os.path.join(".m4nd8", "tools", "snapshot_local.py"), "snapshot"],
+                   cwd=root, check=True, stdout=subprocess.DEVNULL)
+
+
+def _trace(root: str, rng: random.Random, rel: str, tokens: int) -> None:
+    """A `tokens`-token logits trace for the structured output `rel` (written first if missing)."""
+    sys.path.insert(0, os.path.join(root, ".m4nd8", "bin"))
+    import logits_trace
+    toks = [rng.choice(_WORDS + ["{", "}", ":", ",", '"']) for _ in range(tokens)]
+    probs = [0.5 + rng.random() / 2 for _ in range(tokens)]
+    if not os.path.exists(os.path.join(root, rel)):
+        _write(root, rel, json.dumps({"result": " ".join(toks[:50])}))
+    logits_trace.write_trace(os.path.join(root, rel + logits_trace.TRACE_SUFFIX), toks, probs)
+
+
+def logits(root: str, rng: random.Random, tokens: int) -> None:
+    """output/result.json with a `tokens`-token trace; C170 wants one for every .json, so the
+    package manifests get a short one too."""
+    for rel in ("package.json", "package-lock.json"):
+        _trace(root, rng, rel, 64)
+    if tokens:
+        _trace(root, rng, "output/result.json", tokens)
+
+
+def feature_files(root: str, rng: random.Random, features: Iterable[str], capsule: str) -> None:
+    """What the enabled features' checks require: rails (C190), the CoVe doctrine (C191), and
+    C2PA sidecars sealed into a provenance manifest (C180; last, as it hashes the outputs)."""
+    enabled = set(features)
+    if "intent_based_gating" in enabled:
+        os.makedirs(os.path.join(root, "policies"), exist_ok=True)
+        shutil.copy(os.path.join(capsule, "policies", "input_rails.colang"), os.path.join(root, "policies"))
+    if "chain_of_verification" in enabled:
+        _write(root, "doctrine.md", "# Doctrine\n\n## Chain of Verification (CoVe) Policy\n\n"
+                                    "Claims are verified independently before release.\n")
+    if "cryptographic_provenance" in enabled:
+        for rel in ("package.json", "package-lock.json", "output/result.json"):
+            if os.path.exists(os.path.join(root, rel)):
+                _write(root, rel + ".c2pa", json.dumps({"sources": ["manifest.yaml"]}))
+        _write(root, "output/manifest.c2pa", json.dumps({"sources": ["manifest.yaml"]}))
+        subprocess.run([sys.executable, os.path.join(".m4nd8", "bin", "provenance.py"), "seal"],
+                       cwd=root, check=True, stdout=subprocess.DEVNULL)
+        _trace(root, rng, "m4nd8_pro/provenance.json", 64)  # a .json too, as far as C170 knows
+
+
+def generate(root: str, files: int, hubs: int, log_lines: int, lock_packages: int, logits_tokens: int,
+             features: Iterable[str] = DEFAULT_FEATURES, seed: int = 0, capsule: str = CAPSULE) -> Dict[str, Any]:
+    """Write the tree under `root` (which must not exist); its parameters, for the results file."""
+    if os.path.exists(root):
+        raise FileExistsError(f"{root} already exists")
+    if not os.path.isfile(os.path.join(capsule, "bin", "sentinel.py")):
+        raise FileNotFoundError(f"no capsule at {capsule} (run pack_protocol.sh)")
+    rng = random.Random(seed)
+    control_plane(root, features, capsule)
+    paths = sources(root, rng, files, hubs)
+    worker_logs(root, rng, log_lines, paths)
+    lockfile(root, rng, lock_packages)
+    logits(root, rng, logits_tokens)
+    feature_files(root, rng, features, capsule)
+    return {"files": files, "hubs": hubs, "log_lines": log_lines, "lock_packages": lock_packages,
+            "logits_tokens": logits_tokens, "features": sorted(features), "seed": seed}
+
+
+def add_scale_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for key in SCALES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f"override the scale's {key}")
+    parser.add_argument("--features", default=",".join(DEFAULT_FEATURES),
+                        help=f"comma-separated manifest features to enable (of: {', '.join(FEATURES)})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--capsule", default=CAPSULE, help="capsule to copy (default: %(default)s)")
+
+
+def scale_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    params: Dict[str, Any] = dict(SCALES[args.scale])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    features = [f for f in args.features.split(",") if f]
+    unknown = sorted(set(features) - set(FEATURES))
+    if unknown:
+        raise ValueError(f"unknown features: {', '.join(unknown)}")
+    return dict(params, features=features, seed=args.seed, capsule=args.capsule)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic project tree for benchmarks.")
+    parser.add_argument("root")
+    add_scale_args(parser)
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    try:
+        params = generate(args.root, **scale_from_args(args))
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(params))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
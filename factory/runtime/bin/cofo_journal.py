@@ -0,0 +1,332 @@
+# cofo_journal.py — append-only journal behind every cofo.md Change Notes table
+"""
+Change Notes are appended as JSON lines to _logs/cofo_journal.jsonl:
+
+    {"ts": "2025-01-01T00:00:00Z", "actor": "builder", "path": "src/app.py",
+     "change": "Add retry", "evidence": "commit abc123", "trace": "_logs/trace/run-42.log"}
+
+  * An append is one locked write at the end of the file (flock where
+    available), so any number of workers can note changes concurrently and a
+    note never costs a rewrite of the ledger.
+  * A path index (_logs/cofo_journal.db) is brought up to date lazily, from
+    the byte offset it last reached, the same way log_store ingests worker logs.
+  * cofo.md's Change Notes table is a rendering of the journal for one
+    directory (`render`); C55/C56 query the journal, not the markdown.
+  * The journal is runtime state under _logs/ and not versioned, so before
+    reading it C55/C56 import the cofo.md rows it lacks (`import_missing`):
+    notes written by hand, in a fresh clone, or from before the journal.
+
+Workers note a change with:
+    python .m4nd8/bin/cofo_journal.py add PATH --change "..." --evidence "..." --trace _logs/trace/...
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: O_APPEND single writes only
+    fcntl = None
+
+JOURNAL_PATH = os.path.join("_logs", "cofo_journal.jsonl")
+FIELDS = ("ts", "actor", "path", "change", "evidence", "trace")
+TRACE_PREFIX = "_logs/trace/"
+HEAD_BYTES = 1024
+TABLE_HEADER = ("| Timestamp (UTC) | Actor | Path | Change | Why / Evidence | Trace Ref |\n"
+                "|-----------------|-------|------|--------|----------------|-----------|\n")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS notes (
+    seq      INTEGER PRIMARY KEY,
+    ts       TEXT,
+    actor    TEXT,
+    path     TEXT NOT NULL,
+    dir      TEXT NOT NULL,
+    change   TEXT,
+    evidence TEXT,
+    trace    TEXT
+);
+CREATE INDEX IF NOT EXISTS notes_path ON notes (path);
+CREATE INDEX IF NOT EXISTS notes_dir ON notes (dir);
+"""
+
+
+def normalize_path(path: str) -> str:
+    """Project-relative, forward slashes, no leading ./ (so `./src/a.py` == `src/a.py`)."""
+    path = str(path).strip().strip("`").strip()
+    return os.path.normpath(path).replace(os.sep, "/") if path else path
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _key(n: Dict[str, Any]) -> tuple:
+    return tuple(normalize_path(n.get(k) or "") if k == "path" else str(n.get(k) or "") for k in FIELDS)
+
+
+def note(path: str, change: str, evidence: str = "", actor: str = "worker",
+         trace: str = "", ts: Optional[str] = None) -> Dict[str, str]:
+    return {"ts": ts or utc_now(), "actor": actor, "path": normalize_path(path),
+            "change": change, "evidence": evidence, "trace": trace}
+
+
+class Journal:
+    """The journal file plus its lazily synced path index."""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".db"
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Writes --------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _locked(self, mode: str) -> Iterator[Any]:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, mode) as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if "a" in mode else fcntl.LOCK_SH)
+            try:
+                yield f
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def append(self, *notes: Dict[str, str]) -> None:
+        """Append notes in one locked write; readers never see half a batch."""
+        data = "".join(json.dumps({k: n.get(k, "") for k in FIELDS}, ensure_ascii=False) + "\n"
+                       for n in notes).encode("utf-8")
+        if not data:
+            return
+        with self._locked("ab") as f:
+            f.write(data)
+            f.flush()
+
+    def import_missing(self, cofo_paths: Iterable[str]) -> int:
+        """Append the cofo.md table rows the journal does not hold yet; returns how many.
+        Reading and appending share one lock, so concurrent callers import a row once."""
+        found = [n for p in cofo_paths for n in import_table(p)]
+        if not found:
+            return 0
+        with self._locked("a+b") as f:
+            f.seek(0)
+            known = set()
+            for line in f.read().splitlines():
+                try:
+                    known.add(_key(json.loads(line)))
+                except ValueError:
+                    continue
+            fresh = []
+            for n in found:
+                if _key(n) not in known:
+                    known.add(_key(n))
+                    fresh.append(n)
+            f.write("".join(json.dumps({k: n.get(k, "") for k in FIELDS}, ensure_ascii=False) + "\n"
+                            for n in fresh).encode("utf-8"))
+            f.flush()
+        return len(fresh)
+
+    # --- Index ---------------------------------------------------------------------
+
+    def _open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.index_path, timeout=30)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _index(self) -> sqlite3.Connection:
+        self.sync()
+        return self._conn
+
+    def sync(self) -> int:
+        """Index notes appended since the last sync; returns how many were added."""
+        conn = self._open()
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            with conn:
+                conn.execute("DELETE FROM notes")
+                conn.execute("DELETE FROM meta")
+            return 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")   # one syncing process at a time
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            offset = int(meta.get("offset", 0))
+            if offset == st.st_size and meta.get("inode") == str(st.st_ino):
+                return 0
+            rows = []
+            with self._locked("rb") as f:
+                head = hashlib.sha1(f.read(min(offset, HEAD_BYTES))).hexdigest()
+                if meta.get("inode") != str(st.st_ino) or st.st_size < offset or meta.get("head") != head:
+                    conn.execute("DELETE FROM notes")   # rewritten or replaced: start over
+                    offset = 0
+                f.seek(offset)
+                data = f.read()
+                cut = data.rfind(b"\n") + 1
+                for line in data[:cut].splitlines():
+                    try:
+                        n = json.loads(line)
+                    except ValueError:
+                        continue
+                    path = normalize_path(n.get("path", ""))
+                    rows.append((n.get("ts"), n.get("actor"), path, os.path.dirname(path),
+                                 n.get("change"), n.get("evidence"), n.get("trace")))
+                offset += cut
+                f.seek(0)
+                head = hashlib.sha1(f.read(min(offset, HEAD_BYTES))).hexdigest()
+            conn.executemany("INSERT INTO notes (ts, actor, path, dir, change, evidence, trace) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             [("offset", str(offset)), ("inode", str(st.st_ino)), ("head", head)])
+        return len(rows)
+
+    # --- Queries -------------------------------------------------------------------
+
+    def _rows(self, sql: str, args: Iterable[Any] = ()) -> List[Dict[str, str]]:
+        cur = self._index().execute(
+            f"SELECT ts, actor, path, change, evidence, trace FROM notes {sql} ORDER BY seq", tuple(args))
+        return [dict(zip(FIELDS, r)) for r in cur]
+
+    def has(self, path: str) -> bool:
+        return self._index().execute("SELECT 1 FROM notes WHERE path = ? LIMIT 1",
+                                     (normalize_path(path),)).fetchone() is not None
+
+    def noted(self, paths: Iterable[str]) -> set:
+        """The subset of `paths` with at least one note."""
+        conn = self._index()
+        return {p for p in {normalize_path(p) for p in paths}
+                if conn.execute("SELECT 1 FROM notes WHERE path = ? LIMIT 1", (p,)).fetchone()}
+
+    def notes(self, path: Optional[str] = None, directory: Optional[str] = None) -> List[Dict[str, str]]:
+        if path is not None:
+            return self._rows("WHERE path = ?", (normalize_path(path),))
+        if directory is not None:
+            d = normalize_path(directory)
+            return self._rows("WHERE dir = ?", ("" if d == "." else d,))
+        return self._rows("")
+
+    def untraced(self) -> List[Dict[str, str]]:
+        """Notes whose Trace Ref does not point into _logs/trace/."""
+        return self._rows("WHERE trace IS NULL OR substr(trace, 1, ?) != ?", (len(TRACE_PREFIX), TRACE_PREFIX))
+
+    # --- Markdown ------------------------------------------------------------------
+
+    def render(self, directory: str) -> str:
+        """The Change Notes table for `directory`, newest last."""
+        base = normalize_path(directory)
+        out = [TABLE_HEADER]
+        for n in self.notes(directory=directory):
+            rel = "./" + (os.path.relpath(n["path"], base) if base not in ("", ".") else n["path"])
+            cells = [n["ts"], n["actor"], f"`{rel}`", n["change"], n["evidence"], n["trace"]]
+            out.append("| " + " | ".join(str(c or "").replace("|", "\\|") for c in cells) + " |\n")
+        return "".join(out)
+
+
+_NOTES_SECTION = re.compile(r"(#+\s*Change Notes[^\n]*\n)(.*?)(?=\n#+\s|\Z)", re.S | re.I)
+_TABLE = re.compile(r"(?:^\|.*\|[ \t]*\n?)+", re.M)
+_TEMPLATE_BOX = re.compile(r"<!--\s*TEMPLATE-ONLY:\s*cofo-template-start\s*-->.*?"
+                           r"<!--\s*TEMPLATE-ONLY:\s*cofo-template-end\s*-->", re.S)
+
+
+def write_table(journal: Journal, cofo_path: str) -> bool:
+    """Replace the Change Notes table of `cofo_path` with the journal's rendering."""
+    with open(cofo_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    table = journal.render(os.path.dirname(cofo_path))
+    for m in _NOTES_SECTION.finditer(text):
+        if _inside_template(text, m.start()):
+            continue
+        body = m.group(2)
+        t = _TABLE.search(body)
+        new_body = body[:t.start()] + table + body[t.end():] if t else body.rstrip("\n") + "\n\n" + table
+        text = text[:m.start(2)] + new_body + text[m.end(2):]
+        break
+    else:
+        text = text.rstrip("\n") + "\n\n## Change Notes\n\n" + table
+    tmp = cofo_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, cofo_path)
+    return True
+
+
+def _inside_template(text: str, pos: int) -> bool:
+    return any(m.start() <= pos < m.end() for m in _TEMPLATE_BOX.finditer(text))
+
+
+def import_table(cofo_path: str) -> List[Dict[str, str]]:
+    """Notes from a hand-written cofo.md Change Notes table (paths relative to its folder)."""
+    with open(cofo_path, "r", encoding="utf-8", errors="ignore") as f:
+        text = _TEMPLATE_BOX.sub("", f.read())
+    base = os.path.dirname(cofo_path)
+    notes = []
+    for m in _NOTES_SECTION.finditer(text):
+        t = _TABLE.search(m.group(2))
+        if not t:
+            continue
+        for line in t.group(0).splitlines()[2:]:   # header + separator
+            cols = [c.strip().replace("\\|", "|") for c in re.split(r"(?<!\\)\|", line.strip())[1:-1]]
+            if len(cols) < 3 or not cols[2].strip("`"):
+                continue
+            cols += [""] * (6 - len(cols))
+            n = note(os.path.join(base, cols[2].strip("`")), cols[3], cols[4],
+                     actor=cols[1], trace=cols[5].strip("`"))
+            n["ts"] = cols[0]   # as written, even if blank: the row's identity for import_missing
+            notes.append(n)
+    return notes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Append to, query and render the cofo Change Notes journal.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add", help="append a Change Note")
+    add.add_argument("path")
+    add.add_argument("--change", required=True)
+    add.add_argument("--evidence", default="")
+    add.add_argument("--actor", default=os.environ.get("M4ND8_ACTOR", "worker"))
+    add.add_argument("--trace", default="", help=f"trace reference (should start with {TRACE_PREFIX})")
+    show = sub.add_parser("show", help="print the notes for a path (or all) as JSON lines")
+    show.add_argument("path", nargs="?")
+    render = sub.add_parser("render", help="print (or --write) the Change Notes table of a folder")
+    render.add_argument("directory", nargs="?", default=".")
+    render.add_argument("--write", action="store_true", help="update DIRECTORY/cofo.md in place")
+    imp = sub.add_parser("import", help="append the rows of cofo.md tables the journal lacks")
+    imp.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    journal = Journal()
+    try:
+        if args.cmd == "add":
+            journal.append(note(args.path, args.change, args.evidence, args.actor, args.trace))
+        elif args.cmd == "show":
+            for n in journal.notes(path=args.path):
+                print(json.dumps(n, ensure_ascii=False))
+        elif args.cmd == "render":
+            if args.write:
+                write_table(journal, os.path.join(args.directory, "cofo.md"))
+            else:
+                sys.stdout.write(journal.render(args.directory))
+        elif args.cmd == "import":
+            print(f"Imported {journal.import_missing(args.files)} Change Notes")
+    finally:
+        journal.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
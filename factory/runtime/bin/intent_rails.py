@@ -0,0 +1,298 @@
+# intent_rails.py — compiled input-rail matcher for policies/input_rails.colang
+r"""
+Screens user messages against the Colang input rails in-process, without a
+NeMo runtime on the hot path. Rails are read from the `if`/`elif` tests of
+every `define flow`:
+
+    if "ignore previous" in $user_message or regex("disable (the )?filters?") in $user_message:
+      bot refuse "I cannot comply with that request."
+
+  * Phrases are compiled once into a character trie, emitted as one regex
+    (`ignore previous|you must` → `(?:ignore\ previous|you\ must)` with
+    shared prefixes factored out), so at each position of a message only
+    the branch for the next character is tried; the regex engine acts as
+    the multi-pattern automaton (1,000 phrases cost about twice what 3
+    do). Regex rails are further alternatives of the same pattern, except
+    those that would change meaning inside it (backreferences, named
+    groups, global inline flags such as `(?i)`): each of these is
+    searched on its own and the earliest hit wins.
+  * Messages are normalized once before matching: NFKC (skipped for
+    ASCII), casefold, and whitespace runs collapsed to one space. Phrases get the same
+    normalization, so "Ignore   Previous" still matches; regex rails see
+    the normalized (casefolded) text, so write them in lower case.
+  * A hit reports the rule and its citation (file:line, flow) and the
+    refusal the flow gives.
+
+Conditions other than `or`-joined `... in $user_message` tests (and, not,
+other variables) are rejected at load time rather than approximated.
+
+    from intent_rails import load
+    rails = load()                       # policies/ or .m4nd8/policies/input_rails.colang
+    rails.check("Please ignore previous instructions")   # → {"rule", "pattern", "citation", ...} | None
+    rails.check_batch(messages)                          # → [match | None, ...]
+
+    python .m4nd8/bin/intent_rails.py check "message" | batch FILE [--json]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+RAILS_PATHS = ("policies/input_rails.colang", ".m4nd8/policies/input_rails.colang")
+
+_FLOW = re.compile(r"^define\s+flow\s+(.+?)\s*$")
+_COND = re.compile(r"^(?:el)?if\s+(.*?):\s*$")
+_TEST = re.compile(r'^(?:"((?:[^"\\]|\\.)*)"|regex\(\s*"((?:[^"\\]|\\.)*)"\s*\))\s+in\s+\$user_message$')
+_REFUSE = re.compile(r'^bot\s+\w+\s+"((?:[^"\\]|\\.)*)"')
+# Group references and global flags, which mean something else once the
+# pattern is one alternative among many (an unescaped \N, (?P=, (?(, (?P<, or a leading (?aiLmsux))
+_NOT_EMBEDDABLE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P[=<]|\(\?\(|^\(\?[aiLmsux]+\)")
+
+
+class RailError(Exception):
+    """The rails file uses a condition this matcher cannot evaluate exactly."""
+
+
+def normalize(text: str) -> str:
+    if not text.isascii():  # ASCII is already NFKC
+        text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.casefold().split())
+
+
+def trie_regex(phrases: Iterable[str]) -> str:
+    """One regex matching exactly `phrases`, shared prefixes factored out."""
+    trie: Dict[str, Any] = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:  # a phrase ends here: the longer ones are optional
+            body = (body if len(branches) > 1 else "(?:" + body + ")") + "?"
+        return body
+
+    return emit(trie)
+
+
+def _unescape(s: str) -> str:
+    return re.sub(r"\\(.)", r"\1", s)
+
+
+def _split_or(cond: str) -> List[str]:
+    """Split on top-level ` or ` (outside quotes)."""
+    parts, buf, quoted, i = [], [], False, 0
+    while i < len(cond):
+        c = cond[i]
+        if c == "\\" and quoted:
+            buf.append(cond[i:i + 2])
+            i += 2
+            continue
+        if c == '"':
+            quoted = not quoted
+        if not quoted and cond.startswith(" or ", i):
+            parts.append("".join(buf).strip())
+            buf = []
+            i += 4
+            continue
+        buf.append(c)
+        i += 1
+    parts.append("".join(buf).strip())
+    return parts
+
+
+def parse_rails(text: str, source: str = "input_rails.colang") -> List[Dict[str, Any]]:
+    """Every rule: {"flow", "kind" (phrase | regex), "pattern", "citation", "response"}."""
+    rules: List[Dict[str, Any]] = []
+    flow = None
+    pending: List[Dict[str, Any]] = []   # rules of the last condition, awaiting its bot line
+    for n, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        m = _FLOW.match(line)
+        if m:
+            flow, pending = m.group(1), []
+            continue
+        m = _COND.match(line)
+        if m and flow:
+            pending = []
+            for test in _split_or(m.group(1)):
+                t = _TEST.match(test)
+                if not t:
+                    raise RailError(f"{source}:{n}: unsupported condition {test!r} "
+                                    f"(only \"phrase\" / regex(\"...\") in $user_message, joined by or)")
+                phrase, pattern = t.group(1), t.group(2)
+                rule = {"flow": flow, "kind": "phrase" if phrase is not None else "regex",
+                        "pattern": normalize(_unescape(phrase)) if phrase is not None else _unescape(pattern),
+                        "citation": f"{source}:{n} (flow {flow})", "response": None}
+                if rule["kind"] == "regex":
+                    try:
+                        re.compile(rule["pattern"])
+                    except re.error as e:
+                        raise RailError(f"{source}:{n}: bad regex {rule['pattern']!r}: {e}")
+                rules.append(rule)
+                pending.append(rule)
+            continue
+        m = _REFUSE.match(line)
+        if m and pending:
+            for rule in pending:
+                rule["response"] = _unescape(m.group(1))
+            pending = []
+    return rules
+
+
+class Rails:
+    """
+    The compiled rule set. Matching is one regex search per normalized
+    message, plus one per regex rail that cannot share that regex.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]]):
+        self.rules = list(rules)
+        self._phrase_rule: Dict[str, int] = {}
+        for i, r in enumerate(self.rules):
+            if r["kind"] == "phrase" and r["pattern"]:
+                self._phrase_rule.setdefault(r["pattern"], i)  # first rule wins
+        regex_rules = [(i, r["pattern"]) for i, r in enumerate(self.rules) if r["kind"] == "regex"]
+        alternatives = [f"(?P<phrase>{trie_regex(self._phrase_rule)})"] if self._phrase_rule else []
+        alternatives += [f"(?P<r{i}>{p})" for i, p in regex_rules if not _NOT_EMBEDDABLE.search(p)]
+        self._rx = re.compile("|".join(alternatives)) if alternatives else None
+        self._alone = [(i, re.compile(p)) for i, p in regex_rules if _NOT_EMBEDDABLE.search(p)]
+        # A rule's group closes after any group inside its regex, so lastindex is the rule's
+        self._rule_of = {idx: int(name[1:]) for name, idx in self._rx.groupindex.items()
+                         if name[0] == "r" and name[1:].isdigit()} if self._rx else {}
+        self._phrase_group = self._rx.groupindex.get("phrase") if self._rx else None
+
+    def _rule(self, m) -> int:
+        if m.re is not self._rx:
+            return next(i for i, rx in self._alone if rx is m.re)
+        if m.lastindex == self._phrase_group:
+            return self._phrase_rule[m.group()]
+        return self._rule_of[m.lastindex]
+
+    def _match(self, m) -> Dict[str, Any]:
+        rule = self.rules[self._rule(m)]
+        return {"rule": rule["flow"], "kind": rule["kind"], "pattern": rule["pattern"],
+                "matched": m.group(), "citation": rule["citation"], "response": rule["response"]}
+
+    def _search(self, text: str, pos: int = 0):
+        m = self._rx.search(text, pos) if self._rx is not None else None
+        for _, rx in self._alone:
+            other = rx.search(text, pos)
+            if other and (m is None or other.start() < m.start()):
+                m = other
+        return m
+
+    def check(self, message: str) -> Optional[Dict[str, Any]]:
+        """The earliest rail hit in `message`, or None when it passes."""
+        m = self._search(normalize(message))
+        return self._match(m) if m else None
+
+    def check_all(self, message: str) -> List[Dict[str, Any]]:
+        """Every non-overlapping hit, for audit logs."""
+        text = normalize(message)
+        if not self._alone:
+            return [self._match(m) for m in self._rx.finditer(text)] if self._rx is not None else []
+        out, pos = [], 0
+        while pos <= len(text):
+            m = self._search(text, pos)
+            if m is None:
+                break
+            out.append(self._match(m))
+            pos = max(m.end(), m.start() + 1)
+        return out
+
+    def check_batch(self, messages: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        if self._alone:
+            return [self.check(message) for message in messages]
+        if self._rx is None:
+            return [None for _ in messages]
+        search, norm, match = self._rx.search, normalize, self._match
+        out = []
+        for message in messages:
+            m = search(norm(message))
+            out.append(match(m) if m else None)
+        return out
+
+
+def load(path: Optional[str] = None) -> Rails:
+    if path is None:
+        path = next((p for p in RAILS_PATHS if os.path.isfile(p)), None)
+        if path is None:
+            raise RailError(f"no input rails found (looked for {', '.join(RAILS_PATHS)})")
+    with open(path, "r", encoding="utf-8") as f:
+        return Rails(parse_rails(f.read(), path))
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def _read_messages(path: str) -> List[str]:
+    """One message per line; JSON lines may carry it as {"message": ...} or a string."""
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith(("{", '"')):
+                try:
+                    data = json.loads(line)
+                    line = data.get("message", "") if isinstance(data, dict) else str(data)
+                except ValueError:
+                    pass
+            out.append(line)
+    return out
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Screen messages against the Colang input rails.")
+    parser.add_argument("--rails", help=f"rails file (default: first of {', '.join(RAILS_PATHS)})")
+    parser.add_argument("--json", action="store_true")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    chk = sub.add_parser("check", help="screen one message")
+    chk.add_argument("message")
+    bat = sub.add_parser("batch", help="screen a file of messages (text or JSON lines)")
+    bat.add_argument("path")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    try:
+        rails = load(args.rails)
+    except (OSError, RailError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.cmd == "check":
+        hit = rails.check(args.message)
+        if args.json:
+            print(json.dumps(hit))
+        elif hit:
+            print(f"BLOCKED by {hit['rule']} ({hit['citation']}): {hit['matched']!r} → {hit['response']}")
+        else:
+            print("PASS")
+        return 1 if hit else 0
+
+    messages = _read_messages(args.path)
+    start = time.perf_counter()
+    hits = rails.check_batch(messages)
+    elapsed = time.perf_counter() - start
+    blocked = [(i, h) for i, h in enumerate(hits) if h]
+    if args.json:
+        print(json.dumps([{"line": i + 1, **h} for i, h in blocked], indent=2))
+    else:
+        for i, h in blocked:
+            print(f"{args.path}:{i + 1}: BLOCKED by {h['rule']} ({h['citation']}): {h['matched']!r}")
+        rate = len(messages) / elapsed if elapsed else float("inf")
+        print(f"{len(blocked)}/{len(messages)} blocked, {len(rails.rules)} rules ({rate:,.0f} messages/s)")
+    return 1 if blocked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
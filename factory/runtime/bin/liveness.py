@@ -1,45 +1,381 @@
-# diagnostic/liveness_checker.py
-import requests
+# liveness.py — real-backend liveness monitor behind C150.backend_real_not_mock
+"""
+Probes every backend declared in manifest.yaml concurrently and decides,
+per target, whether the real service is up or something else (a mock, a
+stub, nothing at all) answers in its place.
+
+    backends:
+      - name: api
+        url: "http://127.0.0.1:8000/health"
+        expected_process: "uvicorn"     # regex over the command line, like pgrep -f
+      - name: worker
+        port: 9001                      # url defaults to http://127.0.0.1:<port><health_endpoint>
+        health_endpoint: "/healthz"
+
+The older single `backend: {backend_port, health_endpoint, expected_process}`
+block is read as one target named "backend".
+
+  * Probes run on one asyncio loop over pooled keep-alive HTTP/1.1
+    connections (asyncio streams, no client library): a target is one
+    connection reused for every round, not a handshake per probe.
+  * Process discovery reads /proc/<pid>/cmdline once per round for all
+    targets; `pgrep` is only forked where there is no /proc.
+  * Each target keeps its last WINDOW probes: latency p50/p95/p99, and
+    whether any of them looked like a mock (a "mock" marker in the body,
+    the Server header or an X-Mock header). The verdict is
+    real | mock | down | no_process.
+
+    python .m4nd8/bin/liveness.py check [--json]              # one round (C150)
+    python .m4nd8/bin/liveness.py watch [--interval 5] [--rounds N] [--json]
+"""
+import argparse
+import asyncio
+import collections
+import json
+import math
+import os
+import re
+import ssl
 import subprocess
+import sys
 import time
-from typing import Dict, Any
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import yaml
+
+MANIFEST_PATHS = ("m4nd8_pro/manifest.yaml", "manifest.yaml")
+TIMEOUT = 2.0
+WINDOW = 100
+INTERVAL = 5.0
+MAX_BODY = 64 * 1024
+_MOCK = re.compile(rb"\bmock", re.IGNORECASE)
+
+
+# --- Targets -----------------------------------------------------------------------------
+
+def load_targets(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Normalized targets: {name, url, expected_process (or None)}."""
+    declared = list(manifest.get("backends") or [])
+    legacy = manifest.get("backend")
+    if isinstance(legacy, dict):
+        declared.insert(0, {"name": "backend", "port": legacy.get("backend_port", 8000),
+                            "health_endpoint": legacy.get("health_endpoint", "/health"),
+                            "expected_process": legacy.get("expected_process", "uvicorn")})
+    targets = []
+    for i, b in enumerate(declared):
+        if not isinstance(b, dict):
+            raise ValueError(f"backends[{i}] must be a mapping")
+        url = b.get("url") or (f"http://{b.get('host', '127.0.0.1')}:{b.get('port', 8000)}"
+                               f"{b.get('health_endpoint', '/health')}")
+        if urlsplit(url).scheme not in ("http", "https"):
+            raise ValueError(f"backends[{i}]: unsupported url {url!r}")
+        targets.append({"name": str(b.get("name") or f"backend{i}"), "url": url,
+                        "expected_process": b.get("expected_process")})
+    return targets
+
+
+def load_manifest(path: Optional[str] = None) -> Dict[str, Any]:
+    path = path or next((p for p in MANIFEST_PATHS if os.path.isfile(p)), None)
+    if path is None:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+# --- Processes ---------------------------------------------------------------------------
+
+def process_table() -> Optional[List[str]]:
+    """Command lines of every process, from /proc; None where there is no /proc."""
+    if not os.path.isdir("/proc/self"):
+        return None
+    me = str(os.getpid())
+    table = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit() or pid == me:
+            continue
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                raw = f.read()
+        except OSError:  # exited, or not ours to read
+            continue
+        if raw:
+            table.append(raw.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace"))
+    return table
+
+
+def process_running(pattern: str, table: Optional[List[str]]) -> bool:
+    if table is None:
+        return subprocess.run(["pgrep", "-f", pattern], capture_output=True).returncode == 0
+    rx = re.compile(pattern)
+    return any(rx.search(cmd) for cmd in table)
+
+
+# --- HTTP --------------------------------------------------------------------------------
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)."""
+
+    def __init__(self, timeout: float = TIMEOUT):
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = \
+            collections.defaultdict(list)
+        self.opened = 0
+
+    async def _acquire(self, key: Tuple[str, str, int]):
+        idle = self._idle[key]
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        ctx = ssl.create_default_context() if scheme == "https" else None
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=ctx), self.timeout)
+        self.opened += 1
+        return reader, writer, False
+
+    async def get(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        """(status, lower-cased headers, body up to MAX_BODY). A stale pooled connection is retried once."""
+        parts = urlsplit(url)
+        scheme = parts.scheme
+        key = (scheme, parts.hostname or "127.0.0.1", parts.port or (443 if scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            reader, writer, reused = await self._acquire(key)
+            try:
+                status, headers, body, keep = await asyncio.wait_for(
+                    _exchange(reader, writer, key[1], path), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                writer.close()
+                if reused:  # the server dropped an idle connection; open a fresh one
+                    continue
+                raise ConnectionError(str(e) or type(e).__name__)
+            except BaseException:
+                writer.close()
+                raise
+            if keep:
+                self._idle[key].append((reader, writer))
+            else:
+                writer.close()
+            return status, headers, body
+
+    async def close(self) -> None:
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+
+async def _exchange(reader, writer, host: str, path: str):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: m4nd8-liveness\r\n"
+                 f"Accept: */*\r\nConnection: keep-alive\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    version, status, headers = await _read_head(reader)
+    while 100 <= status < 200 and status != 101:  # interim (103 Early Hints ...): the final response follows
+        version, status, headers = await _read_head(reader)
+    keep = version == b"HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if status in (101, 204, 304):  # no body, whatever the headers say (RFC 9112 §6.3)
+        return status, headers, b"", keep and status != 101  # 101: the connection is no longer HTTP
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                break
+            body += (await reader.readexactly(size + 2))[:-2]
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # trailers, then the final CRLF
+            pass
+        return status, headers, bytes(body[:MAX_BODY]), keep
+    if "content-length" in headers:
+        length = int(headers["content-length"])
+        if length > MAX_BODY:  # not worth draining: keep the head, drop the connection
+            return status, headers, await reader.readexactly(MAX_BODY), False
+        return status, headers, await reader.readexactly(length), keep
+    return status, headers, await reader.read(MAX_BODY), False  # body ends at close
+
+
+async def _read_head(reader) -> Tuple[bytes, int, Dict[str, str]]:
+    """Status line and lower-cased headers of one response."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    version, status = line.split(None, 2)[:2]
+    headers: Dict[str, str] = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    return version, int(status), headers
+
+
+# --- Monitor -----------------------------------------------------------------------------
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    return values[min(len(values), max(1, math.ceil(q * len(values) / 100))) - 1]
+
+
+def looks_mocked(headers: Dict[str, str], body: bytes) -> bool:
+    return bool(_MOCK.search(body) or "mock" in headers.get("server", "").lower()
+                or "x-mock" in headers or "x-mock-response" in headers)
+
+
+class TargetState:
+    """Rolling window of one target's probes."""
+
+    def __init__(self, target: Dict[str, Any], window: int = WINDOW):
+        self.target = target
+        self.latencies: Deque[float] = collections.deque(maxlen=window)
+        self.mocked: Deque[bool] = collections.deque(maxlen=window)
+        self.probes = self.failures = 0
+        self.last: Dict[str, Any] = {}
+
+    def record(self, result: Dict[str, Any]) -> None:
+        self.probes += 1
+        self.last = result
+        if result["http_healthy"] is None:
+            self.failures += 1
+        else:
+            self.latencies.append(result["latency_ms"])
+            self.mocked.append(result["is_mock"])
+
+    def summary(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies)
+        last = self.last
+        if any(self.mocked):
+            verdict = "mock"
+        elif not last.get("http_healthy"):
+            verdict = "down"
+        elif last.get("process_exists") is False:
+            verdict = "no_process"
+        else:
+            verdict = "real"
+        return {"name": self.target["name"], "url": self.target["url"], "verdict": verdict,
+                "status": last.get("status"), "error": last.get("error"),
+                "process_exists": last.get("process_exists"), "probes": self.probes,
+                "failures": self.failures,
+                "p50_ms": percentile(lat, 50), "p95_ms": percentile(lat, 95), "p99_ms": percentile(lat, 99)}
+
+
+class Monitor:
+    def __init__(self, targets: List[Dict[str, Any]], timeout: float = TIMEOUT, window: int = WINDOW):
+        self.states = [TargetState(t, window) for t in targets]
+        self.pool = ConnectionPool(timeout)
+
+    async def _probe(self, state: TargetState, table: Optional[List[str]]) -> None:
+        target = state.target
+        result: Dict[str, Any] = {"process_exists": None, "http_healthy": None, "is_mock": False,
+                                  "status": None, "latency_ms": None, "error": None}
+        if target.get("expected_process"):
+            result["process_exists"] = process_running(target["expected_process"], table)
+        start = time.perf_counter()
+        try:
+            status, headers, body = await self.pool.get(target["url"])
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            result["error"] = str(e) or type(e).__name__
+        else:
+            result["latency_ms"] = (time.perf_counter() - start) * 1000.0
+            result["status"] = status
+            result["is_mock"] = looks_mocked(headers, body)
+            result["http_healthy"] = status == 200 and not result["is_mock"]
+        state.record(result)
+
+    async def round(self) -> List[Dict[str, Any]]:
+        """Probe every target once, concurrently; the summaries after this round."""
+        needs_table = any(s.target.get("expected_process") for s in self.states)
+        table = process_table() if needs_table else None
+        await asyncio.gather(*(self._probe(s, table) for s in self.states))
+        return [s.summary() for s in self.states]
+
+    async def watch(self, interval: float = INTERVAL, rounds: Optional[int] = None, on_round=None):
+        """Probe every `interval` seconds (measured start to start) until `rounds` are done."""
+        n = 0
+        try:
+            while rounds is None or n < rounds:
+                started = time.monotonic()
+                summaries = await self.round()
+                n += 1
+                if on_round is not None:
+                    on_round(n, summaries)
+                if rounds is None or n < rounds:
+                    await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            await self.pool.close()
+        return [s.summary() for s in self.states]
+
 
 def check_backend_liveness(config: Dict[str, Any]) -> Dict[str, Any]:
-    """Verify the REAL backend is running, not a mock."""
-    expected_port = config.get("backend_port", 8000)
-    health_endpoint = config.get("health_endpoint", "/health")
-    process_name = config.get("expected_process", "uvicorn")  # or gunicorn, etc.
-
-    # 1. Check process existence
-    result = subprocess.run(
-        ["pgrep", "-f", process_name],
-        capture_output=True,
-        text=True
-    )
-    process_exists = len(result.stdout.strip()) > 0
-
-    # 2. Check HTTP liveness
+    """One round for a single legacy `backend:` block."""
+    target = load_targets({"backend": config})[0]
+
+    async def once():
+        monitor = Monitor([target])
+        try:
+            await monitor.round()
+        finally:
+            await monitor.pool.close()
+        return monitor.states[0].last
+
+    last = asyncio.run(once())
+    process_exists, http_healthy, is_mock = bool(last["process_exists"]), bool(last["http_healthy"]), last["is_mock"]
+    return {"process_exists": process_exists, "http_healthy": http_healthy, "is_mock": is_mock,
+            "score": int(process_exists) + int(http_healthy) - int(is_mock)}
+
+
+def describe(s: Dict[str, Any]) -> str:
+    lat = (f"p50 {s['p50_ms']:.1f} ms, p95 {s['p95_ms']:.1f} ms, p99 {s['p99_ms']:.1f} ms"
+           if s["p50_ms"] is not None else "no successful probes")
+    detail = s["error"] or (f"HTTP {s['status']}" if s["status"] is not None else "")
+    proc = {True: "", False: ", process not found", None: ""}[s["process_exists"]]
+    return f"{s['name']} ({s['url']}): {s['verdict'].upper()} — {detail}{proc}; {lat}"
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check that the manifest's real backends are up.")
+    parser.add_argument("--manifest", help=f"manifest (default: first of {', '.join(MANIFEST_PATHS)})")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--json", action="store_true")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("check", help="probe every backend once; exit 1 unless all are real")
+    w = sub.add_parser("watch", help="probe continuously, printing each round")
+    w.add_argument("--interval", type=float, default=INTERVAL)
+    w.add_argument("--rounds", type=int, help="stop after N rounds (default: run until interrupted)")
+    w.add_argument("--window", type=int, default=WINDOW, help="probes kept per target for percentiles")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
     try:
-        resp = requests.get(f"http://localhost:{expected_port}{health_endpoint}", timeout=2)
-        http_healthy = resp.status_code == 200 and "mock" not in resp.text.lower()
-    except requests.RequestException:
-        http_healthy = False
-
-    return {
-        "process_exists": process_exists,
-        "http_healthy": http_healthy,
-        "is_mock": "mock" in (resp.text if not isinstance(resp, bool) else "").lower(),
-        "score": int(process_exists) + int(http_healthy) - int("mock" in (resp.text if not isinstance(resp, bool) else ""))
-    }
-
-# Usage in fnl_chk.yaml verification script
-if __name__ == "__main__":
-    import yaml, sys
-    with open("manifest.yaml") as f:
-        manifest = yaml.safe_load(f)
-    result = check_backend_liveness(manifest.get("backend", {}))
-    if result["score"] < 2:
-        print(f"FAIL: Backend liveness check failed. Mock detected: {result['is_mock']}")
-        sys.exit(1)
+        targets = load_targets(load_manifest(args.manifest))
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if not targets:
+        print("❌ No backends declared (manifest `backends:` or `backend:`)", file=sys.stderr)
+        return 1
+
+    def report(n: int, summaries: List[Dict[str, Any]]) -> None:
+        if args.json:
+            print(json.dumps({"round": n, "time": time.time(), "targets": summaries}), flush=True)
+        else:
+            for s in summaries:
+                print(describe(s), flush=True)
+
+    if args.cmd == "check":
+        summaries = asyncio.run(Monitor(targets, args.timeout).watch(rounds=1, on_round=report))
     else:
-        print("PASS: Real backend confirmed running.")
+        try:
+            summaries = asyncio.run(Monitor(targets, args.timeout, args.window).watch(
+                args.interval, args.rounds, on_round=report))
+        except KeyboardInterrupt:
+            return 130
+    return 0 if all(s["verdict"] == "real" for s in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
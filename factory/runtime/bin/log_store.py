@@ -0,0 +1,224 @@
+# log_store.py — incremental SQLite index of worker-log events
+"""
+Worker logs are parsed once, line by line, against director.yaml's
+`environment.logs.line_contract` and stored as typed events:
+
+    read_ok, plan_ok, verify_ok            literal contract lines (whole-line match)
+    write_ok, cofo_note_ok, hub_wiring_ok  `*_re` entries; value = first named group
+    halt                                   halt_re; value = reason
+
+Each log file's byte offset, line count and a hash of its head are kept, so a
+sync only reads bytes appended since the last one. A file that shrank or
+whose head changed (truncated or rotated) is re-read from the start; a
+trailing partial line is left for the next sync. A contract change drops
+the store.
+
+Sentinel syncs once per run and exports the database path in M4ND8_LOG_DB;
+checks query it instead of re-reading the logs:
+
+    import os, sys
+    sys.path.insert(0, os.environ["M4ND8_BIN"]); from log_store import open_from_env
+    paths = open_from_env().values("write_ok")
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+LOG_GLOB = "_logs/worker/*.log"
+DB_PATH = os.path.join("_logs", "events.db")
+LOG_DB_ENV = "M4ND8_LOG_DB"
+SCHEMA_VERSION = 1
+CHUNK_BYTES = 1 << 20
+HEAD_BYTES = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    path   TEXT PRIMARY KEY,
+    inode  INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    lines  INTEGER NOT NULL,
+    head   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    file  TEXT NOT NULL,
+    line  INTEGER NOT NULL,
+    kind  TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS events_kind ON events (kind, value);
+"""
+
+
+def load_contract(director_path: str) -> Dict[str, str]:
+    """environment.logs.line_contract from a director.yaml."""
+    import yaml
+    with open(director_path, "r", encoding="utf-8") as f:
+        director = yaml.safe_load(f) or {}
+    return ((director.get("environment") or {}).get("logs") or {}).get("line_contract") or {}
+
+
+def compile_contract(contract: Dict[str, str]) -> List[Tuple[str, "re.Pattern[str]"]]:
+    """(kind, regex) pairs: `foo_re` keys are regexes, everything else a literal line."""
+    rules = []
+    for key, spec in contract.items():
+        if key.endswith("_re"):
+            rules.append((key[:-3], re.compile(spec)))
+        else:
+            rules.append((key, re.compile(re.escape(spec) + r"\Z")))
+    return rules
+
+
+def prefilter(contract: Dict[str, str]) -> "re.Pattern[str]":
+    """
+    Union of every contract line, anchored on the newline before it: finds
+    candidate lines in a whole chunk without a Python-level loop over each
+    line, and the literal "\n" prefix lets the regex engine skip ahead fast.
+    Candidates are then confirmed per line by compile_contract's rules.
+    """
+    alts = []
+    for key, spec in contract.items():
+        if key.endswith("_re"):
+            alts.append(re.sub(r"\(\?P<\w+>", "(?:", spec.lstrip("^")))
+        else:
+            alts.append(re.escape(spec) + r"\r?$")
+    return re.compile("\n(?=" + "|".join(f"(?:{a})" for a in alts) + ")", re.M)
+
+
+def _head_hash(f, length: int) -> str:
+    f.seek(0)
+    return hashlib.sha1(f.read(length)).hexdigest()
+
+
+class LogStore:
+    """One connection to the event database; use from a single thread."""
+
+    def __init__(self, path: str = DB_PATH, contract: Optional[Dict[str, str]] = None,
+                 readonly: bool = False):
+        self.path = path
+        self.contract = contract
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        if contract is not None:
+            fingerprint = hashlib.sha256(
+                json.dumps([SCHEMA_VERSION, contract], sort_keys=True).encode()).hexdigest()
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'contract'").fetchone()
+            if row is None or row[0] != fingerprint:
+                with self.conn:
+                    self.conn.execute("DELETE FROM events")
+                    self.conn.execute("DELETE FROM files")
+                    self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('contract', ?)", (fingerprint,))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # --- Ingest --------------------------------------------------------------------
+
+    def sync(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Bring the store up to date with `paths`; returns bytes read and events added."""
+        if self.contract is None:
+            raise ValueError("LogStore.sync needs the director line_contract")
+        rules, candidates = compile_contract(self.contract), prefilter(self.contract)
+        paths = sorted(set(paths))
+        stats = {"files": len(paths), "bytes": 0, "events": 0}
+        known = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT path, inode, offset, lines, head FROM files")}
+        with self.conn:
+            for gone in set(known) - set(paths):
+                self._forget(gone)
+            for path in paths:
+                read, added = self._sync_file(path, known.get(path), rules, candidates)
+                stats["bytes"] += read
+                stats["events"] += added
+        return stats
+
+    def _forget(self, path: str) -> None:
+        self.conn.execute("DELETE FROM events WHERE file = ?", (path,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _sync_file(self, path: str, state: Optional[Tuple[int, int, int, str]],
+                   rules: List[Tuple[str, "re.Pattern[str]"]],
+                   candidates: "re.Pattern[str]") -> Tuple[int, int]:
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return 0, 0
+        with f:
+            st = os.fstat(f.fileno())
+            offset, lineno = 0, 0
+            if state is not None:
+                inode, offset, lineno, head = state
+                if (inode != st.st_ino or st.st_size < offset
+                        or _head_hash(f, min(offset, HEAD_BYTES)) != head):
+                    self._forget(path)
+                    offset, lineno = 0, 0
+            if state is not None and offset == st.st_size:
+                return 0, 0
+
+            f.seek(offset)
+            start, rows, pending = offset, [], b""
+            while True:
+                chunk = f.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                buf = pending + chunk
+                cut = buf.rfind(b"\n") + 1
+                pending = buf[cut:]
+                # Leading "\n" so every line start follows a newline (see prefilter).
+                text = "\n" + buf[:cut].decode("utf-8", "ignore")
+                seen, last = 0, 0
+                for m in candidates.finditer(text):
+                    bol = m.start() + 1
+                    seen += text.count("\n", last, bol)
+                    last = bol
+                    line = text[bol:text.index("\n", bol)].rstrip("\r")
+                    for kind, rx in rules:
+                        hit = rx.match(line)
+                        if hit:
+                            value = next(iter(hit.groupdict().values()), None) if rx.groupindex else None
+                            rows.append((path, lineno + seen, kind, value.strip() if value else value))
+                            break
+                lineno += text.count("\n") - 1
+                offset += cut
+            self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                              (path, st.st_ino, offset, lineno, _head_hash(f, min(offset, HEAD_BYTES))))
+        return offset - start, len(rows)
+
+    # --- Queries -------------------------------------------------------------------
+
+    def has(self, kind: str, value: Optional[str] = None) -> bool:
+        if value is None:
+            row = self.conn.execute("SELECT 1 FROM events WHERE kind = ? LIMIT 1", (kind,)).fetchone()
+        else:
+            row = self.conn.execute("SELECT 1 FROM events WHERE kind = ? AND value = ? LIMIT 1",
+                                    (kind, value)).fetchone()
+        return row is not None
+
+    def values(self, kind: str) -> List[str]:
+        """Distinct values logged for `kind` (e.g. every path in a WRITE_OK line)."""
+        return [r[0] for r in self.conn.execute(
+            "SELECT DISTINCT value FROM events WHERE kind = ? AND value IS NOT NULL ORDER BY value", (kind,))]
+
+    def events(self, kinds: Iterable[str]) -> List[Tuple[str, int, str, Any]]:
+        """(file, line, kind, value) for the given kinds, in file then line order."""
+        kinds = list(kinds)
+        marks = ",".join("?" * len(kinds))
+        return self.conn.execute(
+            f"SELECT file, line, kind, value FROM events WHERE kind IN ({marks}) ORDER BY file, line",
+            kinds).fetchall()
+
+    def files(self) -> List[str]:
+        return [r[0] for r in self.conn.execute("SELECT path FROM files ORDER BY path")]
+
+
+def open_from_env() -> LogStore:
+    """Read-only handle on the store sentinel synced for this run."""
+    return LogStore(os.environ[LOG_DB_ENV], readonly=True)
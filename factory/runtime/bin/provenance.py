@@ -0,0 +1,387 @@
+# provenance.py — Merkle-tree provenance store behind C180.c2pa_provenance_chain
+"""
+Every generated artifact (.json/.pdf/.txt) carries a `<artifact>.c2pa`
+sidecar naming the source documents it was generated from:
+
+    {"sources": ["docs/rag/contract.md", {"path": "kb/rates.csv", "sha256": "..."}], ...}
+
+`seal` hashes every artifact, its sidecar and its declared sources with
+SHA-256 and writes m4nd8_pro/provenance.json: one Merkle leaf per artifact
+
+    leaf = H(0x00 || path \0 artifact sha \0 sidecar sha (\0 source \0 sha)*)   (sources sorted)
+    node = H(0x01 || left || right)        (leaves sorted by path; an odd node moves up)
+
+and the root over all of them, which attests to the whole output set. A
+source listed with a sha256 must still hash to it.
+
+`verify` (what C180 runs) recomputes the leaves and the root and compares.
+It is incremental: file hashes are cached in _logs/provenance_cache.json
+against (size, mtime) from the FileIndex snapshot, so only files that
+changed since the last run are read, and those are hashed in parallel on
+a thread pool (hashlib releases the GIL). `--full` re-reads everything.
+
+    python .m4nd8/bin/provenance.py seal            # after generating artifacts
+    python .m4nd8/bin/provenance.py verify [--full]
+    python .m4nd8/bin/provenance.py proof PATH      # inclusion proof for one artifact
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fs_index import FileIndex, INDEX_ENV, load_from_env
+
+PROVENANCE_PATH = "m4nd8_pro/provenance.json"
+CACHE_PATH = os.path.join("_logs", "provenance_cache.json")
+CACHE_VERSION = 1
+ARTIFACT_GLOB = "**/*.{json,pdf,txt}"
+SIDECAR_SUFFIX = ".c2pa"
+READ_CHUNK = 1 << 20
+WORKERS = min(32, (os.cpu_count() or 1) + 4)
+# Problems listed per category (counts are always complete).
+REPORT_LIMIT = 20
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return h.hexdigest()
+            h.update(chunk)
+
+
+def _node(prefix: bytes, *parts: bytes) -> bytes:
+    return hashlib.sha256(prefix + b"".join(parts)).digest()
+
+
+def leaf_hash(path: str, artifact: str, sidecar: str, sources: Dict[str, str]) -> bytes:
+    # NUL cannot occur in a path, so the fields cannot be re-split another way
+    fields = [path, artifact, sidecar]
+    for item in sorted(sources.items()):
+        fields.extend(item)
+    return _node(b"\x00", "\0".join(fields).encode("utf-8"))
+
+
+def merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Every level of the tree, leaves first; the last level holds the root."""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        nxt = [_node(b"\x01", level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        levels.append(nxt)
+    return levels
+
+
+def merkle_root(leaves: List[bytes]) -> str:
+    if not leaves:
+        return hashlib.sha256(b"").hexdigest()
+    return merkle_levels(leaves)[-1][0].hex()
+
+
+def inclusion_proof(leaves: List[bytes], index: int) -> List[Tuple[str, str]]:
+    """Sibling hashes from leaf `index` up to the root: [("left" | "right", hex), ...]."""
+    proof = []
+    for level in merkle_levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(("left" if sibling < index else "right", level[sibling].hex()))
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: bytes, proof: Iterable[Tuple[str, str]], root: str) -> bool:
+    node = leaf
+    for side, sibling in proof:
+        node = _node(b"\x01", bytes.fromhex(sibling), node) if side == "left" \
+            else _node(b"\x01", node, bytes.fromhex(sibling))
+    return node.hex() == root
+
+
+# --- Incremental hashing -----------------------------------------------------------------
+
+class HashCache:
+    """
+    path → [size, mtime, sha256] (a hit needs the snapshot's size and mtime
+    to match), and sidecar sha256 → parsed source list.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.files: Dict[str, List[Any]] = {}
+        self.sidecars: Dict[str, List[Dict[str, Optional[str]]]] = {}
+        self.dirty = False
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.files = data.get("files", {})
+                    self.sidecars = data.get("sidecars", {})
+            except (OSError, ValueError):
+                pass
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CACHE_VERSION, "files": self.files, "sidecars": self.sidecars},
+                               separators=(",", ":")))
+        os.replace(tmp, self.path)
+
+
+def _stat(index: FileIndex, path: str) -> Optional[Tuple[int, float]]:
+    st = index.stat(path)
+    if st is None:
+        # Sources may live where the snapshot does not look (e.g. _logs/)
+        try:
+            s = os.stat(path)
+        except OSError:
+            return None
+        st = (s.st_size, s.st_mtime) if os.path.isfile(path) else None
+    return st
+
+
+def hash_files(paths: Iterable[str], index: FileIndex, cache: HashCache,
+               workers: int = WORKERS) -> Tuple[Dict[str, Optional[str]], int]:
+    """sha256 of every path (None if missing) and how many had to be read."""
+    out: Dict[str, Optional[str]] = {}
+    todo: List[Tuple[str, Tuple[int, float]]] = []
+    for path in set(paths):
+        st = _stat(index, path)
+        if st is None:
+            out[path] = None
+            continue
+        memo = cache.files.get(path)
+        if memo and memo[0] == st[0] and memo[1] == st[1]:
+            out[path] = memo[2]
+        else:
+            todo.append((path, st))
+    if todo:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (path, st), digest in zip(todo, pool.map(lambda t: _try_sha(t[0]), todo)):
+                out[path] = digest
+                if digest is not None:
+                    cache.files[path] = [st[0], st[1], digest]
+        cache.dirty = True
+    return out, len(todo)
+
+
+def _try_sha(path: str) -> Optional[str]:
+    try:
+        return sha256_file(path)
+    except OSError:
+        return None
+
+
+def read_sidecar(path: str) -> List[Dict[str, Optional[str]]]:
+    """Declared sources of a sidecar: [{"path", "sha256" or None}]."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if not text.strip():
+        return []
+    data = json.loads(text)
+    sources = []
+    for src in (data.get("sources") or []) if isinstance(data, dict) else []:
+        if isinstance(src, str):
+            sources.append({"path": src, "sha256": None})
+        elif isinstance(src, dict) and (src.get("path") or src.get("sha256")):
+            sources.append({"path": src.get("path"), "sha256": src.get("sha256")})
+        else:
+            raise ValueError(f"malformed source entry {src!r}")
+    return sources
+
+
+@functools.lru_cache(maxsize=None)
+def _norm_source(path: str) -> str:
+    return os.path.normpath(path[2:] if path.startswith("./") else path).replace(os.sep, "/")
+
+
+# --- Build / verify ----------------------------------------------------------------------
+
+def artifacts(index: FileIndex) -> List[str]:
+    return [p for p in index.glob(ARTIFACT_GLOB) if p != PROVENANCE_PATH]
+
+
+def compute(index: FileIndex, cache: HashCache, workers: int = WORKERS) -> Dict[str, Any]:
+    """
+    Leaves for the current tree: {"leaves": {path: {...}}, "root", "problems",
+    "read"}. Sidecars are re-parsed only when they changed (their hash is
+    the cache key for the parsed source list).
+    """
+    arts = artifacts(index)
+    problems: List[str] = []
+    sidecars = {a: a + SIDECAR_SUFFIX for a in arts}
+    missing = [a for a in arts if sidecars[a] not in index]
+    problems += [f"Missing C2PA manifest for {a}" for a in missing]
+    present = [a for a in arts if sidecars[a] in index]
+
+    hashes, read = hash_files(present + [sidecars[a] for a in present], index, cache, workers)
+    parsed = cache.sidecars
+    declared: Dict[str, List[Dict[str, Optional[str]]]] = {}
+    for a in present:
+        sha = hashes[sidecars[a]]
+        if sha is None:
+            problems.append(f"Unreadable C2PA manifest {sidecars[a]}")
+            continue
+        if sha not in parsed:
+            try:
+                parsed[sha] = read_sidecar(sidecars[a])
+            except (OSError, ValueError) as e:
+                problems.append(f"Malformed C2PA manifest {sidecars[a]}: {e}")
+                continue
+            cache.dirty = True
+        declared[a] = parsed[sha]
+
+    src_paths = {_norm_source(s["path"]) for srcs in declared.values() for s in srcs if s["path"]}
+    src_hashes, src_read = hash_files(src_paths, index, cache, workers)
+    leaves: Dict[str, Dict[str, Any]] = {}
+    for a in sorted(declared):
+        if hashes[a] is None:
+            problems.append(f"Unreadable artifact {a}")
+            continue
+        sources: Dict[str, str] = {}
+        for s in declared[a]:
+            name = _norm_source(s["path"]) if s["path"] else f"sha256:{s['sha256']}"
+            actual = src_hashes.get(name) if s["path"] else s["sha256"]
+            if actual is None:
+                problems.append(f"{a}: declared source {s['path']} is missing")
+                continue
+            if s["sha256"] and s["sha256"] != actual:
+                problems.append(f"{a}: source {s['path']} no longer matches its declared sha256")
+            sources[name] = actual
+        leaves[a] = {"sha256": hashes[a], "sidecar": hashes[sidecars[a]], "sources": sources}
+    # Drop cache rows for files that are gone, so the cache tracks the tree
+    live = set(hashes) | set(src_hashes)
+    if any(p not in live for p in cache.files):
+        cache.files = {p: v for p, v in cache.files.items() if p in live}
+        cache.dirty = True
+    live_sidecars = {hashes[sidecars[a]] for a in present}
+    if any(sha not in live_sidecars for sha in parsed):
+        cache.sidecars = {sha: v for sha, v in parsed.items() if sha in live_sidecars}
+        cache.dirty = True
+    root = merkle_root([leaf_hash(p, l["sha256"], l["sidecar"], l["sources"]) for p, l in leaves.items()])
+    return {"leaves": leaves, "root": root, "problems": problems, "read": read + src_read}
+
+
+def load_manifest(path: str = PROVENANCE_PATH) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def seal(index: FileIndex, cache: HashCache, path: str = PROVENANCE_PATH,
+         workers: int = WORKERS) -> Dict[str, Any]:
+    state = compute(index, cache, workers)
+    if not state["problems"]:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "algorithm": "sha256", "root": state["root"],
+                       "artifacts": len(state["leaves"]), "leaves": state["leaves"]},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    return state
+
+
+def verify(index: FileIndex, cache: HashCache, manifest: Optional[Dict[str, Any]],
+           workers: int = WORKERS) -> Dict[str, Any]:
+    """compute() plus every difference from the sealed manifest."""
+    state = compute(index, cache, workers)
+    problems = state["problems"]
+    if manifest is None:
+        problems.append(f"No provenance manifest at {PROVENANCE_PATH}: run provenance.py seal")
+        return state
+    if manifest.get("root") == state["root"]:
+        return state
+    sealed = manifest.get("leaves") or {}
+    stale: Dict[str, set] = {}
+    for path, leaf in state["leaves"].items():
+        old = sealed.get(path)
+        if old is None:
+            problems.append(f"{path}: not in the sealed provenance manifest")
+        elif old.get("sha256") != leaf["sha256"]:
+            problems.append(f"{path}: content changed since it was sealed")
+        elif old.get("sidecar") != leaf["sidecar"]:
+            problems.append(f"{path}: C2PA manifest changed since it was sealed")
+        elif old.get("sources") != leaf["sources"]:
+            for src, _sha in set(old.get("sources", {}).items()) ^ set(leaf["sources"].items()):
+                stale.setdefault(src, set()).add(path)
+    # One line per changed source, however many artifacts were generated from it
+    for src in sorted(stale):
+        paths = sorted(stale[src])
+        problems.append(f"Source {src} changed since it was sealed; affects {len(paths)} artifact(s): "
+                        f"{', '.join(paths[:3])}{' ...' if len(paths) > 3 else ''}")
+    problems += [f"{path}: sealed artifact is gone" for path in sealed if path not in index]
+    if not problems:
+        problems.append(f"Merkle root {state['root'][:16]}… does not match the sealed root "
+                        f"{str(manifest.get('root'))[:16]}…")
+    return state
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def _report(problems: List[str]) -> None:
+    for p in problems[:REPORT_LIMIT]:
+        print(p)
+    if len(problems) > REPORT_LIMIT:
+        print(f"... and {len(problems) - REPORT_LIMIT} more")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Merkle-tree provenance for generated artifacts (C180).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("seal", help=f"hash artifacts and sources into {PROVENANCE_PATH}")
+    ver = sub.add_parser("verify", help="compare the tree with the sealed manifest")
+    ver.add_argument("--full", action="store_true", help="re-hash every file, ignoring the cache")
+    prf = sub.add_parser("proof", help="inclusion proof of one artifact against the sealed root")
+    prf.add_argument("path")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "proof":
+        manifest = load_manifest()
+        if manifest is None:
+            print(f"❌ No provenance manifest at {PROVENANCE_PATH}", file=sys.stderr)
+            return 1
+        leaves = manifest.get("leaves") or {}
+        paths = sorted(leaves)
+        if args.path not in leaves:
+            print(f"❌ {args.path} is not sealed", file=sys.stderr)
+            return 1
+        hashes = [leaf_hash(p, leaves[p]["sha256"], leaves[p]["sidecar"], leaves[p]["sources"]) for p in paths]
+        i = paths.index(args.path)
+        print(json.dumps({"path": args.path, "leaf": hashes[i].hex(), "root": manifest.get("root"),
+                          "proof": inclusion_proof(hashes, i)}, indent=2))
+        return 0
+
+    index = load_from_env() if os.environ.get(INDEX_ENV) else FileIndex.build(".")
+    cache = HashCache(None if getattr(args, "full", False) else CACHE_PATH)
+    if args.cmd == "seal":
+        state = seal(index, cache, workers=args.workers)
+    else:
+        state = verify(index, cache, load_manifest(), workers=args.workers)
+    if getattr(args, "full", False):
+        cache.path = CACHE_PATH  # a full pass refreshes the cache for the next run
+    cache.save()
+    if state["problems"]:
+        _report(state["problems"])
+        return 1
+    verb = "Sealed" if args.cmd == "seal" else "Verified"
+    print(f"{verb} {len(state['leaves'])} artifacts, root {state['root']} ({state['read']} files read)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
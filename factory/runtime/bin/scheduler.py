@@ -0,0 +1,212 @@
+# scheduler.py — bounded, dependency-aware parallel runner for sentinel checks
+"""
+Runs independent checks concurrently on a fixed-size worker pool.
+
+Ordering: a check may declare `after: ["C60", ...]` in compliance.yaml; it is
+not started until every named check has finished (ids match in full or by
+their "Cnn" prefix). A failed or blocked prerequisite blocks its dependents.
+
+Fail-fast: the first failing critical check (severity: critical, or legacy
+`blocking: true`) trips the CancelToken. Subprocesses still in flight are
+killed and unstarted checks are reported as cancelled.
+
+Output stays deterministic: results are emitted in declaration order no
+matter which worker finishes first.
+"""
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+# Extra seconds allowed past timeout_sec before an in-process check is abandoned.
+TIMEOUT_GRACE_SEC = 5
+# How often to look for newly started checks while none has a deadline yet.
+START_POLL_SEC = 0.05
+
+
+class CancelToken:
+    """Shared cancellation flag that also tracks live child processes."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._procs = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def register(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            self._procs.add(proc)
+        if self.cancelled:
+            kill_process(proc)
+
+    def unregister(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            self._procs.discard(proc)
+
+    def cancel(self) -> None:
+        self._event.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            kill_process(proc)
+
+
+def kill_process(proc: subprocess.Popen) -> None:
+    """Kill a shell check and everything it spawned (its own session on POSIX)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def check_key(chk: Dict[str, Any]) -> str:
+    """Short id used for `after:` references: "C70.verification_target_green" → "C70"."""
+    return str(chk.get("id") or chk.get("name") or "").split(".")[0]
+
+
+def is_critical(chk: Dict[str, Any]) -> bool:
+    return chk.get("severity") == "critical" or bool(chk.get("blocking"))
+
+
+def resolve_dependencies(checks: List[Dict[str, Any]]) -> List[List[int]]:
+    """Map each check's `after:` list to indices of earlier-or-later checks; reject cycles."""
+    by_key: Dict[str, int] = {}
+    for i, chk in enumerate(checks):
+        by_key.setdefault(str(chk.get("id") or chk.get("name") or ""), i)
+        by_key.setdefault(check_key(chk), i)
+    deps = []
+    for chk in checks:
+        after = chk.get("after") or []
+        if isinstance(after, str):
+            after = [after]
+        deps.append(sorted({by_key[a] for a in after if a in by_key}))
+
+    state = [0] * len(checks)  # 0 = unvisited, 1 = visiting, 2 = done
+
+    def visit(i: int) -> None:
+        if state[i] == 1:
+            raise ValueError(f"Dependency cycle through {check_key(checks[i])}")
+        if state[i] == 0:
+            state[i] = 1
+            for d in deps[i]:
+                visit(d)
+            state[i] = 2
+
+    for i in range(len(checks)):
+        visit(i)
+    return deps
+
+
+def run_checks(
+    checks: List[Dict[str, Any]],
+    run_one: Callable[[Dict[str, Any], CancelToken], Dict[str, Any]],
+    jobs: int = 1,
+    emit: Optional[Callable[[int, Dict[str, Any], Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Execute `run_one(chk, token)` for every check and return results in
+    declaration order. `emit(i, chk, result)` is called in that same order as
+    soon as each prefix of results is complete.
+    """
+    deps = resolve_dependencies(checks)
+    dependents: List[List[int]] = [[] for _ in checks]
+    waiting = [len(d) for d in deps]
+    for i, ds in enumerate(deps):
+        for d in ds:
+            dependents[d].append(i)
+
+    token = CancelToken()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(checks)
+    ready = [i for i, n in enumerate(waiting) if n == 0]
+    running: Dict[Any, int] = {}
+    started: Dict[int, float] = {}  # set on the worker thread: the clock starts when the check does
+    next_emit = 0
+
+    def finish(i: int, res: Dict[str, Any]) -> None:
+        nonlocal next_emit
+        results[i] = res
+        for j in dependents[i]:
+            waiting[j] -= 1
+            if res["status"] in ("fail", "blocked", "cancelled") and results[j] is None:
+                finish(j, {"status": "blocked", "returncode": 1,
+                           "output": f"prerequisite {check_key(checks[i])} did not pass"})
+            elif waiting[j] == 0 and results[j] is None:
+                ready.append(j)
+        if res["status"] == "fail" and is_critical(checks[i]):
+            token.cancel()
+        while next_emit < len(checks) and results[next_emit] is not None:
+            if emit:
+                emit(next_emit, checks[next_emit], results[next_emit])
+            next_emit += 1
+
+    def call(i: int) -> Dict[str, Any]:
+        started[i] = time.monotonic()
+        return run_one(checks[i], token)
+
+    def deadline(i: int) -> Optional[float]:
+        if i not in started:
+            return None
+        return started[i] + checks[i].get("timeout_sec", 10) + TIMEOUT_GRACE_SEC
+
+    def new_pool() -> ThreadPoolExecutor:
+        pool = ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="sentinel")
+        pools.append(pool)
+        return pool
+
+    pools: List[ThreadPoolExecutor] = []
+    pool = new_pool()
+    try:
+        while ready or running:
+            ready.sort()
+            while ready and len(running) < max(1, jobs):
+                i = ready.pop(0)
+                if results[i] is not None:
+                    continue
+                if token.cancelled:
+                    finish(i, {"status": "cancelled", "returncode": 1, "output": "cancelled after critical failure"})
+                    continue
+                running[pool.submit(call, i)] = i
+            if not running:
+                continue
+            pending = [deadline(i) for i in running.values()]
+            known = [d for d in pending if d is not None]
+            timeout = max(0.0, min(known) - time.monotonic()) if known else START_POLL_SEC
+            if len(known) < len(pending):
+                timeout = min(timeout, START_POLL_SEC)
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i = running.pop(fut)
+                try:
+                    res = fut.result()
+                except Exception as e:  # a crashing check must not take the gate down with it
+                    res = {"status": "fail", "returncode": 1, "output": f"{type(e).__name__}: {e}"}
+                if token.cancelled and res["status"] == "fail" and res.get("returncode", 0) < 0:
+                    # killed by the token, not a verdict of its own
+                    res = {"status": "cancelled", "returncode": 1, "output": "cancelled after critical failure"}
+                finish(i, res)
+            now = time.monotonic()
+            expired = [f for f, i in running.items() if i in started and deadline(i) <= now]
+            for fut in expired:
+                i = running.pop(fut)
+                finish(i, {"status": "fail", "returncode": 124,
+                           "output": f"Timed out after {checks[i].get('timeout_sec', 10)}s"})
+            if expired:
+                # An abandoned thread keeps its pool slot; later checks get a fresh pool
+                # so they neither queue behind it nor sit on a running clock.
+                pool.shutdown(wait=False)
+                pool = new_pool()
+    finally:
+        if running:
+            token.cancel()
+        for p in pools:
+            p.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 """
 adb_tool.py — Autonomous Dependency Base Manager
-Usage: python3 adb_tool.py snapshot
+Usage: python3 adb_tool.py snapshot [LOCKFILE ...]
+       (no LOCKFILE: requirements.txt, package-lock.json, npm-shrinkwrap.json,
+        pnpm-lock.yaml, poetry.lock and uv.lock in the current directory)
+Note: Only exact resolved versions are recorded, transitive ones included.
+      Lockfiles are streamed (see lockfiles.py) and all rows go in with one
+      bulk insert in a single transaction. package.json is only read when no
+      npm/pnpm lockfile exists, and then only for exactly pinned versions.
 """
 import sys
 import os
 import sqlite3
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import lockfiles  # noqa: E402
+from version_ranges import semver_version  # noqa: E402
+
 # CONFIG
 DB_PATH = ".m4nd8/data/approved_dependencies.db"
 
@@ -28,49 +38,65 @@ def init_db():
     conn.commit()
     return conn
 
-def snapshot_local():
-    """Scans local manifests and updates the DB."""
-    print("📸 Snapshotting local environment into Approved DB...")
-    conn = init_db()
-    cur = conn.cursor()
-    count = 0
+def package_json_pins(path="package.json"):
+    """Exactly pinned entries of package.json; ranges (^, ~, >=, x) are not resolved versions."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ Warning: Could not parse package.json")
+        return
+    # Combine dependencies and devDependencies
+    deps = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
+    ranges = 0
+    for pkg, ver in deps.items():
+        if semver_version(ver) is None:
+            ranges += 1
+            continue
+        yield "npm", pkg, ver.lstrip("=v")
+    if ranges:
+        print(f"⚠️ Warning: Skipped {ranges} package.json range(s); commit a lockfile to snapshot them")
 
-    # 1. Scan Python (requirements.txt)
-    if os.path.exists("requirements.txt"):
-        with open("requirements.txt", "r") as f:
-            for line in f:
-                if "==" in line and not line.strip().startswith("#"):
-                    try:
-                        # Split "flask==2.0.1" -> pkg="flask", ver="2.0.1"
-                        pkg, ver = line.split("#")[0].strip().split("==", 1)
-                        cur.execute("INSERT OR IGNORE INTO approved_versions VALUES (?, ?, ?)", 
-                                  ("pypi", pkg.strip(), ver.strip()))
-                        count += 1
-                    except ValueError:
-                        pass
+def default_inputs():
+    paths = lockfiles.discover()
+    has_npm_lock = any(os.path.basename(p) in lockfiles.NPM_LOCKFILES + ("pnpm-lock.yaml",) for p in paths)
+    if not has_npm_lock and os.path.exists("package.json"):
+        paths.append("package.json")
+    return paths
 
-    # 2. Scan Node (package.json)
-    if os.path.exists("package.json"):
-        try:
-            with open("package.json", "r") as f:
-                data = json.load(f)
-            # Combine dependencies and devDependencies
-            deps = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
-            for pkg, ver in deps.items():
-                # Strip ^ and ~ for strict locking
-                clean_ver = ver.replace("^", "").replace("~", "")
-                cur.execute("INSERT OR IGNORE INTO approved_versions VALUES (?, ?, ?)", 
-                          ("npm", pkg, clean_ver))
-                count += 1
-        except json.JSONDecodeError:
-            print("⚠️ Warning: Could not parse package.json")
+def rows(paths, counts):
+    """Every (ecosystem, package, version) from `paths`, streamed; counts rows per input."""
+    for path in paths:
+        reader = package_json_pins if os.path.basename(path) == "package.json" else lockfiles.read_lockfile
+        counts[path] = 0
+        for row in reader(path):
+            counts[path] += 1
+            yield row
 
-    conn.commit()
-    conn.close()
-    print(f"✅ Database updated with {count} approved dependencies.")
+def snapshot_local(paths=None):
+    """Scans local lockfiles and updates the DB."""
+    print("📸 Snapshotting local environment into Approved DB...")
+    paths = paths or default_inputs()
+    if not paths:
+        print("⚠️ Warning: No lockfile or requirements.txt found")
+        return
+    conn = init_db()
+    counts = {}
+    try:
+        # One transaction; executemany pulls rows from the streaming readers
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO approved_versions VALUES (?, ?, ?)", rows(paths, counts))
+    except (OSError, ValueError) as e:
+        print(f"❌ Failed to read lockfile: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+    for path, n in counts.items():
+        print(f"   {path}: {n}")
+    print(f"✅ Database updated with {sum(counts.values())} approved dependencies.")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "snapshot":
-        snapshot_local()
+        snapshot_local(sys.argv[2:])
     else:
-        print("Usage: python3 adb_tool.py snapshot")
+        print("Usage: python3 adb_tool.py snapshot [LOCKFILE ...]")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+verify_dependencies.py — Approved Dependency Base verifier
+Purpose: Check every locked/required package against .m4nd8/data/approved_dependencies.db
+Usage: python verify_dependencies.py [FILE ...] [--db PATH] [--json]
+       (no FILE: requirements.txt and every lockfile lockfiles.py reads,
+        plus package.json when there is no npm/pnpm lockfile)
+Output: One report listing every unapproved package; exit 1 if there is any.
+Note: Fully offline. All packages are looked up in one indexed join against
+      approved_versions; ADB entries may be exact versions or ranges
+      (PEP 440 for pypi, npm semver for npm — see version_ranges.py).
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import lockfiles  # noqa: E402
+from version_ranges import ECOSYSTEM_ALIASES, approves, canonical_ecosystem  # noqa: E402
+
+DB_PATH = ".m4nd8/data/approved_dependencies.db"
+# Requested "versions" that pin nothing: reported, never approved
+UNPINNED_SPECS = {"", "*", "x", "X", "latest"}
+
+
+def canonical_name(ecosystem, name):
+    """PEP 503 normalization for pypi; npm names are already case-sensitive lowercase."""
+    if ecosystem == "pypi":
+        return re.sub(r"[-_.]+", "-", name).lower()
+    return name
+
+
+def name_variants(ecosystem, name):
+    """Spellings an ADB row may use for the same package (the DB stores names as given)."""
+    names = {name, name.lower()}
+    if ecosystem == "pypi":
+        canon = canonical_name(ecosystem, name)
+        names |= {canon, canon.replace("-", "_"), canon.replace("-", ".")}
+    return names
+
+
+def ecosystem_variants(ecosystem):
+    return {ecosystem} | {alias for alias, eco in ECOSYSTEM_ALIASES.items() if eco == ecosystem}
+
+
+# --- Inputs ------------------------------------------------------------------------------
+
+def dependency(ecosystem, name, version, source, spec=None):
+    """A locked package (`version`) or, for unlocked manifests, a requested range (`spec`)."""
+    return {"ecosystem": ecosystem, "package": name, "version": version, "spec": spec, "source": source}
+
+
+def read_requirements(path):
+    deps = []
+    for name, spec in lockfiles.requirement_specs(path):
+        version = lockfiles.pinned(spec)
+        deps.append(dependency("pypi", name, version, path, None if version else spec))
+    return deps
+
+
+def read_lockfile(path):
+    return [dependency(eco, name, version, path) for eco, name, version in lockfiles.read_lockfile(path)]
+
+
+def read_package_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    deps = []
+    for field in ("dependencies", "devDependencies", "optionalDependencies"):
+        for name, spec in (data.get(field) or {}).items():
+            deps.append(dependency("npm", name, None, path, str(spec)))
+    return deps
+
+
+def reader_for(path):
+    base = os.path.basename(path)
+    if base == "package.json":
+        return read_package_json
+    if base.endswith(".txt"):
+        return read_requirements
+    if base in lockfiles.READERS:
+        return read_lockfile
+    return None
+
+
+def default_inputs():
+    paths = lockfiles.discover()
+    if not any(os.path.basename(p) in lockfiles.NPM_LOCKFILES + ("pnpm-lock.yaml",) for p in paths) \
+            and os.path.isfile("package.json"):
+        paths.append("package.json")  # a lockfile, when present, already resolves it
+    return paths
+
+
+def collect(paths):
+    deps, seen = [], set()
+    for path in paths:
+        reader = reader_for(path)
+        if reader is None:
+            print(f"❌ ERROR: Don't know how to read {path}", file=sys.stderr)
+            sys.exit(1)
+        for dep in reader(path):
+            key = (dep["ecosystem"], canonical_name(dep["ecosystem"], dep["package"]),
+                   dep["version"], dep["spec"])
+            if key not in seen:
+                seen.add(key)
+                deps.append(dep)
+    return deps
+
+
+# --- Lookup ------------------------------------------------------------------------------
+
+def load_approved(conn, deps):
+    """
+    Every ADB entry for the packages in `deps`, keyed by (ecosystem, canonical name).
+    The wanted names go into a temp table and are joined on the
+    (ecosystem, package) prefix of approved_versions' primary key: one
+    indexed query however long the lockfile is.
+    """
+    wanted = set()
+    for dep in deps:
+        for eco in ecosystem_variants(dep["ecosystem"]):
+            for name in name_variants(dep["ecosystem"], dep["package"]):
+                wanted.add((eco, name))
+    conn.execute("CREATE TEMP TABLE wanted (ecosystem TEXT NOT NULL, package TEXT NOT NULL)")
+    conn.executemany("INSERT INTO wanted VALUES (?, ?)", wanted)
+    approved = defaultdict(list)
+    for eco, pkg, version in conn.execute(
+            "SELECT a.ecosystem, a.package, a.version FROM wanted w "
+            "JOIN approved_versions a ON a.ecosystem = w.ecosystem AND a.package = w.package"):
+        eco = canonical_ecosystem(eco)
+        approved[(eco, canonical_name(eco, pkg))].append(version)
+    return approved
+
+
+def unpinned(dep):
+    return dep["version"] is None and (dep["spec"] or "").strip() in UNPINNED_SPECS
+
+
+def problem(dep, entries):
+    if unpinned(dep):
+        return "unpinned: no version or range requested (pin it or lock it)"
+    if not entries:
+        return "not in the Approved Dependency Base"
+    if dep["version"] is not None:
+        return f"version {dep['version']} is not approved"
+    return f"range {dep['spec']!r} matches no approved version"
+
+
+def verify(deps, approved):
+    """Every dependency not covered by an ADB entry, with the reason and what is approved."""
+    unapproved = []
+    for dep in deps:
+        eco = dep["ecosystem"]
+        entries = approved.get((eco, canonical_name(eco, dep["package"])), [])
+        if dep["version"] is not None:
+            ok = any(approves(eco, entry, dep["version"]) for entry in entries)
+        elif unpinned(dep):
+            ok = False
+        else:
+            # Unlocked range: fine if it admits an approved version (or is itself approved)
+            spec = dep["spec"].strip()
+            ok = any(spec == entry.strip() or approves(eco, spec, entry) for entry in entries)
+        if not ok:
+            unapproved.append({**dep, "reason": problem(dep, entries), "approved": sorted(entries)})
+    return unapproved
+
+
+# --- CLI ---------------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verify dependencies against the Approved Dependency Base.")
+    parser.add_argument("files", nargs="*",
+                        help="requirements*.txt, package.json or a lockfile (package-lock.json, "
+                             "npm-shrinkwrap.json, pnpm-lock.yaml, poetry.lock, uv.lock)")
+    parser.add_argument("--db", default=DB_PATH, help=f"ADB path (default: {DB_PATH})")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = args.files or default_inputs()
+    if not os.path.isfile(args.db):
+        print(f"❌ ERROR: {args.db} not found. Run fetch_approvals.py or snapshot_local.py snapshot", file=sys.stderr)
+        return 1
+    try:
+        deps = collect(paths)
+    except (OSError, ValueError) as e:
+        print(f"❌ ERROR: Could not read dependency manifest: {e}", file=sys.stderr)
+        return 1
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    try:
+        unapproved = verify(deps, load_approved(conn, deps))
+    except sqlite3.Error as e:
+        print(f"❌ ERROR: {args.db} is not a usable ADB: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps({"inputs": paths, "checked": len(deps), "unapproved": unapproved}, indent=2))
+        return 1 if unapproved else 0
+    if not unapproved:
+        print(f"✅ {len(deps)} dependencies approved ({', '.join(paths) or 'no manifests found'})")
+        return 0
+    print(f"❌ {len(unapproved)} of {len(deps)} dependencies are not approved:")
+    for u in unapproved:
+        wanted = u["version"] if u["version"] is not None else (u["spec"] or "*")
+        print(f"  - [{u['ecosystem']}] {u['package']} {wanted} ({u['source']}): {u['reason']}")
+        if u["approved"]:
+            print(f"      approved: {', '.join(u['approved'])}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+version_ranges.py — PEP 440 and npm semver matching for the Approved Dependency Base
+Purpose: Decide whether an installed/locked version is covered by an ADB entry,
+         offline and without third-party packages.
+Usage: from version_ranges import approves
+       approves("pypi", ">=2.0,<3", "2.31.0")  -> True
+       approves("npm", "^4.17.0", "4.17.21")   -> True
+Note: An ADB entry is either an exact version ("5.2.2") or a range
+      (PEP 440 specifiers for pypi, npm range syntax for npm). An empty or
+      unparseable entry approves nothing; unknown ecosystems compare exact
+      strings.
+"""
+
+import functools
+import re
+
+# --- PEP 440 -----------------------------------------------------------------------------
+
+_PEP440 = re.compile(
+    r"""^\s*v?
+    (?:(?P<epoch>\d+)!)?
+    (?P<release>\d+(?:\.\d+)*)
+    (?:[-_.]?(?P<pre_l>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_n>\d*))?
+    (?:-(?P<post_n1>\d+)|[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>\d*))?
+    (?:[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>\d*))?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$""",
+    re.VERBOSE | re.IGNORECASE,
+)
+_PRE_ORDER = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2}
+_INF = float("inf")
+_SPEC = re.compile(r"^\s*(===|==|!=|~=|<=|>=|<|>)\s*(\S+?)\s*$")
+
+
+class Pep440:
+    """A parsed PEP 440 version; instances order like packaging.version.Version."""
+
+    __slots__ = ("release", "is_pre", "is_post", "key")
+
+    def __init__(self, m):
+        epoch = int(m.group("epoch") or 0)
+        release = tuple(int(x) for x in m.group("release").split("."))
+        pre = post = dev = None
+        if m.group("pre_l"):
+            pre = (_PRE_ORDER[m.group("pre_l").lower()], int(m.group("pre_n") or 0))
+        if m.group("post_n1"):
+            post = int(m.group("post_n1"))
+        elif m.group("post_l"):
+            post = int(m.group("post_n2") or 0)
+        if m.group("dev_l"):
+            dev = int(m.group("dev_n") or 0)
+        trimmed = release
+        while len(trimmed) > 1 and trimmed[-1] == 0:
+            trimmed = trimmed[:-1]
+        if pre is None and post is None and dev is not None:
+            pre_key = (-1, 0)          # 1.0.dev0 < 1.0a0
+        elif pre is None:
+            pre_key = (3, 0)           # final release sorts after its pre-releases
+        else:
+            pre_key = pre
+        self.release = release
+        self.is_pre = pre is not None or dev is not None
+        self.is_post = post is not None
+        self.key = (epoch, trimmed, pre_key, -1 if post is None else post, _INF if dev is None else dev)
+
+    def base_key(self):
+        return self.key[:2]
+
+
+@functools.lru_cache(maxsize=None)
+def pep440_version(text):
+    m = _PEP440.match(str(text))
+    return Pep440(m) if m else None
+
+
+def _prefix_match(v, spec_text):
+    """`==1.2.*` semantics: compare the release padded to the prefix length."""
+    prefix = pep440_version(spec_text[:-2])
+    if prefix is None:
+        return False
+    n = len(prefix.release)
+    release = (v.release + (0,) * n)[:n]
+    return v.key[0] == prefix.key[0] and release == prefix.release
+
+
+def _pep440_clause(v, raw_version, op, target):
+    if op == "===":
+        return raw_version.strip().lower() == target.lower()
+    if target.endswith(".*"):
+        if op == "==":
+            return _prefix_match(v, target)
+        if op == "!=":
+            return not _prefix_match(v, target)
+        return False
+    t = pep440_version(target)
+    if t is None:
+        return False
+    if op == "==":
+        return v.key == t.key
+    if op == "!=":
+        return v.key != t.key
+    if op == ">=":
+        return v.key >= t.key
+    if op == "<=":
+        return v.key <= t.key
+    if op == "<":
+        # <V excludes pre-releases of V itself unless V is one
+        return v.key < t.key and not (v.is_pre and not t.is_pre and v.base_key() == t.base_key())
+    if op == ">":
+        # >V excludes post-releases of V unless V is one
+        return v.key > t.key and not (v.is_post and not t.is_post and v.base_key() == t.base_key())
+    if op == "~=":
+        if len(t.release) < 2:
+            return False
+        prefix = ".".join(str(x) for x in t.release[:-1]) + ".*"
+        return v.key >= t.key and _prefix_match(v, prefix)
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def _pep440_clauses(specifiers):
+    clauses = []
+    for part in specifiers.split(","):
+        if not part.strip():
+            continue
+        m = _SPEC.match(part)
+        if m is None:
+            return None
+        clauses.append((m.group(1), m.group(2)))
+    return tuple(clauses)
+
+
+def pep440_matches(version, specifiers):
+    """True when `version` satisfies every comma-separated PEP 440 clause in `specifiers`."""
+    v = pep440_version(version)
+    clauses = _pep440_clauses(specifiers)
+    if v is None or clauses is None:
+        return False
+    return all(_pep440_clause(v, version, op, target) for op, target in clauses)
+
+
+# --- npm semver --------------------------------------------------------------------------
+
+_SEMVER = re.compile(
+    r"^\s*[=v]*(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?\s*$")
+_PARTIAL = re.compile(
+    r"^[=v]*(\d+|[xX*])?(?:\.(\d+|[xX*]))?(?:\.(\d+|[xX*]))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$")
+_COMPARATOR = re.compile(r"^(<=|>=|<|>|=|\^|~>?)?\s*(.*)$")
+
+
+def _pre_key(pre):
+    if not pre:
+        return (1,)
+    ids = tuple((0, int(p), "") if p.isdigit() else (1, 0, p) for p in pre.split("."))
+    return (0, ids)
+
+
+@functools.lru_cache(maxsize=None)
+def semver_version(text):
+    """(major, minor, patch, prerelease-key), or None when `text` is not a full semver."""
+    m = _SEMVER.match(str(text))
+    if m is None:
+        return None
+    return (int(m.group(1)), int(m.group(2)), int(m.group(3)), _pre_key(m.group(4)))
+
+
+def _partial(text):
+    """Parse an x-range partial into ([major, minor, patch] with None wildcards, prerelease)."""
+    m = _PARTIAL.match(text)
+    if m is None or m.group(1) is None:  # "", "v", "=": no version at all
+        return None
+    parts = [None if g is None or g in "xX*" else int(g) for g in m.group(1, 2, 3)]
+    for i in range(1, 3):
+        if parts[i - 1] is None:
+            parts[i] = None
+    return parts, m.group(4)
+
+
+def _v(major, minor, patch, pre=""):
+    return (major, minor, patch, _pre_key(pre))
+
+
+def _upper(parts):
+    """Exclusive upper bound for a partial with wildcards (1 → <2.0.0-0, 1.2 → <1.3.0-0)."""
+    major, minor, _ = parts
+    if minor is None:
+        return ("<", _v(major + 1, 0, 0, "0"))
+    return ("<", _v(major, minor + 1, 0, "0"))
+
+
+def _desugar(op, text):
+    """One npm comparator (`^1.2`, `>=1`, `1.x`, ...) → list of (op, version) primitives."""
+    parsed = _partial(text)
+    if parsed is None:
+        return None
+    parts, pre = parsed
+    major, minor, patch = parts
+    if major is None:
+        return [] if op in (None, "=", ">=", "<=", "^", "~", "~>") else [("<", _v(0, 0, 0, "0"))]
+    lo = _v(major, minor or 0, patch or 0, pre or "")
+    exact = patch is not None
+    if op in (None, "="):
+        return [("=", lo)] if exact else [(">=", lo), _upper(parts)]
+    if op in ("~", "~>"):
+        return [(">=", lo), _upper([major, minor, None])]
+    if op == "^":
+        if major > 0 or minor is None:
+            hi = _v(major + 1, 0, 0, "0")
+        elif minor > 0 or patch is None:
+            hi = _v(0, minor + 1, 0, "0")
+        else:
+            hi = _v(0, 0, patch + 1, "0")
+        return [(">=", lo), ("<", hi)]
+    if op == ">=":
+        return [(">=", lo)]
+    if op == "<":
+        return [("<", lo if exact else _v(major, minor or 0, 0, "0"))]
+    if op == ">":
+        if exact:
+            return [(">", lo)]
+        return [(">=", _v(major + 1, 0, 0) if minor is None else _v(major, minor + 1, 0))]
+    if op == "<=":
+        return [("<=", lo)] if exact else [_upper(parts)]
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def semver_range(text):
+    """Parse an npm range into a tuple of comparator sets (OR of ANDs), or None if invalid."""
+    alternatives = []
+    for alt in str(text).split("||"):
+        alt = alt.strip()
+        if not alt:
+            return None  # an empty range would match everything
+        hyphen = re.match(r"^(\S+)\s+-\s+(\S+)$", alt)
+        comparators = []
+        if hyphen:
+            lo, hi = _partial(hyphen.group(1)), _partial(hyphen.group(2))
+            if lo is None or hi is None:
+                return None
+            comparators += _desugar(">=", hyphen.group(1)) or []
+            comparators += _desugar("<=", hyphen.group(2)) or []
+        else:
+            # Glue operators to their operand: ">= 1.2" → ">=1.2"
+            for tok in re.sub(r"(<=|>=|<|>|=|\^|~>?)\s+", r"\1", alt).split():
+                m = _COMPARATOR.match(tok)
+                prims = _desugar(m.group(1), m.group(2))
+                if prims is None:
+                    return None
+                comparators += prims
+        alternatives.append(tuple(comparators))
+    return tuple(alternatives)
+
+
+def _semver_test(op, v, t):
+    return {"=": v == t, "<": v < t, "<=": v <= t, ">": v > t, ">=": v >= t}[op]
+
+
+def semver_satisfies(version, range_text):
+    """npm `semver.satisfies(version, range)` without includePrerelease."""
+    v = semver_version(version)
+    alternatives = semver_range(range_text)
+    if v is None or alternatives is None:
+        return False
+    for comparators in alternatives:
+        if not all(_semver_test(op, v, t) for op, t in comparators):
+            continue
+        if v[3] == (1,):
+            return True
+        # A pre-release only matches a comparator naming a pre-release of the same triple
+        if any(t[:3] == v[:3] and t[3] != (1,) for _, t in comparators):
+            return True
+    return False
+
+
+# --- ADB entries -------------------------------------------------------------------------
+
+ECOSYSTEM_ALIASES = {"python": "pypi", "pip": "pypi", "node": "npm", "javascript": "npm"}
+
+
+def canonical_ecosystem(name):
+    name = str(name).lower()
+    return ECOSYSTEM_ALIASES.get(name, name)
+
+
+def approves(ecosystem, entry, version):
+    """Whether ADB `entry` (exact version or range) covers `version`."""
+    entry, version = str(entry).strip(), str(version).strip()
+    if not entry or not version:
+        return False
+    eco = canonical_ecosystem(ecosystem)
+    if eco == "pypi":
+        if entry[0] in "=!<>~":
+            return pep440_matches(version, entry)
+        a, b = pep440_version(entry), pep440_version(version)
+        return a is not None and b is not None and a.key == b.key
+    if eco == "npm":
+        exact = semver_version(entry)
+        if exact is not None:
+            return exact == semver_version(version)
+        return semver_satisfies(version, entry)
+    return entry == version
@@ -1,11 +1,21 @@
 # tests/conftest.py
-import pytest
-import yaml
+import argparse
+import json
 import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
 from pathlib import Path
 
+import pytest
+import yaml
+
 # --- CONFIGURATION ---
 MANIFEST_PATH = Path("manifest.yaml")  # Root manifest
+DURATIONS_PATH = Path("_logs/test_durations.json")  # Per-test wall time, for balancing shards
+SHARDS_ENV = "M4ND8_TEST_SHARDS"  # Default for --shards (e.g. in CI)
 TIER_HIERARCHY = {
     "micro_mvp": 1,
     "professional": 2,
@@ -20,7 +30,7 @@ def get_current_tier():
     if not MANIFEST_PATH.exists():
         # Fallback for CI or incomplete scaffolds
         return os.getenv("TARGET_BUILD_TIER", "enterprise")
-    
+
     try:
         with open(MANIFEST_PATH, "r") as f:
             data = yaml.safe_load(f)
@@ -33,6 +43,15 @@ def get_current_tier():
 CURRENT_TIER_NAME = get_current_tier()
 CURRENT_TIER_LEVEL = TIER_HIERARCHY.get(CURRENT_TIER_NAME, 3)
 
+def pytest_addoption(parser):
+    group = parser.getgroup("m4nd8", "M4ND8 tiered testing")
+    group.addoption(
+        "--shards", default=os.getenv(SHARDS_ENV, "1"),
+        help="run the eligible tests in N local worker processes, balanced by recorded "
+             f"durations ('auto' = one per CPU; default ${SHARDS_ENV} or 1)",
+    )
+    group.addoption("--shard", default=None, help=argparse.SUPPRESS)  # "I/N", set on worker processes
+
 def pytest_configure(config):
     """
     Register the custom markers so pytest doesn't warn about 'unknown marker'.
@@ -41,12 +60,14 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "micro_mvp: mark test for Core/MicroMVP tier")
     config.addinivalue_line("markers", "professional: mark test for Professional tier")
     config.addinivalue_line("markers", "enterprise: mark test for Enterprise tier")
+    config._m4nd8_dormant = []
+    config._m4nd8_durations = {}
+    config._m4nd8_shard_results = []
 
-def pytest_runtest_setup(item):
+def required_tier(item):
     """
-    The Gatekeeper: Before any test runs, check its tier marker.
+    The (name, level) a test needs; level 0 means any tier.
     """
-    # 1. Check for specific tier markers
     required_level = 0
     tier_name = ""
 
@@ -55,18 +76,186 @@ def pytest_runtest_setup(item):
     if tier_marker:
         tier_name = tier_marker.args[0]
         required_level = TIER_HIERARCHY.get(tier_name, 3)
-    
+
     # Check for shortcut markers like @pytest.mark.enterprise
     for t, level in TIER_HIERARCHY.items():
         if item.get_closest_marker(t):
             required_level = level
             tier_name = t
             break
+    return tier_name, required_level
 
-    # 2. The Decision Logic (Subtractive)
-    # If the test requires a higher level than the current build, SKIP it.
-    if required_level > CURRENT_TIER_LEVEL:
-        pytest.skip(
-            f"DORMANT PROTOCOL: Test requires '{tier_name}' (L{required_level}), "
-            f"but current build is '{CURRENT_TIER_NAME}' (L{CURRENT_TIER_LEVEL})."
+def pytest_collection_modifyitems(config, items):
+    """
+    The Gatekeeper: dormant tests are deselected at collection time, so none
+    of their fixtures are set up; they stay in the tree, and activating a
+    higher tier in manifest.yaml brings them back.
+    """
+    # The Decision Logic (Subtractive)
+    # If the test requires a higher level than the current build, deselect it.
+    eligible, dormant = [], []
+    for item in items:
+        _, level = required_tier(item)
+        (dormant if level > CURRENT_TIER_LEVEL else eligible).append(item)
+    if dormant:
+        config.hook.pytest_deselected(items=dormant)
+        config._m4nd8_dormant = dormant
+    items[:] = eligible
+
+    shard = config.getoption("shard")
+    if shard:
+        index, count = (int(x) for x in shard.split("/"))
+        keep = set(partition([item.nodeid for item in eligible], load_durations(), count)[index])
+        items[:] = [item for item in eligible if item.nodeid in keep]
+
+# --- SHARDING ---
+
+def load_durations(path=DURATIONS_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {k: float(v) for k, v in data.items()} if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def partition(nodeids, durations, count):
+    """
+    Split tests into `count` shards of near-equal recorded time: longest
+    first, each onto the currently lightest shard. Tests without a record
+    count as the median known duration. Deterministic, so every worker
+    computes the same split from the same collection.
+    """
+    known = sorted(durations[n] for n in nodeids if n in durations)
+    default = known[len(known) // 2] if known else 1.0
+    order = sorted(range(len(nodeids)), key=lambda i: (-durations.get(nodeids[i], default), i))
+    shards = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for i in order:
+        lightest = min(range(count), key=lambda s: (loads[s], s))
+        shards[lightest].append(nodeids[i])
+        loads[lightest] += durations.get(nodeids[i], default)
+    return shards
+
+def shard_count(config):
+    value = str(config.getoption("shards") or "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(value))
+    except ValueError:
+        raise pytest.UsageError(f"--shards expects a number or 'auto', got {value!r}")
+
+def _worker_args(config):
+    args, skip = [], False
+    for arg in config.invocation_params.args:
+        if skip:
+            skip = False
+        elif arg == "--shards":
+            skip = True
+        elif not arg.startswith("--shards="):
+            args.append(arg)
+    return args
+
+def _summary_counts(output):
+    """{'passed': 3, 'failed': 1, ...} from a worker's final summary line."""
+    lines = [l for l in output.splitlines() if re.search(r"\bin [\d.]+s\b", l)]
+    if not lines:
+        return {}
+    return {word: int(n) for n, word in re.findall(r"(\d+) (\w+)", lines[-1])}
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    """
+    With --shards N, this process only coordinates: N workers re-run pytest
+    with the same arguments, each executing its share of the eligible tests.
+    """
+    config = session.config
+    count = min(shard_count(config), len(session.items))
+    if count <= 1 or config.getoption("shard") or config.option.collectonly:
+        return None
+    reporter = config.pluginmanager.get_plugin("terminalreporter")
+    base = [sys.executable, "-m", "pytest", *_worker_args(config)]
+    start = time.perf_counter()
+    workers = []
+    for i in range(count):
+        out = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        proc = subprocess.Popen(base + [f"--shard={i}/{count}"], cwd=str(config.invocation_params.dir),
+                                stdout=out, stderr=subprocess.STDOUT, env=dict(os.environ, **{SHARDS_ENV: "1"}))
+        workers.append((proc, out))
+    failed = 0
+    for i, (proc, out) in enumerate(workers):
+        rc = proc.wait()
+        out.seek(0)
+        output = out.read()
+        out.close()
+        if rc not in (0, 5):  # 5: the shard had nothing to run
+            failed += 1
+        config._m4nd8_shard_results.append((i, rc, _summary_counts(output)))
+        if reporter is not None:
+            reporter.write_sep("-", f"shard {i + 1}/{count} (exit {rc})")
+            reporter.write(output)
+    session.testsfailed = failed
+    merge_shard_durations(count)
+    config._m4nd8_wall = time.perf_counter() - start
+    return True
+
+def _shard_path(index):
+    return DURATIONS_PATH.with_name(f"{DURATIONS_PATH.stem}.shard{index}{DURATIONS_PATH.suffix}")
+
+def _save_durations(durations, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(durations, indent=0, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+def merge_shard_durations(count):
+    merged = load_durations()
+    for i in range(count):
+        path = _shard_path(i)
+        merged.update(load_durations(path))
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    _save_durations(merged, DURATIONS_PATH)
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_makereport(item, call):
+    # setup + call + teardown: the wall time a shard spends on this test
+    if call.when == "setup":
+        item.config._m4nd8_durations[item.nodeid] = 0.0
+    item.config._m4nd8_durations[item.nodeid] += call.duration
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if not config._m4nd8_durations or config.option.collectonly:
+        return
+    shard = config.getoption("shard")
+    if shard:
+        _save_durations(config._m4nd8_durations, _shard_path(int(shard.split("/")[0])))
+    else:
+        merged = load_durations()
+        merged.update(config._m4nd8_durations)
+        _save_durations(merged, DURATIONS_PATH)
+
+def pytest_terminal_summary(terminalreporter, config):
+    dormant = config._m4nd8_dormant
+    if dormant:
+        terminalreporter.write_line(
+            f"DORMANT PROTOCOL: {len(dormant)} test(s) deselected; they require a tier above "
+            f"'{CURRENT_TIER_NAME}' (L{CURRENT_TIER_LEVEL})."
+        )
+    results = config._m4nd8_shard_results
+    if results:
+        # Every worker deselects the same dormant tests: count them once
+        totals = {"deselected": len(dormant)} if dormant else {}
+        for _, _, counts in results:
+            for word, n in counts.items():
+                if word != "deselected":
+                    totals[word] = totals.get(word, 0) + n
+        summary = ", ".join(f"{n} {word}" for word, n in sorted(totals.items())) or "no results"
+        terminalreporter.write_sep(
+            "=", f"{len(results)} shards: {summary} in {config._m4nd8_wall:.2f}s",
+            red=any(rc not in (0, 5) for _, rc, _ in results),
+            green=all(rc in (0, 5) for _, rc, _ in results),
         )
@@ -0,0 +1,33 @@
+# tests/unit/conftest.py — unit tests for the engine (runtime/bin) and tools (runtime/tools)
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+FACTORY = Path(__file__).resolve().parents[2]
+RUNTIME = FACTORY / "runtime"
+for sub in ("bin", "tools"):
+    if str(RUNTIME / sub) not in sys.path:
+        sys.path.insert(0, str(RUNTIME / sub))
+
+
+@pytest.fixture(scope="session")
+def capsule(tmp_path_factory):
+    """A .m4nd8 capsule packed from these factory sources by pack_protocol.sh."""
+    packer = tmp_path_factory.mktemp("packer")
+    (packer / ".m4nd8").mkdir()
+    (packer / "factory").symlink_to(FACTORY)
+    subprocess.run(["bash", str(FACTORY.parent / "pack_protocol.sh")], cwd=packer, check=True,
+                   stdout=subprocess.DEVNULL)
+    return packer / ".m4nd8"
+
+
+@pytest.fixture(scope="session")
+def sentinel(capsule):
+    """sentinel.py as a module; it resolves director.yaml from its own location, so only a capsule's copy imports."""
+    spec = importlib.util.spec_from_file_location("sentinel", capsule / "bin" / "sentinel.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
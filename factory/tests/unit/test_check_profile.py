@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import check_profile
+import detectors
+from check_profile import Recorder
+from fs_index import FileIndex
+
+BENCH = Path(__file__).resolve().parents[2] / "bench"
+
+
+def run_gate(recorder, checks):
+    def run_one(chk, token):
+        return {"status": chk["status"], "returncode": 0 if chk["status"] == "pass" else 1}
+
+    measured = recorder.wrap(run_one)
+    for chk in checks:
+        measured(chk, None)
+
+
+def test_records_and_trace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    recorder = Recorder()
+    run_gate(recorder, [{"id": "C1", "status": "pass"}, {"id": "C2", "status": "skip"}])
+    recorder.wrap_emit(lambda *a: None)(2, {"id": "C3"}, {"status": "blocked"})
+    paths = recorder.write()
+    assert paths == {"records": os.path.join("_logs", "sentinel_checks.jsonl"),
+                     "trace": os.path.join("_logs", "sentinel_trace.json")}
+    records = [json.loads(line) for line in open(paths["records"], encoding="utf-8")]
+    assert [(r["check"], r["origin"]) for r in records] == [("C1", "run"), ("C2", "skip"), ("C3", "scheduler")]
+    trace = json.load(open(paths["trace"], encoding="utf-8"))
+    assert [e["name"] for e in trace["traceEvents"] if e["ph"] in ("X", "i")] == ["C1", "C2", "C3"]
+    Recorder().write()
+    assert len(open(paths["records"], encoding="utf-8").readlines()) == 3  # appended, not rewritten
+
+
+def test_outputs_are_not_project_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "out.json").write_text("{}")
+    recorder = Recorder(profile=True)
+    run_gate(recorder, [{"id": "C1", "status": "pass"}])
+    paths = recorder.write()
+    assert os.path.exists(paths["profile"])
+    assert list(FileIndex.build(".").glob("**/*")) == ["out.json"]
+
+
+def test_shell_children_are_reaped_with_their_usage():
+    usage = []
+    detectors.collect_child_usage(usage)
+    try:
+        done = detectors._shell("echo out; echo err >&2; exit 3", {})
+        killed = detectors._shell("kill -9 $$", {})
+        slow = detectors._shell("sleep 5 & sleep 5", {"timeout": 0.3})
+    finally:
+        detectors.collect_child_usage(None)
+    assert (done.returncode, done.stdout, done.stderr) == (3, "out\n", "err\n")
+    assert killed.returncode == -9
+    assert slow.returncode == 124 and slow.stderr.endswith("Timed out after 0.3s")
+    assert len(usage) == 3 and all(u.ru_maxrss > 0 for u in usage)
+
+
+def test_gate_passes_twice(tmp_path, capsule):
+    """The records and trace of one gate must not fail the next (C170 used to see sentinel_trace.json)."""
+    sys.path.insert(0, str(BENCH))
+    try:
+        import synth_repo
+    finally:
+        sys.path.remove(str(BENCH))
+    root = tmp_path / "project"
+    synth_repo.generate(str(root), files=6, hubs=1, log_lines=10, lock_packages=3, logits_tokens=20,
+                        capsule=str(capsule))
+    for run in (1, 2):
+        gate = subprocess.run([sys.executable, os.path.join(".m4nd8", "bin", "sentinel.py"), "--no-cache"],
+                              cwd=root, capture_output=True, text=True, timeout=600)
+        assert gate.returncode == 0, f"gate {run}:\n{gate.stdout[-3000:]}{gate.stderr[-2000:]}"
+    assert (root / "_logs" / check_profile.TRACE_NAME).exists()
+    assert len((root / "_logs" / check_profile.RECORDS_NAME).read_text().splitlines()) > 20
@@ -0,0 +1,220 @@
+import json
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+import cofo_journal
+from cofo_journal import Journal, note
+from detectors import run_check
+from fs_index import BIN_ENV, INDEX_ENV, FileIndex
+from log_store import LOG_DB_ENV, LogStore, load_contract
+
+FACTORY = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    j = Journal()
+    yield j
+    j.close()
+
+
+def _writer(worker, count):
+    j = Journal()
+    for k in range(count):
+        if k % 5 == 0:
+            j.append(*(note(f"src/w{worker}.py", f"batch {k}.{b}" + "x" * 2000) for b in range(3)))
+        else:
+            j.append(note(f"src/w{worker}.py", f"change {k}" + "x" * 5000))
+
+
+def test_normalize_path():
+    assert cofo_journal.normalize_path("./src/a.py") == "src/a.py"
+    assert cofo_journal.normalize_path(" `src//b/../a.py` ") == "src/a.py"
+    assert cofo_journal.normalize_path("") == ""
+
+
+def test_concurrent_append_processes(journal):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_writer, args=(w, 20)) for w in range(4)]
+    for p in procs:
+        p.start()
+    journal.sync()   # concurrently with the writers
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    with open(journal.path, "rb") as f:
+        lines = f.read().split(b"\n")
+    assert lines[-1] == b""
+    notes = [json.loads(line) for line in lines[:-1]]
+    assert len(notes) == 4 * (16 + 4 * 3)
+    for w in range(4):
+        changes = [n["change"].rstrip("x") for n in notes if n["path"] == f"src/w{w}.py"]
+        assert changes[:4] == ["batch 0.0", "batch 0.1", "batch 0.2", "change 1"]
+    journal.sync()
+    assert len(journal.notes()) == len(notes)
+
+
+def test_concurrent_append_threads(journal):
+    threads = [threading.Thread(target=_writer, args=(w, 10)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(journal.notes()) == 4 * (8 + 2 * 3)
+
+
+def test_sync_is_incremental(journal):
+    journal.append(note("src/a.py", "one"), note("./src/b.py", "two"))
+    assert journal.sync() == 2
+    assert journal.sync() == 0
+    with open(journal.path, "ab") as f:
+        f.write(json.dumps(note("src/a.py", "three")).encode() + b"\n" + b'{"path": "src/c')
+    assert journal.sync() == 1
+    assert not journal.has("src/c.py")
+    with open(journal.path, "ab") as f:
+        f.write(b'.py", "change": "four"}\nnot json\n')
+    assert journal.sync() == 1
+    assert [n["change"] for n in journal.notes(path="src/a.py")] == ["one", "three"]
+    assert journal.noted(["src/a.py", "./src/c.py", "src/d.py"]) == {"src/a.py", "src/c.py"}
+    assert [n["path"] for n in journal.notes(directory="./src")] == ["src/a.py", "src/b.py", "src/a.py", "src/c.py"]
+
+
+def test_sync_starts_over_on_rewrite_and_removal(journal):
+    journal.append(note("src/a.py", "one"), note("src/b.py", "two"))
+    journal.sync()
+    with open(journal.path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(note("src/z.py", "replaced")) + "\n" + json.dumps(note("src/y.py", "too")) + "\n")
+    journal.sync()
+    assert [n["path"] for n in journal.notes()] == ["src/z.py", "src/y.py"]
+    os.remove(journal.path)
+    assert journal.notes() == []
+
+
+def test_untraced(journal):
+    journal.append(note("a.py", "x", trace="_logs/trace/run-1.log"), note("b.py", "y"),
+                   note("c.py", "z", trace="logs/other.log"))
+    assert [n["path"] for n in journal.untraced()] == ["b.py", "c.py"]
+
+
+COFO = """# src
+
+## Change Notes
+
+| Timestamp (UTC) | Actor | Path | Change | Why / Evidence | Trace Ref |
+|-----------------|-------|------|--------|----------------|-----------|
+| 2025-01-01T00:00:00Z | builder | `./app.py` | Add a \\| pipe | commit abc | `_logs/trace/r.log` |
+
+## Next
+kept
+"""
+
+
+def test_import_render_write_round_trip(journal, tmp_path):
+    (tmp_path / "src").mkdir()
+    cofo = tmp_path / "src" / "cofo.md"
+    cofo.write_text(COFO, encoding="utf-8")
+    imported = cofo_journal.import_table("src/cofo.md")
+    assert imported == [{"ts": "2025-01-01T00:00:00Z", "actor": "builder", "path": "src/app.py",
+                         "change": "Add a | pipe", "evidence": "commit abc", "trace": "_logs/trace/r.log"}]
+    journal.append(note("src/app.py", "Add a | pipe", "commit abc", "builder", "_logs/trace/r.log",
+                        ts="2025-01-01T00:00:00Z"))
+    journal.append(note("src/lib.py", "New", ts="2025-01-02T00:00:00Z"))
+    cofo_journal.write_table(journal, "src/cofo.md")
+    text = cofo.read_text(encoding="utf-8")
+    assert text.count("| Timestamp (UTC)") == 1
+    assert "| 2025-01-01T00:00:00Z | builder | `./app.py` | Add a \\| pipe |" in text
+    assert "| 2025-01-02T00:00:00Z | worker | `./lib.py` | New |  |  |" in text
+    assert text.endswith("## Next\nkept\n")
+
+
+HAND_ROW = "| 2025-01-03T00:00:00Z | human | `./util.py` | Hand-written | review | `_logs/trace/h.log` |\n"
+
+
+def test_import_missing_imports_each_row_once(journal, tmp_path):
+    (tmp_path / "src").mkdir()
+    cofo = tmp_path / "src" / "cofo.md"
+    cofo.write_text(COFO, encoding="utf-8")
+    assert journal.import_missing(["src/cofo.md"]) == 1
+    assert journal.import_missing(["src/cofo.md"]) == 0
+    journal.append(note("src/lib.py", "New", ts="2025-01-02T00:00:00Z"))
+    cofo_journal.write_table(journal, "src/cofo.md")
+    assert journal.import_missing(["src/cofo.md"]) == 0   # a rendered table is the journal already
+    cofo.write_text(cofo.read_text(encoding="utf-8").replace("\n## Next", HAND_ROW + "\n## Next", 1),
+                    encoding="utf-8")   # a row added by hand
+    assert journal.import_missing(["src/cofo.md"]) == 1
+    assert [n["path"] for n in journal.notes()] == ["src/app.py", "src/lib.py", "src/util.py"]
+
+
+def _importer(_):
+    Journal().import_missing(["src/cofo.md"])
+
+
+def test_import_missing_concurrently(journal, tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "cofo.md").write_text(COFO, encoding="utf-8")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_importer, args=(w,)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    assert len(journal.notes()) == 1
+
+
+def test_import_missing_without_tables_writes_nothing(journal):
+    assert journal.import_missing([]) == 0
+    assert not os.path.exists(journal.path)
+
+
+@pytest.fixture
+def gate(tmp_path, monkeypatch):
+    """C55/C56 as sentinel runs them: event store, index and changed-file list in the env."""
+    with open(FACTORY / "source_policies" / "policy" / "compliance.yaml", encoding="utf-8") as f:
+        checks = {c["id"].split(".")[0]: c for c in yaml.safe_load(f)["checks"] if "id" in c}
+
+    def run(check):
+        (tmp_path / "_logs" / "worker").mkdir(parents=True, exist_ok=True)
+        (tmp_path / "_logs" / "worker" / "1.log").write_text("COFO_NOTE_OK: src/app.py\n", encoding="utf-8")
+        (tmp_path / "_logs" / "changed.txt").write_text("src/app.py\n", encoding="utf-8")
+        store = LogStore("_logs/events.db", load_contract(str(FACTORY / "kernel" / "director.yaml")))
+        store.sync(["_logs/worker/1.log"])
+        store.close()
+        monkeypatch.setenv(BIN_ENV, str(FACTORY / "runtime" / "bin"))
+        monkeypatch.setenv(LOG_DB_ENV, str(tmp_path / "_logs" / "events.db"))
+        monkeypatch.setenv(INDEX_ENV, str(tmp_path / FileIndex.build(".").save("_logs/fs_index.json")))
+        monkeypatch.setenv("M4ND8_CHANGED_FILES", str(tmp_path / "_logs" / "changed.txt"))
+        return run_check(checks[check], {})
+    return run
+
+
+def test_existing_cofo_md_without_journal_passes(journal, tmp_path, gate):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "cofo.md").write_text(COFO, encoding="utf-8")
+    assert not os.path.exists(journal.path)   # a fresh clone: _logs/ is not versioned
+    for check in ("C55", "C56"):
+        res = gate(check)
+        assert res["status"] == "pass", (check, res["output"])
+
+
+def test_cofo_md_rows_still_count_against_c55_and_c56(journal, tmp_path, gate):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "cofo.md").write_text(COFO.replace("./app.py", "./other.py")
+                                              .replace("`_logs/trace/r.log`", "none"), encoding="utf-8")
+    res = gate("C55")
+    assert res["status"] == "fail" and "Missing Change Note entry for src/app.py" in res["output"]
+    res = gate("C56")
+    assert res["status"] == "fail" and "src/other.py (none)" in res["output"]
+
+
+def test_cli_add_and_show(journal, capsys):
+    assert cofo_journal.main(["add", "./src/a.py", "--change", "c", "--trace", "_logs/trace/t"]) == 0
+    assert cofo_journal.main(["show", "src/a.py"]) == 0
+    shown = json.loads(capsys.readouterr().out)
+    assert (shown["path"], shown["change"], shown["trace"]) == ("src/a.py", "c", "_logs/trace/t")
@@ -0,0 +1,151 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import contrast
+from contrast import ContrastError
+
+UI_GATE = Path(__file__).resolve().parents[2] / "source_policies" / "policy" / "ui_gate.yaml"
+
+# Published WCAG 2.x ratios (WebAIM contrast checker, two decimals)
+KNOWN = [
+    ("#000000", "#ffffff", 21.0),
+    ("#ffffff", "#ffffff", 1.0),
+    ("#767676", "#ffffff", 4.54),   # the lightest grey that passes 4.5:1 on white
+    ("#777777", "#ffffff", 4.48),
+    ("#0000ff", "#ffffff", 8.59),
+    ("#ff0000", "#ffffff", 4.0),
+    ("#ff0000", "#000000", 5.25),
+    ("#00ff00", "#000000", 15.3),
+]
+
+
+def wcag_ratio(fg, bg):
+    """WCAG 2.2 contrast ratio, written out from the spec's definition."""
+    def lum(hex_color):
+        rgb = [int(hex_color[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+        r, g, b = [c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4 for c in rgb]
+        return 0.2126 * r + 0.7152 * g + 0.0722 * b
+    hi, lo = sorted((lum(fg), lum(bg)), reverse=True)
+    return (hi + 0.05) / (lo + 0.05)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(contrast, "np", None)
+    elif contrast.np is None:
+        pytest.fail("numpy is not importable; the vectorised path cannot be tested")
+    return request.param
+
+
+@pytest.mark.parametrize("fg, bg, published", KNOWN)
+def test_scalar_ratio_matches_wcag(fg, bg, published):
+    got = contrast.ratio(contrast.luminance(contrast.parse_hex(fg)), contrast.luminance(contrast.parse_hex(bg)))
+    assert got == pytest.approx(wcag_ratio(fg, bg), abs=1e-12)
+    assert round(got, 2) == pytest.approx(published, abs=0.01)
+
+
+def test_matrix_matches_scalar_ratio(backend):
+    colors = sorted({c for fg, bg, _ in KNOWN for c in (fg, bg)})
+    matrix = contrast.ratio_matrix([contrast.luminance(contrast.parse_hex(c)) for c in colors])
+    if backend == "python":
+        assert isinstance(matrix, list)
+    for i, a in enumerate(colors):
+        for j, b in enumerate(colors):
+            assert matrix[i][j] == pytest.approx(wcag_ratio(a, b), abs=1e-12)
+    for fg, bg, published in KNOWN:
+        assert round(float(matrix[colors.index(fg)][colors.index(bg)]), 2) == pytest.approx(published, abs=0.01)
+
+
+@pytest.mark.parametrize("value, rgb", [("#fff", (255, 255, 255)), ("#1A73E8", (26, 115, 232)),
+                                        ("#1a73e8ff", (26, 115, 232))])
+def test_parse_hex(value, rgb):
+    assert contrast.parse_hex(value) == rgb
+
+
+@pytest.mark.parametrize("value", ["fff", "#ffff", "#12345g", "#1a73e880"])
+def test_parse_hex_rejects(value):
+    with pytest.raises(ContrastError):
+        contrast.parse_hex(value)
+
+
+def test_pairings_follow_token_names():
+    names = ["bg/default", "bg/inverse", "brand/on-primary", "brand/primary", "focus/ring",
+             "text/default", "text/inverse", "text/large"]
+    got = {(names[i], names[j], role) for i, j, role in contrast.pairings(names)}
+    assert got == {
+        ("brand/on-primary", "brand/primary", "text"),
+        ("focus/ring", "bg/default", "ui_components"), ("focus/ring", "bg/inverse", "ui_components"),
+        ("text/default", "bg/default", "text"), ("text/default", "bg/inverse", "text"),
+        ("text/inverse", "bg/inverse", "text"),
+        ("text/large", "bg/default", "large_text"), ("text/large", "bg/inverse", "large_text"),
+    }
+    pinned = contrast.pairings(names, [{"fg": "brand/primary", "bg": ["bg/default"], "role": "ui_components"}])
+    assert (3, 0, "ui_components") in pinned
+
+
+TOKENS = {"design_tokens": {"color": {"semantic": {
+    "bg/default": {"light": "#ffffff", "dark": "#202124"},
+    "text/default": {"light": "#777777", "dark": "#e8eaed"},     # 4.48:1 on white: fails text
+    "text/large": {"light": "#777777", "dark": "#9aa0a6"},       # passes large_text (3.0)
+    "focus/ring": {"light": "#1a73e8", "dark": "#1a73e8"},       # 3.57:1 on #202124: passes 3.0
+}}}}
+
+
+def test_report_judges_every_mode(tmp_path, backend):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps(TOKENS), encoding="utf-8")
+    report = contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=None)
+    assert sorted(report["modes"]) == ["dark", "light"]
+    assert [r["checked"] for r in report["modes"].values()] == [3, 3]
+    failed = [contrast.describe(mode, f) for mode, f in contrast.failures(report)]
+    assert failed == ["[light] text/default on bg/default: 4.48:1 < 4.5:1 (text)"]
+    light = report["modes"]["light"]
+    i, j = light["tokens"].index("text/default"), light["tokens"].index("bg/default")
+    assert light["matrix"][i][j] == round(wcag_ratio("#777777", "#ffffff"), 3)
+
+
+def test_backends_agree(tmp_path, monkeypatch):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps(TOKENS), encoding="utf-8")
+    vectorised = contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=None)
+    monkeypatch.setattr(contrast, "np", None)
+    scalar = contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=None)
+    assert scalar["modes"] == vectorised["modes"]
+
+
+def test_legacy_layout_and_its_floor(tmp_path, backend):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({"colors": {"light_mode": {
+        "background": "#ffffff", "foreground": "#595959", "contrast_ratio_min": 7.5}}}), encoding="utf-8")
+    report = contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=None)
+    (mode, fail), = contrast.failures(report)   # 7.0:1 passes AA but not the file's own 7.5
+    assert (mode, fail["ratio"], fail["min"]) == ("light", round(wcag_ratio("#595959", "#ffffff"), 3), 7.5)
+
+
+def test_shipped_ui_gate_tokens_pass(backend):
+    report = contrast.build_report(str(UI_GATE), ui_gate=str(UI_GATE), cache_path=None)
+    assert all(r["checked"] for r in report["modes"].values())
+    assert list(contrast.failures(report)) == []
+
+
+def test_report_cache(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps(TOKENS), encoding="utf-8")
+    cache = str(tmp_path / "_logs" / "contrast_report.json")
+    first = contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=cache)
+    assert contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=cache) == first
+    path.write_text(json.dumps(TOKENS).replace("#777777", "#595959"), encoding="utf-8")
+    assert list(contrast.failures(contrast.build_report(str(path), ui_gate=str(UI_GATE), cache_path=cache))) == []
+
+
+def test_unusable_tokens(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({"semantic": {"text/default": {"light": "#1a73e880"}, "bg/x": {"light": "#fff"}}}))
+    with pytest.raises(ContrastError, match="text/default: .*translucent"):
+        contrast.build_report(str(path), cache_path=None)
+    path.write_text("{}")
+    with pytest.raises(ContrastError, match="no color tokens"):
+        contrast.build_report(str(path), cache_path=None)
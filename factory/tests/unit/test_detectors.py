@@ -0,0 +1,182 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import detectors
+from detectors import run_check
+from fs_index import FileIndex
+from log_store import LOG_DB_ENV, LogStore, load_contract
+
+DIRECTOR = Path(__file__).resolve().parents[2] / "kernel" / "director.yaml"
+
+SPEC = "## Intro\nAgentic TDD Mandate: RED, GREEN, REFACTOR\n## Extras (Optional)\n"
+LOG = "READ_OK: director.yaml\nPLAN_OK\nWRITE_OK:./src/a.py\nVERIFY_OK\n"  # WRITE_OK:<path>, as director.yaml words it
+
+
+def make_tree(root: Path, compliant: bool = True) -> None:
+    """A project that passes every PARITY check, or one that fails each of them."""
+    files = {
+        "m4nd8_pro/spec.md": SPEC.replace(" (Optional)", ""),
+        "m4nd8_pro/director.yaml": "version: 1\n",
+        "docs/guide.md": "All done.\n",
+        "docs/notes.txt": "TODO in a text file\ntext follows\n",
+        "empty.txt": "",
+        "_logs/action_plan.md": "plan\n",
+        "_logs/worker/1.log": LOG,
+        "bin/run.sh": "#!/bin/sh\n",
+    }
+    if not compliant:
+        del files["m4nd8_pro/director.yaml"], files["docs/guide.md"]
+        files.update({"m4nd8_pro/spec.md": SPEC.replace("REFACTOR", ""), "docs/draft.md": "TODO: finish\n",
+                      "_logs/action_plan.md": "", "_logs/worker/1.log": LOG.split("\n", 2)[2] + "PLAN_OK\n"})
+    for rel, text in files.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(text)
+    (root / "bin/run.sh").chmod(0o755)
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def events(root: Path, monkeypatch) -> None:
+    """Sync the worker logs into an event store, as sentinel does before the checks run."""
+    store = LogStore(str(root / "_logs" / "events.db"), load_contract(str(DIRECTOR)))
+    store.sync(sorted(str(p) for p in (root / "_logs" / "worker").glob("*.log")))
+    store.close()
+    monkeypatch.setenv(LOG_DB_ENV, str(root / "_logs" / "events.db"))
+
+
+def status(detect, manifest=None, **chk):
+    return run_check(dict(chk, detect=detect) if detect else chk, manifest or {}, FileIndex.build("."))["status"]
+
+
+@pytest.mark.parametrize("detect, want", [
+    ({"files_exist": ["m4nd8_pro/spec.md", "m4nd8_pro/director.yaml"]}, "pass"),
+    ({"files_exist": ["m4nd8_pro/spec.md", "m4nd8_pro/fnl_chk.yaml"]}, "fail"),
+    ({"any_files_exist": ["missing.md", "docs/guide.md"]}, "pass"),
+    ({"any_files_exist": ["missing.md", "also_missing.md"]}, "fail"),
+    ({"file_nonempty": "docs/guide.md"}, "pass"),
+    ({"file_nonempty": "empty.txt"}, "fail"),
+    ({"file_nonempty": "missing.md"}, "fail"),
+    ({"file_contains": {"file": "m4nd8_pro/spec.md", "substrings": ["RED", "GREEN"]}}, "pass"),
+    ({"file_contains": {"file": "m4nd8_pro/spec.md", "substrings": ["RED", "BLUE"]}}, "fail"),
+    ({"file_contains": {"file": "missing.md", "substrings": ["RED"]}}, "fail"),
+    ({"file_regex_absent": {"file": "m4nd8_pro/spec.md", "patterns": [r"^##\s+.*\(Optional\)"]}}, "pass"),
+    ({"file_regex_absent": {"file": "m4nd8_pro/spec.md", "patterns": [r"^##\s+Intro$"]}}, "fail"),
+    ({"file_regex_absent": {"file": "missing.md", "patterns": ["x"]}}, "pass"),
+    ({"grep_absent": {"pattern": r"\bTODO\b", "paths": ["**/*.md"]}}, "pass"),
+    ({"grep_absent": {"pattern": r"\bTODO\b", "paths": ["docs/"]}}, "fail"),
+    ({"grep_present": {"pattern": r"^## Intro$", "paths": ["m4nd8_pro/*.md"]}}, "pass"),
+    ({"grep_present": {"pattern": "FIXME", "paths": ["**/*"]}}, "fail"),
+    ({"multi_grep_sequence": {"file_glob": "docs/*", "ordered_patterns": ["TODO", "text"]}}, "pass"),
+    ({"multi_grep_sequence": {"file_glob": "docs/*", "ordered_patterns": ["done", "TODO"]}}, "fail"),
+    ({"multi_grep_sequence": {"file_glob": "nowhere/*", "ordered_patterns": ["x"]}}, "fail"),
+    ({"condition": 'exists("docs/guide.md") and contains("m4nd8_pro/spec.md", "REFACTOR")'}, "pass"),
+    ({"condition": '(manifest.features.ui == true) → exists("ui_theme.json")'}, "pass"),
+    ({"condition": 'manifest.features.ui == true'}, "fail"),
+    ({"condition": 'bogus("x")'}, "fail"),
+    ({"script": "test -f docs/guide.md"}, "pass"),
+    ({"script": "test -f docs/missing.md"}, "fail"),
+    ({"manual": True}, "manual"),
+    ({"no_such_primitive": 1}, "fail"),
+])
+def test_primitives(tree, detect, want):
+    assert status(detect) == want
+
+
+def test_grep_hits_report_file_and_line(tree):
+    res = run_check({"detect": {"file_regex_absent": {"file": "m4nd8_pro/spec.md",
+                                                      "patterns": ["GREEN"]}}}, {})
+    assert res["output"] == "Forbidden patterns present:\nm4nd8_pro/spec.md:2: GREEN"
+
+
+def test_first_failing_primitive_decides(tree):
+    res = run_check({"detect": {"files_exist": ["docs/guide.md"], "file_nonempty": "empty.txt",
+                                "script": "exit 0"}}, {})
+    assert (res["status"], res["output"]) == ("fail", "empty.txt missing or empty")
+
+
+def test_condition_reads_the_manifest(tree):
+    manifest = {"features": {"ui": True}}
+    assert status({"condition": 'manifest.features.ui == true'}, manifest) == "pass"
+    assert status({"condition": '(manifest.features.ui == true) → exists("ui_theme.json")'}, manifest) == "fail"
+
+
+def test_legacy_entries(tree):
+    assert status(None, type="file_verification", target="bin/run.sh", permissions="755") == "pass"
+    assert status(None, type="file_verification", target="bin/missing.sh") == "fail"
+    assert status(None, type="file_verification", target="bin/missing.sh", required=False) == "pass"
+    (tree / "bin/run.sh").chmod(0o644)
+    assert status(None, type="file_verification", target="bin/run.sh", permissions="755") == "fail"
+    assert status(None, type="runtime_verification", command="exit 3", expected_exit_code=3) == "pass"
+    res = run_check({"type": "runtime_verification", "command": "echo hi; exit 2"}, {})
+    assert (res["status"], res["output"], res["returncode"]) == ("fail", "hi", 2)
+    assert status(None, script="test -x bin/run.sh") == "fail"
+
+
+def test_log_events(tree, monkeypatch):
+    monkeypatch.delenv(LOG_DB_ENV, raising=False)
+    assert status({"log_event_present": {"kind": "plan_ok"}}) == "fail"  # store not built
+    events(tree, monkeypatch)
+    assert status({"log_event_present": {"kind": "plan_ok"}}) == "pass"
+    assert status({"log_event_present": {"kind": "halt"}}) == "fail"
+    assert status({"log_event_sequence": ["plan_ok", "write_ok", "verify_ok"]}) == "pass"
+    assert status({"log_event_sequence": ["verify_ok", "plan_ok"]}) == "fail"
+
+
+def test_script_timeout_and_env(tree):
+    res = run_check({"timeout_sec": 0.3, "detect": {"script": "sleep 5"}}, {})
+    assert (res["status"], res["returncode"]) == ("fail", 124)
+    res = detectors.run_check({"detect": {"script": 'test "$CHECK_VAR" = set'}}, {}, env={"CHECK_VAR": "set"})
+    assert res["status"] == "pass"
+
+
+# The checks' former form: each one a shell script run with subprocess, pass iff it exits 0.
+PARITY = [
+    ({"files_exist": ["m4nd8_pro/spec.md", "m4nd8_pro/director.yaml"]},
+     "test -e m4nd8_pro/spec.md && test -e m4nd8_pro/director.yaml"),
+    ({"any_files_exist": ["missing.md", "docs/guide.md"]}, "test -e missing.md || test -e docs/guide.md"),
+    ({"file_nonempty": "_logs/action_plan.md"}, "test -s _logs/action_plan.md"),
+    ({"file_contains": {"file": "m4nd8_pro/spec.md", "substrings": ["Agentic TDD Mandate", "REFACTOR"]}},
+     "grep -qF 'Agentic TDD Mandate' m4nd8_pro/spec.md && grep -qF REFACTOR m4nd8_pro/spec.md"),
+    ({"file_regex_absent": {"file": "m4nd8_pro/spec.md", "patterns": [r"^##\s+.*\(Optional\)"]}},
+     r"! grep -qE '^##\s+.*\(Optional\)' m4nd8_pro/spec.md"),
+    ({"grep_absent": {"pattern": r"\bTODO\b", "paths": ["**/*.md"]}},
+     r"! grep -rqE --include='*.md' '\bTODO\b' ."),
+    ({"grep_present": {"pattern": "^READ_OK: ", "paths": ["_logs/worker/*.log"]}},
+     "grep -qE '^READ_OK: ' _logs/worker/*.log"),
+    ({"condition": 'exists("docs/guide.md") and contains("m4nd8_pro/spec.md", "RED")'},
+     "test -e docs/guide.md && test -f m4nd8_pro/spec.md && grep -qF RED m4nd8_pro/spec.md"),
+    ({"multi_grep_sequence": {"file_glob": "_logs/worker/*.log",
+                              "ordered_patterns": ["^PLAN_OK$", "^WRITE_OK\\:", "^VERIFY_OK$"]}},
+     "awk '/^PLAN_OK$/ {if (s==0) s=1} /^WRITE_OK:/ {if (s==0) {bad=1; exit} if (s==1) s=2} "
+     "/^VERIFY_OK$/ {if (s<2) {bad=1; exit} s=3} END {exit bad || s!=3}' _logs/worker/1.log"),
+]
+
+
+@pytest.mark.parametrize("compliant", [True, False])
+def test_matches_the_shell_checks(tmp_path, monkeypatch, compliant):
+    make_tree(tmp_path, compliant)
+    monkeypatch.chdir(tmp_path)
+    index = FileIndex.build(".")
+    for detect, script in PARITY:
+        shell = subprocess.run(script, shell=True, capture_output=True, cwd=tmp_path)
+        native = run_check({"detect": detect}, {}, index)
+        assert (native["status"] == "pass") == (shell.returncode == 0), (detect, native["output"])
+        assert native["status"] == ("pass" if compliant else "fail"), (detect, native["output"])
+
+
+@pytest.mark.parametrize("compliant", [True, False])
+def test_event_store_matches_log_grep(tmp_path, monkeypatch, compliant):
+    make_tree(tmp_path, compliant)
+    monkeypatch.chdir(tmp_path)
+    events(tmp_path, monkeypatch)
+    grep = status({"multi_grep_sequence": {"file_glob": "_logs/worker/*.log",
+                                           "ordered_patterns": ["^PLAN_OK$", "^WRITE_OK\\:", "^VERIFY_OK$"]}})
+    assert status({"log_event_sequence": ["plan_ok", "write_ok", "verify_ok"]}) == grep
+    assert grep == ("pass" if compliant else "fail")
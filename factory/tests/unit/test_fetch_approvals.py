@@ -0,0 +1,64 @@
+import json
+import sqlite3
+
+import pytest
+
+import fetch_approvals
+
+
+def write_source(path, table):
+    path.write_text(json.dumps(table), encoding="utf-8")
+    return str(path)
+
+
+def approved(db):
+    conn = sqlite3.connect(db)
+    try:
+        return sorted(conn.execute("SELECT ecosystem, package, version FROM approved_versions"))
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+DB = ".m4nd8/data/approved_dependencies.db"
+
+
+def test_parse_rows_accepts_both_shapes():
+    published = {"approved": {"pypi": {"requests": ["2.31.0", "2.32.0"]}, "npm": {"left-pad": "1.3.0"}}}
+    assert fetch_approvals.parse_rows(json.dumps(published)) == {
+        ("pypi", "requests", "2.31.0"), ("pypi", "requests", "2.32.0"), ("npm", "left-pad", "1.3.0")}
+    assert fetch_approvals.parse_rows(json.dumps({"npm": {"a": "1.0.0"}, "notes": "x"})) == {("npm", "a", "1.0.0")}
+
+
+def test_first_build_then_delta_then_noop(project, capsys):
+    src = write_source(project / "adb.json", {"npm": {"a": ["1.0.0", "1.1.0"], "b": "2.0.0"}})
+    fetch_approvals.main(["--source", src])
+    assert approved(DB) == [("npm", "a", "1.0.0"), ("npm", "a", "1.1.0"), ("npm", "b", "2.0.0")]
+    assert "(+3 / -0)" in capsys.readouterr().out
+
+    write_source(project / "adb.json", {"npm": {"a": ["1.1.0", "1.2.0"], "b": "2.0.0"}})
+    fetch_approvals.main(["--source", src])
+    assert approved(DB) == [("npm", "a", "1.1.0"), ("npm", "a", "1.2.0"), ("npm", "b", "2.0.0")]
+    assert "(+1 / -1)" in capsys.readouterr().out
+
+    fetch_approvals.main(["--source", src])
+    assert "already matches source (3 approved versions)" in capsys.readouterr().out
+
+
+def test_force_rebuilds_and_leaves_no_staging(project):
+    src = write_source(project / "adb.json", {"pypi": {"x": "1"}})
+    fetch_approvals.main(["--source", src])
+    fetch_approvals.main(["--source", src, "--force"])
+    assert approved(DB) == [("pypi", "x", "1")]
+    assert not (project / (DB + ".staging")).exists()
+
+
+def test_invalid_json_exits(project):
+    (project / "adb.json").write_text("{not json", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        fetch_approvals.main(["--source", str(project / "adb.json")])
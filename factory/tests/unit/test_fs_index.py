@@ -0,0 +1,119 @@
+import glob
+import os
+
+import pytest
+
+from fs_index import FileIndex, _glob_regex, matches
+
+
+def touch(root, *paths):
+    for p in paths:
+        path = root / p
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(p, encoding="utf-8")
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    touch(tmp_path, "README.md", "a.py", "src/b.py", "src/c.js", "src/deep/d.ts", "src/deep/e.md",
+          ".hidden/f.md", "src/.g.md", "docs/h1.md", "docs/h22.md", "_logs/worker/w.log",
+          "node_modules/pkg/index.js")
+    (tmp_path / "empty").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return FileIndex.build(".")
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    ("**/*.md", "README.md", True),
+    ("**/*.md", "src/deep/e.md", True),
+    ("**/*.md", ".hidden/f.md", False),
+    ("**/*.md", "src/.g.md", False),
+    ("*.py", "a.py", True),
+    ("*.py", "src/b.py", False),
+    ("src/**/*.{js,ts}", "src/c.js", True),
+    ("src/**/*.{js,ts}", "src/deep/d.ts", True),
+    ("src/**/*.{js,ts}", "src/b.py", False),
+    ("docs/h?.md", "docs/h1.md", True),
+    ("docs/h?.md", "docs/h22.md", False),
+    ("docs/h[0-9].md", "docs/h1.md", True),
+    ("docs/h[!0-9].md", "docs/h1.md", False),
+    ("./src/*.py", "src/b.py", True),
+    ("src/**", "src/deep/d.ts", True),
+    ("src/**", "src/.g.md", False),
+])
+def test_glob_translation(pattern, path, expected):
+    assert bool(_glob_regex(pattern.replace("./", "", 1)).match(path)) is expected
+    assert matches(pattern, path) is expected
+
+
+@pytest.mark.parametrize("pattern", ["**/*.md", "*.py", "src/**/*.py", "src/*", "docs/h?.md",
+                                     "docs/h[0-9].md", "**/*", "src/**"])
+def test_glob_agrees_with_glob_module(tree, pattern):
+    expected = sorted(p.replace(os.sep, "/") for p in glob.glob(pattern, recursive=True)
+                      if os.path.isfile(p) and not p.startswith(("_logs", "node_modules")))
+    assert sorted(tree.glob(pattern)) == expected
+
+
+def test_excluded_dirs_are_not_indexed_but_resolve_live(tree):
+    assert "_logs/worker/w.log" not in tree
+    assert not tree.under("node_modules")
+    assert tree.glob("_logs/worker/*.log") == ["_logs/worker/w.log"]
+
+
+def test_bare_directory_and_extension_queries(tree):
+    assert tree.glob("src/") == ["src/.g.md", "src/b.py", "src/c.js", "src/deep/d.ts", "src/deep/e.md"]
+    assert tree.with_ext("MD") == tree.with_ext(".md") == sorted(p for p in tree.paths if p.endswith(".md"))
+    assert "empty" in tree.empty_dirs
+
+
+def test_changed_since_and_subset(tree, tmp_path):
+    touch(tmp_path, "new.py")
+    (tmp_path / "a.py").write_text("changed size", encoding="utf-8")
+    (tmp_path / "src" / "c.js").unlink()
+    assert FileIndex.build(".").changed_since(tree) == ["a.py", "new.py", "src/c.js"]
+    sub = tree.subset(["./a.py", "src/b.py"])
+    assert sub.paths == ("a.py", "src/b.py")
+    assert sub.glob("**/*.md") == []
+
+
+def test_save_load_round_trip(tree, tmp_path):
+    loaded = FileIndex.load(tree.save(str(tmp_path / "_logs" / "index.json")))
+    assert loaded.paths == tree.paths
+    assert loaded.stat("src/b.py") == tree.stat("./src/b.py")
+    assert loaded.empty_dirs == tree.empty_dirs
+
+
+def test_refresh_agrees_with_a_fresh_walk(tree, tmp_path):
+    touch(tmp_path, "src/new.py", "new/deep/x.md", "empty/now_full.txt", "_logs/worker/w2.log")
+    (tmp_path / "a.py").write_text("changed size", encoding="utf-8")
+    (tmp_path / "src" / "c.js").unlink()
+    (tmp_path / "docs" / "h1.md").unlink()
+    (tmp_path / "docs" / "h22.md").unlink()
+    (tmp_path / "src" / "deep").rename(tmp_path / "src" / "deeper")
+    (tmp_path / "vacant").mkdir()
+    refreshed, fresh = tree.refresh(), FileIndex.build(".")
+    assert refreshed.paths == fresh.paths
+    assert [refreshed.stat(p) for p in refreshed.paths] == [fresh.stat(p) for p in fresh.paths]
+    assert refreshed.empty_dirs == fresh.empty_dirs == ("docs", "vacant")
+    assert refreshed.changed_since(tree) == fresh.changed_since(tree)
+    assert refreshed.refresh().paths == fresh.paths
+    assert FileIndex.load(tree.save(str(tmp_path / "_logs" / "i.json"))).refresh().paths == fresh.paths
+
+
+def test_refresh_lists_only_directories_whose_mtime_moved(tree, tmp_path, monkeypatch):
+    past = os.stat(tmp_path).st_mtime - 60
+    for d in [tmp_path, *(p for p in tmp_path.rglob("*") if p.is_dir())]:
+        os.utime(d, (past, past))  # settled: older than the racy window
+    index = FileIndex.build(".")
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: listed.append(path) or scandir(path))
+
+    (tmp_path / "src" / "b.py").write_text("edited in place", encoding="utf-8")
+    edited = index.refresh()
+    assert listed == [] and edited.changed_since(index) == ["src/b.py"]
+
+    touch(tmp_path, "src/deep/new.ts")
+    added = edited.refresh()
+    assert listed == [os.path.join(".", "src/deep")]
+    assert added.changed_since(edited) == ["src/deep/new.ts"]
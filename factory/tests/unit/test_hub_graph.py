@@ -0,0 +1,101 @@
+import pytest
+
+import hub_graph
+from fs_index import FileIndex
+from hub_graph import HubCache, HubGraph
+
+
+def wiring(*edges, nodes=None, relation="imports"):
+    edges = [{"from": a, "to": b, "relation": relation, "why": ""} for a, b in edges]
+    names = nodes or sorted({e[k] for e in edges for k in ("from", "to")})
+    return {"nodes": names, "edges": edges, "local_only": []}
+
+
+def is_closed_cycle(graph, cycle):
+    adj = {(s, d) for s, rel, d, _ in graph.edges if rel == "imports"}
+    return cycle[0] == cycle[-1] and all((a, b) in adj for a, b in zip(cycle, cycle[1:]))
+
+
+@pytest.mark.parametrize("edges, components", [
+    ([("a", "b"), ("b", "c")], []),
+    ([("a", "a")], [{"a"}]),
+    ([("a", "b"), ("b", "a")], [{"a", "b"}]),
+    ([("a", "b"), ("b", "c"), ("c", "a"), ("c", "d")], [{"a", "b", "c"}]),
+    ([("a", "b"), ("b", "a"), ("c", "d"), ("d", "c"), ("b", "c")], [{"a", "b"}, {"c", "d"}]),
+    ([("a", "b"), ("a", "c"), ("b", "c"), ("c", "a")], [{"a", "b", "c"}]),
+])
+def test_cycles(edges, components):
+    graph = HubGraph({"src/hub.md": wiring(*[(f"./{a}", f"./{b}") for a, b in edges])})
+    cycles = graph.cycles()
+    assert all(is_closed_cycle(graph, c) for c in cycles)
+    assert len({tuple(c) for c in cycles}) == len(cycles)
+    found = [{n.split("/")[-1] for n in c} for c in cycles]
+    for component in components:
+        assert any(c <= component for c in found)
+    assert all(any(c <= comp for comp in components) for c in found)
+
+
+def test_cycles_cross_hubs_and_ignore_other_relations():
+    graph = HubGraph({
+        "src/a/hub.md": wiring(("./x.py", "../b/y.py")),
+        "src/b/hub.md": wiring(("./y.py", "../a/x.py")),
+        "src/c/hub.md": wiring(("./p.py", "./q.py"), ("./q.py", "./p.py"), relation="reads"),
+    })
+    assert graph.cycles() == [["src/a/x.py", "src/b/y.py", "src/a/x.py"]]
+
+
+def test_dependents_and_dependencies():
+    graph = HubGraph({"src/hub.md": wiring(("./app.py", "./db.py"), ("./db.py", "./config.py"),
+                                           ("./cli.py", "./app.py"))})
+    assert [d["path"] for d in graph.dependents("./src/config.py")] == ["src/db.py"]
+    assert {d["path"] for d in graph.dependents("src/config.py", transitive=True)} == \
+        {"src/db.py", "src/app.py", "src/cli.py"}
+    assert [d["path"] for d in graph.dependencies("src/cli.py")] == ["src/app.py"]
+
+
+HUB = """# hub
+```yaml
+hub_wiring:
+  nodes: [./a.py, ./b.py{extra}]
+  edges:
+    - {{ from: ./a.py, relation: imports, to: ./b.py, why: "x" }}
+  local_only: [./cofo.md]
+```
+"""
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    for name in ("a.py", "b.py", "cofo.md"):
+        (tmp_path / "src" / name).write_text("", encoding="utf-8")
+    (tmp_path / "src" / "hub.md").write_text(HUB.format(extra=""), encoding="utf-8")
+    return tmp_path
+
+
+def test_build_validates_and_caches(project):
+    cache = HubCache(str(project / "_logs" / "hub_graph.json"))
+    first = hub_graph.build(FileIndex.build("."), cache)
+    cache.save()
+    assert first["errors"] == [] and first["parsed"] == 1
+
+    cache = HubCache(str(project / "_logs" / "hub_graph.json"))
+    assert hub_graph.build(FileIndex.build("."), cache)["cached"] == 1
+
+    (project / "src" / "stray.py").write_text("", encoding="utf-8")
+    report = hub_graph.build(FileIndex.build("."), cache)
+    assert report["relisted"] == 1
+    assert report["errors"] == ["src/hub.md: ./stray.py not represented in nodes or local_only"]
+
+
+def test_build_reports_missing_nodes_and_bad_edges(project):
+    (project / "src" / "hub.md").write_text(
+        HUB.format(extra=", ./gone.py") + "```yaml\nnot: wiring\n```\n", encoding="utf-8")
+    report = hub_graph.build(FileIndex.build("."), HubCache(None))
+    assert report["errors"] == ["src/hub.md: node does not exist: src/gone.py"]
+    assert report["warnings"] == ["orphan node: src/gone.py"]
+    assert hub_graph.parse_hub("h/hub.md", "no block")[1] == ["h/hub.md: missing hub_wiring block"]
+    _, errors = hub_graph.parse_hub("h/hub.md", "```yaml\nhub_wiring:\n  nodes: [./a]\n"
+                                                "  edges:\n    - {from: ./a, to: ./b}\n```\n")
+    assert errors == ["h/hub.md: edge #0 missing relation", "h/hub.md: edge #0 to not in nodes: ./b"]
@@ -0,0 +1,158 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import liveness
+from liveness import ConnectionPool, Monitor
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        Handler.connections.add(self.client_address)
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        if status not in (204, 304):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, b'{"status": "ok"}')
+        elif self.path == "/mock":
+            self._send(200, b'{"status": "ok", "source": "mock data"}')
+        elif self.path == "/mock-header":
+            self._send(200, b"ok", [("X-Mock", "1")])
+        elif self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"he", b"llo ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\nX-Trailer: t\r\n\r\n")
+        elif self.path == "/no-content":
+            self._send(204)
+        elif self.path == "/not-modified":
+            self._send(304, headers=[("ETag", '"v1"')])
+        elif self.path == "/early-hints":
+            self.wfile.write(b"HTTP/1.1 103 Early Hints\r\nLink: </app.css>; rel=preload\r\n\r\n")
+            self._send(200, b"ok")
+        else:
+            self._send(500, b"error")
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def down_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/health"
+
+
+def run_rounds(targets, rounds=1):
+    monitor = Monitor(targets, timeout=2.0)
+    summaries = asyncio.run(monitor.watch(interval=0, rounds=rounds))
+    return monitor, summaries
+
+
+@pytest.mark.parametrize("path, status, body", [
+    ("/health", 200, b'{"status": "ok"}'),
+    ("/chunked", 200, b"hello world"),
+    ("/no-content", 204, b""),
+    ("/not-modified", 304, b""),
+    ("/early-hints", 200, b"ok"),
+    ("/missing", 500, b"error"),
+])
+def test_get_reads_each_response_kind_and_keeps_the_connection(server, path, status, body):
+    async def twice():
+        pool = ConnectionPool(timeout=2.0)
+        try:
+            first = await pool.get(server + path)
+            second = await pool.get(server + path)
+        finally:
+            await pool.close()
+        return first, second, pool.opened
+
+    first, second, opened = asyncio.run(twice())
+    assert first[0] == second[0] == status
+    assert first[2] == second[2] == body
+    assert opened == 1
+
+
+@pytest.mark.parametrize("path, verdict", [
+    ("/health", "real"),
+    ("/chunked", "real"),
+    ("/mock", "mock"),
+    ("/mock-header", "mock"),
+    ("/no-content", "down"),
+    ("/missing", "down"),
+])
+def test_verdicts(server, path, verdict):
+    _, [summary] = run_rounds([{"name": "t", "url": server + path, "expected_process": None}])
+    assert summary["verdict"] == verdict
+    assert summary["error"] is None
+
+
+def test_down_and_missing_process(server, down_url):
+    _, summaries = run_rounds([
+        {"name": "down", "url": down_url, "expected_process": None},
+        {"name": "ghost", "url": server + "/health", "expected_process": "no-such-process-[x]yz"},
+    ])
+    down, ghost = summaries
+    assert (down["verdict"], down["failures"], down["p50_ms"]) == ("down", 1, None)
+    assert down["error"]
+    assert (ghost["verdict"], ghost["process_exists"]) == ("no_process", False)
+
+
+def test_pooled_connection_is_reused_across_rounds(server):
+    Handler.connections.clear()
+    monitor, [summary] = run_rounds([{"name": "t", "url": server + "/chunked", "expected_process": None}],
+                                    rounds=4)
+    assert summary["probes"] == 4 and summary["verdict"] == "real"
+    assert monitor.pool.opened == 1 and len(Handler.connections) == 1
+    assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+
+
+def test_load_targets():
+    targets = liveness.load_targets({
+        "backend": {"backend_port": 9000, "expected_process": "gunicorn"},
+        "backends": [{"name": "api", "url": "https://api.local/ping"}, {"port": 9001, "health_endpoint": "/hz"}],
+    })
+    assert targets == [
+        {"name": "backend", "url": "http://127.0.0.1:9000/health", "expected_process": "gunicorn"},
+        {"name": "api", "url": "https://api.local/ping", "expected_process": None},
+        {"name": "backend2", "url": "http://127.0.0.1:9001/hz", "expected_process": None},
+    ]
+    with pytest.raises(ValueError, match="unsupported url"):
+        liveness.load_targets({"backends": [{"url": "ftp://x"}]})
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert [liveness.percentile(values, q) for q in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert [liveness.percentile([1, 2, 3, 4], q) for q in (0, 25, 50, 51, 99)] == [1, 1, 2, 3, 4]
+    assert liveness.percentile([], 50) is None
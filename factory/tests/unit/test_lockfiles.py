@@ -0,0 +1,105 @@
+import functools
+import io
+import json
+
+import pytest
+
+import lockfiles
+from lockfiles import JsonStream
+
+
+@pytest.fixture(params=[3, 7, lockfiles.CHUNK_CHARS])
+def chunk(request, monkeypatch):
+    """Every reader runs with buffers small enough to split tokens and numbers."""
+    monkeypatch.setattr(lockfiles, "JsonStream", functools.partial(JsonStream, chunk=request.param))
+    return request.param
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text if isinstance(text, str) else json.dumps(text, indent=1), encoding="utf-8")
+    return str(path)
+
+
+def test_json_stream_values_and_skips(chunk):
+    doc = {"skip": {"a": ["}", "{", "\"]\\"], "n": [1.25e10, -3, None, True]},
+           "big": 123456789012345678, "text": "café \"q\"", "empty": {}}
+    stream = JsonStream(io.StringIO(json.dumps(doc)), chunk=chunk)
+    seen = {}
+    for key in stream.items():
+        if key == "skip":
+            stream.skip()
+        elif key == "empty":
+            seen[key] = list(stream.items())
+        else:
+            seen[key] = stream.value()
+    assert seen == {"big": 123456789012345678, "text": "café \"q\"", "empty": []}
+
+
+def test_package_lock_v3(tmp_path, chunk):
+    path = write(tmp_path, "package-lock.json", {
+        "name": "app", "lockfileVersion": 3,
+        "packages": {
+            "": {"name": "app", "version": "1.0.0"},
+            "node_modules/a": {"version": "1.2.3", "resolved": "https://r/{a}.tgz"},
+            "node_modules/a/node_modules/b": {"version": "2.0.0"},
+            "node_modules/@scope/c": {"version": "0.1.0"},
+            "node_modules/linked": {"resolved": "../linked", "link": True},
+            "node_modules/alias": {"name": "real-name", "version": "3.0.0"},
+        },
+    })
+    assert list(lockfiles.package_lock(path)) == [
+        ("npm", "a", "1.2.3"), ("npm", "b", "2.0.0"), ("npm", "@scope/c", "0.1.0"), ("npm", "real-name", "3.0.0")]
+
+
+def test_package_lock_v1_and_v2_are_read_once(tmp_path, chunk):
+    tree = {"a": {"version": "1.0.0", "dependencies": {"b": {"version": "2.0.0", "requires": {"c": "^1"}}}}}
+    v1 = write(tmp_path, "npm-shrinkwrap.json", {"lockfileVersion": 1, "dependencies": tree})
+    assert sorted(lockfiles.package_lock(v1)) == [("npm", "a", "1.0.0"), ("npm", "b", "2.0.0")]
+    v2 = write(tmp_path, "package-lock.json", {
+        "lockfileVersion": 2,
+        "packages": {"": {}, "node_modules/a": {"version": "1.0.0"}},
+        "dependencies": tree,
+    })
+    assert list(lockfiles.package_lock(v2)) == [("npm", "a", "1.0.0")]
+
+
+@pytest.mark.parametrize("version, keys, expected", [
+    ("5.4", ["/a/1.0.0:", "/@s/b/2.0.0_react@18.0.0:"], [("a", "1.0.0"), ("@s/b", "2.0.0")]),
+    ("'6.0'", ["/a@1.0.0:", "/@s/b@2.0.0(react@18.0.0):"], [("a", "1.0.0"), ("@s/b", "2.0.0")]),
+    ("'9.0'", ["a@1.0.0:", "'@s/b@2.0.0':", "c@https://x/c.tgz:"], [("a", "1.0.0"), ("@s/b", "2.0.0")]),
+])
+def test_pnpm_lock(tmp_path, version, keys, expected):
+    body = "".join(f"  {k}\n    resolution: {{integrity: sha512-x}}\n    dependencies:\n      z: 1.0.0\n"
+                   for k in keys)
+    path = write(tmp_path, "pnpm-lock.yaml",
+                 f"lockfileVersion: {version}\nimporters:\n  .:\n    dependencies:\n      q: 1.0.0\n"
+                 f"packages:\n\n{body}")
+    assert list(lockfiles.pnpm_lock(path)) == [("npm",) + e for e in expected]
+
+
+def test_poetry_and_uv(tmp_path):
+    poetry = write(tmp_path, "poetry.lock",
+                   '[[package]]\nname = "requests"\nversion = "2.31.0"\n\n[package.dependencies]\n'
+                   'version = "not this"\n\n[[package]]\nname = \'idna\'\nversion = \'3.6\'\n')
+    assert list(lockfiles.poetry_lock(poetry)) == [("pypi", "requests", "2.31.0"), ("pypi", "idna", "3.6")]
+    uv = write(tmp_path, "uv.lock",
+               '[[package]]\nname = "app"\nversion = "0.1.0"\nsource = { editable = "." }\n\n'
+               '[[package]]\nname = "rich"\nversion = "13.7.0"\nsource = { registry = "https://pypi.org/simple" }\n')
+    assert list(lockfiles.uv_lock(uv)) == [("pypi", "rich", "13.7.0")]
+
+
+def test_requirements_follow_includes(tmp_path):
+    write(tmp_path, "base.txt", "idna==3.6  # pinned\nurllib3>=2\n")
+    req = write(tmp_path, "requirements.txt",
+                "-r base.txt\nrequests[socks]==2.31.0 ; python_version >= '3.8'\n"
+                "git+https://x/y.git\n--index-url https://pypi\nflask===3.0\n")
+    assert list(lockfiles.requirements(req)) == [("pypi", "idna", "3.6"), ("pypi", "requests", "2.31.0")]
+
+
+def test_discover_and_dispatch(tmp_path):
+    write(tmp_path, "uv.lock", "")
+    write(tmp_path, "requirements.txt", "")
+    assert lockfiles.discover(str(tmp_path)) == [str(tmp_path / "requirements.txt"), str(tmp_path / "uv.lock")]
+    with pytest.raises(ValueError):
+        lockfiles.read_lockfile("Cargo.lock")
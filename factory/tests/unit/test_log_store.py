@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest
+
+import log_store
+from log_store import LogStore, load_contract
+
+CONTRACT = load_contract(str(Path(__file__).resolve().parents[2] / "kernel" / "director.yaml"))
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / "worker.log"
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = LogStore(str(tmp_path / "events.db"), CONTRACT)
+    yield s
+    s.close()
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_events_are_typed_with_line_numbers(store, log):
+    append(log, "noise\nPLAN_OK\nWRITE_OK: ./src/a.py\nnot PLAN_OK\nHALT: budget\nVERIFY_OK\n")
+    store.sync([str(log)])
+    assert store.events(["plan_ok", "write_ok", "halt", "verify_ok"]) == [
+        (str(log), 2, "plan_ok", None),
+        (str(log), 3, "write_ok", "./src/a.py"),
+        (str(log), 5, "halt", "budget"),
+        (str(log), 6, "verify_ok", None),
+    ]
+
+
+def test_contract_accepts_the_directors_own_forms(store, log):
+    # director.yaml tells workers to "log WRITE_OK:<path>" and "COFO_NOTE_OK:<path>"; HALT: may have no reason
+    append(log, "WRITE_OK:src/a.py\nWRITE_OK: src/b.py\nWRITE_OK:\nWRITE_OK:   \n"
+                "COFO_NOTE_OK:src/a.py\nHALT:\nHALT: budget\n")
+    store.sync([str(log)])
+    assert store.values("write_ok") == ["src/a.py", "src/b.py"]  # a bare WRITE_OK: names no path
+    assert store.values("cofo_note_ok") == ["src/a.py"]
+    assert [(line, value) for _, line, _, value in store.events(["halt"])] == [(6, ""), (7, "budget")]
+    assert store.has("halt")
+
+
+def test_partial_line_waits_for_its_newline(store, log):
+    append(log, "PLAN_OK\nWRITE_OK: ./src/a")
+    first = store.sync([str(log)])
+    assert store.values("write_ok") == []
+    append(log, ".py\nVERIFY_OK\n")
+    second = store.sync([str(log)])
+    assert store.values("write_ok") == ["./src/a.py"]
+    assert [e[1] for e in store.events(["write_ok", "verify_ok"])] == [2, 3]
+    # only the bytes after the last complete line are read again
+    assert first["bytes"] == len("PLAN_OK\n")
+    assert second["bytes"] == len("WRITE_OK: ./src/a.py\nVERIFY_OK\n")
+    assert store.sync([str(log)])["bytes"] == 0
+
+
+def test_chunk_boundaries_keep_line_numbers(store, log, monkeypatch):
+    monkeypatch.setattr(log_store, "CHUNK_BYTES", 7)
+    lines = [f"WRITE_OK: ./f{i}.py" if i % 3 == 0 else "x" * (i % 5) for i in range(40)]
+    append(log, "\n".join(lines) + "\n")
+    store.sync([str(log)])
+    assert [line for _, line, _, _ in store.events(["write_ok"])] == [i + 1 for i in range(0, 40, 3)]
+
+
+def test_truncated_log_is_reread(store, log):
+    append(log, "WRITE_OK: ./old.py\nVERIFY_OK\n")
+    store.sync([str(log)])
+    log.write_text("WRITE_OK: ./new.py\n", encoding="utf-8")
+    store.sync([str(log)])
+    assert store.values("write_ok") == ["./new.py"]
+
+
+def test_removed_log_is_forgotten(store, log):
+    append(log, "PLAN_OK\n")
+    store.sync([str(log)])
+    store.sync([])
+    assert not store.has("plan_ok") and store.files() == []
+
+
+def test_contract_change_drops_the_store(tmp_path, log):
+    append(log, "PLAN_OK\n")
+    db = str(tmp_path / "events.db")
+    s = LogStore(db, CONTRACT)
+    s.sync([str(log)])
+    s.close()
+    s = LogStore(db, dict(CONTRACT, plan_ok="PLAN_DONE"))
+    try:
+        assert not s.has("plan_ok") and s.files() == []
+    finally:
+        s.close()
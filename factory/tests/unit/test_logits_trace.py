@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+import logits_trace
+from logits_trace import Trace
+
+TOKENS = ["{", '"name"', ":", " \"Zoë 🚀\"", ",", '"n"', ":", "42", "}"]
+PROBS = [0.99, 0.9, 0.98, 0.35, 1.0, 0.4, 0.97, 0.1, 0.95]
+IDS = [90, 1, 25, None, 11, 2, 25, 7, 92]
+
+
+@pytest.fixture(params=["numpy", "struct"])
+def backend(request, monkeypatch):
+    if request.param == "struct":
+        monkeypatch.setattr(logits_trace, "np", None)
+    return request.param
+
+
+def test_round_trip(tmp_path, backend):
+    path = str(tmp_path / "out.json.logits.bin")
+    logits_trace.write_trace(path, TOKENS, PROBS, IDS)
+    with Trace(path) as trace:
+        assert trace.count == len(TOKENS)
+        assert [trace.token(i) for i in range(trace.count)] == TOKENS
+        assert [trace.token_id(i) for i in range(trace.count)] == [-1 if i is None else i for i in IDS]
+        assert [float(p) for p in trace.prob] == [logits_trace.round_f16(p) for p in PROBS]
+        assert list(trace.syntax) == [1, 0, 1, 0, 1, 0, 1, 0, 1]
+        header_len = int.from_bytes(trace._map[8:12], "little")
+        assert all(col["offset"] % 8 == 0 and col["offset"] >= 12 + header_len
+                   for col in trace._columns.values())
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 1000])
+def test_round_trip_sizes(tmp_path, backend, count):
+    tokens = [f"t{i}" for i in range(count)]
+    probs = [(i % 100) / 100 for i in range(count)]
+    path = str(tmp_path / "t.logits.bin")
+    logits_trace.write_trace(path, tokens, probs)
+    with Trace(path) as trace:
+        assert trace.count == count
+        assert [trace.token(i) for i in range(count)] == tokens
+        assert [float(p) for p in trace.prob] == [logits_trace.round_f16(p) for p in probs]
+        assert all(trace.token_id(i) == -1 for i in range(count))
+
+
+def test_legacy_convert_matches_direct_write(tmp_path, backend):
+    legacy = tmp_path / "out.json.logits.json"
+    legacy.write_text(json.dumps([{"token": t, "prob": p, **({"id": i} if i is not None else {})}
+                                  for t, p, i in zip(TOKENS, PROBS, IDS)] + [{"token": "no prob"}]))
+    direct = str(tmp_path / "direct.logits.bin")
+    logits_trace.write_trace(direct, TOKENS, PROBS, IDS)
+    assert logits_trace.convert(str(legacy)) == str(tmp_path / "out.json.logits.bin")
+    with open(direct, "rb") as a, open(tmp_path / "out.json.logits.bin", "rb") as b:
+        assert a.read() == b.read()
+    with logits_trace.open_trace(str(legacy)) as mem, Trace(direct) as mapped:
+        assert logits_trace.minp_report(mem) == logits_trace.minp_report(mapped)
+
+
+def test_minp_report(tmp_path, backend):
+    path = str(tmp_path / "out.json.logits.bin")
+    logits_trace.write_trace(path, TOKENS, PROBS, IDS)
+    with Trace(path) as trace:
+        report = logits_trace.minp_report(trace)
+    assert (report["tokens"], report["critical"], report["low"]) == (9, 4, 2)
+    assert [(i, t) for i, t, _ in report["examples"]] == [(3, " \"Zoë 🚀\""), (7, "42")]
+    assert report["min"] == pytest.approx(0.1, abs=1e-3)
+    assert report["mean"] == pytest.approx((0.9 + 0.35 + 0.4 + 0.1) / 4, abs=1e-3)
+    assert report["p50"] == pytest.approx((0.35 + 0.4) / 2, abs=1e-3)
+
+
+def test_numpy_and_struct_reports_agree(tmp_path, monkeypatch):
+    path = str(tmp_path / "t.logits.bin")
+    logits_trace.write_trace(path, [f"v{i}" for i in range(500)], [((i * 37) % 101) / 100 for i in range(500)])
+    with Trace(path) as trace:
+        vectorized = logits_trace.minp_report(trace)
+    monkeypatch.setattr(logits_trace, "np", None)
+    with Trace(path) as trace:
+        plain = logits_trace.minp_report(trace)
+    assert plain.keys() == vectorized.keys()
+    for key, value in vectorized.items():
+        assert plain[key] == (pytest.approx(value, abs=1e-6) if isinstance(value, float) else value)
+
+
+def test_rejects_bad_input(tmp_path):
+    with pytest.raises(ValueError, match="same length"):
+        logits_trace.write_trace(str(tmp_path / "x"), ["a"], [0.5, 0.6])
+    bad = tmp_path / "bad.logits.bin"
+    bad.write_bytes(b"not a trace")
+    with pytest.raises(ValueError, match="not a logits trace"):
+        Trace(str(bad))
+    bad.write_bytes(b"")
+    with pytest.raises(ValueError, match="not a logits trace"):
+        Trace(str(bad))
+
+
+def test_trace_for_prefers_binary(tmp_path):
+    out = tmp_path / "out.json"
+    assert logits_trace.trace_for(str(out)) is None
+    (tmp_path / "out.json.logits.json").write_text("[]")
+    assert logits_trace.trace_for(str(out)).endswith(".logits.json")
+    (tmp_path / "out.json.logits.bin").write_bytes(b"")
+    assert logits_trace.trace_for(str(out)).endswith(".logits.bin")
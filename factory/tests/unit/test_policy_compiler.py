@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+import policy_compiler
+from policy_compiler import PolicyError, compile_policy, load_or_compile, normalize_check, validate_checks
+
+DIRECTOR = """
+environment:
+  logs:
+    dir: "./logs"
+    line_contract:
+      plan_ok: "PLAN_OK"
+"""
+
+
+def checks(*entries):
+    return [normalize_check(c) for c in entries]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "policy").mkdir()
+    (tmp_path / "policy" / "compliance.yaml").write_text(
+        "checks:\n  - id: C00.present\n    detect:\n      files_exist: [manifest.yaml]\n", encoding="utf-8")
+    (tmp_path / "director.yaml").write_text(DIRECTOR, encoding="utf-8")
+    (tmp_path / "manifest.yaml").write_text(
+        'features:\n  ui: true\nverification_target: ["pytest", "-q", "tests dir"]\n', encoding="utf-8")
+    return tmp_path
+
+
+def test_normalize_legacy_fields():
+    chk = normalize_check({"name": "C10", "blocking": True, "after": "C00", "timeout_sec": "30"})
+    assert chk["id"] == "C10" and chk["severity"] == "critical"
+    assert chk["after"] == ["C00"] and chk["timeout_sec"] == 30
+
+
+def test_validation_lists_every_problem():
+    problems = validate_checks(checks(
+        {"id": "C1", "detect": {"files_exist": ["a"]}},
+        {"id": "C1", "detect": {"files_exist": ["a"]}},
+        {"id": "C2", "severity": "urgent", "detect": {"no_such_primitive": 1}},
+        {"id": "C3", "after": ["C99"], "detect": {"manual": True}},
+        {"id": "C4", "type": "runtime_verification"},
+        {"id": "C5", "applies_if": {}},
+    ))
+    assert problems == [
+        "C1: duplicate id",
+        "C2: unknown severity 'urgent'",
+        "C2: unknown detect primitive 'no_such_primitive'",
+        "C3: after references unknown check C99",
+        "C4: type runtime_verification needs 'command'",
+        "C5: applies_if needs a feature",
+        "C5: no detect block",
+    ]
+
+
+def test_dependency_cycles_are_reported():
+    problems = validate_checks(checks({"id": "C1", "after": ["C2"], "detect": {"manual": True}},
+                                      {"id": "C2", "after": ["C1"], "detect": {"manual": True}}))
+    assert len(problems) == 1 and "cycle" in problems[0]
+
+
+def test_compile_model(project):
+    model = compile_policy("policy/compliance.yaml", "director.yaml")
+    assert model["features"] == {"ui": True}
+    assert model["verification_target"] == "pytest -q 'tests dir'"
+    assert model["line_contract"] == {"plan_ok": "PLAN_OK"}
+    assert [c["id"] for c in model["checks"]] == ["C00.present"]
+
+
+def test_invalid_pack_raises(project):
+    (project / "policy" / "compliance.yaml").write_text("checks:\n  - detect: {}\n", encoding="utf-8")
+    with pytest.raises(PolicyError) as e:
+        compile_policy("policy/compliance.yaml", "director.yaml")
+    assert e.value.problems == ["checks[0]: missing id"]
+
+
+def test_compiled_model_is_reused_until_a_source_changes(project, monkeypatch):
+    out = str(project / "_logs" / "policy.compiled.json")
+    first = load_or_compile("policy/compliance.yaml", "director.yaml", out)
+    calls = []
+    real = policy_compiler.compile_policy
+    monkeypatch.setattr(policy_compiler, "compile_policy", lambda *a: calls.append(a) or real(*a))
+    assert load_or_compile("policy/compliance.yaml", "director.yaml", out) == json.loads(json.dumps(first))
+    assert calls == []
+    (project / "manifest.yaml").write_text("features:\n  ui: false\n", encoding="utf-8")
+    assert load_or_compile("policy/compliance.yaml", "director.yaml", out)["features"] == {"ui": False}
+    assert len(calls) == 1
+
+
+def test_load_from_env(project, monkeypatch):
+    out = str(project / "_logs" / "policy.compiled.json")
+    load_or_compile("policy/compliance.yaml", "director.yaml", out)
+    monkeypatch.setenv(policy_compiler.POLICY_ENV, os.path.abspath(out))
+    assert policy_compiler.load_from_env()["line_contract"] == {"plan_ok": "PLAN_OK"}
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+import provenance
+from fs_index import FileIndex
+from provenance import HashCache
+
+
+def leaves(n):
+    return [hashlib.sha256(str(i).encode()).digest() for i in range(n)]
+
+
+@pytest.mark.parametrize("n", range(1, 10))
+def test_every_inclusion_proof_verifies(n):
+    hashes = leaves(n)
+    root = provenance.merkle_root(hashes)
+    for i, leaf in enumerate(hashes):
+        proof = provenance.inclusion_proof(hashes, i)
+        assert provenance.verify_proof(leaf, proof, root)
+        if n > 1:
+            assert not provenance.verify_proof(hashes[(i + 1) % n], proof, root)
+            side, sibling = proof[0]
+            flipped = [("left" if side == "right" else "right", sibling)] + proof[1:]
+            assert not provenance.verify_proof(leaf, flipped, root)
+
+
+def test_leaf_hash_is_order_independent_and_unambiguous():
+    a = provenance.leaf_hash("out.json", "aa", "bb", {"x": "1", "y": "2"})
+    assert a == provenance.leaf_hash("out.json", "aa", "bb", {"y": "2", "x": "1"})
+    assert a != provenance.leaf_hash("out.json", "aa", "bb", {"x": "1", "y": "3"})
+    assert provenance.merkle_root([]) == hashlib.sha256(b"").hexdigest()
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for d in ("out", "docs"):
+        (tmp_path / d).mkdir()
+    (tmp_path / "docs" / "contract.md").write_text("terms v1\n")
+    (tmp_path / "docs" / "rates.csv").write_text("a,1\n")
+    for name in ("a.json", "b.txt", "c.json"):
+        (tmp_path / "out" / name).write_text(f"{name} body\n")
+        (tmp_path / "out" / (name + ".c2pa")).write_text(json.dumps({"sources": ["./docs/contract.md"]}))
+    rates = hashlib.sha256(b"a,1\n").hexdigest()
+    (tmp_path / "out" / "c.json.c2pa").write_text(json.dumps(
+        {"sources": ["docs/contract.md", {"path": "docs/rates.csv", "sha256": rates}]}))
+    return tmp_path
+
+
+def run(cmd, cache_path="_logs/provenance_cache.json"):
+    cache = HashCache(cache_path)
+    index = FileIndex.build(".")
+    if cmd == "seal":
+        state = provenance.seal(index, cache, workers=2)
+    else:
+        state = provenance.verify(index, cache, provenance.load_manifest(), workers=2)
+    cache.save()
+    return state
+
+
+def touch_later(path):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+
+def test_seal_then_verify_is_clean_and_cached(project):
+    sealed = run("seal")
+    assert sealed["problems"] == [] and sorted(sealed["leaves"]) == ["out/a.json", "out/b.txt", "out/c.json"]
+    manifest = provenance.load_manifest()
+    assert manifest["root"] == sealed["root"] and manifest["artifacts"] == 3
+    again = run("verify")
+    assert again["problems"] == [] and again["root"] == sealed["root"]
+    assert again["read"] == 0
+    assert run("verify", cache_path=None)["read"] == 8
+
+
+def test_verify_reports_what_changed(project):
+    run("seal")
+    (project / "out" / "a.json").write_text("a.json edited\n")
+    (project / "docs" / "contract.md").write_text("terms v2\n")
+    (project / "out" / "new.json").write_text("{}")
+    (project / "out" / "b.txt").unlink()
+    (project / "out" / "b.txt.c2pa").unlink()
+    problems = run("verify")["problems"]
+    assert problems == [
+        "Missing C2PA manifest for out/new.json",
+        "out/a.json: content changed since it was sealed",
+        "Source docs/contract.md changed since it was sealed; affects 1 artifact(s): out/c.json",
+        "out/b.txt: sealed artifact is gone",
+    ]
+
+
+def test_same_size_edit_is_seen_through_the_cache(project):
+    run("seal")
+    (project / "docs" / "rates.csv").write_text("a,2\n")
+    touch_later(project / "docs" / "rates.csv")
+    problems = run("verify")["problems"]
+    assert "out/c.json: source docs/rates.csv no longer matches its declared sha256" in problems
+
+
+def test_seal_refuses_a_broken_tree(project):
+    (project / "out" / "b.txt.c2pa").write_text('{"sources": [42]}')
+    (project / "out" / "a.json.c2pa").write_text('{"sources": ["docs/gone.md"]}')
+    state = run("seal")
+    assert state["problems"] == ["Malformed C2PA manifest out/b.txt.c2pa: malformed source entry 42",
+                                 "out/a.json: declared source docs/gone.md is missing"]
+    assert provenance.load_manifest() is None
+    assert "No provenance manifest at m4nd8_pro/provenance.json: run provenance.py seal" in run("verify")["problems"]
+
+
+def test_cli_proof_matches_sealed_root(project, capsys):
+    assert provenance.main(["seal"]) == 0
+    capsys.readouterr()
+    assert provenance.main(["proof", "out/b.txt"]) == 0
+    proof = json.loads(capsys.readouterr().out)
+    leaf = provenance.load_manifest()["leaves"]["out/b.txt"]
+    expected = provenance.leaf_hash("out/b.txt", leaf["sha256"], leaf["sidecar"], leaf["sources"])
+    assert proof["leaf"] == expected.hex()
+    assert provenance.verify_proof(expected, proof["proof"], proof["root"])
+    assert provenance.main(["proof", "out/nope.json"]) == 1
+    assert provenance.main(["verify", "--full"]) == 0
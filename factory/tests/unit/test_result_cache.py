@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+import result_cache
+from fs_index import FileIndex
+from result_cache import ResultCache, declared_inputs
+
+CHECK = {"id": "C14.no_placeholders", "detect": {"grep_absent": {"pattern": "TODO", "paths": ["src/**/*.py"]}}}
+MANIFEST = {"features": {"ui": False, "dependency_governance": True}}
+PASS = {"status": "pass", "output": "OK", "returncode": 0}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("x = 1\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def cache_for(project):
+    return ResultCache(str(project / "cache.json"), FileIndex.build("."))
+
+
+def key(project, chk=CHECK, manifest=MANIFEST):
+    return cache_for(project).key_for(chk, manifest)
+
+
+def test_key_is_stable_for_an_unchanged_tree(project):
+    assert key(project) == key(project)
+
+
+def test_input_content_changes_the_key(project):
+    before = key(project)
+    path = project / "src" / "a.py"
+    st = path.stat()
+    path.write_text("x = 2\n", encoding="utf-8")  # same size
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert key(project) != before
+
+
+def test_new_file_matching_an_input_glob_changes_the_key(project):
+    before = key(project)
+    (project / "src" / "b.py").write_text("", encoding="utf-8")
+    assert key(project) != before
+
+
+def test_unrelated_file_keeps_the_key(project):
+    before = key(project)
+    (project / "README.md").write_text("# hi\n", encoding="utf-8")
+    assert key(project) == before
+
+
+def test_definition_and_read_features_change_the_key(project):
+    before = key(project)
+    assert key(project, dict(CHECK, severity="high")) != before
+    gated = dict(CHECK, applies_if={"feature": "ui"})
+    assert key(project, gated) != key(project, gated, {"features": {"ui": True}})
+    # a feature the check never reads does not
+    assert key(project, gated) == key(project, gated, {"features": {"ui": False, "dependency_governance": False}})
+
+
+def test_capsule_policy_data_changes_the_key(project, monkeypatch):
+    # ui_gate.yaml lives in the capsule, wherever that is, not at a project path an input could name
+    gate = project / "capsule" / "policy" / "ui_gate.yaml"
+    gate.parent.mkdir(parents=True)
+    gate.write_text("accessibility:\n  min_contrast:\n    text: 4.5\n", encoding="utf-8")
+    monkeypatch.setattr(result_cache, "_ENGINE_DATA", (str(gate),))
+    before = key(project)
+    gate.write_text("accessibility:\n  min_contrast:\n    text: 7.0\n", encoding="utf-8")
+    assert key(project) != before
+
+
+def test_opaque_checks_are_not_cacheable(project):
+    assert declared_inputs({"id": "C1", "detect": {"script": "true"}}) is None
+    assert declared_inputs(dict(CHECK, cache=False)) is None
+    assert declared_inputs({"id": "C2", "detect": {"script": "true"}, "inputs": ["a"]}) == ["a"]
+    assert key(project, {"id": "C3", "type": "runtime_verification", "command": "true"}) is None
+
+
+def test_store_lookup_and_persistence(project):
+    cache = cache_for(project)
+    k = cache.key_for(CHECK, MANIFEST)
+    assert cache.lookup(CHECK["id"], k) is None
+    cache.store(CHECK["id"], k, PASS)
+    cache.save()
+    reloaded = cache_for(project)
+    assert reloaded.lookup(CHECK["id"], k) == dict(PASS, cached=True)
+    assert reloaded.lookup(CHECK["id"], "other-key") is None
+
+
+def test_a_failure_evicts_the_entry(project):
+    cache = cache_for(project)
+    k = cache.key_for(CHECK, MANIFEST)
+    cache.store(CHECK["id"], k, PASS)
+    cache.store(CHECK["id"], k, {"status": "fail", "output": "TODO found", "returncode": 1})
+    assert cache.lookup(CHECK["id"], k) is None
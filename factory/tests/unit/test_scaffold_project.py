@@ -0,0 +1,134 @@
+import json
+import os
+
+import pytest
+
+import cofo_journal
+import scaffold_project
+from scaffold_project import ScaffoldingError
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    journal = cofo_journal.Journal()
+    monkeypatch.setattr(scaffold_project, "JOURNAL", journal)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "hub.md").write_text(
+        scaffold_project.HUB_TEMPLATE.format(directory="./src"), encoding="utf-8")
+    (tmp_path / "tpl.md").write_text("from template\n", encoding="utf-8")
+    yield tmp_path
+    journal.close()
+
+
+def write_plan(path, **plan):
+    plan.setdefault("evidence", "ticket 7")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f)
+    return str(path)
+
+
+ARTIFACTS = [{"path": "src/app.py", "content": "print(1)\n", "role": "Entry", "description": "main"},
+             {"path": "src/pkg/util.py", "content": "", "role": "Lib"},
+             {"path": "docs/guide.md", "template": "tpl.md"}]
+
+
+def snapshot(root):
+    out = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        out[rel] = None
+        for name in filenames:
+            with open(os.path.join(dirpath, name), "rb") as f:
+                out[os.path.join(rel, name)] = f.read()
+    return out
+
+
+def test_plan_commits_files_census_and_notes(project):
+    plan = write_plan(project / "plan.json", artifacts=ARTIFACTS)
+    scaffold_project.execute_scaffold_plan(plan, {}, ["."])
+    assert (project / "src" / "app.py").read_text() == "print(1)\n"
+    assert (project / "docs" / "guide.md").read_text() == "from template\n"
+    hub = (project / "src" / "hub.md").read_text()
+    assert "| ./app.py|Entry|main|" in hub and "| ./pkg|Subdir||" in hub
+    assert "| ./util.py|Lib||" in (project / "src" / "pkg" / "hub.md").read_text()
+    assert "| ./docs|Subdir||" in (project / "hub.md").read_text()
+    assert "| scaffolder | `./util.py` | Created | ticket 7 |" in (project / "src" / "pkg" / "cofo.md").read_text()
+    assert [n["path"] for n in scaffold_project.JOURNAL.notes()] == ["src/app.py", "src/pkg/util.py", "docs/guide.md"]
+    assert not [p for p in os.listdir(project) if p.startswith(".scaffold-staging-")]
+
+
+def test_dry_run_writes_nothing(project):
+    plan = write_plan(project / "plan.json", artifacts=ARTIFACTS)
+    before = snapshot(project)
+    staged = scaffold_project.execute_scaffold_plan(plan, {}, ["."], dry_run=True)
+    assert "src/pkg/hub.md" in staged and "cofo.md" in staged
+    assert snapshot(project) == before
+
+
+@pytest.mark.parametrize("fail_at", [1, 4, 9, "journal"])
+def test_failed_commit_rolls_back(project, monkeypatch, fail_at):
+    (project / "src" / "app.py").write_text("old\n", encoding="utf-8")
+    plan = write_plan(project / "plan.json", artifacts=ARTIFACTS, overwrite=True)
+    before = snapshot(project)
+    calls = []
+    real_replace = os.replace
+
+    def flaky_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == fail_at:
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    def flaky_append(*notes):
+        raise OSError("journal locked")
+
+    monkeypatch.setattr(scaffold_project.os, "replace", flaky_replace)
+    if fail_at == "journal":
+        monkeypatch.setattr(scaffold_project.JOURNAL, "append", flaky_append)
+    with pytest.raises(ScaffoldingError, match="rolled back"):
+        scaffold_project.execute_scaffold_plan(plan, {}, ["."])
+    monkeypatch.setattr(scaffold_project.os, "replace", real_replace)
+    assert snapshot(project) == before
+    assert not os.path.exists(scaffold_project.JOURNAL.path)
+
+
+def test_plan_rejected_before_any_write(project):
+    (project / "src" / "app.py").write_text("old\n", encoding="utf-8")
+    (project / "manifest.yaml").write_text("features:\n  docs_scaffold: false\n", encoding="utf-8")
+    plan = write_plan(project / "plan.json", directories=["../out", "tests"],
+                      artifacts=ARTIFACTS + [{"path": "/etc/x"}])
+    before = snapshot(project)
+    config = {"optional_scaffolds": {"mapping": {"docs": "features.docs_scaffold"}}}
+    with pytest.raises(ScaffoldingError) as err:
+        scaffold_project.execute_scaffold_plan(plan, config, ["src", "docs", "../out"])
+    message = str(err.value)
+    assert "/etc/x: must be a relative path" in message
+    assert "../out: must be a relative path" in message
+    assert "tests: outside filesystem_boundary" in message
+    assert "docs/: optional scaffold needs features.docs_scaffold" in message
+    assert "src/app.py: already exists" in message
+    assert snapshot(project) == before
+
+
+@pytest.mark.parametrize("plan, problem", [
+    ({}, "plan declares no artifacts or directories"),
+    ({"artifacts": [{"role": "x"}]}, "artifacts[0]: needs a path"),
+    ({"artifacts": [{"path": "a"}, {"path": "./a"}]}, "artifacts[1]: duplicate path ./a"),
+    ({"artifacts": [{"path": "a", "template": "tpl.md", "content": ""}]}, "either template or content"),
+    ({"artifacts": [{"path": "a", "template": "nope.md"}]}, "missing template nope.md"),
+    ({"artifacts": [{"path": "src/hub.md"}]}, "maintained by the scaffolder"),
+    ({"directories": [""]}, "directories[0]: must be a path"),
+])
+def test_load_scaffold_plan_problems(project, plan, problem):
+    with pytest.raises(ScaffoldingError, match="Invalid scaffold plan") as err:
+        scaffold_project.load_scaffold_plan(write_plan(project / "plan.json", **plan))
+    assert problem in str(err.value)
+
+
+def test_add_items_rows_is_idempotent():
+    hub = scaffold_project.HUB_TEMPLATE.format(directory="./")
+    once = scaffold_project.add_items_rows(hub, [("./a.py", "Entry", "d")])
+    assert scaffold_project.add_items_rows(once, [("./a.py", "Entry", "d")]) == once
+    assert "|---|---|---|\n| ./a.py|Entry|d|" in once
+    assert "  nodes:\n    - ./a.py" in once
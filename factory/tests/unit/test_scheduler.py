@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+import scheduler
+
+
+@pytest.fixture(autouse=True)
+def no_grace(monkeypatch):
+    monkeypatch.setattr(scheduler, "TIMEOUT_GRACE_SEC", 0)
+
+
+def check(cid, **kw):
+    return dict(id=cid, **kw)
+
+
+def runner(behaviour):
+    """run_one whose result per check id comes from `behaviour` (a status or a callable)."""
+    def run_one(chk, token):
+        b = behaviour.get(chk["id"], "pass")
+        if callable(b):
+            return b(chk, token)
+        return {"status": b, "output": "", "returncode": 0 if b == "pass" else 1}
+    return run_one
+
+
+def test_results_are_emitted_in_declaration_order():
+    def slow(chk, token):
+        time.sleep(0.1)
+        return {"status": "pass", "output": "", "returncode": 0}
+    checks = [check("C1"), check("C2"), check("C3")]
+    emitted = []
+    results = scheduler.run_checks(checks, runner({"C1": slow}), jobs=3,
+                                   emit=lambda i, chk, res: emitted.append(chk["id"]))
+    assert emitted == ["C1", "C2", "C3"]
+    assert [r["status"] for r in results] == ["pass"] * 3
+
+
+def test_failed_prerequisite_blocks_dependents():
+    checks = [check("C60.deps"), check("C70.target", after=["C60"]), check("C80")]
+    results = scheduler.run_checks(checks, runner({"C60.deps": "fail"}), jobs=2)
+    assert [r["status"] for r in results] == ["fail", "blocked", "pass"]
+
+
+def test_critical_failure_cancels_unstarted_checks():
+    checks = [check("C1", severity="critical"), check("C2"), check("C3")]
+    results = scheduler.run_checks(checks, runner({"C1": "fail"}), jobs=1)
+    assert [r["status"] for r in results] == ["fail", "cancelled", "cancelled"]
+
+
+def test_dependency_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        scheduler.resolve_dependencies([check("C1", after="C2"), check("C2", after="C1")])
+
+
+def test_hung_check_does_not_time_out_the_next_one():
+    release = threading.Event()
+
+    def hang(chk, token):
+        release.wait(10)
+        return {"status": "pass", "output": "", "returncode": 0}
+
+    def slowish(chk, token):
+        time.sleep(0.4)  # longer than C1's budget: a clock started at submit would expire
+        return {"status": "pass", "output": "", "returncode": 0}
+
+    checks = [check("C1", timeout_sec=0.2), check("C2", timeout_sec=1), check("C3", timeout_sec=1)]
+    try:
+        results = scheduler.run_checks(checks, runner({"C1": hang, "C2": slowish}), jobs=1)
+    finally:
+        release.set()
+    assert results[0]["returncode"] == 124
+    assert [r["status"] for r in results[1:]] == ["pass", "pass"]
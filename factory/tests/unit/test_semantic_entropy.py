@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+import semantic_entropy
+from semantic_entropy import score_batch
+
+A = {"prompt_id": "a", "samples": ["Paris", "Lyon"], "logprobs": [0.0, -5.0]}
+B = {"prompt_id": "b", "samples": ["yes", "no"]}
+C = {"prompt_id": "c", "samples": ["x", "y", "z"], "logprobs": [-1.0]}   # wrong length: unweighted
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(semantic_entropy, "np", None)
+    return request.param
+
+
+def entropy(weights):
+    total = sum(weights)
+    return -sum(w / total * math.log(w / total) for w in weights)
+
+
+def test_weighting_is_per_prompt(backend):
+    alone = score_batch([A])[0]["entropy"]
+    assert alone == pytest.approx(entropy([1.0, math.exp(-5)]))
+    mixed = score_batch([A, B, C, {"prompt_id": "e", "samples": []}])
+    assert [s["entropy"] for s in mixed] == pytest.approx([alone, math.log(2), math.log(3), 0.0])
+    assert score_batch([B, A])[1]["entropy"] == pytest.approx(alone)
+
+
+@pytest.mark.parametrize("samples, logprobs, expected", [
+    (["Paris", "paris.", "The Paris"], None, 0.0),
+    (["1,000", "1000.0", "one thousand"], None, entropy([2, 1])),
+    (["a", "b"], [-1.0, -1.0], math.log(2)),
+    (["a", "b", "a"], [-0.1, -3.0, -0.2], entropy([math.exp(-0.1) + math.exp(-0.2), math.exp(-3.0)])),
+    (["a"] * 10, None, 0.0),
+    ([str(i) for i in range(10)], None, math.log(10)),
+])
+def test_semantic_entropy(backend, samples, logprobs, expected):
+    assert semantic_entropy.semantic_entropy(samples, logprobs) == pytest.approx(expected)
+
+
+def test_numpy_and_python_agree(monkeypatch):
+    records = [{"prompt_id": i, "samples": [str(j % (i % 4 + 1)) for j in range(i % 7)],
+                **({"logprobs": [-(j % 3) * 0.7 for j in range(i % 7)]} if i % 2 else {})}
+               for i in range(60)]
+    vectorized = score_batch(records)
+    monkeypatch.setattr(semantic_entropy, "np", None)
+    plain = score_batch(records)
+    assert [s["clusters"] for s in plain] == [s["clusters"] for s in vectorized]
+    assert [s["entropy"] for s in plain] == pytest.approx([s["entropy"] for s in vectorized])
+
+
+def test_chunking_does_not_change_scores():
+    records = [A, B, C] * 5
+    whole = [s["entropy"] for s in semantic_entropy.score(records)]
+    assert [s["entropy"] for s in semantic_entropy.score(records, chunk=2)] == pytest.approx(whole)
+
+
+def test_cluster_equivalences():
+    assert semantic_entropy.cluster(["The cat sat", "sat the cat", "a dog"], semantic_entropy.bag_key) == [0, 0, 1]
+    same_length = semantic_entropy.pairwise(lambda a, b: len(a) == len(b))
+    assert semantic_entropy.cluster(["ab", "cd", "efg", "hi"], same_length) == [0, 0, 1, 0]
+    with pytest.raises(ValueError, match="unknown equivalence"):
+        semantic_entropy.resolve_equivalence("nope")
+    assert semantic_entropy.resolve_equivalence("semantic_entropy:bag_key") is semantic_entropy.bag_key
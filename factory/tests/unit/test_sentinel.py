@@ -0,0 +1,186 @@
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+from cofo_journal import Journal, note
+from detectors import run_check
+from fs_index import BIN_ENV, INDEX_ENV, FileIndex
+from log_store import LOG_DB_ENV, LogStore, load_contract
+
+FACTORY = Path(__file__).resolve().parents[2]
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@example.com",
+               GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@example.com")
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True)
+
+
+def write(root: Path, files):
+    for rel, text in files.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(text)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    write(tmp_path, {".gitignore": "*.tmp\n", "a.txt": "a\n", "b.txt": "b\n", "top.txt": "t\n",
+                     "proj/src/a.py": "x = 1\n", "proj/keep.py": "\n"})
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "init")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+# --- changed_files (--since) ---------------------------------------------------------
+
+def test_changed_files_covers_every_kind_of_change(sentinel, repo):
+    write(repo, {"a.txt": "a2\n", "c.txt": "c\n", "d.txt": "d\n", "x.tmp": "",
+                 "_logs/worker/1.log": "PLAN_OK\n"})
+    (repo / "b.txt").unlink()
+    git(repo, "add", "c.txt")
+    # modified, deleted, staged, untracked; ignored files and sentinel's _logs/ are not changes
+    assert sentinel.changed_files("HEAD") == ["a.txt", "b.txt", "c.txt", "d.txt"]
+
+
+def test_changed_files_since_an_older_commit(sentinel, repo):
+    write(repo, {"a.txt": "a2\n", "c.txt": "c\n"})
+    git(repo, "rm", "-q", "b.txt")
+    git(repo, "add", ".")
+    git(repo, "commit", "-qm", "second")
+    assert sentinel.changed_files("HEAD") == []
+    assert sentinel.changed_files("HEAD~1") == ["a.txt", "b.txt", "c.txt"]
+
+
+def test_changed_files_bad_ref_halts(sentinel, repo):
+    with pytest.raises(SystemExit) as exc:
+        sentinel.changed_files("no-such-ref")
+    assert str(exc.value).startswith("HALT: cannot compute changes since no-such-ref")
+
+
+def test_changed_files_from_a_subdirectory(sentinel, repo, monkeypatch):
+    write(repo, {"top.txt": "t2\n", "proj/src/a.py": "x = 2\n", "proj/new.py": "\n"})
+    monkeypatch.chdir(repo / "proj")
+    # relative to the project root, and nothing outside it
+    assert sentinel.changed_files("HEAD") == ["new.py", "src/a.py"]
+
+
+# --- C55 without --since ---------------------------------------------------------------
+
+@pytest.fixture
+def c55():
+    with open(FACTORY / "source_policies" / "policy" / "compliance.yaml", encoding="utf-8") as f:
+        checks = yaml.safe_load(f)["checks"]
+    return next(c for c in checks if str(c.get("id", "")).startswith("C55."))
+
+
+def test_c55_uses_project_relative_paths(c55, repo, monkeypatch):
+    write(repo, {"proj/src/a.py": "x = 2\n", "top.txt": "t2\n"})
+    git(repo, "commit", "-qam", "change")
+    proj = repo / "proj"
+    monkeypatch.chdir(proj)
+    monkeypatch.setenv(BIN_ENV, str(FACTORY / "runtime" / "bin"))
+    monkeypatch.setenv(LOG_DB_ENV, str(proj / "_logs" / "events.db"))
+    monkeypatch.setenv(INDEX_ENV, str(proj / FileIndex.build(".").save("_logs/fs_index.json")))
+    monkeypatch.delenv("M4ND8_CHANGED_FILES", raising=False)
+    write(proj, {"_logs/worker/1.log": "COFO_NOTE_OK: src/a.py\n"})
+    store = LogStore(str(proj / "_logs" / "events.db"), load_contract(str(FACTORY / "kernel" / "director.yaml")))
+    store.sync([str(proj / "_logs" / "worker" / "1.log")])
+    store.close()
+
+    res = run_check(c55, {})
+    assert res["status"] == "fail" and "Missing Change Note entry for src/a.py" in res["output"]
+    Journal().append(note("src/a.py", "Bump x", trace="_logs/trace/run-1.log"))
+    res = run_check(c55, {})
+    assert res["status"] == "pass", res["output"]
+
+
+# --- affected_checks (--watch) ---------------------------------------------------------
+
+CHECKS = [
+    {"id": "C10.spec", "detect": {"file_contains": {"file": "m4nd8_pro/spec.md", "substrings": ["RED"]}}},
+    {"id": "C11.after_spec", "after": ["C10"], "detect": {"files_exist": ["m4nd8_pro/blueprint.md"]}},
+    {"id": "C12.after_after", "after": "C11.after_spec", "detect": {"grep_absent": {"pattern": "x", "paths": ["src/"]}}},
+    {"id": "C13.script", "detect": {"script": "true"}},
+    {"id": "C14.declared", "inputs": ["docs/**/*.md"], "detect": {"script": "true"}},
+    {"id": "C15.manual", "detect": {"manual": True}},
+    {"id": "C16", "type": "runtime_verification", "command": "true"},
+    {"id": "C17.condition", "detect": {"condition": 'exists("policies/input_rails.colang")'}},
+    {"id": "C18.events", "detect": {"log_event_present": {"kind": "plan_ok"}}},
+    {"id": "C19.uncached", "cache": False, "inputs": ["docs/"], "detect": {"files_exist": ["docs/a.md"]}},
+]
+ALWAYS = [3, 6, 9]  # unknown inputs: a script without inputs:, runtime verification, cache: false
+
+
+@pytest.mark.parametrize("changed, hit", [
+    (["m4nd8_pro/spec.md"], [0, 1, 2]),          # C11 and C12 follow through after:
+    (["m4nd8_pro/blueprint.md"], [1, 2]),
+    (["src/app.py"], [2]),
+    (["docs/guide/a.md"], [4]),
+    (["docs/a.txt"], []),
+    (["policies/input_rails.colang"], [7]),
+    (["_logs/worker/builder.log"], [8]),
+    (["README.md"], []),
+])
+def test_affected_checks(sentinel, changed, hit):
+    assert sentinel.affected_checks(CHECKS, changed) == sorted(hit + ALWAYS)
+
+
+def test_affected_checks_never_reruns_manual_checks(sentinel):
+    manual = [{"id": "C1", "detect": {"manual": True}}, {"id": "C2", "after": ["C1"], "detect": {"script": "x"}}]
+    assert sentinel.affected_checks(manual, ["anything"]) == [1]
+
+
+def test_affected_checks_propagates_through_after_in_any_order(sentinel):
+    checks = [{"id": "C1", "after": ["C2"], "detect": {"files_exist": ["a"]}},
+              {"id": "C2", "detect": {"files_exist": ["b"]}},
+              {"id": "C3", "detect": {"files_exist": ["c"]}, "after": ["C1"]}]
+    assert sentinel.affected_checks(checks, ["b"]) == [0, 1, 2]
+    assert sentinel.affected_checks(checks, ["a"]) == [0, 2]
+    assert sentinel.affected_checks(checks, ["c"]) == [2]
+
+
+def test_watch_rechecks_only_what_an_edit_affects(tmp_path, capsule):
+    sys.path.insert(0, str(FACTORY / "bench"))
+    try:
+        import synth_repo
+    finally:
+        sys.path.remove(str(FACTORY / "bench"))
+    root = tmp_path / "project"
+    synth_repo.generate(str(root), files=6, hubs=1, log_lines=10, lock_packages=3, logits_tokens=20,
+                        capsule=str(capsule))
+    proc = subprocess.Popen([sys.executable, "-u", os.path.join(".m4nd8", "bin", "sentinel.py"), "--watch",
+                             "--no-cache", "--interval", "0.05"],
+                            cwd=root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    lines: "queue.Queue[str]" = queue.Queue()
+    threading.Thread(target=lambda: [lines.put(line) for line in proc.stdout], daemon=True).start()
+
+    def until_verdict():
+        seen = []
+        while True:
+            seen.append(lines.get(timeout=300))
+            if seen[-1].startswith("Verdict:"):
+                return seen
+
+    try:
+        first = until_verdict()
+        total = int(re.search(r"Watching \d+ files \((\d+) checks\)", first[0]).group(1))
+        assert first[-1].startswith(f"Verdict: PASS [{total} re-checked"), "".join(first)
+        with open(root / "README.md", "a", encoding="utf-8") as f:
+            f.write("\nMore usage notes.\n")
+        second = until_verdict()
+        assert "--- changed: README.md\n" in second, "".join(second)
+        rechecked = int(re.search(r"\[(\d+) re-checked", second[-1]).group(1))
+        assert second[-1].startswith("Verdict: PASS") and 0 < rechecked < total
+    finally:
+        proc.send_signal(signal.SIGINT)
+        assert proc.wait(timeout=60) == 0
@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+CONFTEST = Path(__file__).resolve().parents[1] / "conftest.py"
+
+
+@pytest.fixture(scope="module")
+def tiers():
+    spec = importlib.util.spec_from_file_location("tiers_conftest", CONFTEST)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 20])
+def test_partition_covers_every_test_once(tiers, count):
+    nodeids = [f"t::{i}" for i in range(12)]
+    durations = {f"t::{i}": float(i % 5) + 0.5 for i in range(0, 12, 2)}
+    shards = tiers.partition(nodeids, durations, count)
+    assert len(shards) == count
+    assert sorted(n for shard in shards for n in shard) == sorted(nodeids)
+    assert shards == tiers.partition(nodeids, dict(reversed(list(durations.items()))), count)
+
+
+def test_partition_balances_recorded_time(tiers):
+    durations = {"a": 8.0, "b": 7.0, "c": 6.0, "d": 5.0, "e": 4.0, "f": 3.0, "g": 2.0, "h": 1.0}
+    shards = tiers.partition(list(durations), durations, 2)
+    loads = [sum(durations[n] for n in shard) for shard in shards]
+    assert sorted(loads) == [18.0, 18.0]
+    assert shards[0][0] == "a" and shards[1][0] == "b"
+
+
+def test_partition_prices_unknown_tests_at_the_median(tiers):
+    shards = tiers.partition(["slow", "x", "y", "z"], {"slow": 3.0, "x": 1.0, "y": 2.0}, 2)
+    assert shards == [["slow", "x"], ["y", "z"]]
+    assert tiers.partition(["a", "b", "c"], {}, 2) == [["a", "c"], ["b"]]
+
+
+def test_worker_args_and_summary(tiers):
+    class Config:
+        class invocation_params:
+            args = ("-q", "--shards", "4", "tests/", "--shards=auto", "-k", "x")
+    assert tiers._worker_args(Config) == ["-q", "tests/", "-k", "x"]
+    out = "....\n3 passed, 1 failed, 2 deselected in 0.12s\n"
+    assert tiers._summary_counts(out) == {"passed": 3, "failed": 1, "deselected": 2}
+    assert tiers._summary_counts("no summary") == {}
+
+
+SAMPLE = '''
+import os
+import pytest
+
+def record(name):
+    with open("ran.log", "a") as f:
+        f.write(name + "\\n")
+
+@pytest.mark.parametrize("i", range(6))
+def test_any_tier(i):
+    record(f"any{i}")
+
+@pytest.mark.professional
+def test_professional():
+    record("professional")
+
+@pytest.mark.tier("enterprise")
+def test_enterprise():
+    record("enterprise")
+'''
+
+
+@pytest.mark.parametrize("shards", ["1", "3"])
+def test_shards_run_eligible_tests_once(tmp_path, shards):
+    shutil.copy(CONFTEST, tmp_path / "conftest.py")
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    (tmp_path / "manifest.yaml").write_text("runtime_tier: professional\n")
+    (tmp_path / "test_sample.py").write_text(SAMPLE)
+    proc = subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "--shards", shards],
+                          cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    ran = (tmp_path / "ran.log").read_text().split()
+    assert sorted(ran) == sorted([f"any{i}" for i in range(6)] + ["professional"])
+    assert "DORMANT PROTOCOL: 1 test(s) deselected" in proc.stdout
+    if shards == "3":
+        assert "3 shards: 1 deselected, 7 passed" in proc.stdout
+    durations = json.loads((tmp_path / "_logs" / "test_durations.json").read_text())
+    assert len(durations) == 7
+    assert not list((tmp_path / "_logs").glob("*.shard*"))
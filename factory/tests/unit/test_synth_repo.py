@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+FACTORY = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(FACTORY / "bench"))
+import synth_repo  # noqa: E402
+
+TINY = {"files": 12, "hubs": 2, "log_lines": 40, "lock_packages": 5, "logits_tokens": 50}
+
+
+def gate(root):
+    return subprocess.run([sys.executable, os.path.join(".m4nd8", "bin", "sentinel.py"), "--no-cache"],
+                          cwd=root, capture_output=True, text=True, timeout=600)
+
+
+@pytest.mark.parametrize("features", [synth_repo.DEFAULT_FEATURES, synth_repo.FEATURES, ()],
+                         ids=["default", "all", "none"])
+def test_generated_tree_passes_the_gate(tmp_path, capsule, features):
+    # The generator hand-writes what each check wants; this keeps it in step with compliance.yaml
+    root = tmp_path / "project"
+    synth_repo.generate(str(root), **TINY, features=features, capsule=str(capsule))
+    proc = gate(root)
+    assert proc.returncode == 0 and "HALT:" not in proc.stdout, proc.stdout + proc.stderr
+
+
+def test_generated_tree_is_checked_by_the_gate(tmp_path, capsule):
+    # ...and the gate really judges it: break one file and it fails
+    root = tmp_path / "project"
+    synth_repo.generate(str(root), **TINY, capsule=str(capsule))
+    (root / "m4nd8_pro" / "spec.md").write_text("A spec without its mandates.\n", encoding="utf-8")
+    proc = gate(root)
+    assert proc.returncode != 0 and "HALT: C" in proc.stdout
+
+
+def test_same_seed_same_tree(tmp_path, capsule):
+    trees = []
+    for name in ("a", "b"):
+        synth_repo.generate(str(tmp_path / name), **TINY, seed=7, capsule=str(capsule))
+        trees.append({str(p.relative_to(tmp_path / name)): p.read_bytes()
+                      for p in sorted((tmp_path / name).rglob("*")) if p.is_file() and ".m4nd8" not in p.parts})
+    assert trees[0] == trees[1]
+
+
+def test_refuses_an_existing_root(tmp_path, capsule):
+    with pytest.raises(FileExistsError):
+        synth_repo.generate(str(tmp_path), **TINY, capsule=str(capsule))
+    with pytest.raises(FileNotFoundError, match="no capsule"):
+        synth_repo.generate(str(tmp_path / "p"), **TINY, capsule=str(tmp_path / "nowhere"))
@@ -0,0 +1,63 @@
+import json
+import sqlite3
+
+import pytest
+
+import verify_dependencies
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = tmp_path / "adb.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE approved_versions (ecosystem TEXT, package TEXT, version TEXT, "
+                 "PRIMARY KEY (ecosystem, package, version))")
+    conn.executemany("INSERT INTO approved_versions VALUES (?, ?, ?)", [
+        ("pypi", "requests", "2.31.0"),
+        ("pypi", "flask", ">=3.0,<4"),
+        ("npm", "lodash", "4.17.21"),
+        ("npm", "left-pad", "1.3.0"),
+    ])
+    conn.commit()
+    conn.close()
+    return tmp_path
+
+
+@pytest.fixture
+def report(project, capsys):
+    def run(*files):
+        code = verify_dependencies.main([*files, "--db", str(project / "adb.db"), "--json"])
+        unapproved = json.loads(capsys.readouterr().out)["unapproved"]
+        return code, {u["package"]: u["reason"] for u in unapproved}
+    return run
+
+
+def test_pinned_requirements(project, report):
+    (project / "requirements.txt").write_text("requests==2.31.0\nFlask==3.0.2\nrich==13.0\n", encoding="utf-8")
+    code, bad = report("requirements.txt")
+    assert code == 1
+    assert bad == {"rich": "not in the Approved Dependency Base"}
+
+
+def test_unpinned_requirements_are_reported(project, report):
+    (project / "requirements.txt").write_text("requests\nflask<2\n", encoding="utf-8")
+    code, bad = report("requirements.txt")
+    assert code == 1
+    assert bad["requests"].startswith("unpinned")
+    assert bad["flask"] == "range '<2' matches no approved version"
+
+
+def test_package_json_ranges(project, report):
+    (project / "package.json").write_text(json.dumps({
+        "dependencies": {"lodash": "^4.17.21", "left-pad": "*"},
+        "devDependencies": {"left-pad": "latest"},
+    }), encoding="utf-8")
+    code, bad = report("package.json")
+    assert code == 1
+    assert list(bad) == ["left-pad"] and bad["left-pad"].startswith("unpinned")
+
+
+def test_all_approved(project, report):
+    (project / "requirements.txt").write_text("requests==2.31.0\nFlask==3.0.2\n", encoding="utf-8")
+    assert report("requirements.txt") == (0, {})
@@ -0,0 +1,101 @@
+import pytest
+
+from version_ranges import approves, pep440_matches, semver_satisfies
+
+
+@pytest.mark.parametrize("spec, version, expected", [
+    # compatible release
+    ("~=2.2", "2.3", True),
+    ("~=2.2", "3.0", False),
+    ("~=1.4.5", "1.4.9", True),
+    ("~=1.4.5", "1.5.0", False),
+    ("~=1", "1.0", False),  # needs at least two release segments
+    # prefix matching
+    ("==1.2.*", "1.2.9", True),
+    ("==1.2.*", "1.3", False),
+    ("!=1.2.*", "1.3.0", True),
+    ("==1.*", "1", True),
+    ("==1.0", "1.0.0", True),
+    ("==1.0", "1!1.0", False),
+    ("==1.0", "1.0+local.7", True),
+    # pre, post and dev releases
+    ("<2.0", "2.0rc1", False),
+    ("<2.0", "2.0.dev1", False),
+    ("<2.0rc2", "2.0rc1", True),
+    (">=2.0b1", "2.0rc1", True),
+    (">1.0", "1.0.post1", False),
+    (">1.0.post1", "1.0.post2", True),
+    (">=1.0,<2", "1.9.post3", True),
+    (">=1.0,!=1.5", "1.5.0", False),
+    # arbitrary equality
+    ("===1.0", "1.0", True),
+    ("===1.0", "1.0.0", False),
+    ("=>1.0", "1.0", False),
+])
+def test_pep440(spec, version, expected):
+    assert pep440_matches(version, spec) is expected
+
+
+@pytest.mark.parametrize("range_text, version, expected", [
+    # caret, including the 0.x and 0.0.x cases
+    ("^1.2.3", "1.9.9", True),
+    ("^1.2.3", "2.0.0", False),
+    ("^0.2.3", "0.2.9", True),
+    ("^0.2.3", "0.3.0", False),
+    ("^0.0.3", "0.0.3", True),
+    ("^0.0.3", "0.0.4", False),
+    ("^0.0", "0.0.9", True),
+    ("^0.0", "0.1.0", False),
+    ("^0.x", "0.9.0", True),
+    # tilde
+    ("~1.2.3", "1.2.9", True),
+    ("~1.2.3", "1.3.0", False),
+    ("~1", "1.9.0", True),
+    # hyphen ranges with full and partial ends
+    ("1.2.3 - 2.3.4", "2.3.4", True),
+    ("1.2.3 - 2.3.4", "2.3.5", False),
+    ("1.2 - 2.3", "2.3.9", True),
+    ("1.2 - 2.3", "2.4.0", False),
+    ("1.2.3 - 2", "2.9.9", True),
+    ("1.2.3 - 2", "1.2.2", False),
+    # x-ranges, comparators, unions
+    ("1.2.x", "1.2.7", True),
+    ("*", "1.0.0", True),
+    ("1.x || >=3", "3.1.0", True),
+    ("1.x || >=3", "2.0.0", False),
+    ("<1.2", "1.1.9", True),
+    (">1.2", "1.3.0", True),
+    (">1.2", "1.2.9", False),
+    ("<=1.2", "1.2.9", True),
+    (">= 1.2.0 < 2", "1.5.0", True),
+    # pre-releases only match a comparator on the same triple
+    ("^1.2.3-beta.2", "1.2.3-beta.4", True),
+    ("^1.2.3-beta.2", "1.2.4-beta.1", False),
+    (">1.2.3-alpha.3", "3.4.5-alpha.9", False),
+    ("^1.2.0", "1.3.0-rc.1", False),
+    # nothing to match on
+    ("", "1.0.0", False),
+    ("1.x || ", "1.0.0", False),
+    ("v", "1.0.0", False),
+    ("not a range", "1.0.0", False),
+])
+def test_npm_semver(range_text, version, expected):
+    assert semver_satisfies(version, range_text) is expected
+
+
+@pytest.mark.parametrize("ecosystem, entry, version, expected", [
+    ("pypi", "2.31", "2.31.0", True),
+    ("python", ">=2,<3", "2.31.0", True),
+    ("pypi", "", "1.0", False),
+    ("pypi", "latest", "latest", False),
+    ("npm", "5.2.2", "5.2.2", True),
+    ("npm", "5.2.2", "5.2.3", False),
+    ("node", "^4.17.0", "4.17.21", True),
+    ("npm", "", "1.2.3", False),
+    ("npm", "  ", "1.2.3", False),
+    ("npm", "^1.0.0", "", False),
+    ("cargo", "1.0", "1.0", True),
+    ("cargo", "1.0", "1.0.0", False),
+])
+def test_adb_entries(ecosystem, entry, version, expected):
+    assert approves(ecosystem, entry, version) is expected
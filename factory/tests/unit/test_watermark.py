@@ -0,0 +1,149 @@
+import random
+from pathlib import Path
+
+import pytest
+import yaml
+
+import watermark
+from detectors import run_check
+from fs_index import BIN_ENV, INDEX_ENV, FileIndex
+from policy_compiler import POLICY_ENV, load_or_compile
+from watermark import Detector
+
+FACTORY = Path(__file__).resolve().parents[2]
+
+KEY = "test-key"
+VOCAB = [f"w{i}" for i in range(200)] + [",", ".", "!"]
+
+
+def generate(count, seed, green=True):
+    """Text whose tokens are (green=True) always, or (False) never, on the key's green list."""
+    rng = random.Random(seed)
+    key = watermark.key_id(KEY)
+    words, prev = ["start"], watermark.token_id("start")
+    for _ in range(count):
+        for word in rng.sample(VOCAB, len(VOCAB)):
+            if watermark.is_green(key, prev, watermark.token_id(word)) == green:
+                break
+        words.append(word)
+        prev = watermark.token_id(word)
+    return " ".join(words)
+
+
+def human(count, seed):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCAB) for _ in range(count))
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(watermark, "np", None)
+    return request.param
+
+
+TEXTS = {
+    "watermarked": generate(300, 1),
+    "human": human(300, 2),
+    "pasted": human(400, 3) + "\n" + generate(120, 4) + "\n\n" + human(400, 5),
+    "short": "only a few words",
+    "empty": "",
+}
+
+
+@pytest.mark.parametrize("name", sorted(TEXTS))
+@pytest.mark.parametrize("chunk", [1, 5, 64, 4096])
+def test_streaming_matches_whole_text(tmp_path, backend, name, chunk):
+    path = tmp_path / f"{name}.txt"
+    path.write_text(TEXTS[name], encoding="utf-8")
+    detector = Detector(KEY, window=50)
+    streamed = detector.score_file(str(path), chunk=chunk)
+    assert streamed == dict(detector.score_text(TEXTS[name]), path=str(path))
+
+
+def test_numpy_and_python_agree(monkeypatch):
+    detector = Detector(KEY, window=50)
+    vectorized = [detector.score_text(t) for t in TEXTS.values()]
+    monkeypatch.setattr(watermark, "np", None)
+    assert [detector.score_text(t) for t in TEXTS.values()] == vectorized
+    key = watermark.key_id(KEY)
+    ids = watermark.ids_of(watermark.regex_tokens(TEXTS["human"]))
+    monkeypatch.undo()
+    mask = watermark.green_mask(key, ids[:-1], ids[1:])
+    assert mask.tolist() == [watermark.is_green(key, p, c) for p, c in zip(ids, ids[1:])]
+
+
+def test_verdicts():
+    detector = Detector(KEY, window=50)
+    marked = detector.score_text(TEXTS["watermarked"])
+    assert marked["watermarked"] is True and marked["green"] == marked["tokens"] == 300
+    assert detector.score_text(TEXTS["human"])["watermarked"] is False
+    pasted = detector.score_text(TEXTS["pasted"])
+    assert pasted["z"] < pasted["window_z"] and pasted["watermarked"] is True
+    assert detector.score_text(TEXTS["short"])["watermarked"] is None
+    assert Detector("other-key", window=50).score_text(TEXTS["watermarked"])["watermarked"] is False
+
+
+def test_z_score():
+    assert watermark.z_score(25, 100) == 0.0
+    assert watermark.z_score(100, 100) == pytest.approx(75 / (100 * 0.25 * 0.75) ** 0.5)
+    assert watermark.z_score(0, 0) == 0.0
+    with pytest.raises(ValueError):
+        Detector(KEY, gamma=1.0)
+
+
+def test_corrected_threshold():
+    assert watermark.corrected_threshold(4.0, 1) == 4.0
+    assert watermark.corrected_threshold(4.0, 0) == 4.0
+    two = watermark.corrected_threshold(2.0, 2)   # half the one-sided p of z=2 (0.02275)
+    assert 2.0 < two < 2.5 and watermark.NormalDist().cdf(-two) == pytest.approx(0.02275 / 2, rel=1e-3)
+    assert watermark.corrected_threshold(4.0, 10_000) > watermark.corrected_threshold(4.0, 100) > 4.0
+    assert watermark.corrected_threshold(60.0, 10) == 60.0   # p underflows: already beyond reach
+
+
+def test_long_unwatermarked_texts_are_not_flagged():
+    # At z >= 2.5 a single window is a 0.6% false positive; the best of ~4000 windows almost always gets there
+    detector = Detector(KEY, window=50, z_threshold=2.5)
+    results = [detector.score_text(human(4000, seed)) for seed in range(10)]
+    assert sum(r["window_z"] >= 2.5 for r in results) >= 8
+    assert all(r["window_threshold"] > 4.0 for r in results)
+    assert [r["watermarked"] for r in results] == [False] * 10
+    pasted = detector.score_text(human(6000, 21) + " " + generate(80, 12) + " " + human(6000, 23))
+    # the document as a whole looks human; the window still finds the real passage
+    assert pasted["z"] < 2.5 and pasted["window_z"] >= pasted["window_threshold"] and pasted["watermarked"] is True
+
+
+def test_cli(tmp_path, monkeypatch, capsys):
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "a.txt").write_text(TEXTS["watermarked"])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(watermark.KEY_ENV, raising=False)
+    assert watermark.main(["scan", "out/*.txt"]) == 1
+    monkeypatch.setenv(watermark.KEY_ENV, KEY)
+    assert watermark.main(["scan", "out/*.txt", "--window", "50"]) == 0
+    assert "out/a.txt: watermarked" in capsys.readouterr().out
+    (tmp_path / "out" / "b.txt").write_text(TEXTS["human"])
+    assert watermark.main(["scan", "out/**/*.txt", "--window", "50"]) == 1
+
+
+@pytest.mark.parametrize("features, want", [
+    ({"text_watermarking": True}, "fail"),
+    ({"text_watermarking": False, "cryptographic_provenance": True}, "pass"),
+    ({"cryptographic_provenance": True}, "pass"),
+])
+def test_c181_follows_the_text_watermarking_feature(tmp_path, monkeypatch, features, want):
+    compliance = FACTORY / "source_policies" / "policy" / "compliance.yaml"
+    with open(compliance, encoding="utf-8") as f:
+        c181 = next(c for c in yaml.safe_load(f)["checks"] if str(c.get("id", "")).startswith("C181."))
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "a.txt").write_text(TEXTS["human"])
+    (tmp_path / "manifest.yaml").write_text(yaml.safe_dump({"features": features, "watermark": {
+        "outputs": ["out/*.txt"], "window": 50}}))
+    monkeypatch.chdir(tmp_path)
+    load_or_compile(str(compliance), str(FACTORY / "kernel" / "director.yaml"), "_logs/policy.compiled.json")
+    monkeypatch.setenv(POLICY_ENV, str(tmp_path / "_logs" / "policy.compiled.json"))
+    monkeypatch.setenv(BIN_ENV, str(FACTORY / "runtime" / "bin"))
+    monkeypatch.setenv(INDEX_ENV, str(tmp_path / FileIndex.build(".").save("_logs/fs_index.json")))
+    monkeypatch.setenv(watermark.KEY_ENV, KEY)
+    res = run_check(c181, {})
+    assert res["status"] == want, res["output"]